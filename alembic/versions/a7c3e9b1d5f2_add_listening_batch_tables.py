@@ -0,0 +1,106 @@
+"""add listening batch tables
+
+Revision ID: a7c3e9b1d5f2
+Revises: e5a1c7d9f3b4
+Create Date: 2026-10-17 20:00:00.000000
+
+新增一对一倾听全班批量生成的持久化任务：
+  - listening_batch_job：批量任务（整批共用字段、状态、累计耗时）
+  - listening_batch_item：任务中的幼儿（状态、已完成领域结果、失败原因、写入的记录 ID）
+  - listening_batch_image：幼儿各领域照片（→ image_blob.sha256）
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a7c3e9b1d5f2"
+down_revision: Union[str, Sequence[str], None] = "e5a1c7d9f3b4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_table(table_name: str) -> bool:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    return table_name in inspector.get_table_names()
+
+
+def _id_type():
+    return sa.BigInteger().with_variant(sa.Integer(), "sqlite")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if not _has_table("listening_batch_job"):
+        op.create_table(
+            "listening_batch_job",
+            sa.Column("id", _id_type(), autoincrement=True, nullable=False),
+            sa.Column("tenant_id", sa.BigInteger(), nullable=False),
+            sa.Column("user_id", sa.BigInteger(), nullable=False),
+            sa.Column("obs_year", sa.Integer(), nullable=False),
+            sa.Column("obs_month", sa.Integer(), nullable=False),
+            sa.Column("grade", sa.String(length=16), nullable=True),
+            sa.Column("term", sa.String(length=16), nullable=True),
+            sa.Column("class_name", sa.String(length=32), nullable=True),
+            sa.Column("observer", sa.String(length=64), nullable=True),
+            sa.Column("status", sa.String(length=16), nullable=False),
+            sa.Column("elapsed_ms", sa.BigInteger(), nullable=False),
+            sa.Column("run_started_at", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_listening_batch_job_tenant_user", "listening_batch_job", ["tenant_id", "user_id"])
+        op.create_index("ix_listening_batch_job_status", "listening_batch_job", ["status"])
+
+    if not _has_table("listening_batch_item"):
+        op.create_table(
+            "listening_batch_item",
+            sa.Column("id", _id_type(), autoincrement=True, nullable=False),
+            sa.Column("job_id", sa.BigInteger(), nullable=False),
+            sa.Column("tenant_id", sa.BigInteger(), nullable=False),
+            sa.Column("user_id", sa.BigInteger(), nullable=False),
+            sa.Column("child_name", sa.String(length=64), nullable=False),
+            sa.Column("adult_count", sa.Integer(), nullable=True),
+            sa.Column("child_age", sa.String(length=16), nullable=True),
+            sa.Column("status", sa.String(length=16), nullable=False),
+            sa.Column("results_json", sa.Text(), nullable=True),
+            sa.Column("error", sa.Text(), nullable=True),
+            sa.Column("attempts", sa.Integer(), nullable=False),
+            sa.Column("record_id", sa.BigInteger(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_listening_batch_item_job", "listening_batch_item", ["job_id"])
+
+    if not _has_table("listening_batch_image"):
+        op.create_table(
+            "listening_batch_image",
+            sa.Column("id", _id_type(), autoincrement=True, nullable=False),
+            sa.Column("item_id", sa.BigInteger(), nullable=False),
+            sa.Column("tenant_id", sa.BigInteger(), nullable=False),
+            sa.Column("user_id", sa.BigInteger(), nullable=False),
+            sa.Column("domain", sa.String(length=8), nullable=False),
+            sa.Column("image_index", sa.Integer(), nullable=False),
+            sa.Column("content_hash", sa.String(length=64), nullable=False),
+            sa.Column("storage_backend", sa.String(length=16), nullable=False),
+            sa.Column("object_key", sa.Text(), nullable=True),
+            sa.Column("mime_type", sa.String(length=32), nullable=False),
+            sa.Column("file_size", sa.Integer(), nullable=True),
+            sa.Column("width", sa.Integer(), nullable=True),
+            sa.Column("height", sa.Integer(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_listening_batch_image_item", "listening_batch_image", ["item_id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in ("listening_batch_image", "listening_batch_item", "listening_batch_job"):
+        if _has_table(table):
+            op.drop_table(table)
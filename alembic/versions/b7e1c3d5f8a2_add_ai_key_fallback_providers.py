@@ -0,0 +1,42 @@
+"""add ai_api_key fallback providers
+
+Revision ID: b7e1c3d5f8a2
+Revises: a6c4d8e2f9b1
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b7e1c3d5f8a2"
+down_revision: Union[str, Sequence[str], None] = "a6c4d8e2f9b1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_column(table_name: str, column_name: str) -> bool:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if table_name not in inspector.get_table_names():
+        return False
+    return column_name in {col["name"] for col in inspector.get_columns(table_name)}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if not _has_column("ai_api_key", "fallback_providers_encrypted"):
+        with op.batch_alter_table("ai_api_key") as batch_op:
+            batch_op.add_column(
+                sa.Column("fallback_providers_encrypted", sa.Text(), nullable=True)
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if _has_column("ai_api_key", "fallback_providers_encrypted"):
+        with op.batch_alter_table("ai_api_key") as batch_op:
+            batch_op.drop_column("fallback_providers_encrypted")
@@ -0,0 +1,48 @@
+"""add holiday_calendar table
+
+Revision ID: b8d4f0c2e6a3
+Revises: a7c3e9b1d5f2
+Create Date: 2026-10-17 21:00:00.000000
+
+新增 holiday_calendar：节假日「年」接口同步的整年日历（每天一行，day_type / name），
+节假日查询由本表应答，首次同步后离线可用。数据由应用启动后的后台刷新写入，迁移不预置。
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b8d4f0c2e6a3"
+down_revision: Union[str, Sequence[str], None] = "a7c3e9b1d5f2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_table(table_name: str) -> bool:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    return table_name in inspector.get_table_names()
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if _has_table("holiday_calendar"):
+        return
+    op.create_table(
+        "holiday_calendar",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("year", sa.Integer(), nullable=False),
+        sa.Column("day_type", sa.SmallInteger(), nullable=False),
+        sa.Column("name", sa.String(length=32), nullable=True),
+        sa.Column("synced_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("day"),
+    )
+    op.create_index("ix_holiday_calendar_year", "holiday_calendar", ["year"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if _has_table("holiday_calendar"):
+        op.drop_table("holiday_calendar")
@@ -0,0 +1,44 @@
+"""add process diff columns to daily_plan
+
+Revision ID: c4e9a2d6f8b1
+Revises: b8d4f0c2e6a3
+Create Date: 2026-10-17 22:00:00.000000
+
+daily_plan 新增 process_diff_key / process_diff_json：保存计划时计算的活动过程逐句差异，
+键为 sha256(原文 + 改写文)。存量计划留空，导出时按需计算，下次保存时写入。
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c4e9a2d6f8b1"
+down_revision: Union[str, Sequence[str], None] = "b8d4f0c2e6a3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_column(table_name: str, column_name: str) -> bool:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if table_name not in inspector.get_table_names():
+        return False
+    return column_name in {col["name"] for col in inspector.get_columns(table_name)}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if not _has_column("daily_plan", "process_diff_key"):
+        with op.batch_alter_table("daily_plan") as batch_op:
+            batch_op.add_column(sa.Column("process_diff_key", sa.String(length=64), nullable=True))
+            batch_op.add_column(sa.Column("process_diff_json", sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if _has_column("daily_plan", "process_diff_key"):
+        with op.batch_alter_table("daily_plan") as batch_op:
+            batch_op.drop_column("process_diff_json")
+            batch_op.drop_column("process_diff_key")
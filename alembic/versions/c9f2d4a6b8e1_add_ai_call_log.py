@@ -0,0 +1,57 @@
+"""add ai_call_log telemetry table
+
+Revision ID: c9f2d4a6b8e1
+Revises: b7e1c3d5f8a2
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c9f2d4a6b8e1"
+down_revision: Union[str, Sequence[str], None] = "b7e1c3d5f8a2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_table(table_name: str) -> bool:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    return table_name in inspector.get_table_names()
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if not _has_table("ai_call_log"):
+        op.create_table(
+            "ai_call_log",
+            sa.Column("id", sa.BigInteger().with_variant(sa.Integer(), "sqlite"), autoincrement=True, nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("task_type", sa.String(length=50), nullable=False),
+            sa.Column("kind", sa.String(length=16), nullable=False),
+            sa.Column("model_name", sa.String(length=100), nullable=False),
+            sa.Column("api_host", sa.String(length=255), nullable=False),
+            sa.Column("outcome", sa.String(length=32), nullable=False),
+            sa.Column("status_code", sa.Integer(), nullable=True),
+            sa.Column("attempts", sa.Integer(), nullable=False),
+            sa.Column("duration_ms", sa.Integer(), nullable=False),
+            sa.Column("prompt_tokens", sa.Integer(), nullable=True),
+            sa.Column("completion_tokens", sa.Integer(), nullable=True),
+            sa.Column("request_bytes", sa.Integer(), nullable=False),
+            sa.Column("response_bytes", sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_ai_call_log_created_at", "ai_call_log", ["created_at"], unique=False)
+        op.create_index("ix_ai_call_log_task_type", "ai_call_log", ["task_type"], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if _has_table("ai_call_log"):
+        op.drop_index("ix_ai_call_log_task_type", table_name="ai_call_log")
+        op.drop_index("ix_ai_call_log_created_at", table_name="ai_call_log")
+        op.drop_table("ai_call_log")
@@ -0,0 +1,145 @@
+"""add content-addressed image_blob table and dedupe existing image blobs
+
+Revision ID: d3b8e5f1a7c2
+Revises: c9f2d4a6b8e1
+Create Date: 2026-10-17 16:00:00.000000
+
+新增 image_blob（主键 SHA-256 + ref_count），game_observation_image / listening_image
+增列 content_hash。存量图片分批迁移：每批只读取 _BATCH 行的字节，计算哈希后写入
+（或引用）image_blob，再把本行 blob_content 置 NULL，内存占用与总数据量无关。
+"""
+import hashlib
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d3b8e5f1a7c2"
+down_revision: Union[str, Sequence[str], None] = "c9f2d4a6b8e1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_IMAGE_TABLES = (
+    ("game_observation_image", "ix_game_obs_image_content_hash"),
+    ("listening_image", "ix_listening_image_content_hash"),
+)
+_BATCH = 200
+
+
+def _has_table(table_name: str) -> bool:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    return table_name in inspector.get_table_names()
+
+
+def _has_column(table_name: str, column_name: str) -> bool:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    return column_name in {c["name"] for c in inspector.get_columns(table_name)}
+
+
+def _blob_type():
+    try:
+        from sqlalchemy.dialects.mysql import LONGBLOB
+        return sa.LargeBinary().with_variant(LONGBLOB(), "mysql")
+    except ImportError:  # pragma: no cover
+        return sa.LargeBinary()
+
+
+def _dedupe_table(bind, table_name: str) -> None:
+    """把 table_name 中仍内联存储的 blob_content 分批迁入 image_blob。"""
+    select_batch = sa.text(
+        f"SELECT id, blob_content, mime_type, storage_backend FROM {table_name} "
+        "WHERE content_hash IS NULL AND blob_content IS NOT NULL "
+        "ORDER BY id LIMIT :limit"
+    )
+    incref = sa.text("UPDATE image_blob SET ref_count = ref_count + 1 WHERE sha256 = :sha")
+    insert_blob = sa.text(
+        "INSERT INTO image_blob (sha256, storage_backend, blob_content, object_key, "
+        "mime_type, file_size, ref_count, created_at) "
+        "VALUES (:sha, :backend, :content, NULL, :mime, :size, 1, :now)"
+    )
+    move_row = sa.text(
+        f"UPDATE {table_name} SET content_hash = :sha, blob_content = NULL WHERE id = :id"
+    )
+    while True:
+        rows = bind.execute(select_batch, {"limit": _BATCH}).fetchall()
+        if not rows:
+            break
+        for row_id, content, mime_type, backend in rows:
+            content = bytes(content)
+            sha = hashlib.sha256(content).hexdigest()
+            if bind.execute(incref, {"sha": sha}).rowcount == 0:
+                bind.execute(insert_blob, {
+                    "sha": sha,
+                    "backend": backend or "mysql_blob",
+                    "content": content,
+                    "mime": mime_type or "image/jpeg",
+                    "size": len(content),
+                    "now": datetime.now(timezone.utc),
+                })
+            bind.execute(move_row, {"sha": sha, "id": row_id})
+
+
+def _restore_table(bind, table_name: str) -> None:
+    """降级：把 image_blob 中的字节分批写回 table_name.blob_content。"""
+    select_batch = sa.text(
+        f"SELECT t.id, b.blob_content FROM {table_name} t "
+        "JOIN image_blob b ON b.sha256 = t.content_hash "
+        "WHERE t.blob_content IS NULL AND b.blob_content IS NOT NULL "
+        "ORDER BY t.id LIMIT :limit"
+    )
+    restore_row = sa.text(
+        f"UPDATE {table_name} SET blob_content = :content, content_hash = NULL WHERE id = :id"
+    )
+    while True:
+        rows = bind.execute(select_batch, {"limit": _BATCH}).fetchall()
+        if not rows:
+            break
+        for row_id, content in rows:
+            bind.execute(restore_row, {"content": bytes(content), "id": row_id})
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if not _has_table("image_blob"):
+        op.create_table(
+            "image_blob",
+            sa.Column("sha256", sa.String(length=64), nullable=False),
+            sa.Column("storage_backend", sa.String(length=16), nullable=False),
+            sa.Column("blob_content", _blob_type(), nullable=True),
+            sa.Column("object_key", sa.Text(), nullable=True),
+            sa.Column("mime_type", sa.String(length=32), nullable=False),
+            sa.Column("file_size", sa.Integer(), nullable=True),
+            sa.Column("ref_count", sa.Integer(), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+            sa.PrimaryKeyConstraint("sha256"),
+        )
+
+    bind = op.get_bind()
+    for table_name, index_name in _IMAGE_TABLES:
+        if not _has_table(table_name):
+            continue
+        if not _has_column(table_name, "content_hash"):
+            with op.batch_alter_table(table_name) as batch_op:
+                batch_op.add_column(sa.Column("content_hash", sa.String(length=64), nullable=True))
+                batch_op.create_index(index_name, ["content_hash"], unique=False)
+        _dedupe_table(bind, table_name)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    for table_name, index_name in _IMAGE_TABLES:
+        if not _has_table(table_name) or not _has_column(table_name, "content_hash"):
+            continue
+        if _has_table("image_blob"):
+            _restore_table(bind, table_name)
+        with op.batch_alter_table(table_name) as batch_op:
+            batch_op.drop_index(index_name)
+            batch_op.drop_column("content_hash")
+    if _has_table("image_blob"):
+        op.drop_table("image_blob")
@@ -0,0 +1,43 @@
+"""add tenant_id to ai_call_log
+
+Revision ID: d7a3f1c5b9e2
+Revises: c4e9a2d6f8b1
+Create Date: 2026-10-18 10:00:00.000000
+
+ai_call_log 新增 tenant_id：遥测统计按租户隔离。存量记录无法归属租户，保持 NULL（不计入任何租户）。
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d7a3f1c5b9e2"
+down_revision: Union[str, Sequence[str], None] = "c4e9a2d6f8b1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_column(table_name: str, column_name: str) -> bool:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if table_name not in inspector.get_table_names():
+        return False
+    return column_name in {col["name"] for col in inspector.get_columns(table_name)}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if not _has_column("ai_call_log", "tenant_id"):
+        with op.batch_alter_table("ai_call_log") as batch_op:
+            batch_op.add_column(sa.Column("tenant_id", sa.BigInteger(), nullable=True))
+            batch_op.create_index("ix_ai_call_log_tenant_id", ["tenant_id"], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if _has_column("ai_call_log", "tenant_id"):
+        with op.batch_alter_table("ai_call_log") as batch_op:
+            batch_op.drop_index("ix_ai_call_log_tenant_id")
+            batch_op.drop_column("tenant_id")
@@ -0,0 +1,61 @@
+"""add image_thumbnail table
+
+Revision ID: e5a1c7d9f3b4
+Revises: d3b8e5f1a7c2
+Create Date: 2026-10-17 18:00:00.000000
+
+新增 image_thumbnail：内容寻址图片的各档缩略图，主键 (sha256, size)。
+存量图片不在迁移中生成缩略图，由 /media 接口首次请求时按需生成并保存。
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e5a1c7d9f3b4"
+down_revision: Union[str, Sequence[str], None] = "d3b8e5f1a7c2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_table(table_name: str) -> bool:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    return table_name in inspector.get_table_names()
+
+
+def _blob_type():
+    try:
+        from sqlalchemy.dialects.mysql import MEDIUMBLOB
+        return sa.LargeBinary().with_variant(MEDIUMBLOB(), "mysql")
+    except ImportError:  # pragma: no cover
+        return sa.LargeBinary()
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if _has_table("image_thumbnail"):
+        return
+    op.create_table(
+        "image_thumbnail",
+        sa.Column("sha256", sa.String(length=64), nullable=False),
+        sa.Column("size", sa.String(length=8), nullable=False),
+        sa.Column("content_hash", sa.String(length=64), nullable=False),
+        sa.Column("storage_backend", sa.String(length=16), nullable=False),
+        sa.Column("blob_content", _blob_type(), nullable=True),
+        sa.Column("object_key", sa.Text(), nullable=True),
+        sa.Column("mime_type", sa.String(length=32), nullable=False),
+        sa.Column("width", sa.Integer(), nullable=False),
+        sa.Column("height", sa.Integer(), nullable=False),
+        sa.Column("file_size", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("sha256", "size"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if _has_table("image_thumbnail"):
+        op.drop_table("image_thumbnail")
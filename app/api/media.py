@@ -0,0 +1,81 @@
+"""图片媒体路由：GET /media/{kind}/{image_id}?size=sm|md|orig。
+
+鉴权二选一：
+1. **签名地址**（页面使用）：查询参数 t / exp / sig 由 :func:`app.service.media_service.media_url`
+   生成，签名绑定图片、租户与过期时间；
+2. **API Key**：无签名参数时按 :func:`app.api.auth.get_api_principal` 校验，租户取自 Key 绑定。
+
+响应携带强 ETag（字节 SHA-256）与 ``Cache-Control: private``，If-None-Match 命中返回 304；
+对象存储可直链时 302 跳转到预签名 / 代理地址，filesystem 后端直接以文件响应输出。
+"""
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi import status as http_status
+from fastapi.exceptions import HTTPException
+from fastapi.responses import FileResponse, RedirectResponse, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.auth import get_api_principal
+from app.api.deps import get_db
+from app.service.media_service import MEDIA_KINDS, MEDIA_SIZES, load_media, verify_media_signature
+
+router = APIRouter(prefix="/media", tags=["media"])
+
+# 图片内容按哈希寻址、永不原地修改，可长期缓存；private 避免共享缓存跨用户复用
+_CACHE_CONTROL = "private, max-age=86400"
+# 跳转地址（预签名）有时效，只短期缓存
+_REDIRECT_CACHE_CONTROL = "private, max-age=300"
+# 缩略图尚在后台生成、暂以原图代替：每次按 ETag 重新校验，生成后即换成缩略图
+_PROVISIONAL_CACHE_CONTROL = "private, no-cache"
+
+
+def _etag_matches(header: str | None, etag: str) -> bool:
+    if not header:
+        return False
+    return header.strip() == "*" or etag in (tag.strip() for tag in header.split(","))
+
+
+@router.get("/{kind}/{image_id}", summary="读取观察 / 倾听图片（缩略图或原图）")
+async def get_media(
+    request: Request,
+    kind: str,
+    image_id: int,
+    size: str = Query("sm"),
+    t: int | None = Query(None, description="签名地址：租户 ID"),
+    exp: int | None = Query(None, description="签名地址：过期时间戳"),
+    sig: str | None = Query(None, description="签名地址：签名"),
+    session: AsyncSession = Depends(get_db),
+) -> Response:
+    if kind not in MEDIA_KINDS or size not in MEDIA_SIZES:
+        raise HTTPException(status_code=http_status.HTTP_404_NOT_FOUND, detail="资源不存在")
+
+    if sig is not None:
+        if t is None or exp is None or not verify_media_signature(kind, image_id, t, exp, sig):
+            raise HTTPException(status_code=http_status.HTTP_403_FORBIDDEN, detail="图片地址无效或已过期")
+        tenant_id = t
+    else:
+        tenant_id = (await get_api_principal(request)).tenant_id
+
+    content = await load_media(session, kind, image_id, tenant_id, size)
+    if content is None:
+        raise HTTPException(status_code=http_status.HTTP_404_NOT_FOUND, detail="资源不存在")
+
+    if content.redirect_url:
+        return RedirectResponse(
+            content.redirect_url,
+            status_code=http_status.HTTP_302_FOUND,
+            headers={"Cache-Control": _PROVISIONAL_CACHE_CONTROL if content.provisional else _REDIRECT_CACHE_CONTROL},
+        )
+
+    headers = {
+        "ETag": content.etag,
+        "Cache-Control": _PROVISIONAL_CACHE_CONTROL if content.provisional else _CACHE_CONTROL,
+    }
+    if _etag_matches(request.headers.get("if-none-match"), content.etag):
+        return Response(status_code=http_status.HTTP_304_NOT_MODIFIED, headers=headers)
+    if content.path is not None:
+        if not content.path.is_file():
+            raise HTTPException(status_code=http_status.HTTP_404_NOT_FOUND, detail="资源不存在")
+        return FileResponse(content.path, media_type=content.mime_type, headers=headers)
+    return Response(content.data, media_type=content.mime_type, headers=headers)
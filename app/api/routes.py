@@ -14,6 +14,11 @@ from fastapi.exceptions import HTTPException
 from app.api.auth import ApiPrincipal, get_api_principal
 from app.api.deps import get_db
 from app.api.schemas import (
+    AiCacheStatsOut,
+    AiDailyTokensOut,
+    AiJsonRepairOut,
+    AiTaskLatencyOut,
+    AiTelemetryOut,
     ClassConfigOut,
     DailyPlanListOut,
     DailyPlanOut,
@@ -21,12 +26,15 @@ from app.api.schemas import (
     PageMeta,
     SemesterOut,
 )
+from app.integration.ai_client.json_repair import repair_stats
+from app.integration.ai_client.response_cache import get_response_cache
 from app.repository.class_repository import list_class_configs
 from app.repository.daily_plan_repository import (
     get_daily_plan_by_id,
     list_daily_plans,
 )
 from app.repository.semester_repository import list_semesters
+from app.service.ai_telemetry_service import get_ai_call_summary
 
 router = APIRouter(prefix="/api/v1", tags=["v1"])
 
@@ -124,3 +132,35 @@ async def query_classes(
         user_id=user_id,
     )
     return [ClassConfigOut.from_model(r) for r in records]
+
+
+@router.get(
+    "/ai/cache-stats",
+    response_model=AiCacheStatsOut,
+    summary="AI 响应缓存命中统计",
+)
+async def ai_cache_stats(
+    principal: ApiPrincipal = Depends(get_api_principal),
+) -> AiCacheStatsOut:
+    return AiCacheStatsOut(**get_response_cache().stats(principal.tenant_id))
+
+
+@router.get(
+    "/ai/telemetry",
+    response_model=AiTelemetryOut,
+    summary="AI 调用耗时百分位与每日 token 用量",
+)
+async def ai_telemetry(
+    principal: ApiPrincipal = Depends(get_api_principal),
+    session=Depends(get_db),
+    days: int = Query(7, ge=1, le=90, description="统计最近 N 天（1~90）"),
+) -> AiTelemetryOut:
+    summary = await get_ai_call_summary(session, principal.tenant_id, days=days)
+    return AiTelemetryOut(
+        days=days,
+        since=summary["since"],
+        tasks=[AiTaskLatencyOut(**t) for t in summary["tasks"]],
+        daily_tokens=[AiDailyTokensOut(**d) for d in summary["daily_tokens"]],
+        dropped=summary["telemetry"]["dropped"],
+        json_repair=AiJsonRepairOut(**repair_stats()),
+    )
@@ -127,3 +127,62 @@ class ClassConfigOut(BaseModel):
             indoor_areas=m.indoor_areas,
             outdoor_content=m.outdoor_content,
         )
+
+
+class AiCacheStatsOut(BaseModel):
+    """AI 响应缓存命中统计（仅计数，不含任何缓存内容）。
+
+    命中 / 未命中 / 写入仅统计调用方租户；淘汰与容量为进程级。
+    """
+
+    hits: int = Field(..., description="本租户内存层命中次数")
+    disk_hits: int = Field(..., description="本租户持久层命中次数")
+    misses: int = Field(..., description="本租户未命中次数")
+    stores: int = Field(..., description="本租户写入次数")
+    evictions: int = Field(..., description="LRU 淘汰次数（进程级）")
+    size: int = Field(..., description="内存层当前条目数（进程级）")
+    max_entries: int = Field(..., description="内存层容量上限")
+    hit_rate: float = Field(..., description="本租户命中率（含持久层）")
+
+
+class AiTaskLatencyOut(BaseModel):
+    """单个任务类型的 AI 调用耗时统计（命中缓存 / 被取消的调用不计入百分位）。"""
+
+    task_type: str = Field(..., description="任务类型（空串表示未标注）")
+    calls: int = Field(..., description="实际发出请求的调用数")
+    errors: int = Field(..., description="最终失败的调用数")
+    cached: int = Field(..., description="命中响应缓存的调用数")
+    p50_ms: int | None = Field(None, description="耗时 p50（毫秒）")
+    p95_ms: int | None = Field(None, description="耗时 p95（毫秒）")
+    p99_ms: int | None = Field(None, description="耗时 p99（毫秒）")
+
+
+class AiDailyTokensOut(BaseModel):
+    """按 (UTC 日期, 任务类型) 汇总的 token 用量。"""
+
+    day: date
+    task_type: str
+    calls: int
+    prompt_tokens: int
+    completion_tokens: int
+
+
+class AiJsonRepairOut(BaseModel):
+    """AI 结构化输出解析计数（进程启动以来）。"""
+
+    direct: int = Field(..., description="直接解析成功次数")
+    repaired: int = Field(..., description="本地修复后解析成功次数")
+    reasked: int = Field(..., description="追问「修复此 JSON」后成功次数")
+    failed: int = Field(..., description="追问后仍失败次数")
+    repair_rate: float = Field(..., description="需要修复（本地或追问）的比例")
+
+
+class AiTelemetryOut(BaseModel):
+    """AI 调用遥测汇总（不含提示词、响应内容或 Key）。"""
+
+    days: int = Field(..., description="统计窗口（天）")
+    since: datetime = Field(..., description="统计起点（UTC）")
+    tasks: list[AiTaskLatencyOut]
+    daily_tokens: list[AiDailyTokensOut]
+    dropped: int = Field(..., description="本进程因缓冲溢出或写库失败丢弃的记录数")
+    json_repair: AiJsonRepairOut = Field(..., description="本进程 AI JSON 解析 / 修复计数")
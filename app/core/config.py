@@ -73,6 +73,8 @@ class Settings(BaseSettings):
 
     # ── 节假日 ───────────────────────────────────────────────────────────────
     HOLIDAY_API_URL: str = "https://timor.tech/api/holiday/info/"
+    # 节假日日历（holiday_calendar 表）后台刷新间隔（小时）；<=0 关闭定时刷新，仅在缺失年份时按需同步
+    HOLIDAY_REFRESH_HOURS: float = 24
     LOG_LEVEL: str = "INFO"
 
     # ── 管理员初始化引导 ─────────────────────────────────────────────────────
@@ -91,8 +93,116 @@ class Settings(BaseSettings):
     API_SIGNATURE_MAX_SKEW: int = 300
 
     # ── 图片存储（游戏观察子系统） ────────────────────────────────────────────
+    # mysql_blob：字节存数据库；filesystem：字节存本地分片目录；s3：字节存对象存储
+    # （后两者数据库只存对象键）
     IMAGE_STORAGE_BACKEND: str = "mysql_blob"
+    # filesystem 后端的根目录；留空 = app_data_dir()/images
+    IMAGE_STORAGE_DIR: str = ""
+    # filesystem / s3 后端孤儿图片清理间隔（小时）；启动时总会清理一次，<=0 关闭后续定时清理
+    IMAGE_SWEEP_INTERVAL_HOURS: float = 24
+    # s3 后端（S3 兼容对象存储，路径风格寻址）
+    S3_ENDPOINT_URL: str = ""
+    S3_BUCKET: str = ""
+    S3_REGION: str = "us-east-1"
+    S3_ACCESS_KEY: str = ""
+    S3_SECRET_KEY: str = ""
+    # 对象键前缀，如 "kindergarten/"
+    S3_PREFIX: str = ""
+    # 非空时浏览器经此地址（CDN / 反向代理）取图；留空则使用预签名 URL
+    S3_PUBLIC_BASE_URL: str = ""
+    S3_PRESIGN_EXPIRES: int = 3600
+    S3_MULTIPART_THRESHOLD: int = 8 * 1024 * 1024
+    S3_MULTIPART_PART_SIZE: int = 8 * 1024 * 1024
+    # 单张图片分片上传的并发数
+    S3_UPLOAD_CONCURRENCY: int = 4
     IMAGE_MAX_BYTES: int = 1_048_576
+    # 上传摄取（upload_ingest）：单张上传字节上限（浏览器端同时限制）、像素上限，
+    # 超过 UPLOAD_SPILL_BYTES 的上传落盘到临时文件而不是留在内存
+    UPLOAD_MAX_BYTES: int = 20 * 1024 * 1024
+    UPLOAD_MAX_PIXELS: int = 50_000_000
+    UPLOAD_SPILL_BYTES: int = 1024 * 1024
+    # 图片解码 / 压缩进程池（image_pool）：关闭时改在线程中处理
+    IMAGE_POOL_ENABLED: bool = True
+    # 工作进程数；0 = min(4, CPU 数)
+    IMAGE_POOL_WORKERS: int = 0
+    # 同时在途的图片任务上限，超出时调用方排队等待（背压）
+    IMAGE_POOL_MAX_PENDING: int = 8
+
+    # ── AI HTTP 连接池 ───────────────────────────────────────────────────────
+    # 每个 api_base_url 一个共享客户端；AI_HTTP2 需额外安装 h2（pip install httpx[http2]）
+    AI_HTTP2: bool = False
+    AI_POOL_MAX_CONNECTIONS: int = 20
+    AI_POOL_MAX_KEEPALIVE: int = 10
+    AI_POOL_KEEPALIVE_EXPIRY: float = 60.0
+
+    # ── AI 响应缓存 ──────────────────────────────────────────────────────────
+    # 相同模型 + 接口 + 消息（含激活提示词）的成功结果在 TTL 内直接复用
+    AI_CACHE_ENABLED: bool = True
+    AI_CACHE_MAX_ENTRIES: int = 256
+    AI_CACHE_TTL_SECONDS: float = 3600.0
+    # 开启后写入 app_data_dir()/ai_response_cache.db（内容以 ENCRYPTION_KEY 加密），重启后仍可命中
+    AI_CACHE_PERSIST: bool = False
+    # 逗号分隔的任务类型，这些任务不走缓存。默认排除页面上没有「重新生成」选项的生成任务，
+    # 否则再次点击「生成」只会拿到缓存中的同一结果；每日计划各任务经 refresh=True 重新生成，仍可缓存
+    AI_CACHE_EXCLUDE_TASKS: str = (
+        "split,adapt,game_observation,one_on_one_listening,homemade_teaching,course_review_activity"
+    )
+
+    # ── AI 调用超时与重试 ────────────────────────────────────────────────────
+    # 仅瞬时故障（超时 / 连接重置 / 429 / 5xx）重试，抖动指数退避（上限 AI_RETRY_BACKOFF_MAX 秒）
+    AI_REQUEST_TIMEOUT_SECONDS: float = 60.0
+    AI_RETRY_MAX_ATTEMPTS: int = 3
+    # 单次调用（含重试与退避）的总时限
+    AI_RETRY_DEADLINE_SECONDS: float = 120.0
+    AI_RETRY_BACKOFF_MAX: float = 8.0
+
+    # ── AI 多服务商对冲 / 降级（AiApiKey 配置了备用服务商时生效） ──────────────
+    AI_HEDGE_ENABLED: bool = True
+    # 主服务商超过其近期耗时的该百分位仍未返回时，向下一个服务商发对冲请求
+    AI_HEDGE_PERCENTILE: float = 95.0
+    # 样本不足 AI_HEDGE_MIN_SAMPLES 时使用的固定对冲延迟（秒）
+    AI_HEDGE_DELAY_SECONDS: float = 20.0
+    AI_HEDGE_MIN_DELAY_SECONDS: float = 2.0
+    AI_HEDGE_MIN_SAMPLES: int = 20
+    AI_HEDGE_WINDOW: int = 200
+
+    # ── AI 结构化输出修复 ────────────────────────────────────────────────────
+    # 本地修复（去代码块围栏 / 截取最外层对象 / 删尾随逗号）失败后，是否追问模型一次「修复此 JSON」
+    AI_JSON_REASK_ENABLED: bool = True
+    # 追问时附带的原始内容最大字符数
+    AI_JSON_REASK_MAX_CHARS: int = 12000
+
+    # ── 视觉请求图片（vision_profile） ──────────────────────────────────────
+    # 按模型输入分辨率缩放出 AI 专用副本再发送（false 时发送存档图片原字节）
+    AI_VISION_OPTIMIZE: bool = True
+    # AI 副本 data-url 的进程内缓存上限（MB，按字符数计）
+    AI_VISION_CACHE_MB: int = 64
+
+    # ── AI 调用遥测（ai_call_log 表） ────────────────────────────────────────
+    # 每次 call_ai* 调用追加一行到内存缓冲，达到批量条数或间隔秒数时批量写库
+    AI_TELEMETRY_ENABLED: bool = True
+    AI_TELEMETRY_BATCH_SIZE: int = 50
+    AI_TELEMETRY_FLUSH_SECONDS: float = 10.0
+    # 数据库不可用时缓冲的最大条数，超出丢弃最旧记录
+    AI_TELEMETRY_MAX_BUFFER: int = 5000
+
+    # ── 一对一倾听 ────────────────────────────────────────────────────────────
+    # 「生成全部领域」同时进行的领域数（generate_all_domains）
+    LISTENING_DOMAIN_CONCURRENCY: int = 5
+    # 全班批量生成的全局预算：所有批量任务同时在途的领域生成数（与单人页面的生成互不占用）
+    LISTENING_BATCH_CONCURRENCY: int = 5
+
+    # ── AI 调用限流（按 api_base_url + Key 共享） ─────────────────────────────
+    AI_RATE_LIMIT_ENABLED: bool = True
+    # 同一服务商同时在途请求上限（不低于 LISTENING_DOMAIN_CONCURRENCY，五领域才能同时生成）
+    AI_RATE_LIMIT_CONCURRENCY: int = 5
+    # 令牌桶平均速率（次/秒）与突发容量；RPS<=0 表示只限并发不限速率
+    AI_RATE_LIMIT_RPS: float = 2.0
+    AI_RATE_LIMIT_BURST: int = 8
+    # 收到 429 后重新排队的最大次数，以及单次服从 Retry-After 的最长等待（秒）；
+    # 排队等待同样受 AI_RETRY_DEADLINE_SECONDS 约束，用尽后的 429 直接失败，不再由重试策略重试
+    AI_RATE_LIMIT_MAX_REQUEUE: int = 5
+    AI_RATE_LIMIT_MAX_WAIT_SECONDS: float = 60.0
 
     @model_validator(mode="after")
     def _ensure_secrets(self) -> "Settings":
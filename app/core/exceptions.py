@@ -29,19 +29,37 @@ class ConfigError(Exception):
 
 
 class AiCallError(Exception):
-    """AI 接口调用失败时抛出：HTTP 4xx/5xx、网络超时、超过重试次数等。"""
+    """AI 接口调用失败时抛出：HTTP 4xx/5xx、网络超时、超过重试次数等。
 
-    def __init__(self, message: str = "AI 调用失败") -> None:
+    status_code 为 HTTP 状态码（网络错误时为 None）；retryable 标记是否为瞬时故障
+    （超时 / 连接重置 / 429 / 5xx）。attempts / elapsed 由重试层在最终抛出前填写。
+    """
+
+    def __init__(
+        self,
+        message: str = "AI 调用失败",
+        *,
+        status_code: int | None = None,
+        retryable: bool = False,
+    ) -> None:
         super().__init__(message)
         self.message = message
+        self.status_code = status_code
+        self.retryable = retryable
+        self.attempts = 1
+        self.elapsed = 0.0
 
 
 class AiParseError(Exception):
-    """AI 返回内容解析失败时抛出：JSON 格式非法、缺少必要字段等。"""
+    """AI 返回内容解析失败时抛出：JSON 格式非法、缺少必要字段等（不重试）。"""
 
-    def __init__(self, message: str = "AI 返回内容解析失败") -> None:
+    def __init__(self, message: str = "AI 返回内容解析失败", *, raw_content: str | None = None) -> None:
         super().__init__(message)
         self.message = message
+        self.attempts = 1
+        self.elapsed = 0.0
+        # 本地修复失败的原始 content，供「修复此 JSON」追问使用（None 表示无可修复内容）
+        self.raw_content = raw_content
 
 
 class AppError(Exception):
@@ -50,3 +68,15 @@ class AppError(Exception):
     def __init__(self, message: str = "操作失败") -> None:
         super().__init__(message)
         self.message = message
+
+
+class StorageError(Exception):
+    """图片存储后端读写失败时抛出：对象存储返回错误状态、网络异常等。
+
+    status_code 为远端 HTTP 状态码（网络错误时为 None）。
+    """
+
+    def __init__(self, message: str = "图片存储失败", *, status_code: int | None = None) -> None:
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
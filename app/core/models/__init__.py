@@ -8,6 +8,8 @@ from app.core.models.prompt_template import PromptTemplate  # noqa: F401
 from app.core.models.export_record import ExportRecord  # noqa: F401
 from app.core.models.game_observation import GameObservation  # noqa: F401
 from app.core.models.game_observation_image import GameObservationImage  # noqa: F401
+from app.core.models.image_blob import ImageBlob  # noqa: F401
+from app.core.models.image_thumbnail import ImageThumbnail  # noqa: F401
 from app.core.models.listening_record import ListeningRecord  # noqa: F401
 from app.core.models.listening_domain import ListeningDomain  # noqa: F401
 from app.core.models.listening_image import ListeningImage  # noqa: F401
@@ -15,6 +17,13 @@ from app.core.models.listening_indicator import ListeningIndicatorResult  # noqa
 from app.core.models.indicator_catalog import IndicatorCatalog  # noqa: F401
 from app.core.models.homemade_teaching import HomemadeTeachingToy  # noqa: F401
 from app.core.models.course_review_activity import CourseReviewActivity  # noqa: F401
+from app.core.models.ai_call_log import AiCallLog  # noqa: F401
+from app.core.models.holiday_calendar import HolidayCalendarDay  # noqa: F401
+from app.core.models.listening_batch import (  # noqa: F401
+    ListeningBatchImage,
+    ListeningBatchItem,
+    ListeningBatchJob,
+)
 
 __all__ = [
     "User",
@@ -26,6 +35,8 @@ __all__ = [
     "ExportRecord",
     "GameObservation",
     "GameObservationImage",
+    "ImageBlob",
+    "ImageThumbnail",
     "ListeningRecord",
     "ListeningDomain",
     "ListeningImage",
@@ -33,4 +44,9 @@ __all__ = [
     "IndicatorCatalog",
     "HomemadeTeachingToy",
     "CourseReviewActivity",
+    "AiCallLog",
+    "ListeningBatchJob",
+    "ListeningBatchItem",
+    "ListeningBatchImage",
+    "HolidayCalendarDay",
 ]
@@ -0,0 +1,54 @@
+"""AI 调用遥测数据模型。
+
+对应数据库表：ai_call_log
+每行记录一次 call_ai* 调用（含命中缓存），由 telemetry 模块批量写入，只增不改。
+用于按租户、任务统计耗时百分位与每日 token 用量。
+"""
+from datetime import datetime, timezone
+
+from sqlalchemy import BigInteger, DateTime, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class AiCallLog(Base):
+    """AI 调用遥测表。"""
+
+    __tablename__ = "ai_call_log"
+
+    id: Mapped[int] = mapped_column(
+        BigInteger().with_variant(Integer, "sqlite"),
+        primary_key=True,
+        autoincrement=True,
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(timezone.utc),
+        index=True,
+    )
+
+    # 发起调用的租户（业务层未标记时为 NULL，不出现在任何租户的统计中）
+    tenant_id: Mapped[int | None] = mapped_column(BigInteger, nullable=True, index=True)
+
+    # 任务类型（prompt task_type，如 morning_talk / game_observation；未传时为空串）
+    task_type: Mapped[str] = mapped_column(String(50), nullable=False, default="", index=True)
+    # 调用方式：json / text / stream / vision
+    kind: Mapped[str] = mapped_column(String(16), nullable=False)
+    model_name: Mapped[str] = mapped_column(String(100), nullable=False)
+    # 接口主机名（不含路径与 Key）
+    api_host: Mapped[str] = mapped_column(String(255), nullable=False)
+
+    # ok / cached / cancelled / 异常类名
+    outcome: Mapped[str] = mapped_column(String(32), nullable=False)
+    status_code: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    duration_ms: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    # 服务商 usage 字段（未返回时为 NULL）
+    prompt_tokens: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    completion_tokens: Mapped[int | None] = mapped_column(Integer, nullable=True)
+
+    request_bytes: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    response_bytes: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
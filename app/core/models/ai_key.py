@@ -3,6 +3,8 @@
 安全约束：
 - `api_key_encrypted` 字段仅存密文，明文禁止入库、禁止写入日志。
 - 加解密统一由 app.core.crypto 模块处理。
+- `fallback_providers_encrypted` 为备用服务商列表（JSON 整体加密），按优先级排列，
+  每项含 api_base_url / model_name / api_key；主服务商慢或失败时依次对冲 / 降级。
 """
 
 from datetime import datetime, timezone
@@ -34,6 +36,8 @@ class AiApiKey(Base):
     )
     # 仅存密文；明文禁止出现在此字段
     api_key_encrypted: Mapped[str] = mapped_column(Text, nullable=False)
+    # 备用服务商列表密文（JSON 数组整体加密）；NULL 表示未配置
+    fallback_providers_encrypted: Mapped[str | None] = mapped_column(Text, nullable=True)
     # Key 类型：text（文本模型）/ vision（视觉模型），同类型只有一条 active 记录
     key_type: Mapped[str] = mapped_column(
         Enum("text", "vision", name="ai_key_type"),
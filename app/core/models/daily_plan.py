@@ -23,6 +23,8 @@ class DailyPlan(Base):
     - activity_goal/prep/key/difficult：教案拆分字段
     - activity_process_original：AI 拆分得到的活动过程原文
     - activity_process_adapted：年龄适配改写后的活动过程
+    - process_diff_key / process_diff_json：保存时计算的活动过程逐句差异及其有效性键
+      （sha256(原文 + 改写文)），导出时键一致直接读取
     - morning_activity / indoor_area / outdoor_activity：一日活动生成内容（可为空）
     - morning_talk_topic / morning_talk_questions：晨间谈话（可为空）
     - daily_reflection：一日活动反思（可为空，由教师手工填写）
@@ -56,6 +58,8 @@ class DailyPlan(Base):
     # 活动过程（原文 + 改写文）
     activity_process_original: Mapped[str | None] = mapped_column(Text, nullable=True)
     activity_process_adapted: Mapped[str | None] = mapped_column(Text, nullable=True)
+    process_diff_key: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    process_diff_json: Mapped[str | None] = mapped_column(Text, nullable=True)
 
     # 一日活动生成内容（可为空，AI 生成后回填）
     morning_activity: Mapped[str | None] = mapped_column(Text, nullable=True)
@@ -0,0 +1,30 @@
+"""法定节假日日历数据模型。
+
+对应数据库表：holiday_calendar
+每行一天，由节假日「年」接口整年同步（holiday_service 定时刷新），覆盖已同步年份的每一天：
+day_type 0=工作日 / 1=周末 / 2=法定节假日 / 3=调班工作日，name 为法定节假日或调班对应的节日名称。
+首次同步后节假日查询全部由本表应答，接口不可用时不影响使用。
+"""
+from datetime import date, datetime, timezone
+
+from sqlalchemy import Date, DateTime, Integer, SmallInteger, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class HolidayCalendarDay(Base):
+    """节假日日历表（全局，不分租户）。"""
+
+    __tablename__ = "holiday_calendar"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    year: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    day_type: Mapped[int] = mapped_column(SmallInteger, nullable=False)
+    name: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    # 本年日历最近一次同步时间
+    synced_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(timezone.utc),
+    )
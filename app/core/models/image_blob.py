@@ -0,0 +1,52 @@
+"""ImageBlob — 按内容寻址的图片存储表（游戏观察 / 一对一倾听共用）。
+
+主键为图片字节的 SHA-256；game_observation_image / listening_image 经 content_hash 逻辑引用。
+ref_count 记录引用行数：同一张图重复上传或记录覆盖保存只增加引用、不再写入字节；
+引用归零时删除。
+"""
+from datetime import datetime, timezone
+
+from sqlalchemy import DateTime, Integer, LargeBinary, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class ImageBlob(Base):
+    __tablename__ = "image_blob"
+
+    # 图片字节的 SHA-256（小写十六进制）
+    sha256: Mapped[str] = mapped_column(String(64), primary_key=True)
+    # 存储后端标识：mysql_blob / filesystem / s3
+    storage_backend: Mapped[str] = mapped_column(
+        String(16), nullable=False, default="mysql_blob"
+    )
+
+    # BLOB 后端：压缩后图片二进制（MySQL 使用 LONGBLOB variant）
+    # 延迟加载：普通查询不取字节（误访问直接报错），字节经 image_store_service.iter_image_bytes 读取
+    try:
+        from sqlalchemy.dialects.mysql import LONGBLOB as _LONGBLOB
+        blob_content: Mapped[bytes | None] = mapped_column(
+            LargeBinary().with_variant(_LONGBLOB, "mysql"),
+            nullable=True,
+            deferred=True,
+            deferred_raiseload=True,
+        )
+    except ImportError:  # pragma: no cover
+        blob_content: Mapped[bytes | None] = mapped_column(  # type: ignore[no-redef]
+            LargeBinary, nullable=True, deferred=True, deferred_raiseload=True,
+        )
+
+    # 远端后端：对象键
+    object_key: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    mime_type: Mapped[str] = mapped_column(String(32), nullable=False, default="image/jpeg")
+    file_size: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    # 引用该内容的图片行数
+    ref_count: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(timezone.utc),
+    )
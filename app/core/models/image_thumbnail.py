@@ -0,0 +1,54 @@
+"""ImageThumbnail — 内容寻址图片的缩略图（游戏观察 / 一对一倾听共用）。
+
+主键为 (原图 SHA-256, 档位)；缩略图字节经与原图相同的存储后端保存（content_hash 为缩略图
+自身字节的 SHA-256）。随原图 image_blob 行一起删除，不单独计引用。
+"""
+from datetime import datetime, timezone
+
+from sqlalchemy import DateTime, Integer, LargeBinary, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class ImageThumbnail(Base):
+    __tablename__ = "image_thumbnail"
+
+    # 原图 → image_blob.sha256
+    sha256: Mapped[str] = mapped_column(String(64), primary_key=True)
+    # 档位名称：sm / md（见 image_processing.THUMBNAIL_SIZES）
+    size: Mapped[str] = mapped_column(String(8), primary_key=True)
+    # 缩略图字节的 SHA-256
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    storage_backend: Mapped[str] = mapped_column(
+        String(16), nullable=False, default="mysql_blob"
+    )
+
+    # BLOB 后端：缩略图二进制
+    # 延迟加载：普通查询不取字节（误访问直接报错），/media 接口经 get_thumbnails(with_content=True) 读取
+    try:
+        from sqlalchemy.dialects.mysql import MEDIUMBLOB as _MEDIUMBLOB
+        blob_content: Mapped[bytes | None] = mapped_column(
+            LargeBinary().with_variant(_MEDIUMBLOB, "mysql"),
+            nullable=True,
+            deferred=True,
+            deferred_raiseload=True,
+        )
+    except ImportError:  # pragma: no cover
+        blob_content: Mapped[bytes | None] = mapped_column(  # type: ignore[no-redef]
+            LargeBinary, nullable=True, deferred=True, deferred_raiseload=True,
+        )
+
+    # 远端后端：对象键
+    object_key: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    mime_type: Mapped[str] = mapped_column(String(32), nullable=False, default="image/jpeg")
+    width: Mapped[int] = mapped_column(Integer, nullable=False)
+    height: Mapped[int] = mapped_column(Integer, nullable=False)
+    file_size: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(timezone.utc),
+    )
@@ -0,0 +1,145 @@
+"""一对一倾听批量生成数据模型。
+
+对应数据库表：
+  - listening_batch_job：一次全班批量生成任务（观察年月、年级学期、观察者等整批共用字段）
+  - listening_batch_item：任务中的一位幼儿；已完成领域的 AI 结果逐领域写入 results_json，
+    失败后续跑时只生成剩余领域，五领域齐全后经 save_record_with_all 写成倾听记录草稿
+  - listening_batch_image：幼儿各领域照片（上传时已压缩），字节按内容寻址存于 image_blob；
+    幼儿记录写入或任务删除后释放引用
+"""
+from datetime import datetime, timezone
+
+from sqlalchemy import BigInteger, DateTime, Index, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class ListeningBatchJob(Base):
+    """倾听批量生成任务表。"""
+
+    __tablename__ = "listening_batch_job"
+
+    __table_args__ = (
+        Index("ix_listening_batch_job_tenant_user", "tenant_id", "user_id"),
+        Index("ix_listening_batch_job_status", "status"),
+    )
+
+    id: Mapped[int] = mapped_column(
+        BigInteger().with_variant(Integer, "sqlite"),
+        primary_key=True,
+        autoincrement=True,
+    )
+    tenant_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    user_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+
+    # 整批共用的记录字段（同 listening_record）
+    obs_year: Mapped[int] = mapped_column(Integer, nullable=False)
+    obs_month: Mapped[int] = mapped_column(Integer, nullable=False)
+    grade: Mapped[str | None] = mapped_column(String(16), nullable=True)
+    term: Mapped[str | None] = mapped_column(String(16), nullable=True)
+    class_name: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    observer: Mapped[str | None] = mapped_column(String(64), nullable=True)
+
+    # running（运行中 / 应用重启后自动续跑）/ finished（无待处理幼儿，可能含失败）/ cancelled
+    status: Mapped[str] = mapped_column(String(16), nullable=False, default="running")
+    # 已结束各轮运行的累计耗时（毫秒），用于计算吞吐量
+    elapsed_ms: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    # 当前一轮运行的开始时间（未运行时为 NULL）
+    run_started_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(timezone.utc),
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+    )
+
+
+class ListeningBatchItem(Base):
+    """倾听批量生成任务中的一位幼儿。"""
+
+    __tablename__ = "listening_batch_item"
+
+    __table_args__ = (
+        Index("ix_listening_batch_item_job", "job_id"),
+    )
+
+    id: Mapped[int] = mapped_column(
+        BigInteger().with_variant(Integer, "sqlite"),
+        primary_key=True,
+        autoincrement=True,
+    )
+    # 逻辑外键 → listening_batch_job.id
+    job_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    tenant_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    user_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+
+    child_name: Mapped[str] = mapped_column(String(64), nullable=False)
+    adult_count: Mapped[int | None] = mapped_column(Integer, nullable=True, default=1)
+    child_age: Mapped[str | None] = mapped_column(String(16), nullable=True)
+
+    # pending / running / done / failed
+    status: Mapped[str] = mapped_column(String(16), nullable=False, default="pending")
+    # 已完成领域的 AI 结果 JSON：{领域: {goals, evaluation, ..., indicator_results}}
+    results_json: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # 最近一次失败原因（成功后清空）
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # 已尝试轮数
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # 写入的倾听记录 → listening_record.id（done 时非 NULL）
+    record_id: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(timezone.utc),
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+    )
+
+
+class ListeningBatchImage(Base):
+    """倾听批量生成任务中幼儿的领域照片（字节存于 image_blob）。"""
+
+    __tablename__ = "listening_batch_image"
+
+    __table_args__ = (
+        Index("ix_listening_batch_image_item", "item_id"),
+    )
+
+    id: Mapped[int] = mapped_column(
+        BigInteger().with_variant(Integer, "sqlite"),
+        primary_key=True,
+        autoincrement=True,
+    )
+    # 逻辑外键 → listening_batch_item.id
+    item_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    tenant_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    user_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    domain: Mapped[str] = mapped_column(String(8), nullable=False)
+    image_index: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    # → image_blob.sha256
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    storage_backend: Mapped[str] = mapped_column(String(16), nullable=False, default="mysql_blob")
+    object_key: Mapped[str | None] = mapped_column(Text, nullable=True)
+    mime_type: Mapped[str] = mapped_column(String(32), nullable=False, default="image/jpeg")
+    file_size: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    width: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    height: Mapped[int | None] = mapped_column(Integer, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(timezone.utc),
+    )
@@ -17,6 +17,7 @@ class ListeningImage(Base):
     __table_args__ = (
         Index("ix_listening_image_record", "record_id"),
         Index("ix_listening_image_tenant_user", "tenant_id", "user_id"),
+        Index("ix_listening_image_content_hash", "content_hash"),
     )
 
     id: Mapped[int] = mapped_column(
@@ -38,18 +39,26 @@ class ListeningImage(Base):
     )
 
     # BLOB 后端：压缩后图片二进制（MySQL 使用 LONGBLOB variant）
+    # 延迟加载：普通查询不取字节（误访问直接报错），迁移前的存量字节经 image_store_service.iter_image_bytes 读取
     try:
         from sqlalchemy.dialects.mysql import LONGBLOB as _LONGBLOB
         blob_content: Mapped[bytes | None] = mapped_column(
             LargeBinary().with_variant(_LONGBLOB, "mysql"),
             nullable=True,
+            deferred=True,
+            deferred_raiseload=True,
         )
     except ImportError:  # pragma: no cover
-        blob_content: Mapped[bytes | None] = mapped_column(LargeBinary, nullable=True)  # type: ignore[no-redef]
+        blob_content: Mapped[bytes | None] = mapped_column(  # type: ignore[no-redef]
+            LargeBinary, nullable=True, deferred=True, deferred_raiseload=True,
+        )
 
     # 远端后端：对象键（本期 NULL）
     object_key: Mapped[str | None] = mapped_column(Text, nullable=True)
 
+    # 内容寻址存储：→ image_blob.sha256（非 NULL 时字节存于 image_blob，本行 blob_content 为 NULL）
+    content_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)
+
     mime_type: Mapped[str] = mapped_column(String(32), nullable=False, default="image/jpeg")
     file_size: Mapped[int | None] = mapped_column(Integer, nullable=True)
     width: Mapped[int | None] = mapped_column(Integer, nullable=True)
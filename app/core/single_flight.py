@@ -0,0 +1,72 @@
+"""Single-flight：合并进行中的重复请求。
+
+同一 key 的请求在第一个（leader）尚未完成时到达，后来者不再发起新的上游调用，
+而是等待 leader 的结果；成功结果与异常都会原样共享给所有等待者。
+
+实现要点：
+- 上游调用以独立 Task 运行，任一等待者被取消（如关闭浏览器标签）不影响其他等待者
+- 完成后立即移出注册表：只合并「进行中」的请求，不充当结果缓存
+- 异步 Task 绑定事件循环；注册表中的 Task 属于其他循环时视为不存在（测试中每用例一个循环）
+"""
+
+import asyncio
+import hashlib
+import json
+from collections.abc import Awaitable, Callable
+from typing import Any, TypeVar
+
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+
+def fingerprint(*parts: Any) -> str:
+    """把请求参数序列化为稳定的 SHA-256 指纹（dict 按键排序，bytes 取哈希）。"""
+
+    def _default(obj: Any) -> str:
+        if isinstance(obj, (bytes, bytearray, memoryview)):
+            return "sha256:" + hashlib.sha256(obj).hexdigest()
+        return str(obj)
+
+    material = json.dumps(
+        parts, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=_default
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    """按 key 合并并发调用的注册表。"""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._calls: dict[str, asyncio.Task] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    def in_flight(self, key: str) -> bool:
+        task = self._calls.get(key)
+        return task is not None and not task.done()
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """执行 fn 或加入同 key 的进行中调用，返回共享结果（或抛出共享异常）。"""
+        loop = asyncio.get_running_loop()
+        task = self._calls.get(key)
+        if task is not None and not task.done() and task.get_loop() is loop:
+            self.coalesced += 1
+            logger.info("合并进行中的重复请求", extra={"flight": self.name})
+            return await asyncio.shield(task)
+
+        self.leaders += 1
+        task = loop.create_task(fn())
+        self._calls[key] = task
+        task.add_done_callback(lambda t, k=key: self._finish(k, t))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # 所有等待者都已取消时异常无人读取，此处标记已读取避免 asyncio 告警
+        if not task.cancelled():
+            task.exception()
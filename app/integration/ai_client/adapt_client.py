@@ -54,6 +54,31 @@ DEFAULT_ADAPT_PROMPT = """你是一名经验丰富的幼儿园教研员，请将
 三、四、五......"""
 
 
+# adapted_process 缺失时依次尝试的备用字段名
+_FALLBACK_KEYS = ("activity_process", "adapted", "process", "content")
+
+
+def _validate_result(result: dict) -> None:
+    """校验存在非空改写结果（含备用字段），不通过则不写入 AI 响应缓存。"""
+    if "adapted_process" not in result:
+        if any(
+            isinstance(result.get(k), str) and result[k].strip() for k in _FALLBACK_KEYS
+        ):
+            return
+        logger.info(
+            "年龄适配结果缺少 adapted_process 字段",
+            extra={"result_keys": list(result.keys())},
+        )
+        raise AiParseError(
+            "年龄适配结果缺少 adapted_process 字段。"
+            "请在【提示词管理 → 年龄适配】检查提示词，"
+            "确保 JSON 输出包含 adapted_process 字段"
+        )
+
+    if not str(result["adapted_process"]).strip():
+        raise AiParseError("年龄适配结果为空字符串")
+
+
 async def adapt_activity_process(
     original: str,
     grade: str,
@@ -104,40 +129,28 @@ async def adapt_activity_process(
         api_base_url=api_base_url,
         api_key=api_key,
         model_name=model_name,
+        task_type="adapt",
+        validate=_validate_result,
         _client=_client,
     )
 
     if "adapted_process" not in result:
         # 兼容常见误配置：用户可能将拆分提示词的 schema 复制到适配 tab
         # 导致 AI 返回 activity_process 等非标准字段名，此处降级处理并记录警告
-        for _fallback in ("activity_process", "adapted", "process", "content"):
+        # （_validate_result 已保证至少存在一个非空备用字段）
+        for _fallback in _FALLBACK_KEYS:
             _val = result.get(_fallback)
             if isinstance(_val, str) and _val.strip():
                 logger.warning(
                     "年龄适配提示词 schema 有误，使用了备用字段（建议到提示词管理页修正）",
                     extra={"fallback_key": _fallback, "result_keys": list(result.keys())},
                 )
-                adapted = _val
-                if not isinstance(adapted, str):
-                    adapted = str(adapted)
-                logger.info("年龄适配成功（备用字段）", extra={"grade": grade, "length": len(adapted)})
-                return adapted
-        logger.info(
-            "年龄适配结果缺少 adapted_process 字段",
-            extra={"result_keys": list(result.keys())},
-        )
-        raise AiParseError(
-            "年龄适配结果缺少 adapted_process 字段。"
-            "请在【提示词管理 → 年龄适配】检查提示词，"
-            "确保 JSON 输出包含 adapted_process 字段"
-        )
+                logger.info("年龄适配成功（备用字段）", extra={"grade": grade, "length": len(_val)})
+                return _val
 
     adapted = result["adapted_process"]
     if not isinstance(adapted, str):
         adapted = str(adapted)
 
-    if not adapted.strip():
-        raise AiParseError("年龄适配结果为空字符串")
-
     logger.info("年龄适配成功", extra={"grade": grade, "length": len(adapted)})
     return adapted
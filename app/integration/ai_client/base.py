@@ -3,34 +3,84 @@
 所有 AI 调用必须通过此模块，禁止在 service 层直接发 HTTP 请求。
 
 特性：
-- httpx.AsyncClient 异步请求，超时 60 秒
-- tenacity 重试：最多 3 次，指数退避（2s → 4s → 8s）
-- 结构化输出：强制要求 JSON 格式，解析失败抛出 AiParseError
-- 4xx/5xx 抛出 AiCallError
+- httpx.AsyncClient 异步请求，单次超时 AI_REQUEST_TIMEOUT_SECONDS；按 api_base_url 复用共享连接池（http_pool）
+- 限流：同一 (api_base_url, Key) 的请求经 rate_limiter 共享令牌桶 + 并发上限公平排队，
+  429 / x-ratelimit-* 头暂停放行并重新排队（不越过单次调用总时限）
+- 重试（retry_policy）：仅超时 / 连接重置 / 5xx（以及关闭限流时的 429）重试，抖动指数退避，
+  单次调用受总时限约束；
+  最终异常带 attempts / elapsed
+- 结构化输出：强制要求 JSON 格式；content 先经 json_repair 本地修复（代码块围栏 / 前后说明文字 /
+  尾随逗号），仍失败且内容像残缺 JSON 时追问一次「修复此 JSON」（reask_json_fix），再失败抛出 AiParseError
+- 响应缓存：成功结果按 (接口, 模型, 消息) 内容寻址缓存；task_type 用于按任务关闭缓存，
+  refresh=True 跳过读取（「重新生成」）但仍写入新结果
+- 流式文本：call_ai_text_stream 以 SSE（stream: true）逐段产出增量文本；
+  首个 token 之前的失败按同样策略重试，之后的失败直接抛出
+- 遥测：每次调用（含命中缓存）的耗时 / 尝试次数 / 状态码 / usage token / 负载大小
+  经 telemetry 批量写入 ai_call_log
+- 4xx/5xx 抛出 AiCallError（401 / 400 等不重试）
 - API Key 明文禁止写入日志
 """
 
 import json
+from collections.abc import AsyncIterator, Awaitable, Callable
 
 import httpx
-from tenacity import retry, stop_after_attempt, wait_exponential
 
+from app.core.config import settings
 from app.core.exceptions import AiCallError, AiParseError
 from app.core.logging import get_logger
+from app.integration.ai_client.http_pool import get_http_client
+from app.integration.ai_client.json_repair import (
+    is_reaskable,
+    loads,
+    parse_json_object,
+    record_failure,
+    record_reask,
+)
+from app.integration.ai_client.rate_limiter import send_limited
+from app.integration.ai_client.retry_policy import (
+    RetryTracker,
+    build_retry_decorator,
+    http_status_error,
+    run_with_retry,
+    transport_error,
+)
+from app.integration.ai_client.response_cache import (
+    cache_enabled_for,
+    get_response_cache,
+    make_cache_key,
+)
+from app.integration.ai_client.telemetry import CallTrace, record_cache_hit, trace_call
 
 logger = get_logger(__name__)
 
 # 强制 JSON 输出的 system prompt 补充说明
 _JSON_INSTRUCTION = "\n\n请严格按照要求的 JSON 格式输出，不要输出任何其他内容。"
 
+# 「修复此 JSON」追问的 system prompt
+_REASK_PROMPT = (
+    "下面是一段格式有误的 JSON。请修复语法错误（括号、引号、逗号等），保持字段与内容不变，"
+    "只输出修复后的 JSON 对象，不要输出任何其他内容。"
+)
+
 
 def _make_retry_decorator():
-    """构造 tenacity 重试装饰器：最多 3 次，指数退避 2s → 4s → 8s。"""
-    return retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=8),
-        reraise=True,
-    )
+    """构造 tenacity 重试装饰器：仅瞬时错误重试，抖动退避，受总时限约束（见 retry_policy）。"""
+    return build_retry_decorator()
+
+
+def _error_detail(response: httpx.Response) -> str:
+    """从错误响应体提取错误描述（脱敏：不含 Authorization header）。"""
+    try:
+        err_body = response.json()
+        return (
+            err_body.get("error", {}).get("message")
+            or err_body.get("message")
+            or err_body.get("detail")
+            or str(err_body)[:200]
+        )
+    except Exception:
+        return response.text[:200]
 
 
 async def call_ai(
@@ -40,6 +90,10 @@ async def call_ai(
     model_name: str = "gpt-4o-mini",
     response_schema: dict | None = None,
     *,
+    task_type: str | None = None,
+    refresh: bool = False,
+    validate: Callable[[dict], None] | None = None,
+    _reask: bool = True,
     _client: httpx.AsyncClient | None = None,
 ) -> dict:
     """发送 Chat Completions 请求，返回解析后的 dict。
@@ -50,7 +104,11 @@ async def call_ai(
         api_key: 明文 API Key（函数内部使用，禁止写日志）。
         model_name: 模型名称（如 gpt-4o-mini、deepseek-chat）。
         response_schema: 期望的 JSON schema（当前仅用于文档约束，不传给 API）。
-        _client: 可选的 httpx 客户端（用于测试 Mock，生产环境留空）。
+        task_type: 任务类型（用于 AI_CACHE_EXCLUDE_TASKS 按任务关闭缓存）。
+        refresh: True 时跳过缓存读取，强制请求并以新结果覆盖缓存。
+        validate: 可选业务校验回调；抛出 AiParseError 表示结果不可用，此时不写入缓存（不重试）。
+        _reask: 本地修复失败时是否追问「修复此 JSON」（追问本身传 False，避免递归）。
+        _client: 可选的 httpx 客户端（用于测试 Mock，生产环境留空走共享连接池）。
 
     Returns:
         解析后的 dict（AI 返回的 JSON 内容）。
@@ -71,26 +129,22 @@ async def call_ai(
     }
 
     async def _do_request(client: httpx.AsyncClient) -> dict:
+        tracker.begin_attempt()
         try:
-            response = await client.post(url, headers=headers, json=payload, timeout=60.0)
-        except httpx.TimeoutException as exc:
-            raise AiCallError(f"AI 请求超时: {exc}") from exc
+            response, _ = await send_limited(
+                api_base_url,
+                api_key,
+                lambda: client.post(
+                    url, headers=headers, json=payload, timeout=tracker.attempt_timeout()
+                ),
+                deadline=tracker.deadline,
+            )
         except httpx.RequestError as exc:
-            raise AiCallError(f"AI 请求网络错误: {exc}") from exc
+            raise transport_error(exc) from exc
+        trace.observe_response(response)
 
         if response.status_code >= 400:
-            # 提取响应体中的错误描述（脱敏：不含 Authorization header）
-            try:
-                err_body = response.json()
-                # 常见 OpenAI 兼容格式：{"error": {"message": "..."}}
-                err_detail = (
-                    err_body.get("error", {}).get("message")
-                    or err_body.get("message")
-                    or err_body.get("detail")
-                    or str(err_body)[:200]
-                )
-            except Exception:
-                err_detail = response.text[:200]
+            err_detail = _error_detail(response)
             logger.error(
                 "AI 接口返回错误",
                 extra={
@@ -99,53 +153,101 @@ async def call_ai(
                     "error_detail": err_detail,
                 },
             )
-            raise AiCallError(
-                f"AI 接口返回 HTTP {response.status_code}: {err_detail}"
-            )
+            raise http_status_error(response.status_code, err_detail)
 
-        raw_text = response.text
         try:
-            body = response.json()
+            body = loads(response.content)
         except Exception as exc:
-            logger.info("AI 返回内容解析失败（非 JSON）", extra={"raw": raw_text[:500]})
+            logger.info("AI 返回内容解析失败（非 JSON）", extra={"raw": response.text[:500]})
             raise AiParseError(f"AI 返回内容不是有效 JSON: {exc}") from exc
 
+        trace.observe_usage(body.get("usage") if isinstance(body, dict) else None)
+
         # 提取 choices[0].message.content
         try:
             content_str = body["choices"][0]["message"]["content"]
         except (KeyError, IndexError, TypeError) as exc:
             logger.info(
                 "AI 响应结构异常，缺少 choices/message/content",
-                extra={"raw": raw_text[:500]},
+                extra={"raw": response.text[:500]},
             )
             raise AiParseError(f"AI 响应结构异常: {exc}") from exc
 
-        # 解析 content 为 dict
+        # 解析 content 为 dict（必要时本地修复）；追问请求自身的解析不计数，由 reask_json_fix 记录结果
         try:
-            result = json.loads(content_str)
-        except json.JSONDecodeError as exc:
+            return parse_json_object(content_str, record=_reask)
+        except ValueError as exc:
             logger.info(
                 "AI content 字段不是有效 JSON",
-                extra={"content": content_str[:500]},
+                extra={"content": str(content_str)[:500]},
             )
-            raise AiParseError(f"AI content 不是有效 JSON: {exc}") from exc
-
-        if not isinstance(result, dict):
-            logger.info("AI 返回内容不是 JSON 对象", extra={"content": content_str[:200]})
-            raise AiParseError("AI 返回内容不是 JSON 对象")
-
-        return result
-
-    # 使用带重试的内层函数
-    @_make_retry_decorator()
-    async def _request_with_retry(client: httpx.AsyncClient) -> dict:
-        return await _do_request(client)
+            raise AiParseError(
+                f"AI content 不是有效 JSON 对象: {exc}",
+                raw_content=content_str if is_reaskable(content_str) else None,
+            ) from exc
+
+    cache = get_response_cache() if cache_enabled_for(task_type) else None
+    cache_key = make_cache_key("json", api_base_url, api_key, model_name, messages)
+    if cache is not None and not refresh:
+        cached = await cache.get(cache_key)
+        if cached is not None:
+            record_cache_hit("json", task_type, model_name, api_base_url)
+            return cached
+
+    client = _client if _client is not None else get_http_client(api_base_url)
+    tracker = RetryTracker()
+    try:
+        async with trace_call("json", task_type, model_name, api_base_url) as trace:
+            result = await run_with_retry(
+                _make_retry_decorator(), lambda: _do_request(client), tracker, url=url
+            )
+            trace.attempts = tracker.attempts
+    except AiParseError as exc:
+        if not _reask:
+            raise
+        result = await reask_json_fix(exc, api_base_url, api_key, model_name, _client=_client)
+    if validate is not None:
+        validate(result)
+    if cache is not None:
+        await cache.set(cache_key, result)
+    return result
+
+
+async def reask_json_fix(
+    exc: AiParseError,
+    api_base_url: str,
+    api_key: str,
+    model_name: str,
+    *,
+    _client: httpx.AsyncClient | None = None,
+) -> dict:
+    """本地修复失败后追问一次「修复此 JSON」，返回修复后的 dict。
 
-    if _client is not None:
-        return await _request_with_retry(_client)
+    只在 exc.raw_content 非空（内容像残缺 JSON）且 AI_JSON_REASK_ENABLED 时追问；
+    追问只带原始内容（不带图片 / 原始上下文），不走缓存、不再嵌套追问。
 
-    async with httpx.AsyncClient() as client:
-        return await _request_with_retry(client)
+    Raises:
+        AiParseError: 不满足追问条件或追问仍失败时，抛出原异常 exc（计入 json_repair 的 failed）。
+    """
+    if exc.raw_content is None or not settings.AI_JSON_REASK_ENABLED:
+        record_failure()
+        raise exc
+    messages = [
+        {"role": "system", "content": _REASK_PROMPT},
+        {"role": "user", "content": exc.raw_content[: settings.AI_JSON_REASK_MAX_CHARS]},
+    ]
+    try:
+        result = await call_ai(
+            messages, api_base_url, api_key, model_name,
+            task_type="json_repair", refresh=True, _reask=False, _client=_client,
+        )
+    except (AiCallError, AiParseError) as reask_exc:
+        record_failure()
+        logger.warning("AI JSON 追问修复失败", extra={"error": str(reask_exc)})
+        raise exc from reask_exc
+    record_reask()
+    logger.info("AI JSON 已经追问修复", extra={"model": model_name})
+    return result
 
 
 async def call_ai_text(
@@ -154,12 +256,15 @@ async def call_ai_text(
     api_key: str,
     model_name: str = "gpt-4o-mini",
     *,
+    task_type: str | None = None,
+    refresh: bool = False,
     _client: httpx.AsyncClient | None = None,
 ) -> str:
     """发送 Chat Completions 请求，返回纯文本 content 字符串。
 
     与 call_ai() 的区别：不强制 json_object 格式，直接返回 message.content。
     适用于生成结构化文本（非 JSON）的场景，如晨间活动、晨间谈话等。
+    task_type / refresh 的缓存语义同 call_ai()。
 
     Returns:
         AI 返回的纯文本字符串（已 strip）。
@@ -179,24 +284,22 @@ async def call_ai_text(
     }
 
     async def _do_text_request(client: httpx.AsyncClient) -> str:
+        tracker.begin_attempt()
         try:
-            response = await client.post(url, headers=headers, json=payload, timeout=60.0)
-        except httpx.TimeoutException as exc:
-            raise AiCallError(f"AI 请求超时: {exc}") from exc
+            response, _ = await send_limited(
+                api_base_url,
+                api_key,
+                lambda: client.post(
+                    url, headers=headers, json=payload, timeout=tracker.attempt_timeout()
+                ),
+                deadline=tracker.deadline,
+            )
         except httpx.RequestError as exc:
-            raise AiCallError(f"AI 请求网络错误: {exc}") from exc
+            raise transport_error(exc) from exc
+        trace.observe_response(response)
 
         if response.status_code >= 400:
-            try:
-                err_body = response.json()
-                err_detail = (
-                    err_body.get("error", {}).get("message")
-                    or err_body.get("message")
-                    or err_body.get("detail")
-                    or str(err_body)[:200]
-                )
-            except Exception:
-                err_detail = response.text[:200]
+            err_detail = _error_detail(response)
             logger.error(
                 "AI 接口返回错误",
                 extra={
@@ -205,12 +308,13 @@ async def call_ai_text(
                     "error_detail": err_detail,
                 },
             )
-            raise AiCallError(f"AI 接口返回 HTTP {response.status_code}: {err_detail}")
+            raise http_status_error(response.status_code, err_detail)
 
         try:
-            body = response.json()
+            body = loads(response.content)
         except Exception as exc:
             raise AiParseError(f"AI 返回内容不是有效 JSON: {exc}") from exc
+        trace.observe_usage(body.get("usage") if isinstance(body, dict) else None)
 
         try:
             content_str = body["choices"][0]["message"]["content"]
@@ -222,12 +326,206 @@ async def call_ai_text(
 
         return content_str.strip()
 
-    @_make_retry_decorator()
-    async def _text_request_with_retry(client: httpx.AsyncClient) -> str:
-        return await _do_text_request(client)
+    cache = get_response_cache() if cache_enabled_for(task_type) else None
+    cache_key = make_cache_key("text", api_base_url, api_key, model_name, messages)
+    if cache is not None and not refresh:
+        cached = await cache.get(cache_key)
+        if cached is not None:
+            record_cache_hit("text", task_type, model_name, api_base_url)
+            return cached
+
+    client = _client if _client is not None else get_http_client(api_base_url)
+    tracker = RetryTracker()
+    async with trace_call("text", task_type, model_name, api_base_url) as trace:
+        result = await run_with_retry(
+            _make_retry_decorator(), lambda: _do_text_request(client), tracker, url=url
+        )
+        trace.attempts = tracker.attempts
+    if cache is not None:
+        await cache.set(cache_key, result)
+    return result
+
+
+def _parse_sse_delta(data: str, trace: CallTrace | None = None) -> str:
+    """解析单条 SSE data 负载，返回 choices[0].delta.content（可能为空串）。
+
+    分片携带 usage 时记入 trace；仅含 usage、choices 为空的结尾分片返回空串。
+    """
+    try:
+        chunk = json.loads(data)
+    except json.JSONDecodeError as exc:
+        raise AiParseError(f"AI 流式分片不是有效 JSON: {exc}") from exc
+    if isinstance(chunk, dict) and chunk.get("usage"):
+        if trace is not None:
+            trace.observe_usage(chunk["usage"])
+        if not chunk.get("choices"):
+            return ""
+    try:
+        choice = chunk["choices"][0]
+    except (KeyError, IndexError, TypeError) as exc:
+        raise AiParseError(f"AI 流式分片结构异常: {exc}") from exc
+    delta = choice.get("delta") or choice.get("message") or {}
+    return delta.get("content") or ""
+
+
+async def _iter_stream_deltas(
+    response: httpx.Response, trace: CallTrace | None = None
+) -> AsyncIterator[str]:
+    """逐条产出流式响应的非空增量文本。
+
+    流末尾的 usage 分片（stream_options.include_usage 要求，choices 为空）只记入 trace，不产出文本。
+    兼容不支持流式、直接返回完整 JSON 的服务端：按 call_ai_text 的格式一次性产出。
+    """
+    content_type = response.headers.get("content-type", "")
+    if "application/json" in content_type:
+        try:
+            body = json.loads(await response.aread())
+        except ValueError as exc:  # JSONDecodeError / 非 UTF-8 响应体
+            raise AiParseError(f"AI 响应不是有效 JSON: {exc}") from exc
+        if trace is not None:
+            trace.observe_usage(body.get("usage") if isinstance(body, dict) else None)
+        try:
+            content_str = body["choices"][0]["message"]["content"]
+        except (KeyError, IndexError, TypeError) as exc:
+            raise AiParseError(f"AI 响应结构异常: {exc}") from exc
+        if content_str:
+            yield content_str
+        return
+
+    async for line in response.aiter_lines():
+        line = line.strip()
+        if not line.startswith("data:"):
+            continue  # 空行 / 注释 / event: 等字段
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            return
+        delta = _parse_sse_delta(data, trace)
+        if delta:
+            yield delta
+
+
+async def call_ai_text_stream(
+    messages: list[dict],
+    api_base_url: str,
+    api_key: str,
+    model_name: str = "gpt-4o-mini",
+    *,
+    task_type: str | None = None,
+    refresh: bool = False,
+    _client: httpx.AsyncClient | None = None,
+) -> AsyncIterator[str]:
+    """以流式（SSE）发送 Chat Completions 请求，逐段产出增量文本。
+
+    与 call_ai_text() 语义一致：首个 token 之前的瞬时错误（超时、连接重置、429、5xx）
+    按 _make_retry_decorator 重试；一旦产出首个 token，后续错误不再重试，
+    直接抛出（调用方已展示部分内容，重试会导致文本重复）。
+    首个 token 的前导空白会被去除，拼接全部增量即得到完整文本。
+    与 call_ai_text() 共用缓存：命中时一次性产出完整文本；完整读完流后写入缓存。
+
+    Yields:
+        增量文本片段（非空）。
+
+    Raises:
+        AiCallError: HTTP 请求失败或超时。
+        AiParseError: 分片结构异常或内容为空。
+    """
+    url = api_base_url.rstrip("/") + "/chat/completions"
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json",
+        "Accept": "text/event-stream",
+    }
+    payload = {
+        "model": model_name,
+        "messages": messages,
+        "stream": True,
+        # 要求服务端在流末尾附带 usage 分片（choices 为空），供遥测统计 token
+        "stream_options": {"include_usage": True},
+    }
+    cache = get_response_cache() if cache_enabled_for(task_type) else None
+    cache_key = make_cache_key("text", api_base_url, api_key, model_name, messages)
+    if cache is not None and not refresh:
+        cached = await cache.get(cache_key)
+        if cached is not None:
+            record_cache_hit("stream", task_type, model_name, api_base_url)
+            yield cached
+            return
+
+    client = _client if _client is not None else get_http_client(api_base_url)
+
+    tracker = RetryTracker()
+
+    async def _send() -> httpx.Response:
+        request = client.build_request(
+            "POST", url, headers=headers, json=payload, timeout=tracker.attempt_timeout()
+        )
+        return await client.send(request, stream=True)
+
+    async def _open_stream() -> tuple[Callable[[], Awaitable[None]], AsyncIterator[str], str]:
+        tracker.begin_attempt()
+        try:
+            response, limiter = await send_limited(
+                api_base_url, api_key, _send, hold=True, deadline=tracker.deadline
+            )
+        except httpx.RequestError as exc:
+            raise transport_error(exc) from exc
+        trace.observe_response(response)
 
-    if _client is not None:
-        return await _text_request_with_retry(_client)
+        async def _close() -> None:
+            """关闭流式响应并归还限流并发名额（流读完前一直占用）。"""
+            try:
+                await response.aclose()
+            finally:
+                if limiter is not None:
+                    limiter.release()
+
+        if response.status_code >= 400:
+            await response.aread()
+            await _close()
+            err_detail = _error_detail(response)
+            logger.error(
+                "AI 接口返回错误",
+                extra={
+                    "status_code": response.status_code,
+                    "url": url,
+                    "error_detail": err_detail,
+                },
+            )
+            raise http_status_error(response.status_code, err_detail)
+
+        deltas = _iter_stream_deltas(response, trace)
+        try:
+            first = ""
+            while not first:
+                first = (await anext(deltas)).lstrip()
+        except StopAsyncIteration:
+            await _close()
+            raise AiParseError("AI 返回内容为空") from None
+        except httpx.RequestError as exc:
+            await _close()
+            raise transport_error(exc) from exc
+        except BaseException:
+            await _close()
+            raise
+        return _close, deltas, first
+
+    async with trace_call("stream", task_type, model_name, api_base_url) as trace:
+        close_stream, deltas, first = await run_with_retry(
+            _make_retry_decorator(), _open_stream, tracker, url=url
+        )
+        trace.attempts = tracker.attempts
+        parts = [first]
+        try:
+            yield first
+            async for delta in deltas:
+                parts.append(delta)
+                yield delta
+        except httpx.TimeoutException as exc:
+            raise AiCallError(f"AI 流式响应超时: {exc}") from exc
+        except httpx.RequestError as exc:
+            raise AiCallError(f"AI 流式响应中断: {exc}") from exc
+        finally:
+            await close_stream()
 
-    async with httpx.AsyncClient() as client:
-        return await _text_request_with_retry(client)
+    if cache is not None:
+        await cache.set(cache_key, "".join(parts).strip())
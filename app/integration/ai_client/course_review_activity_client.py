@@ -84,6 +84,34 @@ def _build_user_content(context: dict) -> str:
     )
 
 
+def _validate_result(result: dict) -> None:
+    """校验字段齐全、布尔字段类型与必填文本非空（不通过则不写入 AI 响应缓存）。"""
+    missing = [key for key in _REQUIRED_KEYS if key not in result]
+    if missing:
+        logger.info(
+            "课程审议生成结果缺少必要字段",
+            extra={"missing_keys": missing, "result_keys": list(result.keys())},
+        )
+        raise AiParseError(f"课程审议生成结果缺少必要字段: {missing}")
+
+    bool_errors = [key for key in _REQUIRED_BOOL_KEYS if not isinstance(result[key], bool)]
+    if bool_errors:
+        logger.info("课程审议生成结果布尔字段类型错误", extra={"keys": bool_errors})
+        raise AiParseError(f"课程审议生成结果布尔字段类型错误: {bool_errors}")
+
+    empty_keys = [
+        key for key in _NON_EMPTY_STRING_KEYS if not str(result[key]).strip()
+    ]
+    if result["goal_adjusted"] and not str(result["goal_adjustment"]).strip():
+        empty_keys.append("goal_adjustment")
+    if result["prep_adjusted"] and not str(result["prep_adjustment"]).strip():
+        empty_keys.append("prep_adjustment")
+
+    if empty_keys:
+        logger.info("课程审议生成结果存在空字段", extra={"empty_keys": empty_keys})
+        raise AiParseError(f"课程审议生成结果字段为空: {empty_keys}")
+
+
 async def generate_course_review_activity(
     context: dict,
     api_base_url: str,
@@ -109,47 +137,15 @@ async def generate_course_review_activity(
         api_base_url=api_base_url,
         api_key=api_key,
         model_name=model_name,
+        task_type="course_review_activity",
+        validate=_validate_result,
         _client=_client,
     )
 
-    missing = [key for key in _REQUIRED_KEYS if key not in result]
-    if missing:
-        logger.info(
-            "课程审议生成结果缺少必要字段",
-            extra={"missing_keys": missing, "result_keys": list(result.keys())},
-        )
-        raise AiParseError(f"课程审议生成结果缺少必要字段: {missing}")
-
-    normalized: dict[str, object] = {}
-    empty_keys: list[str] = []
-    for key in _REQUIRED_STRING_KEYS:
-        value = result[key]
-        if not isinstance(value, str):
-            value = str(value)
-        value = value.strip()
-        if key in _NON_EMPTY_STRING_KEYS and not value:
-            empty_keys.append(key)
-        normalized[key] = value
-
-    bool_errors: list[str] = []
-    for key in _REQUIRED_BOOL_KEYS:
-        value = result[key]
-        if not isinstance(value, bool):
-            bool_errors.append(key)
-        normalized[key] = value
-
-    if bool_errors:
-        logger.info("课程审议生成结果布尔字段类型错误", extra={"keys": bool_errors})
-        raise AiParseError(f"课程审议生成结果布尔字段类型错误: {bool_errors}")
-
-    if normalized["goal_adjusted"] and not normalized["goal_adjustment"]:
-        empty_keys.append("goal_adjustment")
-    if normalized["prep_adjusted"] and not normalized["prep_adjustment"]:
-        empty_keys.append("prep_adjustment")
-
-    if empty_keys:
-        logger.info("课程审议生成结果存在空字段", extra={"empty_keys": empty_keys})
-        raise AiParseError(f"课程审议生成结果字段为空: {empty_keys}")
+    normalized: dict[str, object] = {
+        key: str(result[key]).strip() for key in _REQUIRED_STRING_KEYS
+    }
+    normalized.update({key: result[key] for key in _REQUIRED_BOOL_KEYS})
 
     logger.info("课程审议生成成功", extra={"keys": list(_REQUIRED_KEYS)})
     return {key: normalized[key] for key in _REQUIRED_KEYS}
@@ -8,9 +8,11 @@
 - daily_reflection  →  一日活动反思
 """
 
+from collections.abc import AsyncIterator
+
 from app.core.exceptions import AiParseError
 from app.core.logging import get_logger
-from app.integration.ai_client.base import call_ai_text
+from app.integration.ai_client.base import call_ai_text, call_ai_text_stream
 
 logger = get_logger(__name__)
 
@@ -244,6 +246,21 @@ def _build_user_content(task_type: str, context: dict) -> str:
     return f"{prefix}请根据以上信息生成内容。"
 
 
+def _build_messages(task_type: str, context: dict, system_prompt: str | None) -> list[dict]:
+    """组装 system + user 消息；system_prompt 为 None 时取内置默认。
+
+    Raises:
+        AiParseError: 不支持的任务类型。
+    """
+    prompt = system_prompt if system_prompt is not None else GENERATE_DEFAULTS.get(task_type)
+    if not prompt:
+        raise AiParseError(f"不支持的活动生成任务类型: {task_type}")
+    return [
+        {"role": "system", "content": prompt},
+        {"role": "user", "content": _build_user_content(task_type, context)},
+    ]
+
+
 async def generate_activity(
     task_type: str,
     context: dict,
@@ -252,6 +269,7 @@ async def generate_activity(
     model_name: str = "gpt-4o-mini",
     system_prompt: str | None = None,
     *,
+    refresh: bool = False,
     _client=None,
 ) -> str:
     """生成单项一日活动内容（纯文本输出）。
@@ -262,6 +280,7 @@ async def generate_activity(
         context: 上下文信息 dict（grade、class_name、indoor_areas 等）。
         api_base_url / api_key / model_name: AI 接口参数。
         system_prompt: 自定义 system prompt；传 None 时使用对应内置默认。
+        refresh: True 时跳过 AI 响应缓存（「重新生成」）。
         _client: 可选 httpx 客户端（测试用）。
 
     Returns:
@@ -271,22 +290,48 @@ async def generate_activity(
         AiParseError: 不支持的任务类型或返回内容为空。
         AiCallError: AI 接口调用失败。
     """
-    prompt = system_prompt if system_prompt is not None else GENERATE_DEFAULTS.get(task_type)
-    if not prompt:
-        raise AiParseError(f"不支持的活动生成任务类型: {task_type}")
-
-    user_content = _build_user_content(task_type, context)
-    messages = [
-        {"role": "system", "content": prompt},
-        {"role": "user", "content": user_content},
-    ]
+    messages = _build_messages(task_type, context, system_prompt)
 
     result = await call_ai_text(
         messages=messages,
         api_base_url=api_base_url,
         api_key=api_key,
         model_name=model_name,
+        task_type=task_type,
+        refresh=refresh,
         _client=_client,
     )
     logger.info("活动内容生成成功", extra={"task_type": task_type, "length": len(result)})
     return result
+
+
+async def generate_activity_stream(
+    task_type: str,
+    context: dict,
+    api_base_url: str,
+    api_key: str,
+    model_name: str = "gpt-4o-mini",
+    system_prompt: str | None = None,
+    *,
+    refresh: bool = False,
+    _client=None,
+) -> AsyncIterator[str]:
+    """流式生成单项一日活动内容，逐段产出增量文本。
+
+    参数与 generate_activity 相同；拼接全部增量即为完整内容（末尾空白由调用方 strip）。
+
+    Raises:
+        AiParseError: 不支持的任务类型或返回内容为空。
+        AiCallError: AI 接口调用失败。
+    """
+    messages = _build_messages(task_type, context, system_prompt)
+    async for delta in call_ai_text_stream(
+        messages=messages,
+        api_base_url=api_base_url,
+        api_key=api_key,
+        model_name=model_name,
+        task_type=task_type,
+        refresh=refresh,
+        _client=_client,
+    ):
+        yield delta
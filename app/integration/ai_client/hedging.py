@@ -0,0 +1,160 @@
+"""多服务商对冲请求（hedged requests）与顺序降级。
+
+AiApiKey 可配置按优先级排列的备用服务商列表。调用时先向主服务商发请求：
+- 在「对冲延迟」内仍未返回 → 向下一个服务商再发一份，谁先成功用谁，其余取消
+- 某服务商直接失败 → 立即改用下一个（不必等待对冲延迟）
+- 全部失败 → 抛出主服务商的异常
+
+对冲延迟取该服务商近期成功耗时的第 AI_HEDGE_PERCENTILE 百分位
+（样本不足 AI_HEDGE_MIN_SAMPLES 时用 AI_HEDGE_DELAY_SECONDS），
+使只有尾部慢请求才会触发第二份请求，额外开销约为 (100 - 百分位)%。
+胜出服务商写日志并计入 `hedge_stats()`。
+"""
+
+import asyncio
+import math
+import time
+from collections import Counter, deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import TypeVar
+
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class AiProvider:
+    """一个可调用的 AI 服务商（接口地址 + 模型 + 明文 Key）。"""
+
+    api_base_url: str
+    model_name: str
+    api_key: str = field(repr=False)
+
+    @property
+    def label(self) -> str:
+        """日志 / 统计用标识（不含 Key）。"""
+        return f"{self.api_base_url.rstrip('/')}#{self.model_name}"
+
+
+# 服务商标识 → 最近成功耗时（秒）
+_latencies: dict[str, deque[float]] = {}
+_wins: Counter[str] = Counter()
+_counters = {"calls": 0, "hedges": 0, "fallbacks": 0}
+
+
+def record_latency(label: str, seconds: float) -> None:
+    window = _latencies.setdefault(label, deque(maxlen=settings.AI_HEDGE_WINDOW))
+    window.append(seconds)
+
+
+def latency_percentile(label: str, pct: float) -> float | None:
+    """返回该服务商近期耗时的 pct 百分位；样本不足返回 None。"""
+    samples = _latencies.get(label)
+    if not samples or len(samples) < settings.AI_HEDGE_MIN_SAMPLES:
+        return None
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[idx]
+
+
+def hedge_delay(provider: AiProvider) -> float:
+    """等待该服务商多久后发起对冲请求。"""
+    observed = latency_percentile(provider.label, settings.AI_HEDGE_PERCENTILE)
+    if observed is None:
+        return settings.AI_HEDGE_DELAY_SECONDS
+    return max(observed, settings.AI_HEDGE_MIN_DELAY_SECONDS)
+
+
+def hedge_stats() -> dict:
+    """返回对冲统计：调用数、对冲次数、降级次数、各服务商胜出次数。"""
+    return {**_counters, "wins": dict(_wins)}
+
+
+def reset_hedge_state() -> None:
+    """清空耗时样本与统计（测试用）。"""
+    _latencies.clear()
+    _wins.clear()
+    for key in _counters:
+        _counters[key] = 0
+
+
+async def hedged_call(
+    providers: list[AiProvider],
+    call: Callable[[AiProvider], Awaitable[T]],
+) -> T:
+    """按优先级对 providers 执行对冲 / 降级调用，返回最先成功的结果。
+
+    Args:
+        providers: 主服务商在前的服务商列表（至少 1 个）。
+        call: 针对单个服务商发起完整调用（含其自身重试）的协程工厂。
+
+    Raises:
+        主服务商的异常（全部服务商均失败时）。
+    """
+    _counters["calls"] += 1
+    pending: dict[asyncio.Task, tuple[int, float]] = {}
+    errors: dict[int, BaseException] = {}
+    next_index = 0
+
+    def _launch() -> None:
+        nonlocal next_index
+        provider = providers[next_index]
+        task = asyncio.ensure_future(call(provider))
+        pending[task] = (next_index, time.monotonic())
+        next_index += 1
+
+    _launch()
+    try:
+        while pending:
+            can_hedge = settings.AI_HEDGE_ENABLED and next_index < len(providers)
+            timeout = hedge_delay(providers[next_index - 1]) if can_hedge else None
+            done, _ = await asyncio.wait(
+                pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                _counters["hedges"] += 1
+                logger.info(
+                    "AI 请求超过对冲延迟，向备用服务商发起对冲请求",
+                    extra={"provider": providers[next_index].label, "delay": round(timeout, 2)},
+                )
+                _launch()
+                continue
+
+            for task in done:
+                index, started = pending.pop(task)
+                provider = providers[index]
+                if task.exception() is None:
+                    elapsed = time.monotonic() - started
+                    record_latency(provider.label, elapsed)
+                    _wins[provider.label] += 1
+                    logger.info(
+                        "AI 服务商胜出",
+                        extra={
+                            "provider": provider.label,
+                            "provider_index": index,
+                            "elapsed_ms": int(elapsed * 1000),
+                            "launched": next_index,
+                        },
+                    )
+                    return task.result()
+                errors[index] = task.exception()
+                logger.warning(
+                    "AI 服务商调用失败",
+                    extra={"provider": provider.label, "error": str(errors[index])},
+                )
+
+            if not pending and next_index < len(providers):
+                _counters["fallbacks"] += 1
+                _launch()
+
+        raise errors[min(errors)]
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
@@ -39,6 +39,22 @@ def _build_user_content(context: dict) -> str:
     )
 
 
+def _validate_result(result: dict) -> None:
+    """校验必要字段齐全且非空（不通过则不写入 AI 响应缓存）。"""
+    missing = [key for key in _REQUIRED_KEYS if key not in result]
+    if missing:
+        logger.info(
+            "自制教玩具生成结果缺少必要字段",
+            extra={"missing_keys": missing, "result_keys": list(result.keys())},
+        )
+        raise AiParseError(f"自制教玩具生成结果缺少必要字段: {missing}")
+
+    empty_keys = [key for key in _REQUIRED_KEYS if not str(result[key]).strip()]
+    if empty_keys:
+        logger.info("自制教玩具生成结果存在空字段", extra={"empty_keys": empty_keys})
+        raise AiParseError(f"自制教玩具生成结果字段为空: {empty_keys}")
+
+
 async def generate_homemade_teaching(
     context: dict,
     api_base_url: str,
@@ -60,31 +76,11 @@ async def generate_homemade_teaching(
         api_base_url=api_base_url,
         api_key=api_key,
         model_name=model_name,
+        task_type="homemade_teaching",
+        validate=_validate_result,
         _client=_client,
     )
 
-    missing = [key for key in _REQUIRED_KEYS if key not in result]
-    if missing:
-        logger.info(
-            "自制教玩具生成结果缺少必要字段",
-            extra={"missing_keys": missing, "result_keys": list(result.keys())},
-        )
-        raise AiParseError(f"自制教玩具生成结果缺少必要字段: {missing}")
-
-    normalized: dict[str, str] = {}
-    empty_keys: list[str] = []
-    for key in _REQUIRED_KEYS:
-        value = result[key]
-        if not isinstance(value, str):
-            value = str(value)
-        value = value.strip()
-        if not value:
-            empty_keys.append(key)
-        normalized[key] = value
-
-    if empty_keys:
-        logger.info("自制教玩具生成结果存在空字段", extra={"empty_keys": empty_keys})
-        raise AiParseError(f"自制教玩具生成结果字段为空: {empty_keys}")
-
+    normalized = {key: str(result[key]).strip() for key in _REQUIRED_KEYS}
     logger.info("自制教玩具生成成功", extra={"keys": list(_REQUIRED_KEYS)})
     return normalized
@@ -0,0 +1,106 @@
+"""HTTP 连接池 — 进程级共享 httpx.AsyncClient 注册表（AI 调用与远端图片存储共用此实现）。
+
+每个 (连接池名, base_url) 对应一个长生命周期客户端，复用 TCP/TLS 连接（keep-alive），
+避免每次请求都重新握手。
+
+特性：
+- 命名连接池互相隔离：AI_POOL（AI 调用，默认）与 STORAGE_POOL（s3 图片后端）各有各的客户端
+  与连接上限，大图片上传 / 下载不占用 AI 调用的连接
+- 按规范化后的 base_url 分组；同一事件循环内复用同一客户端
+- AI_POOL 的上限 / keep-alive 过期时间取 AI_POOL_* 配置；AI_HTTP2=true 且已安装 h2 时启用
+  HTTP/2 多路复用，未安装则降级 HTTP/1.1 并告警。STORAGE_POOL 用 httpx 默认上限、HTTP/1.1
+- `close_all_clients` 在应用关闭时统一释放全部连接池（app.main 注册到 on_shutdown）
+"""
+
+import asyncio
+
+import httpx
+
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+AI_POOL = "ai"
+STORAGE_POOL = "storage"
+
+# (连接池名, 规范化 base_url) → (客户端, 所属事件循环)
+_clients: dict[tuple[str, str], tuple[httpx.AsyncClient, asyncio.AbstractEventLoop]] = {}
+
+
+def _normalize_base_url(api_base_url: str) -> str:
+    """去除尾部斜杠并小写 scheme/host 部分，作为注册表键。"""
+    url = httpx.URL(api_base_url.rstrip("/"))
+    return str(url.copy_with(scheme=url.scheme.lower(), host=url.host.lower()))
+
+
+def _http2_enabled() -> bool:
+    """配置开启 HTTP/2 且 h2 可导入时返回 True。"""
+    if not settings.AI_HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logger.warning("AI_HTTP2 已开启但未安装 h2（pip install httpx[http2]），降级为 HTTP/1.1")
+        return False
+    return True
+
+
+def _build_ai_client(key: str) -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=settings.AI_POOL_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.AI_POOL_MAX_KEEPALIVE,
+        keepalive_expiry=settings.AI_POOL_KEEPALIVE_EXPIRY,
+    )
+    http2 = _http2_enabled()
+    logger.info("创建 AI HTTP 连接池", extra={"base_url": key, "http2": http2})
+    return httpx.AsyncClient(limits=limits, http2=http2)
+
+
+def _build_storage_client(key: str) -> httpx.AsyncClient:
+    logger.info("创建图片存储 HTTP 连接池", extra={"base_url": key})
+    return httpx.AsyncClient(limits=httpx.Limits())
+
+
+# 连接池名 → 客户端构造函数（决定连接上限与协议）
+_BUILDERS = {AI_POOL: _build_ai_client, STORAGE_POOL: _build_storage_client}
+
+
+def get_http_client(api_base_url: str, *, pool: str = AI_POOL) -> httpx.AsyncClient:
+    """返回连接池 pool 中 api_base_url 对应的共享客户端（不存在或已失效时新建）。
+
+    httpx 连接绑定创建时的事件循环；若当前运行的循环与缓存客户端不同
+    （如测试中每个用例一个循环），则重建客户端，旧客户端交由 GC 回收。
+
+    Args:
+        api_base_url: 接口基地址（AI 接口 / 对象存储 endpoint）。
+        pool: 连接池名（AI_POOL / STORAGE_POOL）。
+
+    Returns:
+        可直接复用的 httpx.AsyncClient（调用方禁止 aclose）。
+    """
+    key = (pool, _normalize_base_url(api_base_url))
+    loop = asyncio.get_running_loop()
+    entry = _clients.get(key)
+    if entry is not None:
+        client, owner_loop = entry
+        if not client.is_closed and owner_loop is loop:
+            return client
+
+    client = _BUILDERS[pool](key[1])
+    _clients[key] = (client, loop)
+    return client
+
+
+async def close_all_clients() -> None:
+    """关闭全部共享客户端并清空注册表（应用关闭时调用，可重复调用）。"""
+    entries = list(_clients.values())
+    _clients.clear()
+    loop = asyncio.get_running_loop()
+    for client, owner_loop in entries:
+        if client.is_closed or owner_loop is not loop:
+            continue
+        try:
+            await client.aclose()
+        except Exception as exc:
+            logger.warning("关闭共享 HTTP 客户端失败", extra={"error": str(exc)})
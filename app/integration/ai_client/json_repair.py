@@ -0,0 +1,157 @@
+"""AI 结构化输出的快速解析与本地修复。
+
+模型偶尔在 JSON 外包一层 ```json 代码块、前后夹带说明文字或留下尾随逗号；
+这类内容本地即可修复，无需重新请求（重新请求要再等一次完整生成）。
+
+解析顺序：
+1. 直接解析（安装了 orjson 时使用 orjson，否则标准库 json）
+2. 本地修复：去 BOM / 代码块围栏 → 截取最外层 {...} → 删除 } ] 前的尾随逗号 → 再解析
+3. 仍失败时由调用方（base.call_ai / vision_base.call_ai_vision）发一次廉价的「修复此 JSON」追问
+
+各阶段计数经 `repair_stats()` 暴露（/api/v1/ai/telemetry 的 json_repair 字段）：每份 AI 内容恰好计入
+direct / repaired / reasked / failed 之一；追问请求自身的解析不计数（record=False），
+failed 在最终抛出 AiParseError 处计数（含不值得追问、追问关闭与追问失败）。
+"""
+
+import json
+import re
+from typing import Any
+
+from app.core.logging import get_logger
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson 为可选加速依赖
+    orjson = None
+
+logger = get_logger(__name__)
+
+_FENCE = re.compile(r"^\s*```[a-zA-Z0-9_-]*\s*\n?(.*?)\n?\s*```\s*$", re.S)
+_TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+
+_counters = {"direct": 0, "repaired": 0, "reasked": 0, "failed": 0}
+
+
+def loads(data: str | bytes) -> Any:
+    """解析 JSON 文本；orjson 可用时使用 orjson。
+
+    Raises:
+        ValueError: 内容不是合法 JSON（json.JSONDecodeError 与 orjson.JSONDecodeError 均为其子类）。
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _strip_fence(text: str) -> str:
+    match = _FENCE.match(text)
+    return match.group(1) if match else text
+
+
+def _outermost_object(text: str) -> str | None:
+    """返回第一个 { 与其配对 } 之间的文本（忽略字符串内的括号）；无完整对象时返回 None。"""
+    start = text.find("{")
+    if start < 0:
+        return None
+    depth = 0
+    in_string = False
+    escaped = False
+    for idx in range(start, len(text)):
+        ch = text[idx]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                return text[start:idx + 1]
+    return None
+
+
+def _remove_trailing_commas(text: str) -> str:
+    """删除 } / ] 前的多余逗号（跳过字符串内部）。"""
+    out: list[str] = []
+    pos = 0
+    for match in re.finditer(r'"(?:[^"\\]|\\.)*"', text, re.S):
+        out.append(_TRAILING_COMMA.sub(r"\1", text[pos:match.start()]))
+        out.append(match.group(0))
+        pos = match.end()
+    out.append(_TRAILING_COMMA.sub(r"\1", text[pos:]))
+    return "".join(out)
+
+
+def repair_json_text(text: str) -> str | None:
+    """对常见格式问题做本地修复，返回修复后的文本；找不到 JSON 对象时返回 None。"""
+    candidate = _outermost_object(_strip_fence(text.lstrip("\ufeff").strip()))
+    if candidate is None:
+        return None
+    return _remove_trailing_commas(candidate)
+
+
+def parse_json_object(text: str, *, record: bool = True) -> dict:
+    """把 AI 返回的 content 解析为 dict，必要时本地修复。
+
+    Args:
+        text: AI 返回的 content。
+        record: 是否计入 direct / repaired（「修复此 JSON」追问的响应传 False，结果记为 reasked）。
+
+    Raises:
+        ValueError: 直接解析与本地修复均失败，或结果不是 JSON 对象。
+    """
+    if not isinstance(text, str):
+        raise ValueError("内容不是字符串")
+    try:
+        result = loads(text)
+    except ValueError:
+        pass
+    else:
+        if isinstance(result, dict):
+            if record:
+                _counters["direct"] += 1
+            return result
+
+    repaired = repair_json_text(text)
+    if repaired is None:
+        raise ValueError("内容中没有 JSON 对象")
+    result = loads(repaired)
+    if not isinstance(result, dict):
+        raise ValueError("内容不是 JSON 对象")
+    if record:
+        _counters["repaired"] += 1
+    logger.info("AI 返回 JSON 已本地修复", extra={"original_len": len(text)})
+    return result
+
+
+def is_reaskable(text: object) -> bool:
+    """本地修复失败的内容是否值得追问：只有含 { 的（残缺 JSON）才追问，纯文本回答不追问。"""
+    return isinstance(text, str) and "{" in text
+
+
+def record_reask() -> None:
+    """记录一次经「修复此 JSON」追问修复成功的内容。"""
+    _counters["reasked"] += 1
+
+
+def record_failure() -> None:
+    """记录一次最终解析失败（抛出 AiParseError）的内容。"""
+    _counters["failed"] += 1
+
+
+def repair_stats() -> dict:
+    """返回解析计数与修复率（本地修复 + 追问修复占全部解析的比例）。"""
+    total = sum(_counters.values())
+    fixed = _counters["repaired"] + _counters["reasked"]
+    return {**_counters, "repair_rate": round(fixed / total, 4) if total else 0.0}
+
+
+def reset_repair_stats() -> None:
+    for key in _counters:
+        _counters[key] = 0
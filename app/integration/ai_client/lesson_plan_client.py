@@ -54,6 +54,17 @@ _REQUIRED_KEYS = [
 ]
 
 
+def _validate_result(result: dict) -> None:
+    """校验拆分结果包含全部必要字段（不通过则不写入 AI 响应缓存）。"""
+    missing = [k for k in _REQUIRED_KEYS if k not in result]
+    if missing:
+        logger.info(
+            "教案拆分结果缺少必要字段",
+            extra={"missing_keys": missing, "result_keys": list(result.keys())},
+        )
+        raise AiParseError(f"教案拆分结果缺少必要字段: {missing}")
+
+
 async def split_lesson_plan(
     raw_text: str,
     api_base_url: str,
@@ -93,18 +104,11 @@ async def split_lesson_plan(
         api_base_url=api_base_url,
         api_key=api_key,
         model_name=model_name,
+        task_type="split",
+        validate=_validate_result,
         _client=_client,
     )
 
-    # 验证必要字段
-    missing = [k for k in _REQUIRED_KEYS if k not in result]
-    if missing:
-        logger.info(
-            "教案拆分结果缺少必要字段",
-            extra={"missing_keys": missing, "result_keys": list(result.keys())},
-        )
-        raise AiParseError(f"教案拆分结果缺少必要字段: {missing}")
-
     # 确保所有值均为字符串
     for key in _REQUIRED_KEYS:
         if not isinstance(result[key], str):
@@ -11,11 +11,11 @@
 提示词优先级：调用方传入 system_prompt（提示词管理激活版本）> 内置 DEFAULT_LISTENING_PROMPT。
 """
 
-import base64
-
 from app.core.exceptions import AiParseError, AppError
 from app.core.logging import get_logger
+from app.integration.ai_client.hedging import AiProvider
 from app.integration.ai_client.vision_base import call_ai_vision
+from app.integration.ai_client.vision_profile import vision_image_parts
 
 logger = get_logger(__name__)
 
@@ -50,31 +50,6 @@ _REQUIRED_KEYS = [
     "support_strategy",
 ]
 
-# 图片格式 magic bytes 映射
-_MIME_MAGIC: list[tuple[bytes, str]] = [
-    (b"\xff\xd8\xff", "image/jpeg"),
-    (b"\x89PNG\r\n\x1a\n", "image/png"),
-    (b"GIF87a", "image/gif"),
-    (b"GIF89a", "image/gif"),
-    (b"RIFF", "image/webp"),
-]
-
-
-def _detect_mime(image_bytes: bytes) -> str:
-    """根据文件头检测图片 MIME 类型，无法识别时默认 image/jpeg。"""
-    for magic, mime in _MIME_MAGIC:
-        if image_bytes[:len(magic)] == magic:
-            return mime
-    return "image/jpeg"
-
-
-def _image_to_data_url(image_bytes: bytes) -> str:
-    """将图片字节转为 base64 data-url 字符串。"""
-    mime = _detect_mime(image_bytes)
-    b64 = base64.b64encode(image_bytes).decode("ascii")
-    return f"data:{mime};base64,{b64}"
-
-
 def _build_context_text(context: dict, indicators: list[dict]) -> str:
     """构造给 AI 的说明文本（上下文 + 二级指标清单）。"""
     domain = context.get("domain", "")
@@ -103,6 +78,26 @@ def _build_context_text(context: dict, indicators: list[dict]) -> str:
     return "\n".join(parts)
 
 
+def _validate_result(result: dict, image_count: int) -> None:
+    """校验字段齐全、图片描述数量与图片一致（不通过则不写入 AI 响应缓存）。"""
+    missing = [k for k in _REQUIRED_KEYS if k not in result or result[k] is None]
+    if missing:
+        logger.info("一对一倾听 AI 返回缺少必要字段", extra={"missing_keys": missing})
+        raise AiParseError(f"一对一倾听 AI 返回缺少必要字段: {missing}")
+
+    descriptions = result["image_descriptions"]
+    if not isinstance(descriptions, list) or len(descriptions) != image_count:
+        logger.info(
+            "一对一倾听 AI 图片描述数量与图片不符",
+            extra={"desc_count": len(descriptions) if isinstance(descriptions, list) else -1,
+                   "image_count": image_count},
+        )
+        raise AiParseError("一对一倾听 AI 返回的图片描述数量与图片数量不一致")
+
+    if not isinstance(result["indicators"], list):
+        raise AiParseError("一对一倾听 AI 返回的 indicators 不是数组")
+
+
 async def generate_listening_domain(
     images: list[bytes],
     context: dict,
@@ -112,6 +107,7 @@ async def generate_listening_domain(
     model_name: str = "gpt-4o",
     system_prompt: str | None = None,
     *,
+    fallbacks: list[AiProvider] | None = None,
     _client=None,
 ) -> dict:
     """调用视觉 AI 生成某领域的一对一倾听结构化内容。
@@ -124,6 +120,7 @@ async def generate_listening_domain(
         api_key: 明文 API Key。
         model_name: 视觉模型名称。
         system_prompt: 系统提示词，优先级高于内置默认值。
+        fallbacks: 可选备用服务商（按优先级），主服务商慢或失败时对冲 / 降级。
         _client: 可选 httpx 客户端（测试用）。
 
     Returns:
@@ -142,10 +139,8 @@ async def generate_listening_domain(
     user_content: list[dict] = [
         {"type": "text", "text": _build_context_text(context, indicators)},
     ]
-    for img_bytes in images:
-        user_content.append(
-            {"type": "image_url", "image_url": {"url": _image_to_data_url(img_bytes)}}
-        )
+    # 按模型档案缩放的 AI 专用副本（data-url 按图片哈希缓存，重新生成不再编码）
+    user_content.extend(await vision_image_parts(images, model_name))
 
     messages = [
         {"role": "system", "content": prompt},
@@ -157,25 +152,10 @@ async def generate_listening_domain(
         api_base_url=api_base_url,
         api_key=api_key,
         model_name=model_name,
+        task_type="one_on_one_listening",
+        validate=lambda r: _validate_result(r, len(images)),
+        fallbacks=fallbacks,
         _client=_client,
     )
 
-    # 校验必要字段
-    missing = [k for k in _REQUIRED_KEYS if k not in result or result[k] is None]
-    if missing:
-        logger.info("一对一倾听 AI 返回缺少必要字段", extra={"missing_keys": missing})
-        raise AiParseError(f"一对一倾听 AI 返回缺少必要字段: {missing}")
-
-    descriptions = result["image_descriptions"]
-    if not isinstance(descriptions, list) or len(descriptions) != len(images):
-        logger.info(
-            "一对一倾听 AI 图片描述数量与图片不符",
-            extra={"desc_count": len(descriptions) if isinstance(descriptions, list) else -1,
-                   "image_count": len(images)},
-        )
-        raise AiParseError("一对一倾听 AI 返回的图片描述数量与图片数量不一致")
-
-    if not isinstance(result["indicators"], list):
-        raise AiParseError("一对一倾听 AI 返回的 indicators 不是数组")
-
     return {k: result[k] for k in _REQUIRED_KEYS}
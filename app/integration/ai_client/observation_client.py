@@ -14,16 +14,16 @@
     2. 若无，使用内置默认 DEFAULT_OBSERVATION_PROMPT
 
 图片处理：
-    - 图片字节转为 base64 data-url（data:image/jpeg;base64,...）
-    - 支持 JPEG / PNG 格式（自动检测文件头）
+    - 按模型的视觉档案（vision_profile）缩放出 AI 专用副本，转为 base64 data-url；存档图片不变
+    - 无法解码的字节按原字节发送（MIME 由文件头检测）
     - 至少需要 1 张，最多 3 张；空列表抛 AppError
 """
 
-import base64
-
 from app.core.exceptions import AiParseError, AppError
 from app.core.logging import get_logger
+from app.integration.ai_client.hedging import AiProvider
 from app.integration.ai_client.vision_base import call_ai_vision
+from app.integration.ai_client.vision_profile import vision_image_parts
 
 logger = get_logger(__name__)
 
@@ -55,29 +55,15 @@ _REQUIRED_KEYS = [
     "support_strategy",
 ]
 
-# 图片格式 magic bytes 映射
-_MIME_MAGIC: list[tuple[bytes, str]] = [
-    (b"\xff\xd8\xff", "image/jpeg"),
-    (b"\x89PNG\r\n\x1a\n", "image/png"),
-    (b"GIF87a", "image/gif"),
-    (b"GIF89a", "image/gif"),
-    (b"RIFF", "image/webp"),  # RIFF....WEBP
-]
-
-
-def _detect_mime(image_bytes: bytes) -> str:
-    """根据文件头检测图片 MIME 类型，无法识别时默认 image/jpeg。"""
-    for magic, mime in _MIME_MAGIC:
-        if image_bytes[:len(magic)] == magic:
-            return mime
-    return "image/jpeg"
-
-
-def _image_to_data_url(image_bytes: bytes) -> str:
-    """将图片字节转为 base64 data-url 字符串。"""
-    mime = _detect_mime(image_bytes)
-    b64 = base64.b64encode(image_bytes).decode("ascii")
-    return f"data:{mime};base64,{b64}"
+def _validate_result(result: dict) -> None:
+    """校验必要字段齐全（不通过则不写入 AI 响应缓存）。"""
+    missing = [k for k in _REQUIRED_KEYS if k not in result or result[k] is None]
+    if missing:
+        logger.info(
+            "游戏观察 AI 返回结果缺少必要字段",
+            extra={"missing_keys": missing},
+        )
+        raise AiParseError(f"游戏观察 AI 返回结果缺少必要字段: {missing}")
 
 
 async def generate_observation(
@@ -88,6 +74,7 @@ async def generate_observation(
     model_name: str = "gpt-4o",
     system_prompt: str | None = None,
     *,
+    fallbacks: list[AiProvider] | None = None,
     _client=None,
 ) -> dict:
     """调用视觉 AI 生成游戏观察记录四段内容。
@@ -99,6 +86,7 @@ async def generate_observation(
         api_key: 明文 API Key。
         model_name: 视觉模型名称（如 gpt-4o、qwen-vl-plus）。
         system_prompt: 系统提示词，优先级高于内置默认值。
+        fallbacks: 可选备用服务商（按优先级），主服务商慢或失败时对冲 / 降级。
         _client: 可选 httpx 客户端（测试用）。
 
     Returns:
@@ -120,11 +108,8 @@ async def generate_observation(
         {"type": "text", "text": context_text},
     ]
 
-    for img_bytes in images:
-        data_url = _image_to_data_url(img_bytes)
-        user_content.append(
-            {"type": "image_url", "image_url": {"url": data_url}}
-        )
+    # 按模型档案缩放的 AI 专用副本（data-url 按图片哈希缓存，重新生成不再编码）
+    user_content.extend(await vision_image_parts(images, model_name))
 
     messages = [
         {"role": "system", "content": prompt},
@@ -136,18 +121,12 @@ async def generate_observation(
         api_base_url=api_base_url,
         api_key=api_key,
         model_name=model_name,
+        task_type="game_observation",
+        validate=_validate_result,
+        fallbacks=fallbacks,
         _client=_client,
     )
 
-    # 校验必要字段
-    missing = [k for k in _REQUIRED_KEYS if k not in result or result[k] is None]
-    if missing:
-        logger.info(
-            "游戏观察 AI 返回结果缺少必要字段",
-            extra={"missing_keys": missing},
-        )
-        raise AiParseError(f"游戏观察 AI 返回结果缺少必要字段: {missing}")
-
     return {k: result[k] for k in _REQUIRED_KEYS}
 
 
@@ -0,0 +1,245 @@
+"""AI 调用限流 — 按 (api_base_url, API Key) 共享的令牌桶 + 并发上限。
+
+多位教师同时「一键生成」时，所有 AI 客户端经由同一个 ProviderLimiter 排队，
+而不是无上限地并发打到同一服务商后收到大量 429。
+
+特性：
+- 令牌桶：平均速率 AI_RATE_LIMIT_RPS、突发容量 AI_RATE_LIMIT_BURST（RPS<=0 表示不限速率）
+- 并发上限：同一服务商同时在途请求数不超过 AI_RATE_LIMIT_CONCURRENCY
+- 公平排队：等待者按到达顺序（FIFO）依次获得令牌与并发名额
+- 服务端反馈：429 的 Retry-After、x-ratelimit-remaining-* / x-ratelimit-reset-* 头
+  会暂停该服务商的放行，直到窗口重置
+- 429 不直接失败：`send_limited` 重新排队最多 AI_RATE_LIMIT_MAX_REQUEUE 次，且等待不越过调用总时限
+  （deadline，即 RetryTracker.deadline）；开启限流时 429 只由这里重试，重试策略不再重复重试
+"""
+
+import asyncio
+import hashlib
+import re
+import time
+from collections.abc import Awaitable, Callable
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import httpx
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.integration.ai_client.http_pool import _normalize_base_url
+
+logger = get_logger(__name__)
+
+# OpenAI 风格重置时长，如 "1s"、"6m0s"、"20ms"、"1m30.5s"
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_UNIT_SECONDS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+# 429 未携带任何等待提示时的默认暂停时长（秒）
+_DEFAULT_THROTTLE_SECONDS = 1.0
+
+
+def _parse_duration(value: str) -> float | None:
+    """解析纯数字秒数或 "6m0s" 形式的时长，无法解析返回 None。"""
+    value = value.strip()
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts or "".join(n + u for n, u in parts) != value:
+        return None
+    return sum(float(n) * _UNIT_SECONDS[u] for n, u in parts)
+
+
+def _parse_retry_after(value: str) -> float | None:
+    """解析 Retry-After：秒数或 HTTP 日期。"""
+    seconds = _parse_duration(value)
+    if seconds is not None:
+        return seconds
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+def throttle_delay(response: httpx.Response) -> float | None:
+    """根据响应头计算服务商要求的暂停秒数；无需暂停返回 None。
+
+    - 429：优先 Retry-After，其次 x-ratelimit-reset-*，否则默认 1 秒
+    - 其他状态：x-ratelimit-remaining-requests/tokens 为 0 时暂停到对应 reset
+    """
+    headers = response.headers
+    delays: list[float] = []
+    for kind in ("requests", "tokens"):
+        remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+        reset = headers.get(f"x-ratelimit-reset-{kind}")
+        if reset is None:
+            continue
+        seconds = _parse_duration(reset)
+        if seconds is None:
+            continue
+        if response.status_code == 429 or (remaining is not None and remaining.strip() == "0"):
+            delays.append(seconds)
+
+    if response.status_code == 429:
+        retry_after = headers.get("retry-after")
+        if retry_after is not None:
+            seconds = _parse_retry_after(retry_after)
+            if seconds is not None:
+                return seconds
+        return max(delays) if delays else _DEFAULT_THROTTLE_SECONDS
+    return max(delays) if delays else None
+
+
+class ProviderLimiter:
+    """单个服务商（base_url + Key）的令牌桶 + 并发上限，FIFO 排队。"""
+
+    def __init__(self, *, concurrency: int, rate: float, burst: int) -> None:
+        self.concurrency = max(concurrency, 1)
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._refilled_at = time.monotonic()
+        self._paused_until = 0.0
+        # asyncio.Lock 按到达顺序唤醒等待者，保证排队公平
+        self._turn = asyncio.Lock()
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self.in_flight = 0
+        self.throttled = 0
+
+    def _refill(self, now: float) -> None:
+        if self.rate > 0:
+            self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    async def acquire(self) -> None:
+        """按到达顺序等待：服务端暂停窗口 → 令牌 → 并发名额。"""
+        async with self._turn:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                if self.rate <= 0:
+                    break
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    break
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+            await self._slots.acquire()
+        self.in_flight += 1
+
+    def pause_remaining(self) -> float:
+        """服务端暂停窗口剩余秒数（未暂停为 0）。"""
+        return max(self._paused_until - time.monotonic(), 0.0)
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self._slots.release()
+
+    @asynccontextmanager
+    async def slot(self):
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def observe(self, response: httpx.Response) -> float | None:
+        """读取响应头更新暂停窗口，返回要求的暂停秒数（无则 None）。"""
+        delay = throttle_delay(response)
+        if delay is None:
+            return None
+        delay = min(delay, settings.AI_RATE_LIMIT_MAX_WAIT_SECONDS)
+        self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        if response.status_code == 429:
+            self.throttled += 1
+        return delay
+
+
+# (规范化 base_url, Key 指纹) → (限流器, 所属事件循环)
+_limiters: dict[tuple[str, str], tuple[ProviderLimiter, asyncio.AbstractEventLoop]] = {}
+
+
+def get_limiter(api_base_url: str, api_key: str) -> ProviderLimiter:
+    """返回服务商对应的共享限流器（事件循环变化时重建，同 http_pool）。"""
+    key = (
+        _normalize_base_url(api_base_url),
+        hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16],
+    )
+    loop = asyncio.get_running_loop()
+    entry = _limiters.get(key)
+    if entry is not None and entry[1] is loop:
+        return entry[0]
+    limiter = ProviderLimiter(
+        concurrency=settings.AI_RATE_LIMIT_CONCURRENCY,
+        rate=settings.AI_RATE_LIMIT_RPS,
+        burst=settings.AI_RATE_LIMIT_BURST,
+    )
+    _limiters[key] = (limiter, loop)
+    return limiter
+
+
+def reset_limiters() -> None:
+    """清空限流器注册表（测试 / 配置变更后调用）。"""
+    _limiters.clear()
+
+
+async def send_limited(
+    api_base_url: str,
+    api_key: str,
+    send: Callable[[], Awaitable[httpx.Response]],
+    *,
+    hold: bool = False,
+    deadline: float | None = None,
+) -> tuple[httpx.Response, ProviderLimiter | None]:
+    """在限流器内发送请求；429 时按服务端提示暂停后重新排队。
+
+    Args:
+        api_base_url: AI 接口基地址（限流分组键之一）。
+        api_key: 明文 API Key（仅取指纹作分组键）。
+        send: 无参协程工厂，每次调用发出一次请求。
+        hold: True 时成功返回后继续占用并发名额（流式响应读完前），
+            调用方须在关闭响应后调用返回的 limiter.release()。
+        deadline: 调用总时限（time.monotonic() 时间点）；暂停窗口会越过它时不再重新排队。
+
+    Returns:
+        (最终响应, 仍被占用名额的限流器或 None)。重新排队次数用尽或等待将越过 deadline 时
+        返回最后一个 429 响应，由调用方按普通 HTTP 错误处理（不再重试）。
+    """
+    if not settings.AI_RATE_LIMIT_ENABLED:
+        return await send(), None
+
+    limiter = get_limiter(api_base_url, api_key)
+    requeues = 0
+    while True:
+        await limiter.acquire()
+        try:
+            response = await send()
+        except BaseException:
+            limiter.release()
+            raise
+        delay = limiter.observe(response)
+        if (
+            response.status_code != 429
+            or requeues >= settings.AI_RATE_LIMIT_MAX_REQUEUE
+            or (deadline is not None and time.monotonic() + limiter.pause_remaining() >= deadline)
+        ):
+            if hold:
+                return response, limiter
+            limiter.release()
+            return response, None
+
+        limiter.release()
+        await response.aclose()
+        requeues += 1
+        logger.warning(
+            "AI 服务商限流，暂停后重新排队",
+            extra={"url": api_base_url, "delay": delay, "requeue": requeues},
+        )
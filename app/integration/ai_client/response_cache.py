@@ -0,0 +1,232 @@
+"""AI 响应缓存 — 内容寻址的 LRU + TTL 缓存，可选 SQLite 持久层。
+
+缓存键为以下内容的 SHA-256：
+    调用类型（json / text / vision）、api_base_url、API Key 指纹、model_name、messages。
+system prompt（即提示词管理的激活版本）已包含在 messages 中，切换版本自动换键。
+
+分层：
+- 内存层：OrderedDict 实现 LRU，条目超过 TTL 视为未命中
+- 持久层（AI_CACHE_PERSIST=true，默认关闭）：app_data_dir()/ai_response_cache.db，重启后仍可命中；
+  结果可能含幼儿信息，以 ENCRYPTION_KEY（app.core.crypto）加密后落盘，密钥变更后旧条目视为未命中；
+  读写经 asyncio.to_thread 执行，不阻塞事件循环
+
+仅缓存成功结果；异常从不缓存。统计计数通过 `stats()` 暴露，用于评估容量：
+命中 / 未命中 / 写入另按发起调用的租户（telemetry.ai_call_tenant）分别计数，`stats(tenant_id)` 只返回该租户的计数。
+"""
+
+import asyncio
+import copy
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+from app.core.config import settings
+from app.core.crypto import decrypt, encrypt
+from app.core.exceptions import CryptoError
+from app.core.logging import get_logger
+from app.core.paths import app_data_dir
+from app.integration.ai_client.telemetry import current_ai_tenant
+
+logger = get_logger(__name__)
+
+_DB_FILE_NAME = "ai_response_cache.db"
+
+# 按租户分别计数的统计项（淘汰与容量为进程级）
+_TENANT_COUNTERS = ("hits", "disk_hits", "misses", "stores")
+
+
+def make_cache_key(
+    kind: str,
+    api_base_url: str,
+    api_key: str,
+    model_name: str,
+    messages: list[dict],
+) -> str:
+    """计算内容寻址缓存键（API Key 仅以指纹参与，不落盘明文）。"""
+    key_fingerprint = hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+    material = json.dumps(
+        [kind, api_base_url.rstrip("/"), key_fingerprint, model_name, messages],
+        ensure_ascii=False,
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class AiResponseCache:
+    """LRU + TTL 内存缓存，可选 SQLite 持久层。"""
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = 256,
+        ttl_seconds: float = 3600.0,
+        persist_path: Path | None = None,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._counters = {"hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        self._tenant_counters: dict[int | None, dict[str, int]] = {}
+        self._persist_path = persist_path
+        self._db: sqlite3.Connection | None = None
+        self._db_lock = threading.Lock()
+
+    # ── 持久层（同步实现，经 to_thread 调用） ─────────────────────────────────
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            self._db = sqlite3.connect(str(self._persist_path), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS ai_response_cache ("
+                "cache_key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)"
+            )
+            self._db.commit()
+        return self._db
+
+    def _disk_get(self, key: str) -> tuple[float, Any] | None:
+        with self._db_lock:
+            row = self._connect().execute(
+                "SELECT stored_at, value FROM ai_response_cache WHERE cache_key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        try:
+            return row[0], json.loads(decrypt(row[1]))
+        except CryptoError:
+            # 密钥已变更或为早期明文条目：视为未命中，稍后由新结果覆盖
+            return None
+
+    def _disk_set(self, key: str, stored_at: float, value: Any) -> None:
+        with self._db_lock:
+            db = self._connect()
+            db.execute(
+                "INSERT OR REPLACE INTO ai_response_cache (cache_key, value, stored_at) "
+                "VALUES (?, ?, ?)",
+                (key, encrypt(json.dumps(value, ensure_ascii=False)), stored_at),
+            )
+            # 顺带清理过期条目，避免文件无限增长
+            db.execute(
+                "DELETE FROM ai_response_cache WHERE stored_at < ?",
+                (stored_at - self.ttl_seconds,),
+            )
+            db.commit()
+
+    # ── 公开接口 ─────────────────────────────────────────────────────────────
+
+    def _count(self, name: str) -> None:
+        self._counters[name] += 1
+        tenant = self._tenant_counters.setdefault(
+            current_ai_tenant(), dict.fromkeys(_TENANT_COUNTERS, 0)
+        )
+        tenant[name] += 1
+
+    def _expired(self, stored_at: float) -> bool:
+        return time.time() - stored_at > self.ttl_seconds
+
+    def _remember(self, key: str, stored_at: float, value: Any) -> None:
+        self._entries[key] = (stored_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    async def get(self, key: str) -> Any | None:
+        """查询缓存；未命中或已过期返回 None。"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            if not self._expired(entry[0]):
+                self._entries.move_to_end(key)
+                self._count("hits")
+                return copy.deepcopy(entry[1])
+            del self._entries[key]
+
+        if self._persist_path is not None:
+            try:
+                disk_entry = await asyncio.to_thread(self._disk_get, key)
+            except Exception as exc:
+                logger.warning("AI 响应缓存持久层读取失败", extra={"error": str(exc)})
+                disk_entry = None
+            if disk_entry is not None and not self._expired(disk_entry[0]):
+                self._remember(key, *disk_entry)
+                self._count("disk_hits")
+                return disk_entry[1]
+
+        self._count("misses")
+        return None
+
+    async def set(self, key: str, value: Any) -> None:
+        """写入缓存（内存层 + 可选持久层）；持久层失败仅告警。"""
+        stored_at = time.time()
+        self._remember(key, stored_at, copy.deepcopy(value))
+        self._count("stores")
+        if self._persist_path is not None:
+            try:
+                await asyncio.to_thread(self._disk_set, key, stored_at, value)
+            except Exception as exc:
+                logger.warning("AI 响应缓存持久层写入失败", extra={"error": str(exc)})
+
+    def stats(self, tenant_id: int | None = None) -> dict:
+        """返回命中统计：hits / disk_hits / misses / stores / evictions / size / hit_rate。
+
+        给定 tenant_id 时命中 / 未命中 / 写入只统计该租户发起的调用；evictions / size / max_entries
+        始终为进程级容量信息。
+        """
+        if tenant_id is None:
+            counters = self._counters
+        else:
+            counters = {
+                **self._tenant_counters.get(tenant_id, dict.fromkeys(_TENANT_COUNTERS, 0)),
+                "evictions": self._counters["evictions"],
+            }
+        lookups = counters["hits"] + counters["disk_hits"] + counters["misses"]
+        hit_count = counters["hits"] + counters["disk_hits"]
+        return {
+            **counters,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hit_rate": round(hit_count / lookups, 4) if lookups else 0.0,
+        }
+
+    def close(self) -> None:
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+_cache: AiResponseCache | None = None
+
+
+def get_response_cache() -> AiResponseCache:
+    """返回进程级缓存单例（按 settings 懒加载）。"""
+    global _cache
+    if _cache is None:
+        persist_path = app_data_dir() / _DB_FILE_NAME if settings.AI_CACHE_PERSIST else None
+        _cache = AiResponseCache(
+            max_entries=settings.AI_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.AI_CACHE_TTL_SECONDS,
+            persist_path=persist_path,
+        )
+    return _cache
+
+
+def reset_response_cache() -> None:
+    """丢弃缓存单例（测试 / 配置变更后调用），下次访问按最新 settings 重建。"""
+    global _cache
+    if _cache is not None:
+        _cache.close()
+    _cache = None
+
+
+def cache_enabled_for(task_type: str | None) -> bool:
+    """全局开关开启且 task_type 不在 AI_CACHE_EXCLUDE_TASKS 中时返回 True。"""
+    if not settings.AI_CACHE_ENABLED:
+        return False
+    excluded = {t.strip() for t in settings.AI_CACHE_EXCLUDE_TASKS.split(",") if t.strip()}
+    return task_type not in excluded
@@ -0,0 +1,196 @@
+"""AI 调用重试策略 — 错误分类 + 抖动退避 + 单次调用总时限。
+
+只有瞬时故障才值得重试：
+- 网络层：超时、连接失败 / 被重置、服务端协议中断
+- HTTP：408 / 429 / 5xx
+其余错误（401 Key 错误、400 参数错误、AiParseError 内容不合格等）立即抛出，
+避免教师为一个必然失败的请求白等十几秒。
+
+每次调用由 RetryTracker 记录尝试次数与耗时：
+- 单次 HTTP 超时不超过剩余总时限（AI_RETRY_DEADLINE_SECONDS）；总时限已过，或重试时剩余时间
+  不足以完成一次请求，不再发起请求，直接以总时限用尽失败
+- 下一次退避会越过总时限时不再重试
+- 最终异常带 attempts / elapsed 属性，AiCallError 的 message 追加「已尝试 N 次，耗时 Xs」
+"""
+
+import time
+from collections.abc import Awaitable, Callable
+from typing import TypeVar
+
+import httpx
+from tenacity import (
+    RetryCallState,
+    retry,
+    retry_if_exception,
+    stop_after_attempt,
+    stop_before_delay,
+    wait_random_exponential,
+)
+
+from app.core.config import settings
+from app.core.exceptions import AiCallError, AiParseError
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+# 重试时剩余总时限不足这么多秒则不再发起（注定超时的请求只会白等）
+_MIN_ATTEMPT_TIMEOUT = 2.0
+
+# 网络层瞬时故障：超时、连接失败 / 重置、对端中途断开
+_TRANSIENT_TRANSPORT_ERRORS = (
+    httpx.TimeoutException,
+    httpx.NetworkError,
+    httpx.RemoteProtocolError,
+)
+
+
+def is_retryable_status(status_code: int) -> bool:
+    """408 / 429 / 5xx 视为瞬时错误。"""
+    return status_code in (408, 429) or status_code >= 500
+
+
+def is_transient_transport_error(exc: httpx.RequestError) -> bool:
+    return isinstance(exc, _TRANSIENT_TRANSPORT_ERRORS)
+
+
+def is_transient(exc: BaseException) -> bool:
+    """tenacity 重试判定：仅 retryable=True 的 AiCallError 重试。"""
+    return isinstance(exc, AiCallError) and exc.retryable
+
+
+def _log_retry(state: RetryCallState) -> None:
+    exc = state.outcome.exception() if state.outcome else None
+    logger.warning(
+        "AI 调用瞬时失败，准备重试",
+        extra={
+            "attempt": state.attempt_number,
+            "sleep_seconds": round(state.upcoming_sleep, 2),
+            "error": str(exc),
+        },
+    )
+
+
+def build_retry_decorator():
+    """构造重试装饰器：仅瞬时错误重试，抖动指数退避，受次数与总时限双重限制。"""
+    return retry(
+        retry=retry_if_exception(is_transient),
+        stop=(
+            stop_after_attempt(settings.AI_RETRY_MAX_ATTEMPTS)
+            | stop_before_delay(settings.AI_RETRY_DEADLINE_SECONDS)
+        ),
+        wait=wait_random_exponential(multiplier=1, max=settings.AI_RETRY_BACKOFF_MAX),
+        before_sleep=_log_retry,
+        reraise=True,
+    )
+
+
+class RetryTracker:
+    """单次 AI 调用的尝试计数与总时限。"""
+
+    def __init__(self) -> None:
+        self.started = time.monotonic()
+        self.attempts = 0
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    @property
+    def deadline(self) -> float:
+        """总时限对应的 time.monotonic() 时间点（传给 send_limited 限制 429 排队等待）。"""
+        return self.started + settings.AI_RETRY_DEADLINE_SECONDS
+
+    def begin_attempt(self) -> None:
+        self.attempts += 1
+
+    def attempt_timeout(self) -> float:
+        """本次 HTTP 请求超时：不超过剩余总时限。
+
+        Raises:
+            AiCallError: 总时限已过，或重试时剩余不足 _MIN_ATTEMPT_TIMEOUT 时抛出（retryable=False），
+                不再发起请求。
+        """
+        remaining = settings.AI_RETRY_DEADLINE_SECONDS - self.elapsed
+        if remaining <= 0 or (self.attempts > 1 and remaining < _MIN_ATTEMPT_TIMEOUT):
+            raise AiCallError(
+                f"AI 调用总时限 {settings.AI_RETRY_DEADLINE_SECONDS:g}s 已用尽", retryable=False,
+            )
+        return min(settings.AI_REQUEST_TIMEOUT_SECONDS, remaining)
+
+    def annotate(self, exc: AiCallError | AiParseError) -> None:
+        """为最终异常附加尝试次数 / 耗时。"""
+        exc.attempts = self.attempts
+        exc.elapsed = round(self.elapsed, 3)
+        if isinstance(exc, AiCallError):
+            exc.message = f"{exc.message}（已尝试 {self.attempts} 次，耗时 {exc.elapsed:.1f}s）"
+            exc.args = (exc.message,)
+
+
+async def run_with_retry(
+    decorator,
+    fn: Callable[[], Awaitable[T]],
+    tracker: RetryTracker,
+    *,
+    url: str,
+) -> T:
+    """以 decorator 重试执行 fn；失败时为异常补充尝试信息并记录日志。
+
+    decorator 由调用模块的 _make_retry_decorator() 提供（测试可替换）。
+    """
+    @decorator
+    async def _attempt() -> T:
+        # 包一层 async def：tenacity 据此选择异步重试器（fn 可能是返回协程的 lambda）
+        return await fn()
+
+    try:
+        result = await _attempt()
+    except (AiCallError, AiParseError) as exc:
+        tracker.annotate(exc)
+        logger.error(
+            "AI 调用最终失败",
+            extra={
+                "url": url,
+                "attempts": tracker.attempts,
+                "elapsed_ms": int(tracker.elapsed * 1000),
+                "retryable": getattr(exc, "retryable", False),
+                "error_type": type(exc).__name__,
+            },
+        )
+        raise
+    if tracker.attempts > 1:
+        logger.info(
+            "AI 调用重试后成功",
+            extra={
+                "url": url,
+                "attempts": tracker.attempts,
+                "elapsed_ms": int(tracker.elapsed * 1000),
+            },
+        )
+    return result
+
+
+def transport_error(exc: httpx.RequestError, label: str = "AI") -> AiCallError:
+    """把 httpx 网络层异常转换为带 retryable 标记的 AiCallError。"""
+    if isinstance(exc, httpx.TimeoutException):
+        return AiCallError(f"{label} 请求超时: {exc}", retryable=True)
+    return AiCallError(
+        f"{label} 请求网络错误: {exc}", retryable=is_transient_transport_error(exc)
+    )
+
+
+def http_status_error(status_code: int, detail: str, label: str = "AI") -> AiCallError:
+    """把 HTTP 错误状态转换为带 status_code / retryable 的 AiCallError。
+
+    开启限流时 429 已由 rate_limiter.send_limited 按服务端提示重新排队，走到这里说明排队次数
+    或总时限已用尽，不再交给重试策略重复等待；关闭限流时 429 仍按瞬时错误重试。
+    """
+    retryable = is_retryable_status(status_code)
+    if status_code == 429 and settings.AI_RATE_LIMIT_ENABLED:
+        retryable = False
+    return AiCallError(
+        f"{label} 接口返回 HTTP {status_code}: {detail}",
+        status_code=status_code,
+        retryable=retryable,
+    )
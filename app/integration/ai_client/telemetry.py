@@ -0,0 +1,251 @@
+"""AI 调用遥测 — 记录每次 call_ai* 调用的耗时、尝试次数、HTTP 状态、token 用量与负载大小。
+
+调用路径上只把一行记录追加到内存缓冲（不做 I/O），由后台任务批量写库：
+- 缓冲达到 AI_TELEMETRY_BATCH_SIZE 条或每隔 AI_TELEMETRY_FLUSH_SECONDS 秒写一次
+- 缓冲上限 AI_TELEMETRY_MAX_BUFFER，数据库不可用时丢弃最旧记录（计入 dropped），不影响业务调用
+- 写库函数由应用启动时 `start_telemetry(writer)` 注入；未启动时记录只留在缓冲里
+
+outcome 取值：ok / cached（命中响应缓存，未发请求）/ cancelled（被对冲取消或调用方放弃）/
+失败时为异常类名（AiCallError、AiParseError 等）。
+
+租户：AI 客户端不感知租户，业务层以 `with ai_call_tenant(tenant_id):` 包裹调用，
+其间创建的记录（含对冲等子任务，asyncio 任务继承上下文）带上该 tenant_id；统计按租户隔离。
+"""
+
+import asyncio
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterator
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+Writer = Callable[[list[dict]], Awaitable[None]]
+
+_current_tenant: ContextVar[int | None] = ContextVar("ai_call_tenant", default=None)
+
+
+@contextmanager
+def ai_call_tenant(tenant_id: int) -> Iterator[None]:
+    """标记其间发起的 AI 调用所属租户（遥测记录与缓存统计按租户归集）。"""
+    token = _current_tenant.set(tenant_id)
+    try:
+        yield
+    finally:
+        _current_tenant.reset(token)
+
+
+def current_ai_tenant() -> int | None:
+    """当前上下文的租户；未经 ai_call_tenant 标记时为 None（不计入任何租户的统计）。"""
+    return _current_tenant.get()
+
+
+@dataclass
+class CallTrace:
+    """单次 AI 调用的遥测数据（调用过程中逐步填充）。"""
+
+    kind: str
+    task_type: str | None
+    model_name: str
+    api_base_url: str
+    started: float = field(default_factory=time.monotonic)
+    attempts: int = 0
+    status_code: int | None = None
+    prompt_tokens: int | None = None
+    completion_tokens: int | None = None
+    request_bytes: int = 0
+    response_bytes: int = 0
+    tenant_id: int | None = field(default_factory=current_ai_tenant)
+    _response: httpx.Response | None = field(default=None, repr=False)
+
+    def observe_response(self, response: httpx.Response) -> None:
+        """记录最近一次响应的状态码与请求体大小；响应体大小在结束时读取（兼容流式）。"""
+        self.status_code = response.status_code
+        self._response = response
+        try:
+            self.request_bytes = len(response.request.content)
+        except (RuntimeError, httpx.RequestNotRead):
+            pass
+
+    def observe_usage(self, usage: object) -> None:
+        """读取 OpenAI 兼容响应中的 usage 字段（缺失或格式异常时忽略）。"""
+        if not isinstance(usage, dict):
+            return
+        prompt = usage.get("prompt_tokens")
+        completion = usage.get("completion_tokens")
+        if isinstance(prompt, int):
+            self.prompt_tokens = prompt
+        if isinstance(completion, int):
+            self.completion_tokens = completion
+
+    def to_row(self, outcome: str) -> dict:
+        if self._response is not None:
+            self.response_bytes = self._response.num_bytes_downloaded
+            if not self.response_bytes:
+                # 响应体在构造时已就绪（未经网络读取）时按已读内容计算
+                try:
+                    self.response_bytes = len(self._response.content)
+                except httpx.ResponseNotRead:
+                    pass
+        return {
+            "created_at": datetime.now(timezone.utc),
+            "tenant_id": self.tenant_id,
+            "task_type": self.task_type or "",
+            "kind": self.kind,
+            "model_name": self.model_name,
+            "api_host": urlsplit(self.api_base_url).netloc[:255],
+            "outcome": outcome,
+            "status_code": self.status_code,
+            "attempts": self.attempts,
+            "duration_ms": int((time.monotonic() - self.started) * 1000),
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "request_bytes": self.request_bytes,
+            "response_bytes": self.response_bytes,
+        }
+
+
+class TelemetryBuffer:
+    """内存缓冲 + 后台批量写库任务。"""
+
+    def __init__(self) -> None:
+        self._rows: deque[dict] = deque()
+        self._writer: Writer | None = None
+        self._task: asyncio.Task | None = None
+        self._wake: asyncio.Event | None = None
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._rows)
+
+    def record(self, row: dict) -> None:
+        if not settings.AI_TELEMETRY_ENABLED:
+            return
+        if len(self._rows) >= settings.AI_TELEMETRY_MAX_BUFFER:
+            self._rows.popleft()
+            self.dropped += 1
+        self._rows.append(row)
+        self.recorded += 1
+        if self._wake is not None and len(self._rows) >= settings.AI_TELEMETRY_BATCH_SIZE:
+            self._wake.set()
+
+    def drain(self) -> list[dict]:
+        rows = list(self._rows)
+        self._rows.clear()
+        return rows
+
+    async def flush(self) -> int:
+        """把缓冲中的记录写库，返回写入条数；写库失败时丢弃该批并记录日志。"""
+        if self._writer is None or not self._rows:
+            return 0
+        rows = self.drain()
+        try:
+            await self._writer(rows)
+        except Exception as exc:
+            self.dropped += len(rows)
+            logger.warning(
+                "AI 调用遥测写库失败，已丢弃本批记录",
+                extra={"rows": len(rows), "error": str(exc)},
+            )
+            return 0
+        self.written += len(rows)
+        return len(rows)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._wake.wait(), timeout=settings.AI_TELEMETRY_FLUSH_SECONDS
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    def start(self, writer: Writer) -> None:
+        self._writer = writer
+        self._wake = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """停止后台任务并写出剩余记录。"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+        self._writer = None
+        self._wake = None
+
+    def stats(self) -> dict:
+        return {
+            "recorded": self.recorded,
+            "written": self.written,
+            "dropped": self.dropped,
+            "pending": self.pending,
+        }
+
+
+_buffer = TelemetryBuffer()
+
+
+def get_telemetry() -> TelemetryBuffer:
+    return _buffer
+
+
+def start_telemetry(writer: Writer) -> None:
+    """启动后台批量写库（app.main 的 on_startup 调用）。"""
+    _buffer.start(writer)
+
+
+async def stop_telemetry() -> None:
+    await _buffer.stop()
+
+
+def reset_telemetry() -> None:
+    """丢弃缓冲与计数（测试用；不写库）。"""
+    global _buffer
+    if _buffer._task is not None:
+        _buffer._task.cancel()
+    _buffer = TelemetryBuffer()
+
+
+def record_cache_hit(kind: str, task_type: str | None, model_name: str, api_base_url: str) -> None:
+    """记录一次命中响应缓存的调用（耗时近 0，不计入延迟百分位）。"""
+    trace = CallTrace(kind, task_type, model_name, api_base_url)
+    _buffer.record(trace.to_row("cached"))
+
+
+@asynccontextmanager
+async def trace_call(
+    kind: str, task_type: str | None, model_name: str, api_base_url: str
+) -> AsyncIterator[CallTrace]:
+    """包裹一次实际发出的 AI 调用；退出时按结果写入一行遥测记录。
+
+    成功时调用方应设置 trace.attempts；失败时从异常的 attempts 属性读取（retry_policy 已附加）。
+    """
+    trace = CallTrace(kind, task_type, model_name, api_base_url)
+    try:
+        yield trace
+    except (asyncio.CancelledError, GeneratorExit):
+        _buffer.record(trace.to_row("cancelled"))
+        raise
+    except Exception as exc:
+        trace.attempts = getattr(exc, "attempts", None) or trace.attempts
+        trace.status_code = getattr(exc, "status_code", None) or trace.status_code
+        _buffer.record(trace.to_row(type(exc).__name__))
+        raise
+    else:
+        _buffer.record(trace.to_row("ok"))
@@ -3,32 +3,50 @@
 所有视觉 AI 调用必须通过此模块，禁止在 service 层直接发 HTTP 请求。
 
 特性：
-- httpx.AsyncClient 异步请求，超时 60 秒
-- tenacity 重试：最多 3 次，指数退避（2s → 4s → 8s）
+- httpx.AsyncClient 异步请求，单次超时 AI_REQUEST_TIMEOUT_SECONDS；按 api_base_url 复用共享连接池（http_pool）
+- 限流：与 base 共用按 (api_base_url, Key) 分组的令牌桶 + 并发上限（rate_limiter）
+- 重试：与 base 相同的 retry_policy（仅瞬时错误重试、抖动退避、总时限），最终异常带 attempts / elapsed
 - 支持 OpenAI 兼容多模态消息体（image_url + data-url）
-- 结构化输出：强制要求 JSON 格式，解析失败抛出 AiParseError
-- 4xx/5xx 抛出 AiCallError
+- 结构化输出：强制要求 JSON 格式；content 先经 json_repair 本地修复，仍失败时经 base.reask_json_fix
+  追问主服务商一次「修复此 JSON」（纯文本，不再附图），再失败抛出 AiParseError
+- 响应缓存：与 base.call_ai 相同的内容寻址缓存（图片 data-url 随 messages 参与哈希）
+- 多服务商：传入 fallbacks 时对冲慢请求 / 失败降级到备用服务商（hedging）
+- 遥测：每个服务商请求各记一行 ai_call_log（被对冲取消的记为 cancelled）
+- 4xx/5xx 抛出 AiCallError（401 / 400 等不重试）
 - API Key 明文禁止写入日志
 """
 
-import json
+from collections.abc import Callable
 
 import httpx
-from tenacity import retry, stop_after_attempt, wait_exponential
 
 from app.core.exceptions import AiCallError, AiParseError
 from app.core.logging import get_logger
+from app.integration.ai_client.base import reask_json_fix
+from app.integration.ai_client.hedging import AiProvider, hedged_call
+from app.integration.ai_client.http_pool import get_http_client
+from app.integration.ai_client.json_repair import is_reaskable, loads, parse_json_object
+from app.integration.ai_client.rate_limiter import send_limited
+from app.integration.ai_client.retry_policy import (
+    RetryTracker,
+    build_retry_decorator,
+    http_status_error,
+    run_with_retry,
+    transport_error,
+)
+from app.integration.ai_client.response_cache import (
+    cache_enabled_for,
+    get_response_cache,
+    make_cache_key,
+)
+from app.integration.ai_client.telemetry import record_cache_hit, trace_call
 
 logger = get_logger(__name__)
 
 
 def _make_retry_decorator():
-    """构造 tenacity 重试装饰器：最多 3 次，指数退避 2s → 4s → 8s。"""
-    return retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=8),
-        reraise=True,
-    )
+    """构造 tenacity 重试装饰器：仅瞬时错误重试，抖动退避，受总时限约束（见 retry_policy）。"""
+    return build_retry_decorator()
 
 
 async def call_ai_vision(
@@ -37,6 +55,10 @@ async def call_ai_vision(
     api_key: str,
     model_name: str = "gpt-4o",
     *,
+    task_type: str | None = None,
+    refresh: bool = False,
+    validate: Callable[[dict], None] | None = None,
+    fallbacks: list[AiProvider] | None = None,
     _client: httpx.AsyncClient | None = None,
 ) -> dict:
     """发送多模态 Chat Completions 请求，返回解析后的 dict。
@@ -47,7 +69,12 @@ async def call_ai_vision(
         api_base_url: AI 接口基地址（如 https://api.openai.com/v1）。
         api_key: 明文 API Key（函数内部使用，禁止写日志）。
         model_name: 模型名称（如 gpt-4o、qwen-vl-plus）。
-        _client: 可选的 httpx 客户端（用于测试 Mock，生产环境留空）。
+        task_type: 任务类型（用于 AI_CACHE_EXCLUDE_TASKS 按任务关闭缓存）。
+        refresh: True 时跳过缓存读取，强制请求并以新结果覆盖缓存。
+        validate: 可选业务校验回调；抛出 AiParseError 表示结果不可用，此时不写入缓存（不重试）。
+        fallbacks: 可选备用服务商（按优先级）；传入时经 hedging.hedged_call 对冲 / 降级，
+            缓存仍以主服务商为键。
+        _client: 可选的 httpx 客户端（用于测试 Mock，生产环境留空走共享连接池）。
 
     Returns:
         解析后的 dict（AI 返回的 JSON 内容）。
@@ -56,6 +83,45 @@ async def call_ai_vision(
         AiCallError: HTTP 请求失败（4xx/5xx）或超过重试次数。
         AiParseError: AI 返回内容不是有效 JSON 或缺少必要字段。
     """
+    cache = get_response_cache() if cache_enabled_for(task_type) else None
+    cache_key = make_cache_key("vision", api_base_url, api_key, model_name, messages)
+    if cache is not None and not refresh:
+        cached = await cache.get(cache_key)
+        if cached is not None:
+            record_cache_hit("vision", task_type, model_name, api_base_url)
+            return cached
+
+    try:
+        if fallbacks:
+            providers = [AiProvider(api_base_url, model_name, api_key), *fallbacks]
+            result = await hedged_call(
+                providers,
+                lambda p: _request_vision(
+                    messages, p.api_base_url, p.api_key, p.model_name, task_type, _client
+                ),
+            )
+        else:
+            result = await _request_vision(
+                messages, api_base_url, api_key, model_name, task_type, _client
+            )
+    except AiParseError as exc:
+        result = await reask_json_fix(exc, api_base_url, api_key, model_name, _client=_client)
+    if validate is not None:
+        validate(result)
+    if cache is not None:
+        await cache.set(cache_key, result)
+    return result
+
+
+async def _request_vision(
+    messages: list[dict],
+    api_base_url: str,
+    api_key: str,
+    model_name: str,
+    task_type: str | None,
+    _client: httpx.AsyncClient | None,
+) -> dict:
+    """向单个服务商发送视觉请求（含限流与重试），返回解析后的 dict。"""
     url = api_base_url.rstrip("/") + "/chat/completions"
     headers = {
         "Authorization": f"Bearer {api_key}",
@@ -67,12 +133,19 @@ async def call_ai_vision(
     }
 
     async def _do_request(client: httpx.AsyncClient) -> dict:
+        tracker.begin_attempt()
         try:
-            response = await client.post(url, headers=headers, json=payload, timeout=60.0)
-        except httpx.TimeoutException as exc:
-            raise AiCallError(f"视觉 AI 请求超时: {exc}") from exc
+            response, _ = await send_limited(
+                api_base_url,
+                api_key,
+                lambda: client.post(
+                    url, headers=headers, json=payload, timeout=tracker.attempt_timeout()
+                ),
+                deadline=tracker.deadline,
+            )
         except httpx.RequestError as exc:
-            raise AiCallError(f"视觉 AI 请求网络错误: {exc}") from exc
+            raise transport_error(exc, "视觉 AI") from exc
+        trace.observe_response(response)
 
         if response.status_code >= 400:
             try:
@@ -93,47 +166,41 @@ async def call_ai_vision(
                     "error_detail": err_detail,
                 },
             )
-            raise AiCallError(
-                f"视觉 AI 接口返回 HTTP {response.status_code}: {err_detail}"
-            )
+            raise http_status_error(response.status_code, err_detail, "视觉 AI")
 
-        raw_text = response.text
         try:
-            body = response.json()
+            body = loads(response.content)
         except Exception as exc:
-            logger.info("视觉 AI 返回内容解析失败（非 JSON）", extra={"raw": raw_text[:500]})
+            logger.info("视觉 AI 返回内容解析失败（非 JSON）", extra={"raw": response.text[:500]})
             raise AiParseError(f"视觉 AI 返回内容不是有效 JSON: {exc}") from exc
+        trace.observe_usage(body.get("usage") if isinstance(body, dict) else None)
 
         try:
             content_str = body["choices"][0]["message"]["content"]
         except (KeyError, IndexError, TypeError) as exc:
             logger.info(
                 "视觉 AI 响应结构异常，缺少 choices/message/content",
-                extra={"raw": raw_text[:500]},
+                extra={"raw": response.text[:500]},
             )
             raise AiParseError(f"视觉 AI 响应结构异常: {exc}") from exc
 
         try:
-            result = json.loads(content_str)
-        except json.JSONDecodeError as exc:
+            return parse_json_object(content_str)
+        except ValueError as exc:
             logger.info(
                 "视觉 AI content 字段不是有效 JSON",
-                extra={"content": content_str[:500]},
+                extra={"content": str(content_str)[:500]},
             )
-            raise AiParseError(f"视觉 AI content 不是有效 JSON: {exc}") from exc
-
-        if not isinstance(result, dict):
-            logger.info("视觉 AI 返回内容不是 JSON 对象", extra={"content": content_str[:200]})
-            raise AiParseError("视觉 AI 返回内容不是 JSON 对象")
-
-        return result
-
-    @_make_retry_decorator()
-    async def _request_with_retry(client: httpx.AsyncClient) -> dict:
-        return await _do_request(client)
-
-    if _client is not None:
-        return await _request_with_retry(_client)
-
-    async with httpx.AsyncClient() as client:
-        return await _request_with_retry(client)
+            raise AiParseError(
+                f"视觉 AI content 不是有效 JSON 对象: {exc}",
+                raw_content=content_str if is_reaskable(content_str) else None,
+            ) from exc
+
+    client = _client if _client is not None else get_http_client(api_base_url)
+    tracker = RetryTracker()
+    async with trace_call("vision", task_type, model_name, api_base_url) as trace:
+        result = await run_with_retry(
+            _make_retry_decorator(), lambda: _do_request(client), tracker, url=url
+        )
+        trace.attempts = tracker.attempts
+    return result
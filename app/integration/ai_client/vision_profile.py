@@ -0,0 +1,214 @@
+"""视觉模型图片档案 — 按模型的实际输入分辨率准备 AI 专用的小图副本。
+
+存档图片按 IMAGE_MAX_BYTES（默认 1MB）压缩，而视觉模型会把输入缩放到固定分辨率再切块计费：
+超出部分只多付上传时间与图片 token，不会提升识别效果。VisionProfile 描述一类模型的输入上限：
+
+- max_long_side / max_short_side / max_pixels：模型内部缩放的上限（任一为 0 表示不限）
+- tile_size：计费 / 编码块边长；缩放后某边刚超出整块不多时收缩到整块，少算一整行 / 列块
+- detail：OpenAI 的 image_url.detail（仅支持该字段的服务商设置，其余为 None 不发送）
+- quality：AI 副本的 JPEG 质量
+
+vision_image_parts 为 AI 请求准备 image_url 内容段：按 (图片 SHA-256, 档案名) 缓存于进程内 LRU
+（总字符数上限 AI_VISION_CACHE_MB），同一领域重新生成时不再缩放与 base64 编码。
+缩放在图片进程池中执行；无法解码的字节（或 AI_VISION_OPTIMIZE=false）按原字节发送。
+"""
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import math
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from app.core.config import settings
+from app.core.exceptions import AppError
+from app.core.logging import get_logger
+from app.integration.image_pool import run_image_task
+from app.integration.image_processing import CompressedImage, fit_image, probe_image
+
+logger = get_logger(__name__)
+
+# 收缩到整块边界的容忍度：超出部分不超过块边长的该比例时收缩
+_TILE_SNAP_RATIO = 0.25
+
+
+@dataclass(frozen=True)
+class VisionProfile:
+    """一类视觉模型的图片输入档案。"""
+
+    name: str
+    max_long_side: int = 0
+    max_short_side: int = 0
+    max_pixels: int = 0
+    tile_size: int = 0
+    detail: str | None = None
+    quality: int = 85
+
+    def target_size(self, width: int, height: int) -> tuple[int, int]:
+        """返回 AI 副本的目标尺寸（保持宽高比，不放大）。"""
+        scale = 1.0
+        long_side, short_side = max(width, height), min(width, height)
+        if self.max_long_side and long_side > self.max_long_side:
+            scale = min(scale, self.max_long_side / long_side)
+        if self.max_short_side and short_side > self.max_short_side:
+            scale = min(scale, self.max_short_side / short_side)
+        if self.max_pixels and width * height > self.max_pixels:
+            scale = min(scale, math.sqrt(self.max_pixels / (width * height)))
+        if self.tile_size:
+            # 每条边各自基于同一原始 scale 求对齐候选，再取最小者，避免逐边叠加缩小
+            candidates = []
+            for side in (width * scale, height * scale):
+                over = side % self.tile_size
+                if side > self.tile_size and 0 < over <= self.tile_size * _TILE_SNAP_RATIO:
+                    candidates.append((side - over) / side * scale)
+            scale = min([scale, *candidates])
+        return max(1, int(width * scale)), max(1, int(height * scale))
+
+
+# 按模型名匹配（小写，先匹配先用）；数值取自各服务商公开的视觉输入说明
+_PROFILES: list[tuple[re.Pattern, VisionProfile]] = [
+    # OpenAI：先缩放到 2048 见方内，再把短边缩到 768，按 512 块计费
+    (re.compile(r"gpt-4o|gpt-4\.1|gpt-5|^o[134](-|$)"),
+     VisionProfile("openai", max_long_side=2048, max_short_side=768, tile_size=512, detail="high")),
+    # 通义千问 VL：28px patch，默认上限约 1280 个 token 块（≈1.0MP）
+    (re.compile(r"qwen.*vl|qvq"),
+     VisionProfile("qwen-vl", max_pixels=1280 * 28 * 28, tile_size=28)),
+    # 智谱 GLM-4V
+    (re.compile(r"glm-4v|glm-4\.\dv"),
+     VisionProfile("glm-4v", max_long_side=1120, tile_size=28)),
+    # Anthropic Claude：长边 1568、约 1.15MP 以内不再缩放
+    (re.compile(r"claude"),
+     VisionProfile("claude", max_long_side=1568, max_pixels=1_150_000)),
+    # Google Gemini：768 块
+    (re.compile(r"gemini"),
+     VisionProfile("gemini", max_long_side=1536, tile_size=768)),
+]
+# 未知模型：保守取常见上限
+DEFAULT_PROFILE = VisionProfile("default", max_long_side=1568, max_pixels=1_200_000)
+
+
+def profile_for_model(model_name: str) -> VisionProfile:
+    """按模型名选择视觉档案，未匹配时返回 DEFAULT_PROFILE。"""
+    lowered = (model_name or "").lower()
+    for pattern, profile in _PROFILES:
+        if pattern.search(lowered):
+            return profile
+    return DEFAULT_PROFILE
+
+
+def render_for_vision(data: bytes, profile: VisionProfile) -> CompressedImage:
+    """生成 AI 专用副本（图片进程池中执行）。
+
+    Raises:
+        AppError: 非图片字节或无法解码时抛出。
+    """
+    header = probe_image(data)
+    width, height = profile.target_size(header.width, header.height)
+    return fit_image(data, width, height, profile.quality)
+
+
+# 图片格式 magic bytes 映射（原字节直发时推断 MIME）
+_MIME_MAGIC: list[tuple[bytes, str]] = [
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"RIFF", "image/webp"),  # RIFF....WEBP
+]
+
+
+def detect_mime(image_bytes: bytes) -> str:
+    """根据文件头检测图片 MIME 类型，无法识别时默认 image/jpeg。"""
+    for magic, mime in _MIME_MAGIC:
+        if image_bytes[:len(magic)] == magic:
+            return mime
+    return "image/jpeg"
+
+
+def to_data_url(image_bytes: bytes, mime_type: str | None = None) -> str:
+    """图片字节 → base64 data-url。"""
+    b64 = base64.b64encode(image_bytes).decode("ascii")
+    return f"data:{mime_type or detect_mime(image_bytes)};base64,{b64}"
+
+
+class _DataUrlCache:
+    """(图片 SHA-256, 档案名) → data-url 的 LRU，按总字符数限容。"""
+
+    def __init__(self) -> None:
+        self._items: OrderedDict[tuple[str, str], str] = OrderedDict()
+        self._chars = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple[str, str]) -> str | None:
+        url = self._items.get(key)
+        if url is None:
+            self.misses += 1
+            return None
+        self._items.move_to_end(key)
+        self.hits += 1
+        return url
+
+    def put(self, key: tuple[str, str], url: str) -> None:
+        limit = settings.AI_VISION_CACHE_MB * 1024 * 1024
+        if len(url) > limit:
+            return
+        old = self._items.pop(key, None)
+        if old is not None:
+            self._chars -= len(old)
+        self._items[key] = url
+        self._chars += len(url)
+        while self._chars > limit:
+            _, evicted = self._items.popitem(last=False)
+            self._chars -= len(evicted)
+
+    def stats(self) -> dict:
+        return {"entries": len(self._items), "chars": self._chars, "hits": self.hits, "misses": self.misses}
+
+
+_cache = _DataUrlCache()
+
+
+def reset_vision_cache() -> None:
+    """清空 data-url 缓存与计数（测试用）。"""
+    global _cache
+    _cache = _DataUrlCache()
+
+
+def vision_cache_stats() -> dict:
+    return _cache.stats()
+
+
+async def _data_url(image_bytes: bytes, profile: VisionProfile) -> str:
+    key = (hashlib.sha256(image_bytes).hexdigest(), profile.name)
+    url = _cache.get(key)
+    if url is not None:
+        return url
+    try:
+        rendition = await run_image_task(render_for_vision, image_bytes, profile)
+        url = to_data_url(rendition.data, rendition.mime_type)
+    except AppError as exc:
+        logger.info("AI 图片副本生成失败，按原图发送", extra={"profile": profile.name, "error": str(exc)})
+        url = to_data_url(image_bytes)
+    _cache.put(key, url)
+    return url
+
+
+async def vision_image_parts(images: list[bytes], model_name: str) -> list[dict]:
+    """为视觉请求准备 image_url 内容段（按 model_name 的档案缩放，缓存 data-url）。
+
+    对冲的备用服务商复用同一份消息体，副本按主模型的档案准备。
+    """
+    if not settings.AI_VISION_OPTIMIZE:
+        return [{"type": "image_url", "image_url": {"url": to_data_url(b)}} for b in images]
+    profile = profile_for_model(model_name)
+    urls = await asyncio.gather(*(_data_url(b, profile) for b in images))
+    parts = []
+    for url in urls:
+        image_url = {"url": url}
+        if profile.detail:
+            image_url["detail"] = profile.detail
+        parts.append({"type": "image_url", "image_url": image_url})
+    return parts
@@ -5,46 +5,87 @@
 - 查询指定日期是否为法定节假日（True / False / None）
 - 查询是否为法定节假日前一天（near_holiday）
 - 返回不放假节日标签（本地硬编码）
-- 当天结果内存缓存（跨天自动失效）
-- API 失败时降级：返回 None，不抛异常，不阻断主流程
-
-API 格式约定（兼容 timor.tech 等主流中国节假日接口）：
-  GET {HOLIDAY_API_URL}/{YYYY-MM-DD}
-  Response: {"code": 0, "type": {"type": 0|1|2|3, "name": "..."}, ...}
+- 按年整年日历应答：一年只请求一次「年」接口，之后全部查询在进程内日历中完成
+- 年日历可由服务层注入加载函数（set_year_loader）：先读数据库中已同步的日历，缺失时再请求接口并落库，
+  首次同步后离线可用；同一年份的并发加载经 single-flight 合并
+- API 失败时降级：返回 None，不抛异常，不阻断主流程；失败年份短时间内不重复请求
+
+API 格式约定（timor.tech「年」接口）：
+  GET {base}/year/{year}
+  Response: {"code": 0, "holiday": {"MM-DD": {"holiday": true|false, "name": "...", "date": "YYYY-MM-DD"}, ...}}
+    holiday == true  → 法定节假日
+    holiday == false → 调班工作日（周末实际上班）
+  未列出的日期按星期推断：周一~周五为工作日，周六日为普通周末。
+
+日期类型（day_type）：
     0 = 工作日
     1 = 周末（非法定节假日）
     2 = 法定节假日
     3 = 调班工作日（周末实际上班）
 """
 
+import calendar
+import time
+from collections.abc import Awaitable, Callable
 from datetime import date, timedelta
 
 import httpx
 
 from app.core.config import settings
 from app.core.logging import get_logger
+from app.core.single_flight import SingleFlight
 
 logger = get_logger(__name__)
 
+WORKDAY, WEEKEND, LEGAL_HOLIDAY, ADJUSTED_WORKDAY = 0, 1, 2, 3
+
+# 一年的日历：date -> (day_type, 节日名称或 None)，覆盖该年每一天
+YearCalendar = dict[date, tuple[int, str | None]]
+
+# 加载失败（接口不可用且库中无数据）后，该年份在此时长内直接降级，不重复请求
+_FAILURE_BACKOFF_SECONDS = 60.0
+
 # ──────────────────────────────────────────────
-# 内存缓存：当天有效，跨天自动清空
-# 结构：date_str -> (is_legal_holiday, holiday_name_or_None, day_type)
-#   day_type: 0=工作日, 1=周末, 2=法定节假日, 3=调班工作日
+# 进程内日历：year -> YearCalendar（长期有效，由后台定时刷新覆盖）
 # ──────────────────────────────────────────────
 
-_cache: dict[str, tuple[bool, str | None, int]] = {}
-_year_cache: dict[int, set[date]] = {}
-_cache_populated_date: date | None = None
+_calendar: dict[int, YearCalendar] = {}
+_failed_until: dict[int, float] = {}
+_year_loader: Callable[[int], Awaitable[YearCalendar | None]] | None = None
+_year_flight = SingleFlight("holiday_year")
+# 日历版本号：每次放入 / 清空日历时递增，派生索引（SemesterCalendar）据此判断是否过期
+_version = 0
+
+
+def install_year_calendar(year: int, days: YearCalendar) -> None:
+    """把一年的日历放入进程内（同步完成或从数据库载入后调用）。"""
+    global _version
+    _calendar[year] = days
+    _failed_until.pop(year, None)
+    _version += 1
+
+
+def calendar_version() -> int:
+    return _version
+
+
+def set_year_loader(loader: Callable[[int], Awaitable[YearCalendar | None]] | None) -> None:
+    """注入年日历加载函数（读库 → 缺失时请求接口并落库）；None 表示直接请求接口。"""
+    global _year_loader
+    _year_loader = loader
+
 
+def reset_holiday_calendar() -> None:
+    """清空进程内日历、失败记录与加载函数（测试用）。"""
+    global _version
+    _calendar.clear()
+    _version += 1
+    _failed_until.clear()
+    set_year_loader(None)
 
-def _ensure_cache_fresh() -> None:
-    """若缓存日期不是今天，清空缓存（单日缓存 + 年节假日缓存）。"""
-    global _cache, _year_cache, _cache_populated_date
-    today = date.today()
-    if _cache_populated_date != today:
-        _cache.clear()
-        _year_cache.clear()
-        _cache_populated_date = today
+
+def loaded_years() -> list[int]:
+    return sorted(_calendar)
 
 
 # ──────────────────────────────────────────────
@@ -59,6 +100,104 @@ _SPECIAL_DAYS: dict[tuple[int, int], list[str]] = {
 }
 
 
+# ──────────────────────────────────────────────
+# 年接口
+# ──────────────────────────────────────────────
+
+def _year_url(year: int) -> str:
+    # 由配置的「info」接口推导「year」接口地址
+    base = settings.HOLIDAY_API_URL.rstrip("/")
+    if base.rsplit("/", 1)[-1] == "info":
+        base = base.rsplit("/", 1)[0]
+    return f"{base}/year/{year}"
+
+
+def build_year_calendar(year: int, holiday_map: dict) -> YearCalendar:
+    """年接口的 holiday 字段 → 覆盖全年每一天的日历（未列出的日期按星期推断）。"""
+    days: YearCalendar = {}
+    for month in range(1, 13):
+        for day in range(1, calendar.monthrange(year, month)[1] + 1):
+            d = date(year, month, day)
+            days[d] = (WEEKEND if d.weekday() >= 5 else WORKDAY, None)
+    for entry in holiday_map.values():
+        if not isinstance(entry, dict) or not isinstance(entry.get("holiday"), bool):
+            continue
+        try:
+            d = date.fromisoformat(entry.get("date") or "")
+        except (ValueError, TypeError):
+            continue
+        if d.year != year:
+            continue
+        days[d] = (LEGAL_HOLIDAY if entry["holiday"] else ADJUSTED_WORKDAY, entry.get("name"))
+    return days
+
+
+async def fetch_year_calendar(
+    year: int,
+    *,
+    _transport: httpx.AsyncBaseTransport | None = None,
+) -> YearCalendar | None:
+    """请求「年」接口得到整年日历；失败返回 None（降级）。"""
+    client_kwargs: dict = {"timeout": 10.0}
+    if _transport is not None:
+        client_kwargs["transport"] = _transport
+    try:
+        async with httpx.AsyncClient(**client_kwargs) as client:
+            resp = await client.get(_year_url(year))
+            resp.raise_for_status()
+            data = resp.json()
+            return build_year_calendar(year, data.get("holiday") or {})
+    except Exception as exc:
+        logger.warning(
+            "节假日年接口调用失败，降级处理",
+            extra={"year": year, "error": str(exc)},
+        )
+        return None
+
+
+async def _year_calendar(
+    year: int,
+    _transport: httpx.AsyncBaseTransport | None,
+) -> YearCalendar | None:
+    """取一年的日历：进程内已有直接返回，否则经加载函数（或接口）加载；失败返回 None。"""
+    days = _calendar.get(year)
+    if days is not None:
+        return days
+    if _failed_until.get(year, 0.0) > time.monotonic():
+        return None
+
+    async def _load() -> YearCalendar | None:
+        # 显式传入 _transport（测试）时直接请求接口
+        if _year_loader is not None and _transport is None:
+            loaded = await _year_loader(year)
+        else:
+            loaded = await fetch_year_calendar(year, _transport=_transport)
+        if loaded is None:
+            _failed_until[year] = time.monotonic() + _FAILURE_BACKOFF_SECONDS
+            return None
+        install_year_calendar(year, loaded)
+        return loaded
+
+    return await _year_flight.do(str(year), _load)
+
+
+async def get_year_calendar(
+    year: int,
+    *,
+    _transport: httpx.AsyncBaseTransport | None = None,
+) -> YearCalendar | None:
+    """返回一年的完整日历（覆盖每一天）；不可用时返回 None。用于构建学期日历索引。"""
+    return await _year_calendar(year, _transport)
+
+
+async def _day_entry(
+    target_date: date,
+    _transport: httpx.AsyncBaseTransport | None,
+) -> tuple[int, str | None] | None:
+    days = await _year_calendar(target_date.year, _transport)
+    return None if days is None else days.get(target_date)
+
+
 # ──────────────────────────────────────────────
 # 公开接口
 # ──────────────────────────────────────────────
@@ -72,49 +211,17 @@ async def is_holiday(
     查询指定日期是否为法定节假日。
 
     返回语义（固定）：
-    - True  ：法定节假日（API type == 2）
-    - False ：工作日或普通周末（API type == 0 / 1 / 3）
-    - None  ：API 调用失败，节假日信息不可用
+    - True  ：法定节假日（day_type == 2）
+    - False ：工作日或普通周末（day_type == 0 / 1 / 3）
+    - None  ：该年日历不可用（接口失败且尚未同步）
 
     注意：周末（type=1）返回 False，不归入法定节假日；
           调班工作日（type=3）也返回 False。
     """
-    _ensure_cache_fresh()
-    date_str = target_date.isoformat()
-
-    if date_str in _cache:
-        return _cache[date_str][0]
-
-    url = f"{settings.HOLIDAY_API_URL.rstrip('/')}/{date_str}"
-    client_kwargs: dict = {"timeout": 10.0}
-    if _transport is not None:
-        client_kwargs["transport"] = _transport
-
-    try:
-        async with httpx.AsyncClient(**client_kwargs) as client:
-            resp = await client.get(url)
-            resp.raise_for_status()
-            data = resp.json()
-            day_type: int = data["type"]["type"]
-            is_legal = day_type == 2  # 仅 type=2 为法定节假日
-
-            # 解析节日名称：优先从 holiday 对象取，其次从 type.name 取
-            name: str | None = None
-            if is_legal:
-                holiday_obj = data.get("holiday")
-                if holiday_obj and isinstance(holiday_obj, dict):
-                    name = holiday_obj.get("name")
-                else:
-                    name = data["type"].get("name")
-
-            _cache[date_str] = (is_legal, name, day_type)
-            return is_legal
-    except Exception as exc:
-        logger.warning(
-            "节假日 API 调用失败，降级处理",
-            extra={"date": date_str, "error": str(exc)},
-        )
+    entry = await _day_entry(target_date, _transport)
+    if entry is None:
         return None
+    return entry[0] == LEGAL_HOLIDAY
 
 
 async def get_legal_holidays_in_year(
@@ -122,55 +229,18 @@ async def get_legal_holidays_in_year(
     *,
     _transport: httpx.AsyncBaseTransport | None = None,
 ) -> set[date] | None:
-    """一次性查询整年的法定节假日集合（单请求，避免逐日并发触发限流）。
+    """返回整年的法定节假日集合。
 
-    用于「一对一倾听」批量选取工作日时排除节假日。复用 timor.tech 的「年」接口：
-      GET {base}/year/{year}
-      → {"code":0, "holiday": {"MM-DD": {"holiday": true/false, "date": "YYYY-MM-DD", ...}}}
-    仅取 holiday==True（法定休息日）；holiday==False 为调班工作日，不计入。
+    用于「一对一倾听」批量选取工作日时排除节假日。
 
     返回：
     - set[date]：该年全部法定节假日日期（可能为空集）
-    - None：API 调用失败（降级，调用方不阻断）
-    每天结果内存缓存，跨天自动失效。
+    - None：该年日历不可用（降级，调用方不阻断）
     """
-    _ensure_cache_fresh()
-    if year in _year_cache:
-        return _year_cache[year]
-
-    # 由配置的「info」接口推导「year」接口地址
-    base = settings.HOLIDAY_API_URL.rstrip("/")
-    if base.rsplit("/", 1)[-1] == "info":
-        base = base.rsplit("/", 1)[0]
-    url = f"{base}/year/{year}"
-
-    client_kwargs: dict = {"timeout": 10.0}
-    if _transport is not None:
-        client_kwargs["transport"] = _transport
-
-    try:
-        async with httpx.AsyncClient(**client_kwargs) as client:
-            resp = await client.get(url)
-            resp.raise_for_status()
-            data = resp.json()
-            holiday_map = data.get("holiday") or {}
-            result: set[date] = set()
-            for entry in holiday_map.values():
-                if isinstance(entry, dict) and entry.get("holiday") is True:
-                    iso = entry.get("date")
-                    if iso:
-                        try:
-                            result.add(date.fromisoformat(iso))
-                        except (ValueError, TypeError):
-                            continue
-            _year_cache[year] = result
-            return result
-    except Exception as exc:
-        logger.warning(
-            "节假日年接口调用失败，降级处理",
-            extra={"year": year, "error": str(exc)},
-        )
+    days = await _year_calendar(year, _transport)
+    if days is None:
         return None
+    return {d for d, (day_type, _name) in days.items() if day_type == LEGAL_HOLIDAY}
 
 
 async def is_near_holiday(
@@ -184,7 +254,7 @@ async def is_near_holiday(
     返回语义：
     - True  ：明天是法定节假日
     - False ：明天不是法定节假日（含普通周末前一天）
-    - None  ：API 调用失败
+    - None  ：日历不可用
 
     注意：near_holiday 不包含普通周末前一天（周五），
           仅在"明天是法定节假日"时才为 True。
@@ -203,22 +273,11 @@ async def get_holiday_name(
 
     返回语义：
     - str  ：该日期是法定节假日，返回节日名称（如"国庆节"）
-    - None ：不是法定节假日，或 API 调用失败
-
-    复用 is_holiday 的缓存，同一日期不重复发起 HTTP 请求。
+    - None ：不是法定节假日，或日历不可用
     """
-    _ensure_cache_fresh()
-    date_str = target_date.isoformat()
-
-    if date_str not in _cache:
-        # 通过 is_holiday 填充缓存（共享同一次 HTTP 请求）
-        result = await is_holiday(target_date, _transport=_transport)
-        if result is None:
-            return None  # API 失败
-
-    entry = _cache.get(date_str)
-    if entry and entry[0]:   # is_legal == True
-        return entry[1]      # 返回节日名称（可能为 None，若 API 未返回名称）
+    entry = await _day_entry(target_date, _transport)
+    if entry and entry[0] == LEGAL_HOLIDAY:
+        return entry[1]      # 节日名称（可能为 None，若接口未返回名称）
     return None
 
 
@@ -231,24 +290,14 @@ async def is_adjusted_workday(
     判断指定日期是否为调班工作日（节假日调休补班的周末）。
 
     返回语义：
-    - True  ：调班工作日（API type == 3），周末需正常上班
+    - True  ：调班工作日（day_type == 3），周末需正常上班
     - False ：非调班工作日（普通工作日、普通周末或法定节假日）
-    - None  ：API 调用失败，信息不可用
-
-    复用 is_holiday 的缓存，同一日期不重复发起 HTTP 请求。
+    - None  ：日历不可用
     """
-    _ensure_cache_fresh()
-    date_str = target_date.isoformat()
-
-    if date_str not in _cache:
-        result = await is_holiday(target_date, _transport=_transport)
-        if result is None:
-            return None  # API 失败
-
-    entry = _cache.get(date_str)
+    entry = await _day_entry(target_date, _transport)
     if entry is None:
         return None
-    return entry[2] == 3  # day_type == 3
+    return entry[0] == ADJUSTED_WORKDAY
 
 
 def get_special_day_tags(target_date: date) -> list[str]:
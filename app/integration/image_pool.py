@@ -0,0 +1,142 @@
+"""图片处理进程池 — 把 Pillow 解码 / 压缩移出 NiceGUI 事件循环。
+
+compress_image / normalize_to_landscape 是纯 CPU 的同步函数，直接在 async 处理器里调用
+会阻塞所有在线教师的页面。run_image_task 把它们提交到全应用共享的 ProcessPoolExecutor：
+
+- 有界：进程数 IMAGE_POOL_WORKERS（0 = min(4, CPU 数)），同时在途任务数 IMAGE_POOL_MAX_PENDING，
+  超出时调用方在 asyncio.Semaphore 上排队（背压），不会把图片字节无限堆进进程池队列
+- 取消：等待中的协程被取消时，尚未开始的任务从进程池队列撤回；已开始的任务结果被丢弃
+- 打包安全：固定使用 spawn 启动方式（不 fork 带线程的服务器进程）；PyInstaller 打包版依赖
+  run.py 的 multiprocessing.freeze_support()，`python -m app.main` 由入口护栏跳过子进程
+- 降级：IMAGE_POOL_ENABLED=false、进程池无法创建或工作进程崩溃（BrokenProcessPool）时，
+  改在线程中执行（asyncio.to_thread，Pillow 编解码期间释放 GIL），页面不受影响；
+  崩溃后下一次调用会重建进程池
+
+提交的函数与参数须可 pickle（模块级函数 + bytes）；函数抛出的业务异常（如 AppError）原样传回。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, TypeVar
+
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+_executor: ProcessPoolExecutor | None = None
+# 进程池不可用的原因（非 None 时本进程固定走线程降级）
+_unavailable: str | None = None
+# 背压信号量绑定事件循环（同 http_pool：循环变化时重建）
+_semaphore: tuple[asyncio.Semaphore, asyncio.AbstractEventLoop] | None = None
+_stats = {"submitted": 0, "completed": 0, "fallback": 0, "cancelled": 0, "broken": 0}
+
+
+def _worker_count() -> int:
+    return settings.IMAGE_POOL_WORKERS or min(4, os.cpu_count() or 1)
+
+
+def _get_executor() -> ProcessPoolExecutor | None:
+    """返回共享进程池（按需创建）；禁用或无法创建时返回 None。"""
+    global _executor, _unavailable
+    if not settings.IMAGE_POOL_ENABLED or _unavailable is not None:
+        return None
+    if _executor is None:
+        try:
+            _executor = ProcessPoolExecutor(
+                max_workers=_worker_count(),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        except (OSError, NotImplementedError, ValueError) as exc:
+            _unavailable = str(exc)
+            logger.warning("图片进程池不可用，改在线程中处理图片", extra={"error": _unavailable})
+            return None
+        logger.info("图片进程池已创建", extra={"workers": _worker_count()})
+    return _executor
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    global _semaphore
+    loop = asyncio.get_running_loop()
+    if _semaphore is None or _semaphore[1] is not loop:
+        _semaphore = (asyncio.Semaphore(max(1, settings.IMAGE_POOL_MAX_PENDING)), loop)
+    return _semaphore[0]
+
+
+def _discard_broken(executor: ProcessPoolExecutor) -> None:
+    global _executor
+    if _executor is executor:
+        _executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def run_image_task(fn: Callable[..., T], *args: Any) -> T:
+    """在图片进程池中执行 fn(*args)，不阻塞事件循环。
+
+    Args:
+        fn: 模块级同步函数（如 compress_image）。
+        *args: 位置参数（须可 pickle）。
+
+    Returns:
+        fn 的返回值。
+
+    Raises:
+        fn 抛出的异常原样抛出；调用方被取消时抛出 asyncio.CancelledError。
+    """
+    async with _get_semaphore():
+        executor = _get_executor()
+        if executor is None:
+            _stats["fallback"] += 1
+            return await asyncio.to_thread(fn, *args)
+
+        _stats["submitted"] += 1
+        loop = asyncio.get_running_loop()
+        try:
+            result = await loop.run_in_executor(executor, fn, *args)
+        except asyncio.CancelledError:
+            _stats["cancelled"] += 1
+            raise
+        except BrokenProcessPool as exc:
+            _stats["broken"] += 1
+            _stats["fallback"] += 1
+            logger.warning("图片进程池工作进程异常退出，本次改在线程中处理", extra={"error": str(exc)})
+            _discard_broken(executor)
+            return await asyncio.to_thread(fn, *args)
+        _stats["completed"] += 1
+        return result
+
+
+def image_pool_stats() -> dict:
+    """返回进程池计数（提交 / 完成 / 降级 / 取消 / 崩溃）与当前状态。"""
+    return {
+        **_stats,
+        "workers": _worker_count(),
+        "running": _executor is not None,
+        "unavailable": _unavailable,
+    }
+
+
+def shutdown_image_pool() -> None:
+    """关闭进程池并撤回排队任务（应用关闭时调用，可重复调用）。"""
+    global _executor
+    executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def reset_image_pool() -> None:
+    """关闭进程池并清空状态与计数（测试 / 配置变更后调用）。"""
+    global _unavailable, _semaphore
+    shutdown_image_pool()
+    _unavailable = None
+    _semaphore = None
+    for key in _stats:
+        _stats[key] = 0
@@ -1,17 +1,69 @@
 """图片压缩处理模块（游戏观察子系统）。
 
-`compress_image` 将任意图片字节压缩至指定大小上限：
-- 超限时等比缩放 + 逐步降低 JPEG 质量直至 ≤ max_bytes。
-- 透明 PNG 先转为白色背景 RGB 再压缩（统一输出 JPEG）。
+`compress_image` 将任意图片字节压缩至指定大小上限（统一输出 JPEG）：
+- 原图能以 quality=95 放下时直接输出；
+- 否则按字节预算估算目标尺寸：超预算较多的 JPEG 以 draft 模式按 1/2、1/4、1/8 直接解码，
+  体积由原分辨率小块拼图估算（_estimate_size），一步缩小到位（reduce() 整数倍 + LANCZOS 收尾），
+  只在缩小后的图上二分查找质量；中间试探不开 optimize，仅最终输出开启。
+- 对比基准见 benchmarks/bench_image_compress.py。
+- 透明 PNG 先转为白色背景 RGB 再压缩。
 - 非图片字节抛 AppError。
+
+`make_thumbnails` 生成 THUMBNAIL_SIZES 中各档缩略图（长边像素上限，JPEG），供页面预览。
+
+`fit_image` 按给定目标尺寸缩小并重编码（供视觉模型的 AI 专用副本，存档原图不变）。
+
+`probe_image` 只解析文件头（格式与像素尺寸，不解码像素），供上传时尽早拒绝；
+`prepare_upload` 是上传后的后台处理入口（可直接读取落盘的临时文件，字节不经主进程）。
 """
 from __future__ import annotations
 
 import io
+import math
 from dataclasses import dataclass
 
 from app.core.exceptions import AppError
 
+# 质量候选（升序）；二分查找其中能放进预算的最高质量
+_QUALITIES = tuple(range(30, 96, 5))
+# 估算目标尺寸时的参考质量：先按此质量试编码，超出预算再按比例缩小尺寸
+_REFERENCE_QUALITY = 75
+# 估算体积用的样本图：grid x grid 个原分辨率小块，总像素数约 _PREVIEW_PIXELS
+_PREVIEW_PIXELS = 500_000
+_PREVIEW_GRID = 3
+# 估算尺寸时预留的余量（JPEG 体积与像素数并非严格线性）
+_SIZE_HEADROOM = 0.9
+# 缩小尺寸的最大轮数（每轮至少缩小 10%，正常 1~2 轮即可收敛）
+_MAX_ROUNDS = 6
+# 上传允许的图片格式（Pillow 格式名；MPO 为部分手机相机输出的多帧 JPEG）
+UPLOAD_FORMATS = frozenset({"JPEG", "MPO", "PNG", "WEBP", "BMP", "GIF", "TIFF"})
+# Pillow 格式名 → 响应的 MIME 类型（MPO 按 JPEG 输出，浏览器可直接显示）
+_FORMAT_MIME_TYPES = {
+    "JPEG": "image/jpeg", "MPO": "image/jpeg", "PNG": "image/png", "WEBP": "image/webp",
+    "BMP": "image/bmp", "GIF": "image/gif", "TIFF": "image/tiff",
+}
+# 缩略图档位：名称 → 长边像素上限（页面预览 w-24 约 96 CSS 像素，按 2x 屏幕取 sm）
+THUMBNAIL_SIZES = {"sm": 192, "md": 640}
+_THUMBNAIL_QUALITY = 80
+
+
+@dataclass(frozen=True)
+class ImageHeader:
+    """图片文件头信息（未解码像素）。"""
+
+    format: str
+    width: int
+    height: int
+
+    @property
+    def pixels(self) -> int:
+        return self.width * self.height
+
+    @property
+    def mime_type(self) -> str:
+        """格式对应的 MIME 类型；未登记的格式为 application/octet-stream。"""
+        return _FORMAT_MIME_TYPES.get(self.format, "application/octet-stream")
+
 
 @dataclass(frozen=True)
 class CompressedImage:
@@ -27,6 +79,85 @@ class CompressedImage:
         return len(self.data)
 
 
+def _to_rgb(img):
+    """透明通道（RGBA / LA / P）转白色背景 RGB，其余模式直接转 RGB。"""
+    from PIL import Image
+
+    if img.mode in ("RGBA", "LA", "P"):
+        bg = Image.new("RGB", img.size, (255, 255, 255))
+        if img.mode == "P":
+            img = img.convert("RGBA")
+        bg.paste(img, mask=img.split()[-1] if img.mode in ("RGBA", "LA") else None)
+        return bg
+    if img.mode != "RGB":
+        return img.convert("RGB")
+    return img
+
+
+def _encode(img, quality: int, optimize: bool = False) -> bytes:
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=quality, optimize=optimize)
+    return buf.getvalue()
+
+
+def _downscale(img, width: int, height: int):
+    """缩小到 (width, height)：先 reduce() 整数倍盒式缩小，再 LANCZOS 收尾。"""
+    from PIL import Image
+
+    factor = min(img.width // width, img.height // height)
+    if factor >= 2:
+        img = img.reduce(factor)
+    if img.size != (width, height):
+        img = img.resize((width, height), Image.LANCZOS)
+    return img
+
+
+def _scaled_size(width: int, height: int, scale: float) -> tuple[int, int]:
+    return max(1, int(width * scale)), max(1, int(height * scale))
+
+
+def _estimate_size(img, quality: int) -> int:
+    """估算 img 以 quality 编码的体积。
+
+    大图取均匀分布的原分辨率小块拼成样本图编码，再按像素比放大：
+    JPEG 按 8x8 块独立编码，原分辨率小块的每像素字节数与全图接近（缩略预览会抹掉细节而严重低估）。
+    """
+    from PIL import Image
+
+    if img.width * img.height <= _PREVIEW_PIXELS * 2:
+        return len(_encode(img, quality))
+    grid = _PREVIEW_GRID
+    tile_w, tile_h = img.width // grid // 8 * 8, img.height // grid // 8 * 8
+    tile = min(tile_w, tile_h, int(math.sqrt(_PREVIEW_PIXELS) / grid) // 8 * 8)
+    mosaic = Image.new("RGB", (tile * grid, tile * grid))
+    for row in range(grid):
+        for col in range(grid):
+            left = col * img.width // grid + (img.width // grid - tile) // 2
+            top = row * img.height // grid + (img.height // grid - tile) // 2
+            mosaic.paste(img.crop((left, top, left + tile, top + tile)), (col * tile, row * tile))
+    return len(_encode(mosaic, quality)) * img.width * img.height // (mosaic.width * mosaic.height)
+
+
+def _search_quality(img, max_bytes: int, probes: dict[int, int]) -> int | None:
+    """二分查找 _QUALITIES 中能放进 max_bytes 的最高质量；都放不下返回 None。
+
+    probes 记录每个试探质量的体积（不开 optimize），供调用方估算缩放比例。
+    """
+    lo, hi = 0, len(_QUALITIES) - 1
+    best: int | None = None
+    while lo <= hi:
+        mid = (lo + hi) // 2
+        quality = _QUALITIES[mid]
+        if quality not in probes:
+            probes[quality] = len(_encode(img, quality))
+        if probes[quality] <= max_bytes:
+            best = quality
+            lo = mid + 1
+        else:
+            hi = mid - 1
+    return best
+
+
 def compress_image(data: bytes, max_bytes: int = 1_048_576) -> CompressedImage:
     """将图片字节压缩至 max_bytes 以内。
 
@@ -47,63 +178,98 @@ def compress_image(data: bytes, max_bytes: int = 1_048_576) -> CompressedImage:
 
     try:
         img = Image.open(io.BytesIO(data))
+        if img.format == "JPEG" and len(data) > max_bytes:
+            # 按字节预算估算目标尺寸，留 2 倍线性余量；draft 只会解码到不小于请求的尺寸
+            scale = min(1.0, math.sqrt(max_bytes / len(data)) * 2)
+            img.draft("RGB", _scaled_size(img.width, img.height, scale))
         img.load()  # 强制解码，尽早抛出解码错误
     except Exception as exc:
         raise AppError(f"图片解码失败，请确认上传的是合法图片文件：{exc}") from exc
 
-    # 透明通道（RGBA / LA / P）转白色背景 RGB
-    if img.mode in ("RGBA", "LA", "P"):
-        bg = Image.new("RGB", img.size, (255, 255, 255))
-        if img.mode == "P":
-            img = img.convert("RGBA")
-        bg.paste(img, mask=img.split()[-1] if img.mode in ("RGBA", "LA") else None)
-        img = bg
-    elif img.mode != "RGB":
-        img = img.convert("RGB")
+    img = _to_rgb(img)
 
-    width, height = img.size
+    # 先在小预览图上估算全尺寸体积（体积约与像素数成正比；预览细节密度更高，估算偏保守）
+    if len(data) <= max_bytes or _estimate_size(img, 95) <= max_bytes:
+        result_bytes = _encode(img, 95, optimize=True)
+        if len(result_bytes) <= max_bytes:
+            return CompressedImage(
+                data=result_bytes, mime_type="image/jpeg", width=img.width, height=img.height
+            )
 
-    # 若原图已满足大小要求，直接以 quality=95 输出
-    buf = io.BytesIO()
-    img.save(buf, format="JPEG", quality=95, optimize=True)
-    if buf.tell() <= max_bytes:
-        result_bytes = buf.getvalue()
-        return CompressedImage(
-            data=result_bytes,
-            mime_type="image/jpeg",
-            width=width,
-            height=height,
-        )
+    reference = _estimate_size(img, _REFERENCE_QUALITY)
+    probes: dict[int, int] = {}
+    for _ in range(_MAX_ROUNDS):
+        if reference > max_bytes:
+            # 按字节预算直接估算目标尺寸，一步缩小到位
+            scale = math.sqrt(max_bytes / reference) * _SIZE_HEADROOM
+            size = _scaled_size(img.width, img.height, scale)
+            if size == img.size:
+                break
+            img = _downscale(img, *size)
+            probes = {}
 
-    # 否则：先尝试降质量，仍超限则同步缩放
-    scale = 1.0
-    for quality in (85, 75, 65, 50, 40, 30):
-        buf = io.BytesIO()
-        w = max(1, int(width * scale))
-        h = max(1, int(height * scale))
-        resized = img.resize((w, h), Image.LANCZOS) if scale < 1.0 else img
-        resized.save(buf, format="JPEG", quality=quality, optimize=True)
-        if buf.tell() <= max_bytes:
+        quality = _search_quality(img, max_bytes, probes)
+        if quality is not None:
+            result_bytes = _encode(img, quality, optimize=True)
+            if len(result_bytes) > max_bytes:  # optimize 通常只会更小，兜底用试探参数重编码
+                result_bytes = _encode(img, quality)
             return CompressedImage(
-                data=buf.getvalue(),
-                mime_type="image/jpeg",
-                width=w,
-                height=h,
+                data=result_bytes, mime_type="image/jpeg", width=img.width, height=img.height
             )
-        # 每轮额外缩小 20%
-        scale *= 0.8
+        # 最低质量也放不下：以最低质量的实测体积为参考继续缩小
+        reference = probes[_QUALITIES[0]]
 
-    # 最后兜底：极度压缩
-    buf = io.BytesIO()
-    w = max(1, int(width * scale))
-    h = max(1, int(height * scale))
-    img.resize((w, h), Image.LANCZOS).save(buf, format="JPEG", quality=20, optimize=True)
+    # 兜底：极度压缩
     return CompressedImage(
-        data=buf.getvalue(),
-        mime_type="image/jpeg",
-        width=w,
-        height=h,
+        data=_encode(img, 20, optimize=True), mime_type="image/jpeg", width=img.width, height=img.height
+    )
+
+
+def make_thumbnails(data: bytes, sizes: tuple[str, ...] | None = None) -> dict[str, CompressedImage]:
+    """按 THUMBNAIL_SIZES 生成缩略图（只解码一次，由大到小依次缩小）。
+
+    原图长边不超过某档上限时该档直接按原尺寸重编码。
+
+    Args:
+        data: 图片字节。
+        sizes: 需要生成的档位名称；None 表示全部。
+
+    Returns:
+        {档位名称: CompressedImage}。
+
+    Raises:
+        AppError: 非图片字节或无法解码时抛出。
+    """
+    try:
+        from PIL import Image
+    except ImportError as e:  # pragma: no cover
+        raise AppError("Pillow 未安装，无法处理图片") from e
+
+    wanted = sorted(
+        ((name, edge) for name, edge in THUMBNAIL_SIZES.items() if sizes is None or name in sizes),
+        key=lambda item: -item[1],
     )
+    if not wanted:
+        return {}
+    try:
+        img = Image.open(io.BytesIO(data))
+        if img.format == "JPEG":
+            img.draft("RGB", (wanted[0][1], wanted[0][1]))
+        img.load()
+    except Exception as exc:
+        raise AppError(f"图片解码失败，请确认上传的是合法图片文件：{exc}") from exc
+
+    img = _to_rgb(img)
+    thumbs: dict[str, CompressedImage] = {}
+    for name, edge in wanted:
+        scale = min(1.0, edge / max(img.width, img.height))
+        if scale < 1.0:
+            img = _downscale(img, *_scaled_size(img.width, img.height, scale))
+        thumbs[name] = CompressedImage(
+            data=_encode(img, _THUMBNAIL_QUALITY, optimize=True),
+            mime_type="image/jpeg", width=img.width, height=img.height,
+        )
+    return thumbs
 
 
 def normalize_to_landscape(data: bytes) -> bytes:
@@ -139,14 +305,7 @@ def normalize_to_landscape(data: bytes) -> bytes:
     img = ImageOps.exif_transpose(img)
 
     # 2. 透明通道转白底
-    if img.mode in ("RGBA", "LA", "P"):
-        bg = Image.new("RGB", img.size, (255, 255, 255))
-        if img.mode == "P":
-            img = img.convert("RGBA")
-        bg.paste(img, mask=img.split()[-1] if img.mode in ("RGBA", "LA") else None)
-        img = bg
-    elif img.mode != "RGB":
-        img = img.convert("RGB")
+    img = _to_rgb(img)
 
     # 3. 竖版 → 顺时针旋转 90° 变横版（ROTATE_270 = 顺时针 90°）
     if img.height > img.width:
@@ -155,3 +314,82 @@ def normalize_to_landscape(data: bytes) -> bytes:
     buf = io.BytesIO()
     img.save(buf, format="JPEG", quality=95, optimize=True)
     return buf.getvalue()
+
+
+def probe_image(head: bytes) -> ImageHeader:
+    """从文件开头的若干字节解析图片格式与尺寸（只读文件头，不分配像素内存）。
+
+    Args:
+        head: 文件开头字节；JPEG 的尺寸位于 EXIF 之后，通常需要数十 KB。
+
+    Returns:
+        ImageHeader。
+
+    Raises:
+        AppError: 字节不足以识别，或不是 Pillow 可识别的图片时抛出。
+    """
+    try:
+        from PIL import Image
+    except ImportError as e:  # pragma: no cover
+        raise AppError("Pillow 未安装，无法处理图片") from e
+
+    try:
+        with Image.open(io.BytesIO(head)) as img:
+            return ImageHeader(format=img.format or "", width=img.width, height=img.height)
+    except Exception as exc:
+        raise AppError(f"无法识别的图片文件：{exc}") from exc
+
+
+def prepare_upload(
+    source: bytes | str, landscape: bool = False, max_bytes: int = 1_048_576
+) -> CompressedImage:
+    """上传图片的后台处理：（可选）归一为横版后压缩。
+
+    Args:
+        source: 图片字节，或已落盘的临时文件路径（在工作进程中读取，大文件不经主进程内存）。
+        landscape: 是否先经 normalize_to_landscape 统一为横版（一对一倾听）。
+        max_bytes: 压缩目标上限。
+
+    Raises:
+        AppError: 非图片字节或无法解码时抛出。
+    """
+    if isinstance(source, str):
+        with open(source, "rb") as fh:
+            data = fh.read()
+    else:
+        data = source
+    if landscape:
+        data = normalize_to_landscape(data)
+    return compress_image(data, max_bytes)
+
+
+def fit_image(data: bytes, width: int, height: int, quality: int = 85) -> CompressedImage:
+    """把图片缩小到 (width, height) 并以 quality 重编码为 JPEG。
+
+    原图已是不大于目标尺寸的 JPEG 时原样返回（不重复有损编码）；JPEG 以 draft 模式解码到
+    不小于目标的尺寸，省去大部分解码开销。
+
+    Raises:
+        AppError: 非图片字节或无法解码时抛出。
+    """
+    try:
+        from PIL import Image
+    except ImportError as e:  # pragma: no cover
+        raise AppError("Pillow 未安装，无法处理图片") from e
+
+    try:
+        img = Image.open(io.BytesIO(data))
+        if img.format == "JPEG" and img.width <= width and img.height <= height:
+            return CompressedImage(data=data, mime_type="image/jpeg", width=img.width, height=img.height)
+        if img.format == "JPEG":
+            img.draft("RGB", (width, height))
+        img.load()
+    except Exception as exc:
+        raise AppError(f"图片解码失败，请确认上传的是合法图片文件：{exc}") from exc
+
+    img = _to_rgb(img)
+    if img.width > width or img.height > height:
+        img = _downscale(img, min(width, img.width), min(height, img.height))
+    return CompressedImage(
+        data=_encode(img, quality, optimize=True), mime_type="image/jpeg", width=img.width, height=img.height,
+    )
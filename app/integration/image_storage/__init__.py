@@ -3,6 +3,8 @@ from __future__ import annotations
 
 from app.integration.image_storage.base import ImageStorageBackend
 from app.integration.image_storage.blob_backend import BlobImageStorage
+from app.integration.image_storage.fs_backend import FilesystemImageStorage
+from app.integration.image_storage.s3_backend import S3ImageStorage
 
 
 def get_storage_backend(backend_name: str | None = None) -> ImageStorageBackend:
@@ -16,6 +18,7 @@ def get_storage_backend(backend_name: str | None = None) -> ImageStorageBackend:
 
     Raises:
         ValueError: 未知后端名称时抛出。
+        ConfigError: s3 后端缺少连接配置时抛出。
     """
     if backend_name is None:
         from app.core.config import settings
@@ -23,9 +26,13 @@ def get_storage_backend(backend_name: str | None = None) -> ImageStorageBackend:
 
     if backend_name == "mysql_blob":
         return BlobImageStorage()
+    if backend_name == "filesystem":
+        return FilesystemImageStorage()
+    if backend_name == "s3":
+        return S3ImageStorage.from_settings()
 
-    # 预留：s3 / webdav（本期不实现）
+    # 预留：webdav（本期不实现）
     raise ValueError(
         f"未知图片存储后端：{backend_name!r}。"
-        f"当前支持：mysql_blob。"
+        f"当前支持：mysql_blob、filesystem、s3。"
     )
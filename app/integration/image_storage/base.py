@@ -1,15 +1,24 @@
 """图片存储后端抽象接口。"""
 from __future__ import annotations
 
+import asyncio
 from abc import ABC, abstractmethod
 
 
+def object_key_for(content_hash: str, prefix: str = "") -> str:
+    """内容哈希 → 对象键（两级十六进制分片：ab/cd/abcd…），各远端 / 本地后端共用。"""
+    return f"{prefix}{content_hash[:2]}/{content_hash[2:4]}/{content_hash}"
+
+
 class ImageStorageBackend(ABC):
     """可插拔图片存储后端抽象。
 
     put / get 与数据库 session 解耦：
-    - put 返回 stored_ref dict，由 repository 层将其写入 DB。
+    - put 返回 stored_ref dict，由 repository 层将其写入 DB；必须幂等，且含 content_hash
+      （图片字节的 SHA-256），repository 据此在 image_blob 中按内容去重。
     - get 从 stored_ref dict 中还原原始字节。
+    - aput / aget 为异步版本，服务层统一调用；默认在线程中执行同步实现，
+      远端后端（s3）以原生异步客户端覆盖。实现须可并发调用（同一实例并行上传多张图片）。
     """
 
     @abstractmethod
@@ -17,7 +26,8 @@ class ImageStorageBackend(ABC):
         """存储图片字节，返回存储引用 dict。
 
         Returns:
-            dict，键因后端而异（blob_backend 含 blob_content；s3 含 object_key 等）。
+            dict，含 storage_backend / content_hash / mime_type，其余键因后端而异
+            （blob_backend 含 blob_content；filesystem / s3 含 object_key 等）。
         """
         ...
 
@@ -32,3 +42,15 @@ class ImageStorageBackend(ABC):
             原始图片字节。
         """
         ...
+
+    async def aput(self, data: bytes, *, mime_type: str = "image/jpeg") -> dict:
+        """put 的异步版本。"""
+        return await asyncio.to_thread(self.put, data, mime_type=mime_type)
+
+    async def aget(self, stored: dict) -> bytes:
+        """get 的异步版本。"""
+        return await asyncio.to_thread(self.get, stored)
+
+    def public_url(self, stored: dict) -> str | None:
+        """浏览器可直接访问的图片地址（预签名 / 反向代理 URL）；不支持时返回 None。"""
+        return None
@@ -1,19 +1,23 @@
 """MySQL BLOB 图片存储后端。
 
 put/get 只操作内存 dict，实际 DB 写入由 repository 层完成。
+put 是幂等的：相同字节得到相同的 content_hash，repository 据此在 image_blob 中去重。
 """
 from __future__ import annotations
 
+import hashlib
+
 from app.integration.image_storage.base import ImageStorageBackend
 
 
 class BlobImageStorage(ImageStorageBackend):
-    """MySQL BLOB 后端：图片二进制存入 game_observation_image.blob_content。"""
+    """MySQL BLOB 后端：图片二进制按内容哈希存入 image_blob.blob_content。"""
 
     def put(self, data: bytes, *, mime_type: str = "image/jpeg") -> dict:
         """将字节打包为 stored_ref dict（供 repository 写入 blob_content 字段）。"""
         return {
             "storage_backend": "mysql_blob",
+            "content_hash": hashlib.sha256(data).hexdigest(),
             "blob_content": data,
             "mime_type": mime_type,
         }
@@ -21,3 +25,7 @@ class BlobImageStorage(ImageStorageBackend):
     def get(self, stored: dict) -> bytes:
         """从 stored_ref dict 提取 blob_content 字节。"""
         return stored["blob_content"]
+
+    async def aget(self, stored: dict) -> bytes:
+        """字节已随 image_blob 行读出，无需线程。"""
+        return stored["blob_content"]
@@ -0,0 +1,136 @@
+"""本地文件系统图片存储后端。
+
+图片按内容哈希分片存放：<root>/<sha[:2]>/<sha[2:4]>/<sha>，单目录文件数保持在数千以内。
+- put：同名文件已存在即视为已存储（内容寻址，天然幂等），只刷新其修改时间——孤儿清理按修改时间
+  跳过近期写入的文件，重新引用的旧文件因此不会在引用提交前被清理；否则写入同目录临时文件、
+  fsync 后 os.replace 原子改名，进程崩溃不会留下半张图片
+- remove_stale：清理时删除前再次确认文件未被重新 put（修改时间仍早于阈值）
+- get：按文件大小一次性读入；大文件经 mmap 读取，避免缓冲区反复扩容
+- iter_chunks / local_path：供下载接口分块流式输出或交给 sendfile
+
+数据库中 image_blob.object_key 保存相对路径，blob_content 为 NULL。
+"""
+from __future__ import annotations
+
+import hashlib
+import mmap
+import os
+import tempfile
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+from app.integration.image_storage.base import ImageStorageBackend, object_key_for
+
+_BACKEND_NAME = "filesystem"
+# 超过该大小的文件经 mmap 读取
+_MMAP_THRESHOLD = 256 * 1024
+_CHUNK_SIZE = 64 * 1024
+
+
+def default_root() -> Path:
+    """返回默认图片目录：IMAGE_STORAGE_DIR，未配置时为 app_data_dir()/images。"""
+    from app.core.config import settings
+    from app.core.paths import app_data_dir
+
+    if settings.IMAGE_STORAGE_DIR:
+        return Path(settings.IMAGE_STORAGE_DIR)
+    return app_data_dir() / "images"
+
+
+class FilesystemImageStorage(ImageStorageBackend):
+    """本地文件系统后端：图片字节写入分片目录，数据库只保存 object_key。"""
+
+    def __init__(self, root: str | Path | None = None) -> None:
+        self.root = Path(root) if root is not None else default_root()
+
+    def local_path(self, stored: dict) -> Path:
+        """stored_ref → 本地文件绝对路径。
+
+        Raises:
+            ValueError: object_key 缺失或越出存储根目录时抛出。
+        """
+        key = stored.get("object_key")
+        if not key:
+            raise ValueError("filesystem 图片引用缺少 object_key")
+        path = (self.root / key).resolve()
+        if not path.is_relative_to(self.root.resolve()):
+            raise ValueError(f"非法的图片对象键：{key!r}")
+        return path
+
+    def put(self, data: bytes, *, mime_type: str = "image/jpeg") -> dict:
+        """写入图片文件（已存在则只刷新修改时间），返回含 object_key 的 stored_ref dict。"""
+        content_hash = hashlib.sha256(data).hexdigest()
+        key = object_key_for(content_hash)
+        path = self.root / key
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            self._write_atomic(path, data)
+        return {
+            "storage_backend": _BACKEND_NAME,
+            "content_hash": content_hash,
+            "object_key": key,
+            "blob_content": None,
+            "mime_type": mime_type,
+        }
+
+    def get(self, stored: dict) -> bytes:
+        """读取图片文件的全部字节。
+
+        Raises:
+            FileNotFoundError: 文件不存在时抛出。
+        """
+        with open(self.local_path(stored), "rb") as fh:
+            size = os.fstat(fh.fileno()).st_size
+            if size >= _MMAP_THRESHOLD:
+                with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    return mm[:]
+            return fh.read(size)
+
+    def iter_chunks(self, stored: dict, chunk_size: int = _CHUNK_SIZE) -> Iterator[bytes]:
+        """按块读取图片文件，供 HTTP 响应流式输出（不把整张图片载入内存）。"""
+        with open(self.local_path(stored), "rb") as fh:
+            while chunk := fh.read(chunk_size):
+                yield chunk
+
+    def iter_stored(self, *, min_age_seconds: float = 0) -> Iterator[tuple[str, Path]]:
+        """遍历已存储的图片文件，产出 (content_hash, path)。
+
+        Args:
+            min_age_seconds: 只产出修改时间早于该秒数的文件（跳过刚写入、尚未提交引用的文件）。
+        """
+        if not self.root.is_dir():
+            return
+        cutoff = time.time() - min_age_seconds
+        for path in self.root.glob("??/??/*"):
+            if path.name.startswith(".") or not path.is_file():
+                continue
+            if path.stat().st_mtime <= cutoff:
+                yield path.name, path
+
+    def remove_stale(self, path: Path, *, min_age_seconds: float = 0) -> bool:
+        """文件修改时间仍早于 min_age_seconds 时删除，返回是否删除（期间被重新 put 的文件保留）。"""
+        try:
+            if path.stat().st_mtime > time.time() - min_age_seconds:
+                return False
+            path.unlink()
+        except FileNotFoundError:
+            return False
+        return True
+
+    def _write_atomic(self, path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(data)
+                fh.flush()
+                os.fsync(fh.fileno())
+            os.replace(tmp_name, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_name)
+            except OSError:
+                pass
+            raise
@@ -0,0 +1,432 @@
+"""S3 兼容对象存储图片后端（AWS S3 / MinIO / 各云厂商 S3 兼容接口）。
+
+- 直接以 httpx 发送 AWS Signature V4 签名请求，不引入 boto 依赖；异步请求复用
+  http_pool 中 STORAGE_POOL 按 endpoint 共享的长连接客户端（与 AI 调用的连接池隔离）
+- 对象键按内容哈希分片（与 filesystem 后端相同），aput 先对对象做一次自身 CopyObject：
+  已存在则只刷新 LastModified、不再上传（内容寻址，天然幂等；孤儿清理按 LastModified
+  跳过近期对象，重新引用的旧对象因此不会在引用提交前被清理），返回 404 时才上传
+- 超过 S3_MULTIPART_THRESHOLD 的图片走分片上传：各分片并发（S3_UPLOAD_CONCURRENCY）
+  上传，任一分片失败即中止（AbortMultipartUpload）并抛出 StorageError
+- public_url：配置了 S3_PUBLIC_BASE_URL（CDN / 反向代理）时返回拼接地址，否则返回
+  限时预签名 GET URL，浏览器直接从对象存储取图，不经应用服务器转发
+- aiter_stored（ListObjectsV2 分页）/ aremove_stale（HEAD 确认 LastModified 后 DELETE）供孤儿对象清理
+  （image_store_service.sweep_orphan_objects）
+
+实例无可变状态，可被多个协程并发调用。
+数据库中 image_blob.object_key 保存对象键，blob_content 为 NULL。
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import hmac
+import re
+from collections.abc import AsyncIterator
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import quote, urlsplit
+from xml.etree import ElementTree
+
+import httpx
+
+from app.core.exceptions import ConfigError, StorageError
+from app.integration.image_storage.base import ImageStorageBackend, object_key_for
+from app.integration.ai_client.http_pool import STORAGE_POOL, get_http_client
+
+_BACKEND_NAME = "s3"
+_ALGORITHM = "AWS4-HMAC-SHA256"
+_UNSIGNED_PAYLOAD = "UNSIGNED-PAYLOAD"
+# S3 规定除最后一片外每片至少 5 MiB
+_MIN_PART_SIZE = 5 * 1024 * 1024
+_TIMEOUT = httpx.Timeout(30.0, connect=5.0)
+# prefix 之后的内容寻址对象键：ab/cd/<sha256>
+_STORED_KEY = re.compile(r"[0-9a-f]{2}/[0-9a-f]{2}/([0-9a-f]{64})")
+
+
+def _uri_encode(value: str, *, keep_slash: bool = False) -> str:
+    return quote(value, safe="/-_.~" if keep_slash else "-_.~")
+
+
+def _hmac(key: bytes, msg: str) -> bytes:
+    return hmac.new(key, msg.encode("utf-8"), hashlib.sha256).digest()
+
+
+def _signing_key(secret_key: str, date_stamp: str, region: str) -> bytes:
+    k_date = _hmac(("AWS4" + secret_key).encode("utf-8"), date_stamp)
+    return _hmac(_hmac(_hmac(k_date, region), "s3"), "aws4_request")
+
+
+def _canonical_query(params: dict[str, str]) -> str:
+    return "&".join(
+        f"{_uri_encode(k)}={_uri_encode(v)}" for k, v in sorted(params.items())
+    )
+
+
+def _local_name(elem: ElementTree.Element) -> str:
+    return elem.tag.rsplit("}", 1)[-1]
+
+
+def _extract_xml(text: str, tag: str) -> str | None:
+    """取 S3 XML 响应中第一个名为 tag 的元素文本（忽略命名空间）。"""
+    for elem in ElementTree.fromstring(text).iter():
+        if _local_name(elem) == tag:
+            return elem.text
+    return None
+
+
+def _child_text(elem: ElementTree.Element, tag: str) -> str | None:
+    for child in elem:
+        if _local_name(child) == tag:
+            return child.text
+    return None
+
+
+class S3ImageStorage(ImageStorageBackend):
+    """S3 兼容对象存储后端（路径风格寻址：<endpoint>/<bucket>/<key>）。"""
+
+    def __init__(
+        self,
+        *,
+        endpoint_url: str,
+        bucket: str,
+        access_key: str,
+        secret_key: str,
+        region: str = "us-east-1",
+        prefix: str = "",
+        public_base_url: str = "",
+        presign_expires: int = 3600,
+        multipart_threshold: int = 8 * 1024 * 1024,
+        part_size: int = 8 * 1024 * 1024,
+        upload_concurrency: int = 4,
+        client: httpx.AsyncClient | None = None,
+    ) -> None:
+        if not (endpoint_url and bucket and access_key and secret_key):
+            raise ConfigError("s3 图片存储缺少 endpoint / bucket / access key / secret key 配置")
+        self.endpoint_url = endpoint_url.rstrip("/")
+        self.bucket = bucket
+        self.region = region
+        self.prefix = prefix
+        self.public_base_url = public_base_url.rstrip("/")
+        self.presign_expires = presign_expires
+        self.multipart_threshold = multipart_threshold
+        self.part_size = max(part_size, _MIN_PART_SIZE)
+        self.upload_concurrency = max(1, upload_concurrency)
+        self._access_key = access_key
+        self._secret_key = secret_key
+        self._client = client
+        self._host = urlsplit(self.endpoint_url).netloc
+
+    @classmethod
+    def from_settings(cls) -> "S3ImageStorage":
+        """按 settings.S3_* 构造实例。
+
+        Raises:
+            ConfigError: endpoint / bucket / 密钥未配置时抛出。
+        """
+        from app.core.config import settings
+
+        return cls(
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            bucket=settings.S3_BUCKET,
+            access_key=settings.S3_ACCESS_KEY,
+            secret_key=settings.S3_SECRET_KEY,
+            region=settings.S3_REGION,
+            prefix=settings.S3_PREFIX,
+            public_base_url=settings.S3_PUBLIC_BASE_URL,
+            presign_expires=settings.S3_PRESIGN_EXPIRES,
+            multipart_threshold=settings.S3_MULTIPART_THRESHOLD,
+            part_size=settings.S3_MULTIPART_PART_SIZE,
+            upload_concurrency=settings.S3_UPLOAD_CONCURRENCY,
+        )
+
+    # ── 签名 ──────────────────────────────────────────────────────────────────
+
+    def _path(self, key: str) -> str:
+        """对象路径；key 为空时为桶路径（ListObjectsV2）。"""
+        if not key:
+            return f"/{_uri_encode(self.bucket)}"
+        return f"/{_uri_encode(self.bucket)}/{_uri_encode(key, keep_slash=True)}"
+
+    def _signature(self, canonical_request: str, amz_date: str, scope: str) -> str:
+        string_to_sign = "\n".join([
+            _ALGORITHM, amz_date, scope, hashlib.sha256(canonical_request.encode("utf-8")).hexdigest(),
+        ])
+        return hmac.new(
+            _signing_key(self._secret_key, amz_date[:8], self.region),
+            string_to_sign.encode("utf-8"), hashlib.sha256,
+        ).hexdigest()
+
+    def _sign(
+        self,
+        method: str,
+        key: str,
+        params: dict[str, str] | None = None,
+        *,
+        payload_hash: str,
+        amz_headers: dict[str, str] | None = None,
+        now: datetime | None = None,
+    ) -> tuple[str, dict[str, str]]:
+        """返回 (url, 需附加的请求头)：Authorization 头方式签名（amz_headers 中的 x-amz-* 头一并签名）。"""
+        now = now or datetime.now(timezone.utc)
+        amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+        scope = f"{amz_date[:8]}/{self.region}/s3/aws4_request"
+        headers = {
+            **(amz_headers or {}),
+            "host": self._host, "x-amz-content-sha256": payload_hash, "x-amz-date": amz_date,
+        }
+        signed_headers = ";".join(sorted(headers))
+        path = self._path(key)
+        query = _canonical_query(params or {})
+        canonical = "\n".join([
+            method, path, query,
+            "".join(f"{k}:{headers[k]}\n" for k in sorted(headers)),
+            signed_headers, payload_hash,
+        ])
+        signature = self._signature(canonical, amz_date, scope)
+        headers["authorization"] = (
+            f"{_ALGORITHM} Credential={self._access_key}/{scope}, "
+            f"SignedHeaders={signed_headers}, Signature={signature}"
+        )
+        del headers["host"]
+        url = f"{self.endpoint_url}{path}" + (f"?{query}" if query else "")
+        return url, headers
+
+    def presigned_get_url(
+        self, key: str, *, expires: int | None = None, now: datetime | None = None,
+    ) -> str:
+        """生成限时预签名 GET URL（查询参数方式签名）。"""
+        now = now or datetime.now(timezone.utc)
+        amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+        scope = f"{amz_date[:8]}/{self.region}/s3/aws4_request"
+        params = {
+            "X-Amz-Algorithm": _ALGORITHM,
+            "X-Amz-Credential": f"{self._access_key}/{scope}",
+            "X-Amz-Date": amz_date,
+            "X-Amz-Expires": str(expires or self.presign_expires),
+            "X-Amz-SignedHeaders": "host",
+        }
+        path = self._path(key)
+        query = _canonical_query(params)
+        canonical = "\n".join(["GET", path, query, f"host:{self._host}\n", "host", _UNSIGNED_PAYLOAD])
+        signature = self._signature(canonical, amz_date, scope)
+        return f"{self.endpoint_url}{path}?{query}&X-Amz-Signature={signature}"
+
+    # ── 请求 ──────────────────────────────────────────────────────────────────
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is not None:
+            return self._client
+        return get_http_client(self.endpoint_url, pool=STORAGE_POOL)
+
+    async def _request(
+        self,
+        method: str,
+        key: str,
+        params: dict[str, str] | None = None,
+        *,
+        body: bytes = b"",
+        headers: dict[str, str] | None = None,
+        ok: tuple[int, ...] = (200,),
+    ) -> httpx.Response:
+        payload_hash = hashlib.sha256(body).hexdigest()
+        amz_headers = {k: v for k, v in (headers or {}).items() if k.startswith("x-amz-")}
+        url, signed = self._sign(method, key, params, payload_hash=payload_hash, amz_headers=amz_headers)
+        try:
+            resp = await self._http().request(
+                method, url, content=body or None, headers={**(headers or {}), **signed},
+                timeout=_TIMEOUT,
+            )
+        except httpx.HTTPError as exc:
+            raise StorageError(f"对象存储请求失败：{method} {key}：{exc}") from exc
+        if resp.status_code not in ok:
+            raise StorageError(
+                f"对象存储返回 {resp.status_code}：{method} {key}", status_code=resp.status_code,
+            )
+        return resp
+
+    async def _touch(self, key: str, mime_type: str) -> bool:
+        """对象已存在时自身复制一次以刷新 LastModified，返回是否存在。"""
+        resp = await self._request(
+            "PUT", key,
+            headers={
+                "content-type": mime_type,
+                "x-amz-copy-source": self._path(key),
+                "x-amz-metadata-directive": "REPLACE",
+            },
+            ok=(200, 404),
+        )
+        if resp.status_code == 404:
+            return False
+        # S3 可能以 200 + <Error> 报告复制失败
+        if _extract_xml(resp.text, "Code"):
+            raise StorageError(f"对象存储刷新对象失败：{key}")
+        return True
+
+    async def _multipart_upload(self, key: str, data: bytes, mime_type: str) -> None:
+        resp = await self._request("POST", key, {"uploads": ""}, headers={"content-type": mime_type})
+        upload_id = _extract_xml(resp.text, "UploadId")
+        if not upload_id:
+            raise StorageError(f"对象存储未返回 UploadId：{key}")
+
+        view = memoryview(data)
+        parts = [
+            (number, view[offset:offset + self.part_size])
+            for number, offset in enumerate(range(0, len(data), self.part_size), start=1)
+        ]
+        semaphore = asyncio.Semaphore(self.upload_concurrency)
+
+        async def _upload_part(number: int, chunk: memoryview) -> str:
+            async with semaphore:
+                part = await self._request(
+                    "PUT", key, {"partNumber": str(number), "uploadId": upload_id}, body=bytes(chunk),
+                )
+                return part.headers.get("etag", "")
+
+        try:
+            etags = await asyncio.gather(*(_upload_part(n, c) for n, c in parts))
+            manifest = "".join(
+                f"<Part><PartNumber>{n}</PartNumber><ETag>{etag}</ETag></Part>"
+                for (n, _), etag in zip(parts, etags)
+            )
+            done = await self._request(
+                "POST", key, {"uploadId": upload_id},
+                body=f"<CompleteMultipartUpload>{manifest}</CompleteMultipartUpload>".encode(),
+                headers={"content-type": "application/xml"},
+            )
+            # S3 可能以 200 + <Error> 报告合并失败
+            if _extract_xml(done.text, "Code"):
+                raise StorageError(f"对象存储合并分片失败：{key}")
+        except BaseException:
+            try:
+                await self._request("DELETE", key, {"uploadId": upload_id}, ok=(200, 204, 404))
+            except StorageError:
+                pass
+            raise
+
+    # ── ImageStorageBackend ──────────────────────────────────────────────────
+
+    def _stored_ref(self, content_hash: str, mime_type: str) -> dict:
+        return {
+            "storage_backend": _BACKEND_NAME,
+            "content_hash": content_hash,
+            "object_key": object_key_for(content_hash, self.prefix),
+            "blob_content": None,
+            "mime_type": mime_type,
+        }
+
+    async def aput(self, data: bytes, *, mime_type: str = "image/jpeg") -> dict:
+        """上传图片（对象已存在则只刷新 LastModified），返回含 object_key 的 stored_ref dict。
+
+        Raises:
+            StorageError: 对象存储请求失败时抛出。
+        """
+        ref = self._stored_ref(hashlib.sha256(data).hexdigest(), mime_type)
+        key = ref["object_key"]
+        if await self._touch(key, mime_type):
+            return ref
+        if len(data) >= self.multipart_threshold:
+            await self._multipart_upload(key, data, mime_type)
+        else:
+            await self._request("PUT", key, body=data, headers={"content-type": mime_type})
+        return ref
+
+    async def aget(self, stored: dict) -> bytes:
+        """下载图片字节。
+
+        Raises:
+            FileNotFoundError: 对象不存在时抛出。
+            StorageError: 其他请求失败时抛出。
+        """
+        key = stored["object_key"]
+        resp = await self._request("GET", key, ok=(200, 404))
+        if resp.status_code == 404:
+            raise FileNotFoundError(key)
+        return resp.content
+
+    async def adelete(self, stored: dict) -> None:
+        """删除对象（对象不存在视为已删除）。
+
+        Raises:
+            StorageError: 请求失败时抛出。
+        """
+        await self._request("DELETE", stored["object_key"], ok=(200, 204, 404))
+
+    async def aremove_stale(self, key: str, *, min_age_seconds: float = 0) -> bool:
+        """对象 LastModified 仍早于 min_age_seconds 时删除，返回是否删除（期间被重新 aput 的对象保留）。
+
+        Raises:
+            StorageError: 请求失败时抛出。
+        """
+        resp = await self._request("HEAD", key, ok=(200, 404))
+        modified = resp.headers.get("last-modified")
+        if resp.status_code == 404 or not modified:
+            return False
+        if parsedate_to_datetime(modified) > datetime.now(timezone.utc) - timedelta(seconds=min_age_seconds):
+            return False
+        await self.adelete({"object_key": key})
+        return True
+
+    async def aiter_stored(
+        self, *, min_age_seconds: float = 0,
+    ) -> AsyncIterator[tuple[str, str]]:
+        """按 ListObjectsV2 分页遍历 prefix 下的图片对象，产出 (content_hash, object_key)。
+
+        Args:
+            min_age_seconds: 只产出最后修改时间早于该秒数的对象（跳过刚上传、尚未提交引用的对象）。
+
+        Raises:
+            StorageError: 请求失败时抛出。
+        """
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=min_age_seconds)
+        params = {"list-type": "2", "prefix": self.prefix}
+        while True:
+            root = ElementTree.fromstring((await self._request("GET", "", params)).text)
+            for item in root:
+                if _local_name(item) != "Contents":
+                    continue
+                key = _child_text(item, "Key") or ""
+                match = _STORED_KEY.fullmatch(key[len(self.prefix):]) if key.startswith(self.prefix) else None
+                modified = _child_text(item, "LastModified")
+                if match is None or not modified:
+                    continue
+                if datetime.fromisoformat(modified.replace("Z", "+00:00")) <= cutoff:
+                    yield match.group(1), key
+            token = _child_text(root, "NextContinuationToken")
+            if _child_text(root, "IsTruncated") != "true" or not token:
+                return
+            params = {**params, "continuation-token": token}
+
+    def put(self, data: bytes, *, mime_type: str = "image/jpeg") -> dict:
+        """同步上传（单次 PUT，供脚本 / 线程中使用；服务层走 aput）。"""
+        ref = self._stored_ref(hashlib.sha256(data).hexdigest(), mime_type)
+        url, signed = self._sign("PUT", ref["object_key"], payload_hash=ref["content_hash"])
+        resp = httpx.put(
+            url, content=data, headers={"content-type": mime_type, **signed}, timeout=_TIMEOUT,
+        )
+        if resp.status_code != 200:
+            raise StorageError(
+                f"对象存储返回 {resp.status_code}：PUT {ref['object_key']}", status_code=resp.status_code,
+            )
+        return ref
+
+    def get(self, stored: dict) -> bytes:
+        """同步下载（供脚本 / 线程中使用；服务层走 aget）。"""
+        key = stored["object_key"]
+        url, signed = self._sign("GET", key, payload_hash=hashlib.sha256(b"").hexdigest())
+        resp = httpx.get(url, headers=signed, timeout=_TIMEOUT)
+        if resp.status_code == 404:
+            raise FileNotFoundError(key)
+        if resp.status_code != 200:
+            raise StorageError(
+                f"对象存储返回 {resp.status_code}：GET {key}", status_code=resp.status_code,
+            )
+        return resp.content
+
+    def public_url(self, stored: dict) -> str | None:
+        """S3_PUBLIC_BASE_URL 非空时返回代理地址，否则返回预签名 GET URL。"""
+        key = stored.get("object_key")
+        if not key:
+            return None
+        if self.public_base_url:
+            return f"{self.public_base_url}/{_uri_encode(key, keep_slash=True)}"
+        return self.presigned_get_url(key)
@@ -0,0 +1,219 @@
+"""图片上传摄取 — 边接收边校验，大文件落盘，上传完成即在后台压缩。
+
+页面原先 `await e.file.read()` 把整张照片读进内存并一直留在页面状态里，直到点「生成」时
+compress_image 才发现它不是图片或有 40MB。ingest_upload 改为：
+
+- 先看声明大小（NiceGUI FileUpload.size()），超过 UPLOAD_MAX_BYTES 直接拒绝，不读取内容；
+- 按块读取，只用开头若干 KB 经 probe_image 解析格式与像素尺寸（不解码像素），
+  格式不在 UPLOAD_FORMATS 内或像素数超过 UPLOAD_MAX_PIXELS 立即拒绝；
+- 实际字节数超过 UPLOAD_MAX_BYTES 时中止读取并清理；超过 UPLOAD_SPILL_BYTES 的内容
+  写入临时文件，主进程内存只保留文件头；
+- 接收完成后立即把 prepare_upload 提交到图片进程池（run_image_task），落盘的文件由工作进程
+  按路径读取；「生成」时 `await upload.compressed()` 通常已就绪。
+
+拒绝一律抛 AppError（message 可直接展示给教师）。
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import tempfile
+import weakref
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Protocol
+
+from app.core.config import settings
+from app.core.exceptions import AppError
+from app.integration.image_pool import run_image_task
+from app.integration.image_processing import (
+    UPLOAD_FORMATS,
+    CompressedImage,
+    ImageHeader,
+    prepare_upload,
+    probe_image,
+)
+
+# 解析文件头最多读取的字节数（JPEG 的 SOF 段在 EXIF 之后，EXIF 通常 < 64KB）
+_HEADER_LIMIT = 256 * 1024
+_CHUNK_SIZE = 64 * 1024
+
+
+class UploadSource(Protocol):
+    """NiceGUI FileUpload 中摄取用到的部分（测试 / 基准可自行实现）。"""
+
+    name: str
+
+    def size(self) -> int: ...
+
+    def iterate(self, *, chunk_size: int = ...) -> AsyncIterator[bytes]: ...
+
+
+def _unlink(path: str) -> None:
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+def _retrieve_exception(task: asyncio.Task) -> None:
+    # 失败结果由 compressed() 的调用方处理；页面丢弃的上传不再产生「未取回异常」告警
+    if not task.cancelled():
+        task.exception()
+
+
+@dataclass(eq=False)
+class IngestedImage:
+    """已通过校验的上传图片：小文件字节在内存（data），大文件在临时文件（path）。"""
+
+    name: str
+    size: int
+    sha256: str
+    header: ImageHeader
+    data: bytes | None = None
+    path: Path | None = None
+    landscape: bool = False
+    _task: asyncio.Task | None = field(default=None, repr=False)
+
+    def __post_init__(self) -> None:
+        if self.path is not None:
+            # 页面状态被丢弃（关闭标签页、重新上传）时临时文件随对象回收删除
+            self._finalizer = weakref.finalize(self, _unlink, str(self.path))
+
+    @property
+    def fingerprint_key(self) -> str:
+        """与 single_flight.fingerprint 对 bytes 的表示一致，同一内容的字节与上传对象指纹相同。"""
+        return f"sha256:{self.sha256}"
+
+    def start_processing(self) -> None:
+        """在后台开始压缩（幂等）；须在事件循环中调用。"""
+        if self._task is None:
+            source = str(self.path) if self.path is not None else self.data
+            self._task = asyncio.ensure_future(
+                run_image_task(prepare_upload, source, self.landscape, settings.IMAGE_MAX_BYTES)
+            )
+            self._task.add_done_callback(_retrieve_exception)
+
+    async def compressed(self) -> CompressedImage:
+        """等待并返回压缩结果（尚未开始时立即开始）。
+
+        Raises:
+            AppError: 图片解码失败时抛出。
+        """
+        self.start_processing()
+        return await asyncio.shield(self._task)
+
+    async def read(self) -> bytes:
+        """读取完整原始字节（大文件在线程中读盘）。"""
+        if self.data is not None:
+            return self.data
+        return await asyncio.to_thread(self.path.read_bytes)
+
+    def discard(self) -> None:
+        """取消后台处理并删除临时文件。"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        if self.path is not None:
+            self._finalizer()
+
+
+def _too_large(limit: int) -> AppError:
+    return AppError(f"图片过大（上限 {limit // (1024 * 1024)}MB），请压缩后再上传")
+
+
+def _validate_header(head: bytes, *, max_pixels: int, final: bool) -> ImageHeader | None:
+    """解析并校验文件头；字节不足且尚未读完时返回 None（继续读取）。"""
+    try:
+        header = probe_image(head)
+    except AppError:
+        if final or len(head) >= _HEADER_LIMIT:
+            raise AppError("无法识别的图片文件，请上传 JPG / PNG 等常见格式的照片") from None
+        return None
+    if header.format not in UPLOAD_FORMATS:
+        raise AppError(f"不支持的图片格式：{header.format}，请上传 JPG / PNG 等常见格式的照片")
+    if header.pixels > max_pixels:
+        raise AppError(
+            f"图片分辨率过大（{header.width}×{header.height}），请缩小后再上传"
+        )
+    return header
+
+
+async def ingest_upload(
+    file: UploadSource,
+    *,
+    landscape: bool = False,
+    process: bool = True,
+    max_bytes: int | None = None,
+    max_pixels: int | None = None,
+    spill_bytes: int | None = None,
+) -> IngestedImage:
+    """流式摄取一张上传图片：校验文件头与大小，按需落盘，并在后台开始压缩。
+
+    Args:
+        file: NiceGUI 上传事件的 e.file（或同接口对象）。
+        landscape: 后台处理时先统一为横版（一对一倾听）。
+        process: 是否立即开始后台压缩；一键导入等需要先挑选的场景传 False，稍后 start_processing。
+        max_bytes / max_pixels / spill_bytes: 缺省取 UPLOAD_MAX_BYTES / UPLOAD_MAX_PIXELS /
+            UPLOAD_SPILL_BYTES。
+
+    Raises:
+        AppError: 超过大小 / 像素上限、格式不支持或不是图片时抛出。
+    """
+    max_bytes = max_bytes if max_bytes is not None else settings.UPLOAD_MAX_BYTES
+    max_pixels = max_pixels if max_pixels is not None else settings.UPLOAD_MAX_PIXELS
+    spill_bytes = spill_bytes if spill_bytes is not None else settings.UPLOAD_SPILL_BYTES
+
+    declared = file.size()
+    if declared > max_bytes:
+        raise _too_large(max_bytes)
+
+    digest = hashlib.sha256()
+    buffer = bytearray()
+    header: ImageHeader | None = None
+    total = 0
+    spill = None
+    try:
+        async for chunk in file.iterate(chunk_size=_CHUNK_SIZE):
+            total += len(chunk)
+            if total > max_bytes:
+                raise _too_large(max_bytes)
+            digest.update(chunk)
+            if spill is not None:
+                await asyncio.to_thread(spill.write, chunk)
+                continue
+            buffer += chunk
+            if header is None:
+                # 只解析文件头，Pillow 打开不解码像素；放到线程中避免占用事件循环
+                header = await asyncio.to_thread(
+                    _validate_header, bytes(buffer), max_pixels=max_pixels, final=False,
+                )
+            if header is not None and len(buffer) > spill_bytes:
+                spill = tempfile.NamedTemporaryFile(prefix="kg-upload-", delete=False)
+                await asyncio.to_thread(spill.write, buffer)
+                buffer = bytearray()
+        if header is None:
+            header = await asyncio.to_thread(
+                _validate_header, bytes(buffer), max_pixels=max_pixels, final=True,
+            )
+    except BaseException:
+        if spill is not None:
+            spill.close()
+            _unlink(spill.name)
+        raise
+    if spill is not None:
+        spill.close()
+
+    upload = IngestedImage(
+        name=getattr(file, "name", "") or "",
+        size=total,
+        sha256=digest.hexdigest(),
+        header=header,
+        data=bytes(buffer) if spill is None else None,
+        path=Path(spill.name) if spill is not None else None,
+        landscape=landscape,
+    )
+    if process:
+        upload.start_processing()
+    return upload
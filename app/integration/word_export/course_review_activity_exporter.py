@@ -13,6 +13,7 @@ from docx.table import Table
 from docx.text.paragraph import Paragraph
 
 from app.core.logging import get_logger
+from app.integration.word_export.template_cache import open_template
 
 logger = get_logger(__name__)
 
@@ -232,7 +233,7 @@ def export_course_review_activity(
     """导出课程审议 Word 文档。"""
     tpl = template_path or TEMPLATE_PATH
     if tpl.exists():
-        doc = Document(str(tpl))
+        doc = open_template(tpl)
         _fill_template(doc, record)
     else:
         logger.warning("课程审议模板缺失，降级从零构建", extra={"template": str(tpl)})
@@ -34,9 +34,11 @@ from typing import Any
 from docx import Document
 from docx.oxml.ns import qn
 from docx.shared import Pt, RGBColor
+from docx.table import Table
 
 from app.core.logging import get_logger
 from app.core.models.daily_plan import DailyPlan
+from app.integration.word_export.template_cache import open_template, template_document
 
 logger = get_logger(__name__)
 
@@ -185,7 +187,11 @@ def _fill_process_cell(
 
 def _fill_template(doc: Document, daily_plan: DailyPlan, diff_result: list[dict]) -> None:
     """按模板既有单元格结构填充各字段。"""
-    table = doc.tables[0]
+    _fill_table(doc.tables[0], daily_plan, diff_result)
+
+
+def _fill_table(table: Table, daily_plan: DailyPlan, diff_result: list[dict]) -> None:
+    """填充一张模板表格（单日导出为文档首表；批量导出为克隆到合并文档中的模板表）。"""
     rows = table.rows
 
     def rcell(idx: int):
@@ -300,7 +306,7 @@ def export_daily_plan(daily_plan: DailyPlan, diff_result: list[dict]) -> bytes:
     """
     if TEMPLATE_PATH.exists():
         try:
-            doc = Document(str(TEMPLATE_PATH))
+            doc = open_template(TEMPLATE_PATH)
             _fill_template(doc, daily_plan, diff_result)
             buf = BytesIO()
             doc.save(buf)
@@ -441,8 +447,9 @@ def export_batch_daily_plans(
     各计划按 plan_date 升序排列，相邻计划表格之间插入一个空行段落。
     空列表时返回一个仅含空白段落的合法 docx bytes。
 
-    使用 `copy.deepcopy` 将每个独立生成的模板表格 XML 元素追加到首个文档的
-    body 中，保留模板样式（字体、边框等）。
+    首日由模板缓存克隆出合并文档；其余各天把缓存中原始模板表格的 XML 元素
+    `copy.deepcopy` 追加到合并文档 body 后原地填充（不再为每天单独生成文档），
+    保留模板样式（字体、边框等）。
 
     Args:
         plans_with_diffs: [(DailyPlan, diff_result)] 列表，顺序不限。
@@ -468,7 +475,7 @@ def export_batch_daily_plans(
         """生成单日计划文档对象（不转 bytes）。"""
         if use_template:
             try:
-                doc = Document(str(TEMPLATE_PATH))
+                doc = open_template(TEMPLATE_PATH)
                 _fill_template(doc, plan, diff)
                 return doc
             except Exception as exc:  # noqa: BLE001
@@ -483,13 +490,30 @@ def export_batch_daily_plans(
     # 第一个计划作为主文档
     first_plan, first_diff = sorted_items[0]
     combined_doc = _gen_doc(first_plan, first_diff)
+    pristine_tables = template_document(TEMPLATE_PATH).tables if use_template else []
+    body = combined_doc.element.body
 
     for plan, diff in sorted_items[1:]:
         # 追加空行段落作为间隔
         combined_doc.add_paragraph()
 
-        # 生成当天独立文档并取第一张表格
-        day_doc = _gen_doc(plan, diff)
+        if pristine_tables:
+            # 克隆原始模板表格到合并文档并原地填充
+            table_elem = deepcopy(pristine_tables[0]._element)
+            body.append(table_elem)
+            try:
+                _fill_table(Table(table_elem, combined_doc._body), plan, diff)
+                continue
+            except Exception as exc:  # noqa: BLE001
+                body.remove(table_elem)
+                logger.warning(
+                    "批量导出：模板填充失败，降级从零构建",
+                    extra={"plan_date": str(plan.plan_date), "error": f"{type(exc).__name__}: {exc}"},
+                )
+            day_doc = Document(BytesIO(_export_from_scratch(plan, diff)))
+        else:
+            # 生成当天独立文档并取第一张表格
+            day_doc = _gen_doc(plan, diff)
         if not day_doc.tables:
             logger.warning(
                 "批量导出：某天文档无表格，跳过",
@@ -499,7 +523,7 @@ def export_batch_daily_plans(
 
         # deepcopy 表格 XML 节点并追加到主文档 body
         table_elem = deepcopy(day_doc.tables[0]._element)
-        combined_doc.element.body.append(table_elem)
+        body.append(table_elem)
 
     buf = BytesIO()
     combined_doc.save(buf)
@@ -11,6 +11,7 @@ from docx.oxml.ns import qn
 from docx.shared import Pt
 
 from app.core.logging import get_logger
+from app.integration.word_export.template_cache import open_template
 
 logger = get_logger(__name__)
 
@@ -59,7 +60,7 @@ def export_homemade_teaching(
     """导出自制教玩具 Word 文档。"""
     tpl = template_path or TEMPLATE_PATH
     if tpl.exists():
-        doc = Document(str(tpl))
+        doc = open_template(tpl)
         _fill_template(doc, record)
     else:
         logger.warning("自制教玩具模板缺失，降级从零构建", extra={"template": str(tpl)})
@@ -30,6 +30,7 @@ from docx.shared import Cm, Pt, RGBColor
 from docx.table import Table
 
 from app.core.logging import get_logger
+from app.integration.word_export.template_cache import open_template, template_derived, template_document
 
 logger = get_logger(__name__)
 
@@ -158,8 +159,36 @@ def _fill_date_in_header(cell, d) -> None:
         _set_font(run)
 
 
-def _fill_domain_table(table: Table, record: dict, dom_data: dict) -> None:
-    """将一个领域的全部数据填入对应表格。"""
+def _table_layout(table: Table) -> tuple[int, int | None, int | None]:
+    """领域表格中 (指标表头, 综合评价, 支持策略) 所在行索引，只取决于模板结构。
+
+    逐行解析合并单元格代价较高，按模板缓存（_domain_layout），同一模板的各份表格复用。
+    """
+    header_idx = _find_row_index(table, lambda r: r.cells[0].text.strip() == "一级指标")
+    if header_idx is None:
+        header_idx = min(7, len(table.rows))
+    zh_idx = _find_row_index(table, lambda r: _norm(r.cells[0].text) == "综合评价")
+    st_idx = _find_row_index(table, lambda r: _norm(r.cells[0].text) == "支持策略")
+    return header_idx, zh_idx, st_idx
+
+
+def _domain_layout(tpl: Path, domain: str) -> tuple[int, int | None, int | None] | None:
+    """模板中某领域表格的行布局（按模板缓存）；未找到该领域块返回 None。"""
+
+    def _build(pristine) -> tuple[int, int | None, int | None] | None:
+        _title_el, tbl_el = _extract_block(pristine, domain)
+        return None if tbl_el is None else _table_layout(Table(tbl_el, pristine._body))
+
+    return template_derived(tpl, ("listening_layout", domain), _build)
+
+
+def _fill_domain_table(
+    table: Table,
+    record: dict,
+    dom_data: dict,
+    layout: tuple[int, int | None, int | None] | None = None,
+) -> None:
+    """将一个领域的全部数据填入对应表格；layout 为模板缓存的行布局，None 时现场计算。"""
     rows = table.rows
     if not rows:
         return
@@ -167,10 +196,8 @@ def _fill_domain_table(table: Table, record: dict, dom_data: dict) -> None:
     # R0 元数据
     _write_metadata(rows[0].cells[0], record, dom_data)
 
-    # 指标表头行
-    header_idx = _find_row_index(table, lambda r: r.cells[0].text.strip() == "一级指标")
-    if header_idx is None:
-        header_idx = min(7, len(rows))
+    # 指标表头行 / 综合评价 / 支持策略 行
+    header_idx, zh_idx, st_idx = layout or _table_layout(table)
 
     # 绘画/倾听记录块：R1/R3/R5 表头 + R2/R4/R6 内容
     dates = [dom_data.get("date_1"), dom_data.get("date_2"), dom_data.get("date_3")]
@@ -188,9 +215,6 @@ def _fill_domain_table(table: Table, record: dict, dom_data: dict) -> None:
         slot += 1
         hdr_idx += 2
 
-    # 综合评价 / 支持策略 行
-    zh_idx = _find_row_index(table, lambda r: _norm(r.cells[0].text) == "综合评价")
-    st_idx = _find_row_index(table, lambda r: _norm(r.cells[0].text) == "支持策略")
     end_indicator = zh_idx if zh_idx is not None else len(rows)
 
     # 指标打勾：第 i 个二级指标 3 行（★/★★/★★★），标记达成星级行的 C5
@@ -276,14 +300,14 @@ def _build_domain_doc(domain: str, children: list[tuple[dict, list[dict]]], tpl:
         logger.warning("一对一倾听模板缺失，降级从零构建", extra={"template": str(tpl)})
         return _build_from_scratch(domain, children)
 
-    pristine = Document(str(tpl))
-    title_el, tbl_el = _extract_block(pristine, domain)
+    # 共享的原始模板只用于查找领域块（元素复制后再插入），正文清空后的骨架另行缓存
+    title_el, tbl_el = _extract_block(template_document(tpl), domain)
     if tbl_el is None:
         logger.warning("模板中未找到领域块，降级", extra={"domain": domain})
         return _build_from_scratch(domain, children)
 
-    doc = Document(str(tpl))
-    _remove_all_blocks(doc)
+    layout = _domain_layout(tpl, domain)
+    doc = open_template(tpl, prepare=_remove_all_blocks)
     body = doc.element.body
     sectPr = body.find(qn("w:sectPr"))
 
@@ -299,7 +323,7 @@ def _build_domain_doc(domain: str, children: list[tuple[dict, list[dict]]], tpl:
         else:
             body.append(new_title)
             body.append(new_tbl)
-        _fill_domain_table(doc.tables[-1], record, dom_data)
+        _fill_domain_table(doc.tables[-1], record, dom_data, layout)
 
     return _save_bytes(doc)
 
@@ -319,13 +343,17 @@ def export_combined(record: dict, domains: list[dict], template_path: Path | Non
                 _scratch_domain(doc, d, record, dom_data)
         return _save_bytes(doc)
 
-    doc = Document(str(tpl))
+    doc = open_template(tpl)
+    seen: set[str] = set()
     for domain, table in _map_tables_to_domains(doc):
         if domain is None:
             continue
+        # 每个领域的首张表格即模板领域块，可用缓存的行布局
+        layout = _domain_layout(tpl, domain) if domain not in seen else None
+        seen.add(domain)
         dom_data = _find_domain(domains, domain)
         if dom_data is not None:
-            _fill_domain_table(table, record, dom_data)
+            _fill_domain_table(table, record, dom_data, layout)
     return _save_bytes(doc)
 
 
@@ -33,6 +33,7 @@ from docx.oxml.ns import qn
 from docx.shared import Cm, Pt, RGBColor
 
 from app.core.logging import get_logger
+from app.integration.word_export.template_cache import open_template
 
 logger = get_logger(__name__)
 
@@ -111,7 +112,7 @@ def export_observation(
     tpl = template_path or TEMPLATE_PATH
 
     if tpl.exists():
-        doc = Document(str(tpl))
+        doc = open_template(tpl)
         _fill_template(doc, observation, images)
     else:
         logger.warning("游戏观察模板缺失，降级从零构建", extra={"template": str(tpl)})
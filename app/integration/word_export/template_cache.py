@@ -0,0 +1,130 @@
+"""Word 模板的进程级解析缓存。
+
+各导出器原先每生成一份文档都 `Document(str(模板路径))`：重新读取 zip 并解析全部 XML
+（批量导出每天 / 每个领域一次，一对一倾听的领域文档还要打开两次）。本模块对每个模板只解析一次，
+之后由内存中的原始文档克隆：copy.deepcopy 整个 OPC 包（XML 部件复制元素树，二进制部件共享只读字节），
+再由副本的主文档部件新建 Document 代理。调用方得到的是可随意修改的独立 Document。
+不直接 deepcopy Document 对象：其上缓存的正文代理（如 _body）持有原元素树中子元素的引用，
+复制后会指向与副本元素树脱节的另一份拷贝。
+
+有效性：每次取用时比较模板文件的 mtime / 大小；发生变化时读取文件计算 sha256，
+内容确实不同才重新解析（仅 touch 不重新解析）。
+
+prepare：可选的预处理函数（如清空正文只保留页面设置），预处理后的结果按 (模板, prepare) 另行缓存，
+取用时直接克隆，不必每次对完整模板重复预处理。
+template_derived：按模板缓存由原始文档推导出的只读数据（如表格中各标签所在行），模板变更后随之失效。
+"""
+import copy
+import hashlib
+import threading
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass, field
+from io import BytesIO
+from pathlib import Path
+from typing import Any, TypeVar
+
+from docx import Document
+from docx.document import Document as DocxDocument
+
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass
+class _Compiled:
+    mtime_ns: int
+    size: int
+    sha256: str
+    pristine: DocxDocument
+    # prepare 函数 -> 预处理后的原始文档
+    prepared: dict[Callable, DocxDocument] = field(default_factory=dict)
+    # 推导数据键 -> 值
+    derived: dict[Hashable, Any] = field(default_factory=dict)
+
+
+_cache: dict[Path, _Compiled] = {}
+_lock = threading.Lock()
+_parse_count = 0
+
+
+def clear_template_cache() -> None:
+    """清空模板缓存（测试用）。"""
+    global _parse_count
+    with _lock:
+        _cache.clear()
+        _parse_count = 0
+
+
+def template_parse_count() -> int:
+    """进程内实际解析模板文件的次数（测试 / 基准用）。"""
+    return _parse_count
+
+
+def _compiled(path: Path) -> _Compiled:
+    global _parse_count
+    key = path.resolve()
+    st = key.stat()
+    with _lock:
+        entry = _cache.get(key)
+        if entry is not None and (entry.mtime_ns, entry.size) == (st.st_mtime_ns, st.st_size):
+            return entry
+        data = key.read_bytes()
+        digest = hashlib.sha256(data).hexdigest()
+        if entry is not None and entry.sha256 == digest:
+            # 仅修改时间变化，内容相同：沿用已解析的模板
+            entry.mtime_ns, entry.size = st.st_mtime_ns, st.st_size
+            return entry
+        if entry is not None:
+            logger.info("Word 模板已变更，重新解析", extra={"template": str(key)})
+        entry = _Compiled(st.st_mtime_ns, st.st_size, digest, Document(BytesIO(data)))
+        _parse_count += 1
+        _cache[key] = entry
+        return entry
+
+
+def _clone(source: DocxDocument) -> DocxDocument:
+    package = copy.deepcopy(source.part.package)
+    part = package.main_document_part
+    # 部件上缓存的 inline_shapes 持有复制前正文元素的引用，丢弃后按需重建
+    part.__dict__.pop("inline_shapes", None)
+    return part.document
+
+
+def template_document(path: Path) -> DocxDocument:
+    """返回模板的共享原始文档（只读：仅用于查找 / 复制元素，不得修改或保存）。"""
+    return _compiled(path).pristine
+
+
+def open_template(
+    path: Path,
+    *,
+    prepare: Callable[[DocxDocument], None] | None = None,
+) -> DocxDocument:
+    """返回模板的独立副本（等价于 Document(str(path))，但不重新读取与解析文件）。
+
+    Args:
+        path: 模板路径（须存在；调用方负责缺失时的降级）。
+        prepare: 可选预处理函数，对原始文档副本原地修改；结果按 (path, prepare) 缓存。
+    """
+    entry = _compiled(path)
+    source = entry.pristine
+    if prepare is not None:
+        with _lock:
+            source = entry.prepared.get(prepare)
+            if source is None:
+                source = _clone(entry.pristine)
+                prepare(source)
+                entry.prepared[prepare] = source
+    return _clone(source)
+
+
+def template_derived(path: Path, key: Hashable, build: Callable[[DocxDocument], T]) -> T:
+    """返回按模板缓存的推导数据；首次调用时以共享原始文档（只读）执行 build。"""
+    entry = _compiled(path)
+    with _lock:
+        if key not in entry.derived:
+            entry.derived[key] = build(entry.pristine)
+        return entry.derived[key]
@@ -21,9 +21,11 @@ from app.ui.pages import daily_plan  # noqa: F401
 from app.ui.pages import prompt_mgmt  # noqa: F401
 from app.ui.pages import game_observation  # noqa: F401
 from app.ui.pages import one_on_one_listening  # noqa: F401
+from app.ui.pages import listening_batch  # noqa: F401
 from app.ui.pages import homemade_teaching  # noqa: F401
 from app.ui.pages import course_review_activity  # noqa: F401
 from app.ui.pages import setup  # noqa: F401
+from app.ui.pages import ai_metrics  # noqa: F401
 
 from app.api import create_api_router
 from app.auth.middleware import AuthMiddleware
@@ -31,6 +33,12 @@ from app.core.bootstrap import run_bootstrap
 from app.core.config import settings
 from app.core.logging import get_logger
 from app.core.startup import run_startup_migrations
+from app.integration.ai_client.http_pool import close_all_clients
+from app.integration.image_pool import shutdown_image_pool
+from app.service.ai_telemetry_service import start_ai_telemetry, stop_ai_telemetry
+from app.service.holiday_service import start_holiday_calendar, stop_holiday_calendar
+from app.service.image_store_service import start_image_sweep, stop_image_sweep
+from app.service.listening_batch_service import resume_interrupted_jobs, stop_batch_jobs
 
 logger = get_logger("app.main")
 
@@ -54,12 +62,28 @@ def main() -> None:
 
     # 启动后引导默认用户（单用户模式）
     app.on_startup(run_bootstrap)
+    # AI 调用遥测：后台批量写库，关闭时写出剩余记录
+    app.on_startup(start_ai_telemetry)
+    app.on_shutdown(stop_ai_telemetry)
+    # 关闭时释放共享连接池（AI 调用 / 对象存储）
+    app.on_shutdown(close_all_clients)
+    # 关闭时停止图片处理进程池
+    app.on_shutdown(shutdown_image_pool)
+    # filesystem / s3 图片后端：启动时及定时清理已无引用的图片文件 / 对象
+    app.on_startup(start_image_sweep)
+    app.on_shutdown(stop_image_sweep)
+    # 节假日日历：载入库中已同步的年份，后台定时刷新
+    app.on_startup(start_holiday_calendar)
+    app.on_shutdown(stop_holiday_calendar)
+    # 一对一倾听批量任务：启动时继续运行中的任务，关闭时停止（下次启动续跑）
+    app.on_startup(resume_interrupted_jobs)
+    app.on_shutdown(stop_batch_jobs)
 
     # 全局异常日志
     app.on_exception(_on_global_exception)
     # 路由守卫：单用户模式仅做根路径重定向
     app.add_middleware(AuthMiddleware)
-    # 对外只读 REST API（二期）：/api/v1，API Key + 可选 HMAC 签名鉴权
+    # 对外只读 REST API（二期）：/api/v1，API Key + 可选 HMAC 签名鉴权；/media 图片（签名地址或 API Key）
     app.include_router(create_api_router())
 
     # 打包版（PyInstaller frozen）自动打开浏览器；开发/服务器模式不弹窗
@@ -84,4 +108,6 @@ def main() -> None:
 if __name__ in {"__main__", "__mp_main__"}:
     # 与 run.py 一致的 multiprocessing/PyInstaller 护栏（`python -m app.main` 入口）。
     multiprocessing.freeze_support()
-    main()
+    # 图片进程池以 spawn 启动工作进程，工作进程会以 __mp_main__ 重新导入本模块，不得再启动服务器
+    if multiprocessing.parent_process() is None:
+        main()
@@ -0,0 +1,108 @@
+"""AI 调用遥测仓库层。
+
+全部查询强制 tenant_id 过滤；未标记租户（tenant_id 为 NULL）的记录不会出现在任何租户的统计中。
+"""
+from datetime import datetime
+
+from sqlalchemy import case, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.models.ai_call_log import AiCallLog
+
+# 统计的耗时百分位
+LATENCY_PERCENTILES = (50, 95, 99)
+
+
+async def add_ai_call_logs(session: AsyncSession, rows: list[dict]) -> int:
+    """批量插入遥测记录（单条 executemany），返回条数。调用方负责提交事务。"""
+    if not rows:
+        return 0
+    await session.execute(insert(AiCallLog), rows)
+    return len(rows)
+
+
+async def summarize_call_latency(
+    session: AsyncSession, tenant_id: int, since: datetime
+) -> list[dict]:
+    """按任务汇总 since 之后实际发出请求的调用数、失败数与耗时百分位（毫秒），在数据库内计算。
+
+    命中缓存与被取消的调用不计入。百分位取最近秩：按耗时升序第 ceil(p% × n) 个，
+    即满足 rn × 100 >= p × n 的最小耗时（窗口函数，SQLite 3.25+ / MySQL 8 均支持）。
+
+    Returns:
+        [{"task_type", "calls", "errors", "p50_ms", "p95_ms", "p99_ms"}, ...]，按 task_type 升序。
+    """
+    ranked = (
+        select(
+            AiCallLog.task_type,
+            AiCallLog.outcome,
+            AiCallLog.duration_ms,
+            func.row_number()
+            .over(partition_by=AiCallLog.task_type, order_by=AiCallLog.duration_ms)
+            .label("rn"),
+            func.count().over(partition_by=AiCallLog.task_type).label("n"),
+        )
+        .where(
+            AiCallLog.tenant_id == tenant_id,
+            AiCallLog.created_at >= since,
+            AiCallLog.outcome.not_in(("cached", "cancelled")),
+        )
+        .subquery()
+    )
+    percentiles = [
+        func.min(case((ranked.c.rn * 100 >= pct * ranked.c.n, ranked.c.duration_ms))).label(
+            f"p{pct}_ms"
+        )
+        for pct in LATENCY_PERCENTILES
+    ]
+    result = await session.execute(
+        select(
+            ranked.c.task_type,
+            func.count().label("calls"),
+            func.coalesce(func.sum(case((ranked.c.outcome != "ok", 1), else_=0)), 0).label("errors"),
+            *percentiles,
+        )
+        .group_by(ranked.c.task_type)
+        .order_by(ranked.c.task_type)
+    )
+    return [dict(row._mapping) for row in result.all()]
+
+
+async def count_cached_calls(
+    session: AsyncSession, tenant_id: int, since: datetime
+) -> dict[str, int]:
+    """按任务统计 since 之后命中缓存的调用数。"""
+    result = await session.execute(
+        select(AiCallLog.task_type, func.count())
+        .where(
+            AiCallLog.tenant_id == tenant_id,
+            AiCallLog.created_at >= since,
+            AiCallLog.outcome == "cached",
+        )
+        .group_by(AiCallLog.task_type)
+    )
+    return {task_type: count for task_type, count in result.all()}
+
+
+async def sum_daily_tokens(
+    session: AsyncSession, tenant_id: int, since: datetime
+) -> list[dict]:
+    """按 (日期, 任务) 汇总 since 之后的调用数与 token 用量（UTC 日期）。"""
+    day = func.date(AiCallLog.created_at)
+    result = await session.execute(
+        select(
+            day.label("day"),
+            AiCallLog.task_type,
+            func.count().label("calls"),
+            func.coalesce(func.sum(AiCallLog.prompt_tokens), 0).label("prompt_tokens"),
+            func.coalesce(func.sum(AiCallLog.completion_tokens), 0).label("completion_tokens"),
+        )
+        .where(
+            AiCallLog.tenant_id == tenant_id,
+            AiCallLog.created_at >= since,
+            AiCallLog.outcome != "cached",
+        )
+        .group_by(day, AiCallLog.task_type)
+        .order_by(day, AiCallLog.task_type)
+    )
+    return [dict(row._mapping) for row in result.all()]
@@ -7,6 +7,7 @@
 - `get_decrypted_key` 返回的明文由调用方负责不泄露。
 """
 
+import json
 from datetime import datetime, timezone
 
 from sqlalchemy import select, update
@@ -16,6 +17,22 @@ from app.core.crypto import decrypt, encrypt
 from app.core.models.ai_key import AiApiKey
 
 
+_FALLBACK_FIELDS = ("api_base_url", "model_name", "api_key")
+
+
+def _encrypt_fallbacks(providers: list[dict] | None) -> str | None:
+    """校验并加密备用服务商列表；空列表返回 None。"""
+    if not providers:
+        return None
+    cleaned = []
+    for item in providers:
+        missing = [f for f in _FALLBACK_FIELDS if not str(item.get(f) or "").strip()]
+        if missing:
+            raise ValueError(f"备用服务商缺少字段: {', '.join(missing)}")
+        cleaned.append({f: str(item[f]).strip() for f in _FALLBACK_FIELDS})
+    return encrypt(json.dumps(cleaned, ensure_ascii=False))
+
+
 async def save_ai_key(
     session: AsyncSession,
     tenant_id: int,
@@ -24,6 +41,7 @@ async def save_ai_key(
     plain_api_key: str,
     model_name: str = "gpt-4o-mini",
     key_type: str = "text",
+    fallback_providers: list[dict] | None = None,
 ) -> AiApiKey:
     """加密 API Key 后入库，同时将该用户同类型旧记录标记为 inactive。
 
@@ -35,6 +53,8 @@ async def save_ai_key(
         plain_api_key: 明文 API Key（函数内部立即加密，不写日志）。
         model_name: 模型名称（如 gpt-4o-mini、deepseek-chat）。
         key_type: Key 类型：'text'（文本模型）或 'vision'（视觉模型），默认 'text'。
+        fallback_providers: 可选备用服务商列表（按优先级），每项含
+            api_base_url / model_name / api_key（明文，整体加密后入库）。
 
     Returns:
         新建的 AiApiKey 记录（`api_key_encrypted` 为密文）。
@@ -61,6 +81,7 @@ async def save_ai_key(
         model_name=model_name,
         api_key_encrypted=encrypted,
         key_type=key_type,
+        fallback_providers_encrypted=_encrypt_fallbacks(fallback_providers),
         is_active=True,
     )
     session.add(new_key)
@@ -113,3 +134,20 @@ def get_decrypted_key(ai_key: AiApiKey) -> str:
         返回的明文禁止写入任何日志。
     """
     return decrypt(ai_key.api_key_encrypted)
+
+
+def get_fallback_providers(ai_key: AiApiKey) -> list[dict]:
+    """解密并返回备用服务商列表（按优先级）；未配置时返回空列表。
+
+    Returns:
+        list[{"api_base_url", "model_name", "api_key"}]，api_key 为明文。
+
+    Raises:
+        CryptoError: 密文被篡改或密钥不匹配时抛出。
+
+    Note:
+        返回的明文 Key 禁止写入任何日志。
+    """
+    if not ai_key.fallback_providers_encrypted:
+        return []
+    return json.loads(decrypt(ai_key.fallback_providers_encrypted))
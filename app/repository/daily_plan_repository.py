@@ -22,6 +22,8 @@ async def save_daily_plan(
     """创建或更新每日活动计划（同一用户同一日期 upsert）。
 
     若当天已存在记录，则更新；否则新建。
+    活动过程差异（process_diff_key / process_diff_json）由服务层计算后经 kwargs 传入，
+    见 diff_service.save_plan_with_diff。
 
     Args:
         session: 异步数据库会话。
@@ -0,0 +1,38 @@
+"""节假日日历仓库层（holiday_calendar，全局表）。调用方负责提交事务。"""
+from collections import defaultdict
+from collections.abc import Iterable
+from datetime import date, datetime, timezone
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.models.holiday_calendar import HolidayCalendarDay
+
+
+async def replace_year(session: AsyncSession, year: int, days: dict[date, tuple[int, str | None]]) -> int:
+    """用整年日历覆盖某年的全部行（先删后插，单条 executemany），返回行数。"""
+    synced_at = datetime.now(timezone.utc)
+    await session.execute(delete(HolidayCalendarDay).where(HolidayCalendarDay.year == year))
+    rows = [
+        {"day": d, "year": year, "day_type": day_type, "name": name, "synced_at": synced_at}
+        for d, (day_type, name) in sorted(days.items())
+    ]
+    if rows:
+        await session.execute(insert(HolidayCalendarDay), rows)
+    return len(rows)
+
+
+async def load_years(
+    session: AsyncSession, years: Iterable[int] | None = None
+) -> dict[int, dict[date, tuple[int, str | None]]]:
+    """读取已同步年份的日历：{year: {date: (day_type, name)}}；years 为 None 时读取全部年份。"""
+    stmt = select(
+        HolidayCalendarDay.year, HolidayCalendarDay.day, HolidayCalendarDay.day_type, HolidayCalendarDay.name
+    )
+    if years is not None:
+        stmt = stmt.where(HolidayCalendarDay.year.in_(list(years)))
+    result = await session.execute(stmt)
+    calendars: dict[int, dict[date, tuple[int, str | None]]] = defaultdict(dict)
+    for year, day, day_type, name in result.all():
+        calendars[year][day] = (day_type, name)
+    return dict(calendars)
@@ -0,0 +1,204 @@
+"""image_blob_repository — 内容寻址图片存储（image_blob）数据访问层。
+
+game_observation_image / listening_image 的图片字节按 SHA-256 去重存于 image_blob：
+- acquire_blob：内容已存在时仅 ref_count + 1（不写字节），否则插入新行
+- release_blobs：按引用行递减 ref_count，归零的行（连同其缩略图 image_thumbnail）删除
+以上两个函数不提交事务，由调用方（图片仓库）随图片行一起提交。
+缩略图按 (原图 sha256, 档位) 存于 image_thumbnail：add_thumbnail / get_thumbnails。
+blob_content 为延迟加载列：get_blobs / get_thumbnails 默认只取元数据，with_content=True 时才读取字节。
+"""
+from __future__ import annotations
+
+import hashlib
+from collections import Counter
+from collections.abc import Iterable
+from typing import Any
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import undefer
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.models.image_blob import ImageBlob
+from app.core.models.image_thumbnail import ImageThumbnail
+
+
+def compute_content_hash(data: bytes) -> str:
+    """返回图片字节的 SHA-256（小写十六进制）。"""
+    return hashlib.sha256(data).hexdigest()
+
+
+async def _incref(session: AsyncSession, sha256: str, count: int = 1) -> bool:
+    result = await session.execute(
+        update(ImageBlob)
+        .where(ImageBlob.sha256 == sha256)
+        .values(ref_count=ImageBlob.ref_count + count)
+    )
+    return result.rowcount > 0
+
+
+async def acquire_blob(
+    session: AsyncSession,
+    *,
+    sha256: str,
+    storage_backend: str = "mysql_blob",
+    blob_content: bytes | None = None,
+    object_key: str | None = None,
+    mime_type: str = "image/jpeg",
+    file_size: int | None = None,
+) -> str:
+    """为一行图片引用内容 sha256：已存在则增加引用计数，否则写入新内容。返回 sha256。
+
+    不提交事务。并发写入同一新内容时，后到者在保存点内插入冲突后改为增加引用。
+    """
+    if await _incref(session, sha256):
+        return sha256
+    try:
+        async with session.begin_nested():
+            session.add(ImageBlob(
+                sha256=sha256,
+                storage_backend=storage_backend,
+                blob_content=blob_content,
+                object_key=object_key,
+                mime_type=mime_type,
+                file_size=file_size if file_size is not None else (
+                    len(blob_content) if blob_content is not None else None
+                ),
+                ref_count=1,
+            ))
+    except IntegrityError:
+        await _incref(session, sha256)
+    return sha256
+
+
+async def release_blobs(session: AsyncSession, hashes: Iterable[str | None]) -> int:
+    """释放一组引用（每个元素对应一行被删除的图片）；引用归零的内容随之删除。
+
+    不提交事务。
+
+    Returns:
+        被删除的 image_blob 行数。
+    """
+    counts = Counter(h for h in hashes if h)
+    if not counts:
+        return 0
+    for sha256, count in counts.items():
+        await _incref(session, sha256, -count)
+    collected = list((await session.execute(
+        select(ImageBlob.sha256).where(
+            ImageBlob.sha256.in_(list(counts)),
+            ImageBlob.ref_count <= 0,
+        )
+    )).scalars().all())
+    if not collected:
+        return 0
+    await session.execute(delete(ImageThumbnail).where(ImageThumbnail.sha256.in_(collected)))
+    await session.execute(delete(ImageBlob).where(ImageBlob.sha256.in_(collected)))
+    return len(collected)
+
+
+async def get_blobs(
+    session: AsyncSession,
+    hashes: Iterable[str | None],
+    *,
+    with_content: bool = False,
+) -> dict[str, ImageBlob]:
+    """按 sha256 批量查询内容行，返回 {sha256: ImageBlob}（不存在的键缺省）。
+
+    Args:
+        with_content: 同时读取 blob_content（mysql_blob 后端的图片字节）；默认只取元数据。
+    """
+    keys = list({h for h in hashes if h})
+    if not keys:
+        return {}
+    stmt = select(ImageBlob).where(ImageBlob.sha256.in_(keys))
+    if with_content:
+        stmt = stmt.options(undefer(ImageBlob.blob_content))
+    result = await session.execute(stmt)
+    return {blob.sha256: blob for blob in result.scalars().all()}
+
+
+async def existing_blob_hashes(session: AsyncSession, hashes: Iterable[str]) -> set[str]:
+    """返回 hashes 中存在 image_blob 行的哈希（只查主键）。"""
+    keys = list(set(hashes))
+    if not keys:
+        return set()
+    result = await session.execute(select(ImageBlob.sha256).where(ImageBlob.sha256.in_(keys)))
+    return set(result.scalars().all())
+
+
+async def add_thumbnail(
+    session: AsyncSession,
+    *,
+    sha256: str,
+    size: str,
+    content_hash: str,
+    storage_backend: str = "mysql_blob",
+    blob_content: bytes | None = None,
+    object_key: str | None = None,
+    mime_type: str = "image/jpeg",
+    width: int,
+    height: int,
+    file_size: int,
+) -> None:
+    """保存原图 sha256 的一档缩略图；该档已存在（并发生成）时保持原行。不提交事务。"""
+    try:
+        async with session.begin_nested():
+            session.add(ImageThumbnail(
+                sha256=sha256,
+                size=size,
+                content_hash=content_hash,
+                storage_backend=storage_backend,
+                blob_content=blob_content,
+                object_key=object_key,
+                mime_type=mime_type,
+                width=width,
+                height=height,
+                file_size=file_size,
+            ))
+    except IntegrityError:
+        pass
+
+
+async def get_thumbnails(
+    session: AsyncSession,
+    hashes: Iterable[str | None],
+    size: str | None = None,
+    *,
+    with_content: bool = False,
+) -> dict[tuple[str, str], ImageThumbnail]:
+    """按原图 sha256 批量查询缩略图，返回 {(sha256, 档位): ImageThumbnail}；size 非空时只查该档。
+
+    Args:
+        with_content: 同时读取缩略图字节 blob_content；默认只取元数据。
+    """
+    keys = list({h for h in hashes if h})
+    if not keys:
+        return {}
+    stmt = select(ImageThumbnail).where(ImageThumbnail.sha256.in_(keys))
+    if size is not None:
+        stmt = stmt.where(ImageThumbnail.size == size)
+    if with_content:
+        stmt = stmt.options(undefer(ImageThumbnail.blob_content))
+    result = await session.execute(stmt)
+    return {(t.sha256, t.size): t for t in result.scalars().all()}
+
+
+async def list_thumbnail_content_hashes(session: AsyncSession, hashes: Iterable[str]) -> set[str]:
+    """返回 hashes 中作为某张缩略图字节被引用的哈希（孤儿文件清理用）。"""
+    keys = list(set(hashes))
+    if not keys:
+        return set()
+    result = await session.execute(
+        select(ImageThumbnail.content_hash).where(ImageThumbnail.content_hash.in_(keys))
+    )
+    return set(result.scalars().all())
+
+
+async def get_inline_contents(session: AsyncSession, model: Any, ids: Iterable[int]) -> dict[int, bytes | None]:
+    """读取迁移前存量图片行（GameObservationImage / ListeningImage）自身 blob_content，返回 {id: 字节}。"""
+    keys = list(set(ids))
+    if not keys:
+        return {}
+    result = await session.execute(select(model.id, model.blob_content).where(model.id.in_(keys)))
+    return {row_id: content for row_id, content in result.all()}
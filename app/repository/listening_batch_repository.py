@@ -0,0 +1,233 @@
+"""listening_batch_repository — 一对一倾听批量生成任务数据访问层。
+
+任务 / 幼儿 / 照片三张表（见 app.core.models.listening_batch）。批量任务的写入多为
+「一次改多行」（建任务时写全班幼儿与照片、续跑时重置失败幼儿），本模块函数均不提交事务，
+由服务层按步骤提交。照片字节按内容寻址存于 image_blob，删除照片行时释放引用。
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from collections.abc import Iterable
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.models.listening_batch import ListeningBatchImage, ListeningBatchItem, ListeningBatchJob
+from app.repository.image_blob_repository import acquire_blob, release_blobs
+
+
+async def create_job(
+    session: AsyncSession,
+    *,
+    tenant_id: int,
+    user_id: int,
+    obs_year: int,
+    obs_month: int,
+    grade: str | None = None,
+    term: str | None = None,
+    class_name: str | None = None,
+    observer: str | None = None,
+) -> ListeningBatchJob:
+    """新建批量任务（flush 取得 id，不提交）。"""
+    job = ListeningBatchJob(
+        tenant_id=tenant_id,
+        user_id=user_id,
+        obs_year=obs_year,
+        obs_month=obs_month,
+        grade=grade,
+        term=term,
+        class_name=class_name,
+        observer=observer,
+        status="running",
+        elapsed_ms=0,
+    )
+    session.add(job)
+    await session.flush()
+    return job
+
+
+async def add_item(
+    session: AsyncSession,
+    *,
+    job_id: int,
+    tenant_id: int,
+    user_id: int,
+    child_name: str,
+    adult_count: int | None = 1,
+    child_age: str | None = None,
+) -> ListeningBatchItem:
+    """新增任务中的一位幼儿（flush 取得 id，不提交）。"""
+    item = ListeningBatchItem(
+        job_id=job_id,
+        tenant_id=tenant_id,
+        user_id=user_id,
+        child_name=child_name,
+        adult_count=adult_count,
+        child_age=child_age,
+        status="pending",
+        attempts=0,
+    )
+    session.add(item)
+    await session.flush()
+    return item
+
+
+async def add_item_image(
+    session: AsyncSession,
+    *,
+    item_id: int,
+    tenant_id: int,
+    user_id: int,
+    domain: str,
+    image_index: int,
+    content_hash: str,
+    storage_backend: str = "mysql_blob",
+    blob_content: bytes | None = None,
+    object_key: str | None = None,
+    mime_type: str = "image/jpeg",
+    file_size: int | None = None,
+    width: int | None = None,
+    height: int | None = None,
+) -> ListeningBatchImage:
+    """新增幼儿的一张领域照片：引用 image_blob 内容（已存在时只加引用计数），不提交。"""
+    await acquire_blob(
+        session,
+        sha256=content_hash,
+        storage_backend=storage_backend,
+        blob_content=blob_content,
+        object_key=object_key,
+        mime_type=mime_type,
+        file_size=file_size,
+    )
+    img = ListeningBatchImage(
+        item_id=item_id,
+        tenant_id=tenant_id,
+        user_id=user_id,
+        domain=domain,
+        image_index=image_index,
+        content_hash=content_hash,
+        storage_backend=storage_backend,
+        object_key=object_key,
+        mime_type=mime_type,
+        file_size=file_size,
+        width=width,
+        height=height,
+    )
+    session.add(img)
+    return img
+
+
+async def get_job(
+    session: AsyncSession, job_id: int, tenant_id: int | None = None, user_id: int | None = None
+) -> ListeningBatchJob | None:
+    """按 id 查询任务；传入 tenant_id / user_id 时同时校验归属（页面调用须传入）。"""
+    stmt = select(ListeningBatchJob).where(ListeningBatchJob.id == job_id)
+    if tenant_id is not None:
+        stmt = stmt.where(ListeningBatchJob.tenant_id == tenant_id)
+    if user_id is not None:
+        stmt = stmt.where(ListeningBatchJob.user_id == user_id)
+    result = await session.execute(stmt)
+    return result.scalar_one_or_none()
+
+
+async def list_jobs(
+    session: AsyncSession, tenant_id: int, user_id: int, limit: int = 20
+) -> list[ListeningBatchJob]:
+    """用户的批量任务，按创建时间倒序。"""
+    result = await session.execute(
+        select(ListeningBatchJob)
+        .where(ListeningBatchJob.tenant_id == tenant_id, ListeningBatchJob.user_id == user_id)
+        .order_by(ListeningBatchJob.id.desc())
+        .limit(limit)
+    )
+    return list(result.scalars().all())
+
+
+async def list_job_ids_by_status(session: AsyncSession, status: str) -> list[int]:
+    """全部租户中处于某状态的任务 id（应用启动时续跑 running 任务用）。"""
+    result = await session.execute(
+        select(ListeningBatchJob.id).where(ListeningBatchJob.status == status).order_by(ListeningBatchJob.id)
+    )
+    return list(result.scalars().all())
+
+
+async def update_job(session: AsyncSession, job_id: int, **values) -> None:
+    """更新任务字段（不提交）。"""
+    await session.execute(update(ListeningBatchJob).where(ListeningBatchJob.id == job_id).values(**values))
+
+
+async def list_items(
+    session: AsyncSession, job_id: int, statuses: Iterable[str] | None = None
+) -> list[ListeningBatchItem]:
+    """任务中的幼儿（按添加顺序）；statuses 非空时只取这些状态。"""
+    stmt = select(ListeningBatchItem).where(ListeningBatchItem.job_id == job_id)
+    if statuses is not None:
+        stmt = stmt.where(ListeningBatchItem.status.in_(list(statuses)))
+    result = await session.execute(stmt.order_by(ListeningBatchItem.id))
+    return list(result.scalars().all())
+
+
+async def count_items_by_status(session: AsyncSession, job_ids: Iterable[int]) -> dict[int, dict[str, int]]:
+    """按任务统计各状态幼儿数：{job_id: {status: count}}（无幼儿的任务缺省）。"""
+    ids = list(job_ids)
+    if not ids:
+        return {}
+    result = await session.execute(
+        select(ListeningBatchItem.job_id, ListeningBatchItem.status, func.count())
+        .where(ListeningBatchItem.job_id.in_(ids))
+        .group_by(ListeningBatchItem.job_id, ListeningBatchItem.status)
+    )
+    counts: dict[int, dict[str, int]] = defaultdict(dict)
+    for job_id, status, count in result.all():
+        counts[job_id][status] = count
+    return dict(counts)
+
+
+async def update_item(session: AsyncSession, item_id: int, **values) -> None:
+    """更新幼儿字段（不提交）。"""
+    await session.execute(update(ListeningBatchItem).where(ListeningBatchItem.id == item_id).values(**values))
+
+
+async def reset_items(
+    session: AsyncSession, job_id: int, from_statuses: Iterable[str], to_status: str = "pending"
+) -> int:
+    """把任务中处于 from_statuses 的幼儿改为 to_status（不提交），返回行数。"""
+    result = await session.execute(
+        update(ListeningBatchItem)
+        .where(ListeningBatchItem.job_id == job_id, ListeningBatchItem.status.in_(list(from_statuses)))
+        .values(status=to_status)
+    )
+    return result.rowcount
+
+
+async def list_item_images(session: AsyncSession, item_id: int) -> list[ListeningBatchImage]:
+    """幼儿的全部照片，按 (领域, 序号) 排序。"""
+    result = await session.execute(
+        select(ListeningBatchImage)
+        .where(ListeningBatchImage.item_id == item_id)
+        .order_by(ListeningBatchImage.domain, ListeningBatchImage.image_index)
+    )
+    return list(result.scalars().all())
+
+
+async def delete_item_images(session: AsyncSession, item_ids: Iterable[int]) -> int:
+    """删除幼儿的照片行并释放 image_blob 引用（不提交），返回删除行数。"""
+    ids = list(item_ids)
+    if not ids:
+        return 0
+    hashes = list((await session.execute(
+        select(ListeningBatchImage.content_hash).where(ListeningBatchImage.item_id.in_(ids))
+    )).scalars().all())
+    await session.execute(delete(ListeningBatchImage).where(ListeningBatchImage.item_id.in_(ids)))
+    await release_blobs(session, hashes)
+    return len(hashes)
+
+
+async def delete_job(session: AsyncSession, job_id: int) -> None:
+    """删除任务及其幼儿与照片（释放照片引用，已写入的倾听记录不受影响；不提交）。"""
+    item_ids = list((await session.execute(
+        select(ListeningBatchItem.id).where(ListeningBatchItem.job_id == job_id)
+    )).scalars().all())
+    await delete_item_images(session, item_ids)
+    await session.execute(delete(ListeningBatchItem).where(ListeningBatchItem.job_id == job_id))
+    await session.execute(delete(ListeningBatchJob).where(ListeningBatchJob.id == job_id))
@@ -1,10 +1,18 @@
-"""listening_image_repository — 一对一倾听图片数据访问层。"""
+"""listening_image_repository — 一对一倾听图片数据访问层。
+
+查询结果不含图片字节（blob_content 延迟加载），字节经 image_store_service.iter_image_bytes 读取。
+"""
 from __future__ import annotations
 
 from sqlalchemy import delete, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.models.listening_image import ListeningImage
+from app.repository.image_blob_repository import (
+    acquire_blob,
+    compute_content_hash,
+    release_blobs,
+)
 
 
 async def add_image(
@@ -18,13 +26,31 @@ async def add_image(
     storage_backend: str = "mysql_blob",
     blob_content: bytes | None = None,
     object_key: str | None = None,
+    content_hash: str | None = None,
     mime_type: str = "image/jpeg",
     file_size: int | None = None,
     width: int | None = None,
     height: int | None = None,
     image_description: str | None = None,
 ) -> ListeningImage:
-    """新增一张倾听绘画图片记录，返回带 id 的对象。"""
+    """新增一张倾听绘画图片记录，返回带 id 的对象。
+
+    图片字节（blob_content）按内容去重存入 image_blob：同一内容已存在时只增加引用计数、
+    不再写入字节；本行只保存 content_hash。
+    """
+    if blob_content is not None and content_hash is None:
+        content_hash = compute_content_hash(blob_content)
+    if content_hash is not None:
+        await acquire_blob(
+            session,
+            sha256=content_hash,
+            storage_backend=storage_backend,
+            blob_content=blob_content,
+            object_key=object_key,
+            mime_type=mime_type,
+            file_size=file_size,
+        )
+        blob_content = None
     img = ListeningImage(
         tenant_id=tenant_id,
         user_id=user_id,
@@ -34,6 +60,7 @@ async def add_image(
         storage_backend=storage_backend,
         blob_content=blob_content,
         object_key=object_key,
+        content_hash=content_hash,
         mime_type=mime_type,
         file_size=file_size,
         width=width,
@@ -52,7 +79,7 @@ async def list_images_by_record(
     record_id: int,
     domain: str | None = None,
 ) -> list[ListeningImage]:
-    """查询某记录下的图片（可选按领域过滤），按领域 + image_index 升序。"""
+    """查询某记录下的图片（仅元数据，可选按领域过滤），按领域 + image_index 升序。"""
     filters = [
         ListeningImage.tenant_id == tenant_id,
         ListeningImage.record_id == record_id,
@@ -86,12 +113,27 @@ async def delete_images_by_record(
     session: AsyncSession,
     tenant_id: int,
     record_id: int,
-) -> None:
-    """删除某记录下的所有图片（tenant 隔离）。"""
-    await session.execute(
-        delete(ListeningImage).where(
-            ListeningImage.tenant_id == tenant_id,
-            ListeningImage.record_id == record_id,
-        )
+    *,
+    release: bool = True,
+) -> list[str]:
+    """删除某记录下的所有图片（tenant 隔离），返回被删行引用的 content_hash 列表。
+
+    Args:
+        release: True 时同时释放 image_blob 引用；覆盖保存时传 False，
+            待新图片行引用完成后再由调用方 release_blobs，避免相同内容先删后写。
+    """
+    filters = (
+        ListeningImage.tenant_id == tenant_id,
+        ListeningImage.record_id == record_id,
     )
+    hashes = [
+        h for h in (await session.execute(
+            select(ListeningImage.content_hash).where(*filters)
+        )).scalars().all()
+        if h
+    ]
+    await session.execute(delete(ListeningImage).where(*filters))
+    if release:
+        await release_blobs(session, hashes)
     await session.commit()
+    return hashes
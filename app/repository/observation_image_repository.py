@@ -1,10 +1,18 @@
-"""observation_image_repository — 游戏观察图片数据访问层。"""
+"""observation_image_repository — 游戏观察图片数据访问层。
+
+查询结果不含图片字节（blob_content 延迟加载），字节经 image_store_service.iter_image_bytes 读取。
+"""
 from __future__ import annotations
 
 from sqlalchemy import delete, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.models.game_observation_image import GameObservationImage
+from app.repository.image_blob_repository import (
+    acquire_blob,
+    compute_content_hash,
+    release_blobs,
+)
 
 
 async def add_image(
@@ -17,12 +25,30 @@ async def add_image(
     storage_backend: str = "mysql_blob",
     blob_content: bytes | None = None,
     object_key: str | None = None,
+    content_hash: str | None = None,
     mime_type: str = "image/jpeg",
     file_size: int | None = None,
     width: int | None = None,
     height: int | None = None,
 ) -> GameObservationImage:
-    """新增一张观察图片记录，返回带 id 的对象。"""
+    """新增一张观察图片记录，返回带 id 的对象。
+
+    图片字节（blob_content）按内容去重存入 image_blob：同一内容已存在时只增加引用计数、
+    不再写入字节；本行只保存 content_hash。
+    """
+    if blob_content is not None and content_hash is None:
+        content_hash = compute_content_hash(blob_content)
+    if content_hash is not None:
+        await acquire_blob(
+            session,
+            sha256=content_hash,
+            storage_backend=storage_backend,
+            blob_content=blob_content,
+            object_key=object_key,
+            mime_type=mime_type,
+            file_size=file_size,
+        )
+        blob_content = None
     img = GameObservationImage(
         tenant_id=tenant_id,
         user_id=user_id,
@@ -31,6 +57,7 @@ async def add_image(
         storage_backend=storage_backend,
         blob_content=blob_content,
         object_key=object_key,
+        content_hash=content_hash,
         mime_type=mime_type,
         file_size=file_size,
         width=width,
@@ -47,7 +74,7 @@ async def list_images_by_observation(
     tenant_id: int,
     observation_id: int,
 ) -> list[GameObservationImage]:
-    """查询某观察记录下的所有图片，按 image_index 升序排列。"""
+    """查询某观察记录下的所有图片（仅元数据），按 image_index 升序排列。"""
     result = await session.execute(
         select(GameObservationImage)
         .where(
@@ -59,6 +86,31 @@ async def list_images_by_observation(
     return list(result.scalars().all())
 
 
+async def list_image_ids_by_observations(
+    session: AsyncSession,
+    tenant_id: int,
+    observation_ids: list[int],
+) -> dict[int, list[int]]:
+    """批量查询多条观察记录的图片 id（历史列表缩略图用），返回 {observation_id: [image_id, ...]}。
+
+    只查 id 列，一次查询覆盖整页记录；按 image_index 升序。
+    """
+    if not observation_ids:
+        return {}
+    result = await session.execute(
+        select(GameObservationImage.observation_id, GameObservationImage.id)
+        .where(
+            GameObservationImage.tenant_id == tenant_id,
+            GameObservationImage.observation_id.in_(observation_ids),
+        )
+        .order_by(GameObservationImage.observation_id, GameObservationImage.image_index.asc())
+    )
+    grouped: dict[int, list[int]] = {}
+    for observation_id, image_id in result.all():
+        grouped.setdefault(observation_id, []).append(image_id)
+    return grouped
+
+
 async def get_image(
     session: AsyncSession,
     tenant_id: int,
@@ -79,11 +131,14 @@ async def delete_images_by_observation(
     tenant_id: int,
     observation_id: int,
 ) -> None:
-    """删除某观察记录下的所有图片（tenant 隔离）。"""
-    await session.execute(
-        delete(GameObservationImage).where(
-            GameObservationImage.tenant_id == tenant_id,
-            GameObservationImage.observation_id == observation_id,
-        )
+    """删除某观察记录下的所有图片（tenant 隔离），并释放其 image_blob 引用。"""
+    filters = (
+        GameObservationImage.tenant_id == tenant_id,
+        GameObservationImage.observation_id == observation_id,
     )
+    hashes = (await session.execute(
+        select(GameObservationImage.content_hash).where(*filters)
+    )).scalars().all()
+    await session.execute(delete(GameObservationImage).where(*filters))
+    await release_blobs(session, hashes)
     await session.commit()
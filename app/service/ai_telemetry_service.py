@@ -0,0 +1,67 @@
+"""AI 调用遥测服务层。
+
+- 注入批量写库函数，启动 / 停止 telemetry 后台任务（app.main 注册）
+- 按租户汇总近 N 天的按任务耗时百分位（p50 / p95 / p99，数据库内计算）与每日 token 用量，
+  供统计页与 /api/v1 使用
+"""
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import AsyncSessionLocal
+from app.integration.ai_client.telemetry import get_telemetry, start_telemetry, stop_telemetry
+from app.repository.ai_call_log_repository import (
+    add_ai_call_logs,
+    count_cached_calls,
+    sum_daily_tokens,
+    summarize_call_latency,
+)
+
+
+async def write_ai_call_logs(rows: list[dict]) -> None:
+    """telemetry 写库回调：独立会话，一批一个事务。"""
+    async with AsyncSessionLocal() as session:
+        await add_ai_call_logs(session, rows)
+        await session.commit()
+
+
+async def start_ai_telemetry() -> None:
+    start_telemetry(write_ai_call_logs)
+
+
+async def stop_ai_telemetry() -> None:
+    await stop_telemetry()
+
+
+def merge_cached_counts(latency: list[dict], cached: dict[str, int]) -> list[dict]:
+    """把各任务的缓存命中数并入耗时统计；只有缓存命中的任务补一行（calls 为 0、百分位为 None）。"""
+    by_task = {row["task_type"]: {**row, "cached": cached.get(row["task_type"], 0)} for row in latency}
+    for task_type, count in cached.items():
+        by_task.setdefault(task_type, {
+            "task_type": task_type, "calls": 0, "errors": 0, "cached": count,
+            "p50_ms": None, "p95_ms": None, "p99_ms": None,
+        })
+    return [by_task[t] for t in sorted(by_task)]
+
+
+async def get_ai_call_summary(session: AsyncSession, tenant_id: int, days: int = 7) -> dict:
+    """汇总租户近 days 天的 AI 调用统计（先写出缓冲中尚未落库的记录）。
+
+    Returns:
+        {"since", "tasks": [...], "daily_tokens": [...], "telemetry": {...}}
+    """
+    await get_telemetry().flush()
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+    latency = await summarize_call_latency(session, tenant_id, since)
+    cached = await count_cached_calls(session, tenant_id, since)
+    daily = await sum_daily_tokens(session, tenant_id, since)
+    for row in daily:
+        # SQLite 的 date() 返回字符串，MySQL 返回 date
+        if not isinstance(row["day"], date):
+            row["day"] = date.fromisoformat(str(row["day"]))
+    return {
+        "since": since,
+        "tasks": merge_cached_counts(latency, cached),
+        "daily_tokens": daily,
+        "telemetry": get_telemetry().stats(),
+    }
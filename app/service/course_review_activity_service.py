@@ -8,6 +8,7 @@ from app.core.logging import get_logger
 from app.integration.ai_client.course_review_activity_client import (
     generate_course_review_activity,
 )
+from app.integration.ai_client.telemetry import ai_call_tenant
 from app.repository.ai_key_repository import get_active_ai_key, get_decrypted_key
 from app.repository.prompt_repository import get_active_prompt
 
@@ -42,14 +43,15 @@ async def generate_course_review_activity_content(
         extra={"tenant_id": tenant_id, "user_id": user_id},
     )
 
-    result = await generate_course_review_activity(
-        context=context,
-        api_base_url=ai_key_record.api_base_url,
-        api_key=plain_api_key,
-        model_name=ai_key_record.model_name,
-        system_prompt=system_prompt,
-        _client=_ai_client,
-    )
+    with ai_call_tenant(tenant_id):
+        result = await generate_course_review_activity(
+            context=context,
+            api_base_url=ai_key_record.api_base_url,
+            api_key=plain_api_key,
+            model_name=ai_key_record.model_name,
+            system_prompt=system_prompt,
+            _client=_ai_client,
+        )
 
     logger.info(
         "课程审议生成完成",
@@ -4,7 +4,10 @@
 import calendar
 import random
 from datetime import date
-from typing import Callable, Optional
+from typing import TYPE_CHECKING, Callable, Optional
+
+if TYPE_CHECKING:
+    from app.service.semester_calendar import SemesterCalendar
 
 
 _WEEKDAY_CN = ["周一", "周二", "周三", "周四", "周五", "周六", "周日"]
@@ -45,6 +48,8 @@ def pick_three_workdays(
     month: int,
     is_holiday: Optional[Callable[[date], Optional[bool]]] = None,
     rng: Optional[random.Random] = None,
+    *,
+    semester_calendar: Optional["SemesterCalendar"] = None,
 ) -> list[date]:
     """从指定年月的全部工作日中随机选取 3 个不同日期，按时间升序返回。
 
@@ -61,19 +66,23 @@ def pick_three_workdays(
         is_holiday: 可选回调 (date) -> bool | None。返回 True 表示法定节假日需排除；
             返回 False 或 None（如 API 不可用）均视为非节假日（降级原则）。
         rng: 可选随机源（注入以便测试确定性）；默认使用模块级 random（每次点击结果不同）。
+        semester_calendar: 可选学期日历索引；给出时直接取其预计算的本月工作日，忽略 is_holiday。
 
     Returns:
         最多 3 个 date，按时间升序。
     """
-    num_days = calendar.monthrange(year, month)[1]
-    candidates: list[date] = []
-    for day in range(1, num_days + 1):
-        d = date(year, month, day)
-        if d.weekday() >= 5:  # 周末
-            continue
-        if is_holiday is not None and is_holiday(d) is True:
-            continue  # 法定节假日排除
-        candidates.append(d)
+    if semester_calendar is not None:
+        candidates = semester_calendar.workdays_in_month(year, month)
+    else:
+        num_days = calendar.monthrange(year, month)[1]
+        candidates = []
+        for day in range(1, num_days + 1):
+            d = date(year, month, day)
+            if d.weekday() >= 5:  # 周末
+                continue
+            if is_holiday is not None and is_holiday(d) is True:
+                continue  # 法定节假日排除
+            candidates.append(d)
 
     if len(candidates) <= 3:
         return candidates  # 已升序
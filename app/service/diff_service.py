@@ -10,10 +10,24 @@
     ]
 
 changed=True 表示该句在改写文中与原文不同（新增、修改或删除）。
+
+持久化与增量：
+- 保存计划（save_plan_with_diff）时把 compute_diff 结果连同 diff_key(原文, 改写文) 存入 daily_plan，
+  导出时键一致即直接读取（plan_diff），不再重跑 SequenceMatcher
+- 教师编辑改写文时用 IncrementalDiff：与上一版逐句比较，只对首尾未变句子之间的改动区段重新匹配；
+  其结果仅供页面提示，大段重排时可能与全量比对不同，不写入数据库
 """
 
 import difflib
+import hashlib
+import json
 import re
+from datetime import date
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.models.daily_plan import DailyPlan
+from app.repository.daily_plan_repository import get_daily_plan_by_date, save_daily_plan
 
 
 def _split_sentences(text: str) -> list[str]:
@@ -51,20 +65,140 @@ def compute_diff(original: str, adapted: str) -> list[dict]:
     if not adap_sentences:
         return []
 
-    # 使用 SequenceMatcher 比对句子序列
-    matcher = difflib.SequenceMatcher(None, orig_sentences, adap_sentences, autojunk=False)
+    matched = _match_sentences(orig_sentences, adap_sentences)
+    return [{"text": sentence, "changed": m < 0} for sentence, m in zip(adap_sentences, matched)]
 
-    result: list[dict] = []
 
-    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+def _match_sentences(orig_sentences: list[str], adap_sentences: list[str], offset: int = 0) -> list[int]:
+    """SequenceMatcher 比对句子序列，返回每个改写句对应的原文句下标（+offset），-1 表示新增或修改。"""
+    matched = [-1] * len(adap_sentences)
+    matcher = difflib.SequenceMatcher(None, orig_sentences, adap_sentences, autojunk=False)
+    for tag, i1, _i2, j1, j2 in matcher.get_opcodes():
         if tag == "equal":
             # 完全相同的句子
-            for sentence in adap_sentences[j1:j2]:
-                result.append({"text": sentence, "changed": False})
-        elif tag in ("replace", "insert"):
-            # 改写文中新增或替换的句子
-            for sentence in adap_sentences[j1:j2]:
-                result.append({"text": sentence, "changed": True})
-        # tag == "delete"：原文中有但改写文中删除的句子，不出现在结果中
-
-    return result
+            for k in range(j2 - j1):
+                matched[j1 + k] = offset + i1 + k
+        # replace / insert：改写文中新增或替换的句子保持 -1；
+        # delete：原文中有但改写文中删除的句子，不出现在结果中
+    return matched
+
+
+# ──────────────────────────────────────────────
+# 持久化：按原文 + 改写文的哈希判断已存差异是否有效
+# ──────────────────────────────────────────────
+
+def diff_key(original: str, adapted: str) -> str:
+    """原文 + 改写文的 sha256（十六进制），作为已存差异的有效性键。"""
+    h = hashlib.sha256(original.encode("utf-8"))
+    h.update(b"\0")
+    h.update(adapted.encode("utf-8"))
+    return h.hexdigest()
+
+
+def encode_diff(result: list[dict]) -> str:
+    return json.dumps(result, ensure_ascii=False)
+
+
+def plan_diff(plan) -> list[dict]:
+    """返回每日计划活动过程的差异：已存差异与当前原文 / 改写文一致时直接读取，否则重新计算。"""
+    original = plan.activity_process_original or ""
+    adapted = plan.activity_process_adapted or ""
+    if plan.process_diff_json is not None and plan.process_diff_key == diff_key(original, adapted):
+        return json.loads(plan.process_diff_json)
+    return compute_diff(original, adapted)
+
+
+async def save_plan_with_diff(
+    session: AsyncSession,
+    tenant_id: int,
+    user_id: int,
+    plan_date: date,
+    week_number: int,
+    weekday_cn: str,
+    grade: str,
+    class_name: str,
+    **kwargs,
+) -> DailyPlan:
+    """保存每日计划（见 daily_plan_repository.save_daily_plan），并写入活动过程的逐句差异。
+
+    差异一律由 compute_diff 计算；原文 / 改写文与已存差异的键一致时不重算。
+    """
+    existing = await get_daily_plan_by_date(session, tenant_id, user_id, plan_date)
+
+    def _current(field: str) -> str:
+        if field in kwargs:
+            return kwargs[field] or ""
+        return (getattr(existing, field) if existing is not None else None) or ""
+
+    original = _current("activity_process_original")
+    adapted = _current("activity_process_adapted")
+    key = diff_key(original, adapted)
+    if existing is None or existing.process_diff_key != key or existing.process_diff_json is None:
+        kwargs["process_diff_key"] = key
+        kwargs["process_diff_json"] = encode_diff(compute_diff(original, adapted))
+    return await save_daily_plan(
+        session, tenant_id, user_id, plan_date, week_number, weekday_cn, grade, class_name, **kwargs,
+    )
+
+
+# ──────────────────────────────────────────────
+# 编辑中的增量差异
+# ──────────────────────────────────────────────
+
+class IncrementalDiff:
+    """编辑会话内的增量差异（每个页面 / 编辑会话一个实例）。
+
+    diff(original, adapted) 与 compute_diff 返回同样格式的结果：
+    - 原文与改写文均未变化：直接返回上次结果
+    - 原文变化：全量比对
+    - 仅改写文变化：与上一版改写句逐句比较，保留首尾未变句子的结果，
+      只把中间改动区段与其两侧锚点之间的原文句重新匹配
+    局部编辑（改一句、增删几句）时结果与全量比对一致；大段重排时两者可能在对齐方式上略有差别。
+    """
+
+    def __init__(self) -> None:
+        self._original: str | None = None
+        self._adapted: str | None = None
+        self._orig_sentences: list[str] = []
+        self._sentences: list[str] = []
+        self._matched: list[int] = []
+        self.result: list[dict] = []
+
+    def diff(self, original: str, adapted: str) -> list[dict]:
+        if original == self._original and adapted == self._adapted:
+            return self.result
+        if original != self._original:
+            self._original = original
+            self._orig_sentences = _split_sentences(original)
+            self._sentences, self._matched, self.result = [], [], []
+        self._adapted = adapted
+
+        if not original.strip() and not adapted.strip():
+            new: list[str] = []
+        else:
+            new = _split_sentences(adapted)
+        old = self._sentences
+
+        # 首尾未变的句子
+        limit = min(len(old), len(new))
+        prefix = 0
+        while prefix < limit and old[prefix] == new[prefix]:
+            prefix += 1
+        suffix = 0
+        while suffix < limit - prefix and old[-1 - suffix] == new[-1 - suffix]:
+            suffix += 1
+
+        # 改动区段只能对齐到两侧锚点之间的原文句
+        lo = max((m for m in self._matched[:prefix] if m >= 0), default=-1) + 1
+        hi = min((m for m in self._matched[len(old) - suffix:] if m >= 0), default=len(self._orig_sentences))
+        middle = new[prefix:len(new) - suffix]
+        middle_matched = _match_sentences(self._orig_sentences[lo:hi], middle, offset=lo)
+
+        self._matched = self._matched[:prefix] + middle_matched + self._matched[len(old) - suffix:]
+        self.result = (
+            self.result[:prefix]
+            + [{"text": sentence, "changed": m < 0} for sentence, m in zip(middle, middle_matched)]
+            + self.result[len(old) - suffix:]
+        )
+        self._sentences = new
+        return self.result
@@ -2,19 +2,32 @@
 
 编排 AI 调用与提示词版本查询，供 UI 层调用。
 支持：晨间活动、晨间谈话、区域游戏、户外游戏、一日活动反思。
+传入 on_partial 时走流式生成，每收到新 token 即回调当前已生成文本，供 UI 增量渲染。
+同一用户的相同请求（双击 / 多标签页）进行中时经 single-flight 合并为一次 AI 调用。
 """
 
+from collections.abc import Callable
+
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.audit import log_audit
 from app.core.exceptions import ConfigError
 from app.core.logging import get_logger
-from app.integration.ai_client.generate_client import generate_activity
+from app.core.single_flight import SingleFlight, fingerprint
+from app.integration.ai_client.generate_client import (
+    generate_activity,
+    generate_activity_stream,
+)
+from app.integration.ai_client.telemetry import ai_call_tenant
 from app.repository.ai_key_repository import get_active_ai_key, get_decrypted_key
 from app.repository.prompt_repository import get_active_prompt
 
 logger = get_logger(__name__)
 
+_generate_flight = SingleFlight("generate_activity_content")
+# 请求指纹 → 等待同一次生成的流式回调（leader 的增量同时推送给后加入的页面）
+_partial_listeners: dict[str, list[Callable[[str], None]]] = {}
+
 
 async def generate_activity_content(
     session: AsyncSession,
@@ -23,6 +36,8 @@ async def generate_activity_content(
     task_type: str,
     context: dict,
     *,
+    on_partial: Callable[[str], None] | None = None,
+    refresh: bool = False,
     _ai_client=None,
 ) -> str:
     """生成单项活动内容。
@@ -33,6 +48,8 @@ async def generate_activity_content(
         task_type: 任务类型（morning_exercise / morning_talk /
                    area_game / outdoor_game / daily_reflection）。
         context: 上下文信息 dict，含 grade、class_name、activity_goal 等。
+        on_partial: 可选回调；传入时以流式生成，每段增量到达后以「截至目前的完整文本」回调。
+        refresh: True 时跳过 AI 响应缓存重新生成（页面「重新生成」）。
         _ai_client: 可选 httpx 客户端（测试用）。
 
     Returns:
@@ -60,15 +77,48 @@ async def generate_activity_content(
         extra={"tenant_id": tenant_id, "user_id": user_id, "task_type": task_type},
     )
 
-    result = await generate_activity(
+    ai_kwargs = dict(
         task_type=task_type,
         context=context,
         api_base_url=api_base_url,
         api_key=plain_api_key,
         model_name=model_name,
         system_prompt=system_prompt,
+        refresh=refresh,
         _client=_ai_client,
     )
+    flight_key = fingerprint(tenant_id, user_id, task_type, context, refresh)
+
+    def _fanout(text: str) -> None:
+        # 某个页面已关闭导致回调出错时，不能中断其他页面共享的这次生成
+        for callback in list(_partial_listeners.get(flight_key, ())):
+            try:
+                callback(text)
+            except Exception as exc:
+                logger.warning("流式回调失败，已忽略", extra={"error": str(exc)})
+
+    async def _generate() -> str:
+        with ai_call_tenant(tenant_id):
+            if on_partial is None:
+                return await generate_activity(**ai_kwargs)
+            parts: list[str] = []
+            async for delta in generate_activity_stream(**ai_kwargs):
+                parts.append(delta)
+                _fanout("".join(parts))
+            return "".join(parts).strip()
+
+    coalesced = _generate_flight.in_flight(flight_key)
+    if on_partial is not None:
+        _partial_listeners.setdefault(flight_key, []).append(on_partial)
+    try:
+        result = await _generate_flight.do(flight_key, _generate)
+    finally:
+        if on_partial is not None:
+            listeners = _partial_listeners.get(flight_key, [])
+            if on_partial in listeners:
+                listeners.remove(on_partial)
+            if not listeners:
+                _partial_listeners.pop(flight_key, None)
 
     logger.info(
         "活动内容生成完成",
@@ -79,5 +129,7 @@ async def generate_activity_content(
         tenant_id=tenant_id,
         user_id=user_id,
         task_type=task_type,
+        streamed=on_partial is not None,
+        coalesced=coalesced,
     )
     return result
@@ -0,0 +1,106 @@
+"""节假日日历服务层。
+
+- 日历按年同步到 holiday_calendar 表（节假日「年」接口，一年一次请求），节假日客户端的全部查询
+  （is_holiday / is_near_holiday / get_holiday_name / is_adjusted_workday / get_legal_holidays_in_year）
+  都由进程内日历应答，不再逐日请求接口
+- start_holiday_calendar（app.main 启动钩子）：注入年日历加载函数，把库中已同步的年份载入进程内，
+  并在后台每 HOLIDAY_REFRESH_HOURS 小时重新同步今明两年；接口不可用时继续使用库中数据（离线可用）
+- 库中没有的年份在首次查询时按需同步并落库
+"""
+import asyncio
+from datetime import date
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.logging import get_logger
+from app.integration.holiday_client.client import (
+    YearCalendar,
+    fetch_year_calendar,
+    install_year_calendar,
+    set_year_loader,
+)
+from app.repository.holiday_repository import load_years, replace_year
+
+logger = get_logger(__name__)
+
+_refresh_task: asyncio.Task | None = None
+
+
+async def sync_holiday_year(session: AsyncSession, year: int, *, _transport=None) -> YearCalendar | None:
+    """请求接口同步一年的日历：覆盖库中该年并载入进程内。接口失败返回 None（库中旧数据保留）。"""
+    days = await fetch_year_calendar(year, _transport=_transport)
+    if days is None:
+        return None
+    await replace_year(session, year, days)
+    await session.commit()
+    install_year_calendar(year, days)
+    return days
+
+
+async def load_stored_calendars(session: AsyncSession) -> list[int]:
+    """把库中已同步的全部年份载入进程内，返回年份列表。"""
+    calendars = await load_years(session)
+    for year, days in calendars.items():
+        install_year_calendar(year, days)
+    return sorted(calendars)
+
+
+async def _load_year(year: int) -> YearCalendar | None:
+    """节假日客户端的年日历加载函数：先读库，库中没有再同步。"""
+    async with AsyncSessionLocal() as session:
+        stored = (await load_years(session, [year])).get(year)
+        if stored:
+            return stored
+        return await sync_holiday_year(session, year)
+
+
+def refresh_years(today: date | None = None) -> list[int]:
+    """定时刷新的年份：今年与明年（明年的安排通常在年底公布）。"""
+    year = (today or date.today()).year
+    return [year, year + 1]
+
+
+async def refresh_holiday_calendar() -> dict[int, bool]:
+    """同步今明两年，返回 {年份: 是否成功}。"""
+    outcome: dict[int, bool] = {}
+    async with AsyncSessionLocal() as session:
+        for year in refresh_years():
+            outcome[year] = await sync_holiday_year(session, year) is not None
+    return outcome
+
+
+async def _refresh_loop(interval_seconds: float) -> None:
+    while True:
+        try:
+            outcome = await refresh_holiday_calendar()
+            logger.info("节假日日历已刷新", extra={"years": outcome})
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:  # noqa: BLE001 — 刷新失败继续使用已有日历
+            logger.warning("节假日日历刷新失败", extra={"error": str(exc)})
+        await asyncio.sleep(interval_seconds)
+
+
+async def start_holiday_calendar() -> None:
+    """启动钩子：注入加载函数、载入库中日历并开始后台定时刷新。"""
+    global _refresh_task
+    set_year_loader(_load_year)
+    try:
+        async with AsyncSessionLocal() as session:
+            years = await load_stored_calendars(session)
+        logger.info("节假日日历已载入", extra={"years": years})
+    except Exception as exc:  # noqa: BLE001 — 库不可用时按需同步
+        logger.warning("节假日日历载入失败", extra={"error": str(exc)})
+    if settings.HOLIDAY_REFRESH_HOURS > 0 and _refresh_task is None:
+        _refresh_task = asyncio.ensure_future(_refresh_loop(settings.HOLIDAY_REFRESH_HOURS * 3600))
+
+
+async def stop_holiday_calendar() -> None:
+    """关闭钩子：停止后台刷新。"""
+    global _refresh_task
+    if _refresh_task is not None:
+        _refresh_task.cancel()
+        await asyncio.gather(_refresh_task, return_exceptions=True)
+        _refresh_task = None
@@ -6,6 +6,7 @@ from app.core.audit import log_audit
 from app.core.exceptions import ConfigError
 from app.core.logging import get_logger
 from app.integration.ai_client.homemade_teaching_client import generate_homemade_teaching
+from app.integration.ai_client.telemetry import ai_call_tenant
 from app.repository.ai_key_repository import get_active_ai_key, get_decrypted_key
 from app.repository.prompt_repository import get_active_prompt
 
@@ -40,14 +41,15 @@ async def generate_homemade_teaching_content(
         extra={"tenant_id": tenant_id, "user_id": user_id},
     )
 
-    result = await generate_homemade_teaching(
-        context=context,
-        api_base_url=ai_key_record.api_base_url,
-        api_key=plain_api_key,
-        model_name=ai_key_record.model_name,
-        system_prompt=system_prompt,
-        _client=_ai_client,
-    )
+    with ai_call_tenant(tenant_id):
+        result = await generate_homemade_teaching(
+            context=context,
+            api_base_url=ai_key_record.api_base_url,
+            api_key=plain_api_key,
+            model_name=ai_key_record.model_name,
+            system_prompt=system_prompt,
+            _client=_ai_client,
+        )
 
     logger.info(
         "自制教玩具生成完成",
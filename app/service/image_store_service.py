@@ -0,0 +1,224 @@
+"""图片内容读取服务 — 把图片行（游戏观察 / 一对一倾听）还原为字节。
+
+图片字节按内容寻址存于 image_blob（见 image_blob_repository）；历史数据迁移前的行
+仍把字节直接存在自身的 blob_content 中，这里统一兼容两种情况。
+读取经各后端的 aget（filesystem 在线程中读文件，s3 走异步 HTTP），同一批图片并发读取；
+支持直链的后端（s3）可经 load_image_urls 取浏览器直接访问的地址，不经应用服务器转发字节。
+
+各表的 blob_content 为延迟加载列，列表 / 元数据查询不再经驱动拉取图片字节；
+字节只经 iter_image_bytes（导出、/media 接口、编辑回填）显式按批读取。
+"""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator, Sequence
+from typing import Any
+
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.logging import get_logger
+from app.core.models.image_blob import ImageBlob
+from app.integration.image_storage import get_storage_backend
+from app.integration.image_storage.fs_backend import FilesystemImageStorage
+from app.integration.image_storage.s3_backend import S3ImageStorage
+from app.repository.image_blob_repository import (
+    existing_blob_hashes,
+    get_blobs,
+    get_inline_contents,
+    list_thumbnail_content_hashes,
+)
+
+logger = get_logger(__name__)
+
+# 清理孤儿文件 / 对象时跳过最近写入的：put 先于引用提交，刚写入的图片可能尚未入库
+_ORPHAN_MIN_AGE_SECONDS = 3600
+_SWEEP_BATCH = 500
+# 流式读取时每批并发读取的图片数：兼顾远端后端的并发与主进程同时驻留的字节量
+_STREAM_BATCH = 4
+
+_sweep_task: asyncio.Task | None = None
+
+
+def stored_ref_of(blob: ImageBlob) -> dict:
+    """image_blob 行 → 存储后端 get 所需的 stored_ref dict（未读取字节的行 blob_content 为 None）。"""
+    return {
+        "storage_backend": blob.storage_backend,
+        "content_hash": blob.sha256,
+        "blob_content": None if "blob_content" in inspect(blob).unloaded else blob.blob_content,
+        "object_key": blob.object_key,
+        "mime_type": blob.mime_type,
+    }
+
+
+async def _read_blob(blob: ImageBlob) -> bytes | None:
+    try:
+        return await get_storage_backend(blob.storage_backend).aget(stored_ref_of(blob))
+    except FileNotFoundError:
+        logger.warning("图片文件缺失", extra={"sha256": blob.sha256, "object_key": blob.object_key})
+        return None
+
+
+async def iter_image_bytes(
+    session: AsyncSession,
+    images: Sequence[Any],
+    *,
+    batch: int = _STREAM_BATCH,
+) -> AsyncIterator[bytes | None]:
+    """按顺序逐张产出图片行的字节（内容缺失时为 None）。
+
+    每批 batch 张：一次查询取出内容行（含 mysql_blob 字节）并发读取，产出后即把字节从会话中
+    释放，主进程同一时刻只驻留一批图片；迁移前的存量行从自身 blob_content 读取。
+
+    Args:
+        session: 异步数据库会话。
+        images: GameObservationImage / ListeningImage 行（元数据查询结果即可）。
+    """
+    images = list(images)
+    for start in range(0, len(images), batch):
+        chunk = images[start:start + batch]
+        blobs = await get_blobs(session, (img.content_hash for img in chunk), with_content=True)
+        contents = dict(zip(blobs, await asyncio.gather(*(_read_blob(b) for b in blobs.values()))))
+        for blob in blobs.values():
+            session.expire(blob, ["blob_content"])
+        inline: dict[tuple[type, int], bytes | None] = {}
+        legacy = [img for img in chunk if img.content_hash is None]
+        for model in {type(img) for img in legacy}:
+            rows = await get_inline_contents(session, model, (img.id for img in legacy if type(img) is model))
+            inline.update(((model, row_id), data) for row_id, data in rows.items())
+        for img in chunk:
+            if img.content_hash is None:
+                yield inline.get((type(img), img.id))
+            else:
+                yield contents.get(img.content_hash)
+
+
+async def load_image_bytes(session: AsyncSession, images: Sequence[Any]) -> list[bytes | None]:
+    """按顺序返回每个图片行的字节（内容缺失时为 None）；需要全部字节时（如生成 .docx）使用。"""
+    return [data async for data in iter_image_bytes(session, images)]
+
+
+async def load_image_urls(session: AsyncSession, images: Sequence[Any]) -> list[str | None]:
+    """按顺序返回每个图片行的直链（预签名 / 代理 URL）；后端不支持直链时为 None。"""
+    blobs = await get_blobs(session, (img.content_hash for img in images))
+    urls: list[str | None] = []
+    for img in images:
+        blob = blobs.get(img.content_hash) if img.content_hash else None
+        if blob is None or blob.object_key is None:
+            urls.append(None)
+            continue
+        urls.append(get_storage_backend(blob.storage_backend).public_url(stored_ref_of(blob)))
+    return urls
+
+
+async def _referenced_hashes(session: AsyncSession, hashes: list[str]) -> set[str]:
+    """hashes 中仍被 image_blob / image_thumbnail 行引用的内容哈希（分批查询）。"""
+    referenced: set[str] = set()
+    for start in range(0, len(hashes), _SWEEP_BATCH):
+        batch = hashes[start:start + _SWEEP_BATCH]
+        referenced.update(await existing_blob_hashes(session, batch))
+        referenced.update(await list_thumbnail_content_hashes(session, batch))
+    return referenced
+
+
+async def sweep_orphan_files(
+    session: AsyncSession,
+    storage: FilesystemImageStorage,
+    *,
+    min_age_seconds: float = _ORPHAN_MIN_AGE_SECONDS,
+) -> int:
+    """删除 filesystem 后端中已无 image_blob / image_thumbnail 行引用的图片文件，返回删除数。
+
+    引用计数归零时 image_blob 行随事务删除，文件留待此处清理（事务回滚时文件仍需保留）。
+    put 已存在的文件会刷新其修改时间，故按修改时间跳过近期文件即可避开「重新上传同一张图片、
+    引用尚未提交」的文件；列举后才被 put 的文件在删除前再按修改时间确认。
+    """
+    files = await asyncio.to_thread(
+        lambda: dict(storage.iter_stored(min_age_seconds=min_age_seconds))
+    )
+    if not files:
+        return 0
+    referenced = await _referenced_hashes(session, list(files))
+    removed = 0
+    for sha, path in files.items():
+        if sha in referenced:
+            continue
+        # 列举之后被重新 put（修改时间已刷新）的文件可能即将被引用，删除前再确认一次
+        if await asyncio.to_thread(storage.remove_stale, path, min_age_seconds=min_age_seconds):
+            removed += 1
+    if removed:
+        logger.info("已清理孤儿图片文件", extra={"count": removed})
+    return removed
+
+
+async def sweep_orphan_objects(
+    session: AsyncSession,
+    storage: S3ImageStorage,
+    *,
+    min_age_seconds: float = _ORPHAN_MIN_AGE_SECONDS,
+) -> int:
+    """删除 s3 后端中已无 image_blob / image_thumbnail 行引用的图片对象，返回删除数。
+
+    与 sweep_orphan_files 相同，release_blobs 只删行，对象留待此处清理；aput 已存在的对象会刷新
+    其 LastModified，删除前再经 HEAD 确认。
+
+    Raises:
+        StorageError: 列举或删除请求失败时抛出（已删除的对象不回滚）。
+    """
+    objects = {sha: key async for sha, key in storage.aiter_stored(min_age_seconds=min_age_seconds)}
+    if not objects:
+        return 0
+    referenced = await _referenced_hashes(session, list(objects))
+    removed = 0
+    for sha, key in objects.items():
+        # 列举之后被重新 aput（LastModified 已刷新）的对象可能即将被引用，删除前再确认一次
+        if sha not in referenced and await storage.aremove_stale(key, min_age_seconds=min_age_seconds):
+            removed += 1
+    if removed:
+        logger.info("已清理孤儿图片对象", extra={"count": removed})
+    return removed
+
+
+async def sweep_image_files() -> None:
+    """清理 filesystem / s3 后端中已无引用的图片（其他后端直接返回，失败只记日志）。"""
+    from app.core.config import settings
+    from app.core.database import AsyncSessionLocal
+
+    if settings.IMAGE_STORAGE_BACKEND not in ("filesystem", "s3"):
+        return
+    try:
+        storage = get_storage_backend(settings.IMAGE_STORAGE_BACKEND)
+        async with AsyncSessionLocal() as session:
+            if isinstance(storage, S3ImageStorage):
+                await sweep_orphan_objects(session, storage)
+            else:
+                await sweep_orphan_files(session, storage)
+    except Exception:
+        logger.exception("清理孤儿图片失败")
+
+
+async def _sweep_loop(interval_seconds: float | None) -> None:
+    while True:
+        await sweep_image_files()
+        if interval_seconds is None:
+            return
+        await asyncio.sleep(interval_seconds)
+
+
+async def start_image_sweep() -> None:
+    """启动钩子：后台清理一次孤儿图片，之后每 IMAGE_SWEEP_INTERVAL_HOURS 小时清理（<=0 只清理一次）。"""
+    from app.core.config import settings
+
+    global _sweep_task
+    if _sweep_task is None:
+        hours = settings.IMAGE_SWEEP_INTERVAL_HOURS
+        _sweep_task = asyncio.ensure_future(_sweep_loop(hours * 3600 if hours > 0 else None))
+
+
+async def stop_image_sweep() -> None:
+    """关闭钩子：停止后台清理。"""
+    global _sweep_task
+    if _sweep_task is not None:
+        _sweep_task.cancel()
+        await asyncio.gather(_sweep_task, return_exceptions=True)
+        _sweep_task = None
@@ -19,6 +19,7 @@ from app.core.exceptions import ConfigError
 from app.core.logging import get_logger
 from app.integration.ai_client.adapt_client import adapt_activity_process
 from app.integration.ai_client.lesson_plan_client import split_lesson_plan
+from app.integration.ai_client.telemetry import ai_call_tenant
 from app.repository.ai_key_repository import get_active_ai_key, get_decrypted_key
 from app.repository.prompt_repository import get_active_prompt
 from app.service.diff_service import compute_diff
@@ -107,26 +108,27 @@ async def process_lesson_plan(
             resolved_adapt_prompt = adapt_template.content
 
     # 3. 教案拆分
-    split_result = await split_lesson_plan(
-        raw_text=raw_text,
-        api_base_url=api_base_url,
-        api_key=plain_api_key,
-        model_name=model_name,
-        system_prompt=resolved_split_prompt,
-        _client=_ai_client,
-    )
-
-    # 4. 年龄适配（对活动过程改写）
-    original_process = split_result["activity_process"]
-    adapted_process = await adapt_activity_process(
-        original=original_process,
-        grade=grade,
-        api_base_url=api_base_url,
-        api_key=plain_api_key,
-        model_name=model_name,
-        system_prompt=resolved_adapt_prompt,
-        _client=_ai_client,
-    )
+    with ai_call_tenant(tenant_id):
+        split_result = await split_lesson_plan(
+            raw_text=raw_text,
+            api_base_url=api_base_url,
+            api_key=plain_api_key,
+            model_name=model_name,
+            system_prompt=resolved_split_prompt,
+            _client=_ai_client,
+        )
+
+        # 4. 年龄适配（对活动过程改写）
+        original_process = split_result["activity_process"]
+        adapted_process = await adapt_activity_process(
+            original=original_process,
+            grade=grade,
+            api_base_url=api_base_url,
+            api_key=plain_api_key,
+            model_name=model_name,
+            system_prompt=resolved_adapt_prompt,
+            _client=_ai_client,
+        )
 
     # 5. 差异比对
     diff_result = compute_diff(original_process, adapted_process)
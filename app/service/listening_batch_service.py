@@ -0,0 +1,467 @@
+"""一对一倾听批量生成服务 — 全班幼儿的持久化后台任务。
+
+流程：
+  - create_batch_job：写入任务、幼儿与各领域照片（照片上传时已压缩，按内容寻址存储）
+  - start_batch_job / run_batch_job：后台逐个幼儿调用 generate_domain_content 生成剩余领域；
+    所有任务共享 LISTENING_BATCH_CONCURRENCY 个在途领域名额（全局预算），每完成一个领域即把结果
+    写入 listening_batch_item，五领域齐全后经 save_record_with_all 写成倾听记录草稿并释放照片
+  - 单个领域失败时该幼儿记为 failed（已完成领域保留），其余幼儿照常进行；
+    resume_batch_job 把失败幼儿重新排队，续跑时只生成尚未完成的领域
+  - 任务状态全部在数据库中：页面刷新后重新查询进度即可；应用重启时 resume_interrupted_jobs
+    （app.main 启动钩子）继续运行中的任务
+
+吞吐量（幼儿 / 小时）= 已完成幼儿数 ÷ 各轮运行累计耗时。
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.logging import get_logger
+from app.core.models.listening_batch import ListeningBatchItem, ListeningBatchJob
+from app.integration.image_processing import CompressedImage
+from app.integration.image_storage import get_storage_backend
+from app.integration.image_storage.base import ImageStorageBackend
+from app.repository.listening_batch_repository import (
+    add_item,
+    add_item_image,
+    count_items_by_status,
+    create_job,
+    delete_item_images,
+    delete_job,
+    get_job,
+    list_item_images,
+    list_items,
+    list_job_ids_by_status,
+    list_jobs,
+    reset_items,
+    update_item,
+    update_job,
+)
+from app.service.date_service import pick_three_workdays
+from app.service.image_store_service import load_image_bytes
+from app.service.listening_service import generate_domain_content, save_record_with_all
+from app.service.semester_calendar import SemesterCalendar, get_semester_calendar
+
+logger = get_logger(__name__)
+
+# 五大领域（生成与写入记录的顺序）
+BATCH_DOMAINS = ("健康", "语言", "社会", "艺术", "科学")
+# generate_domain_content 结果中持久化到 results_json 的字段（压缩图片由照片行还原）
+_RESULT_FIELDS = ("goals", "image_descriptions", "indicator_results", "evaluation", "support_strategy")
+
+
+@dataclass
+class BatchChild:
+    """建任务时的一位幼儿：{领域: 已压缩照片}。"""
+
+    child_name: str
+    domain_images: dict[str, list[CompressedImage]]
+    child_age: str | None = None
+    adult_count: int | None = 1
+
+
+@dataclass(frozen=True)
+class BatchProgress:
+    """批量任务进度（页面轮询展示）。"""
+
+    job_id: int
+    status: str
+    obs_year: int
+    obs_month: int
+    grade: str | None
+    term: str | None
+    pending: int = 0
+    running: int = 0
+    done: int = 0
+    failed: int = 0
+    elapsed_seconds: float = 0.0
+    active: bool = False
+
+    @property
+    def total(self) -> int:
+        return self.pending + self.running + self.done + self.failed
+
+    @property
+    def children_per_hour(self) -> float | None:
+        return children_per_hour(self.done, self.elapsed_seconds)
+
+
+def children_per_hour(done: int, elapsed_seconds: float) -> float | None:
+    """吞吐量：已完成幼儿数 ÷ 运行小时数；尚无完成或未计时返回 None。"""
+    if done <= 0 or elapsed_seconds <= 0:
+        return None
+    return done * 3600 / elapsed_seconds
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite 读回的时间不带时区
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _error_text(exc: BaseException) -> str:
+    return getattr(exc, "message", None) or str(exc) or type(exc).__name__
+
+
+# ─── 建任务 / 查询 ─────────────────────────────────────────────────────────────
+
+
+async def create_batch_job(
+    session: AsyncSession,
+    *,
+    job_data: dict,
+    children: list[BatchChild],
+    storage: ImageStorageBackend,
+) -> int:
+    """写入批量任务（幼儿 + 各领域照片），一个事务提交，返回任务 id；不启动运行。
+
+    Args:
+        job_data: tenant_id / user_id / obs_year / obs_month / grade / term / class_name / observer。
+        children: 全班幼儿及其已压缩照片。
+        storage: 图片存储后端实例。
+    """
+    job = await create_job(session, **job_data)
+    tenant_id, user_id = job_data["tenant_id"], job_data["user_id"]
+    for child in children:
+        item = await add_item(
+            session, job_id=job.id, tenant_id=tenant_id, user_id=user_id,
+            child_name=child.child_name, adult_count=child.adult_count, child_age=child.child_age,
+        )
+        for domain, images in child.domain_images.items():
+            stored_refs = await asyncio.gather(
+                *(storage.aput(ci.data, mime_type=ci.mime_type) for ci in images)
+            )
+            for idx, (ci, ref) in enumerate(zip(images, stored_refs), start=1):
+                await add_item_image(
+                    session,
+                    item_id=item.id,
+                    tenant_id=tenant_id,
+                    user_id=user_id,
+                    domain=domain,
+                    image_index=idx,
+                    content_hash=ref["content_hash"],
+                    storage_backend=ref.get("storage_backend", "mysql_blob"),
+                    blob_content=ref.get("blob_content"),
+                    object_key=ref.get("object_key"),
+                    mime_type=ref.get("mime_type", ci.mime_type),
+                    file_size=ci.file_size,
+                    width=ci.width,
+                    height=ci.height,
+                )
+    await session.commit()
+    return job.id
+
+
+async def get_batch_progress(
+    session: AsyncSession, tenant_id: int, user_id: int, limit: int = 20
+) -> list[BatchProgress]:
+    """用户最近的批量任务进度（新任务在前）。"""
+    jobs = await list_jobs(session, tenant_id, user_id, limit=limit)
+    counts = await count_items_by_status(session, [job.id for job in jobs])
+    now = datetime.now(timezone.utc)
+    progress = []
+    for job in jobs:
+        elapsed = job.elapsed_ms / 1000
+        if job.run_started_at is not None:
+            elapsed += max(0.0, (now - _as_utc(job.run_started_at)).total_seconds())
+        by_status = counts.get(job.id, {})
+        progress.append(BatchProgress(
+            job_id=job.id,
+            status=job.status,
+            obs_year=job.obs_year,
+            obs_month=job.obs_month,
+            grade=job.grade,
+            term=job.term,
+            pending=by_status.get("pending", 0),
+            running=by_status.get("running", 0),
+            done=by_status.get("done", 0),
+            failed=by_status.get("failed", 0),
+            elapsed_seconds=elapsed,
+            active=is_batch_job_active(job.id),
+        ))
+    return progress
+
+
+# ─── 后台运行 ─────────────────────────────────────────────────────────────────
+
+
+class _BatchRunner:
+    """进程内的运行中任务表与全局领域名额（所有批量任务共享）。"""
+
+    def __init__(self) -> None:
+        self.tasks: dict[int, asyncio.Task] = {}
+        self._slots: asyncio.Semaphore | None = None
+
+    @property
+    def slots(self) -> asyncio.Semaphore:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(max(1, settings.LISTENING_BATCH_CONCURRENCY))
+        return self._slots
+
+
+_runner = _BatchRunner()
+
+
+def reset_batch_runner() -> None:
+    """丢弃运行中任务表与名额（测试用；不取消任务）。"""
+    global _runner
+    _runner = _BatchRunner()
+
+
+def is_batch_job_active(job_id: int) -> bool:
+    task = _runner.tasks.get(job_id)
+    return task is not None and not task.done()
+
+
+@dataclass
+class _RunContext:
+    job: ListeningBatchJob
+    sessions: async_sessionmaker
+    storage: ImageStorageBackend
+    calendar: SemesterCalendar | None = None
+    ai_client: object | None = None
+
+
+def _record_domains(ctx: _RunContext, rows: list, contents: list[bytes | None], results: dict) -> list[dict]:
+    """已完成领域结果 + 照片 → save_record_with_all 的领域 payload（每领域随机 3 个工作日）。"""
+    images: dict[str, list[CompressedImage]] = defaultdict(list)
+    for row, data in zip(rows, contents):
+        images[row.domain].append(CompressedImage(
+            data=data, mime_type=row.mime_type, width=row.width or 0, height=row.height or 0,
+        ))
+    year, month = ctx.job.obs_year, ctx.job.obs_month
+    domains = []
+    for domain in BATCH_DOMAINS:
+        if domain not in results:
+            continue
+        workdays = pick_three_workdays(year, month, semester_calendar=ctx.calendar)
+        dates = {f"date_{i}": (workdays[i - 1] if i <= len(workdays) else None) for i in (1, 2, 3)}
+        domains.append({
+            "domain": domain,
+            "obs_year": year,
+            "obs_month": month,
+            **dates,
+            **results[domain],
+            "compressed_images": images[domain],
+        })
+    return domains
+
+
+async def _run_item(ctx: _RunContext, item: ListeningBatchItem) -> None:
+    """生成一位幼儿的剩余领域；全部完成后写入倾听记录并释放照片。"""
+    job = ctx.job
+    results: dict = json.loads(item.results_json or "{}")
+    async with ctx.sessions() as session:
+        await update_item(session, item.id, status="running", attempts=item.attempts + 1, error=None)
+        await session.commit()
+        rows = await list_item_images(session, item.id)
+        contents = await load_image_bytes(session, rows)
+
+    by_domain: dict[str, list[bytes | None]] = defaultdict(list)
+    for row, data in zip(rows, contents):
+        by_domain[row.domain].append(data)
+    todo = [d for d in BATCH_DOMAINS if by_domain.get(d) and d not in results]
+    context = {
+        "grade": job.grade or "",
+        "term": job.term or "",
+        "child_name": item.child_name,
+        "child_age": item.child_age or "",
+    }
+    write_lock = asyncio.Lock()
+
+    async def _domain(domain: str) -> None:
+        images = by_domain[domain]
+        if any(data is None for data in images):
+            raise FileNotFoundError(f"{domain}领域照片缺失")
+        async with _runner.slots:
+            async with ctx.sessions() as session:
+                result = await generate_domain_content(
+                    session, job.tenant_id, job.user_id,
+                    domain=domain, images=images, context=context, _ai_client=ctx.ai_client,
+                )
+        # 逐领域落库：失败后续跑不再重复生成已完成的领域
+        async with write_lock:
+            results[domain] = {k: result[k] for k in _RESULT_FIELDS}
+            async with ctx.sessions() as session:
+                await update_item(session, item.id, results_json=json.dumps(results, ensure_ascii=False))
+                await session.commit()
+
+    outcomes = await asyncio.gather(*(_domain(d) for d in todo), return_exceptions=True)
+    errors = [f"{d}：{_error_text(exc)}" for d, exc in zip(todo, outcomes) if isinstance(exc, BaseException)]
+    if errors:
+        logger.warning("倾听批量生成幼儿失败", extra={"job_id": job.id, "item_id": item.id, "errors": errors})
+        async with ctx.sessions() as session:
+            await update_item(session, item.id, status="failed", error="；".join(errors))
+            await session.commit()
+        return
+
+    record_data = {
+        "tenant_id": job.tenant_id,
+        "user_id": job.user_id,
+        "obs_year": job.obs_year,
+        "obs_month": job.obs_month,
+        "child_name": item.child_name,
+        "adult_count": item.adult_count,
+        "child_age": item.child_age,
+        "grade": job.grade,
+        "term": job.term,
+        "class_name": job.class_name,
+        "observer": job.observer,
+    }
+    async with ctx.sessions() as session:
+        record_id = await save_record_with_all(
+            session, record_data=record_data,
+            domains=_record_domains(ctx, rows, contents, results), storage=ctx.storage,
+        )
+        await update_item(session, item.id, status="done", record_id=record_id, error=None)
+        await delete_item_images(session, [item.id])
+        await session.commit()
+
+
+async def run_batch_job(
+    job_id: int,
+    *,
+    sessions: async_sessionmaker | None = None,
+    storage: ImageStorageBackend | None = None,
+    _ai_client=None,
+) -> None:
+    """运行一轮批量任务：处理全部待处理幼儿，结束时累计耗时；无待处理幼儿时任务记为 finished。
+
+    同时进行的幼儿数按全局名额折算（每位幼儿最多 5 个领域同时在途，多留一位以便名额不空转）。
+    被取消（页面取消 / 应用关闭）时正在处理的幼儿退回待处理，已完成的领域保留。
+    """
+    sessions = sessions or AsyncSessionLocal
+    storage = storage or get_storage_backend()
+    async with sessions() as session:
+        job = await get_job(session, job_id)
+        if job is None or job.status != "running":
+            return
+        await reset_items(session, job_id, ["running"])
+        queue = await list_items(session, job_id, ["pending"])
+        await update_job(session, job_id, run_started_at=datetime.now(timezone.utc))
+        await session.commit()
+
+    calendar = await get_semester_calendar(covering=[date(job.obs_year, job.obs_month, 1)])
+    ctx = _RunContext(job=job, sessions=sessions, storage=storage, calendar=calendar, ai_client=_ai_client)
+
+    async def _worker() -> None:
+        while queue:
+            item = queue.pop(0)
+            try:
+                await _run_item(ctx, item)
+            except Exception as exc:  # noqa: BLE001 — 单个幼儿失败不影响其余幼儿
+                logger.error("倾听批量写入幼儿记录失败", extra={"job_id": job_id, "item_id": item.id}, exc_info=exc)
+                async with sessions() as session:
+                    await update_item(session, item.id, status="failed", error=_error_text(exc))
+                    await session.commit()
+
+    slots = max(1, settings.LISTENING_BATCH_CONCURRENCY)
+    workers = min(len(queue), math.ceil(slots / len(BATCH_DOMAINS)) + 1)
+    started = time.monotonic()
+    try:
+        await asyncio.gather(*(_worker() for _ in range(workers)))
+    finally:
+        elapsed_ms = int((time.monotonic() - started) * 1000)
+        async with sessions() as session:
+            await reset_items(session, job_id, ["running"])
+            current = await get_job(session, job_id)
+            if current is not None:
+                values: dict = {"elapsed_ms": current.elapsed_ms + elapsed_ms, "run_started_at": None}
+                if current.status == "running" and not await list_items(session, job_id, ["pending"]):
+                    values["status"] = "finished"
+                await update_job(session, job_id, **values)
+            await session.commit()
+            counts = (await count_items_by_status(session, [job_id])).get(job_id, {})
+        logger.info(
+            "倾听批量任务本轮结束",
+            extra={
+                "job_id": job_id,
+                "done": counts.get("done", 0),
+                "failed": counts.get("failed", 0),
+                "pending": counts.get("pending", 0),
+                "elapsed_s": round(elapsed_ms / 1000, 1),
+            },
+        )
+
+
+def start_batch_job(
+    job_id: int,
+    *,
+    sessions: async_sessionmaker | None = None,
+    storage: ImageStorageBackend | None = None,
+    _ai_client=None,
+) -> asyncio.Task:
+    """在后台运行任务（同一任务已在运行时返回原任务）。"""
+    task = _runner.tasks.get(job_id)
+    if task is not None and not task.done():
+        return task
+    task = asyncio.ensure_future(run_batch_job(job_id, sessions=sessions, storage=storage, _ai_client=_ai_client))
+    _runner.tasks[job_id] = task
+    task.add_done_callback(lambda t: _runner.tasks.pop(job_id, None) if _runner.tasks.get(job_id) is t else None)
+    return task
+
+
+async def resume_batch_job(session: AsyncSession, job_id: int, tenant_id: int, user_id: int) -> bool:
+    """失败 / 已取消的任务续跑：失败幼儿重新排队（保留已完成领域），任务改回 running 并启动。
+
+    Returns:
+        False 表示任务不存在或不属于该用户。
+    """
+    job = await get_job(session, job_id, tenant_id, user_id)
+    if job is None:
+        return False
+    await reset_items(session, job_id, ["failed"])
+    await update_job(session, job_id, status="running")
+    await session.commit()
+    start_batch_job(job_id)
+    return True
+
+
+async def cancel_batch_job(session: AsyncSession, job_id: int, tenant_id: int, user_id: int) -> bool:
+    """取消任务：停止后台运行，已完成的幼儿与领域保留，可再续跑。"""
+    job = await get_job(session, job_id, tenant_id, user_id)
+    if job is None:
+        return False
+    await update_job(session, job_id, status="cancelled")
+    await session.commit()
+    task = _runner.tasks.get(job_id)
+    if task is not None:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+    return True
+
+
+async def delete_batch_job(session: AsyncSession, job_id: int, tenant_id: int, user_id: int) -> bool:
+    """删除任务（先停止运行）：释放未写入记录的照片，已写入的倾听记录不受影响。"""
+    if not await cancel_batch_job(session, job_id, tenant_id, user_id):
+        return False
+    await delete_job(session, job_id)
+    await session.commit()
+    return True
+
+
+async def resume_interrupted_jobs() -> None:
+    """应用启动钩子：继续上次关闭 / 崩溃时仍在运行的任务。"""
+    async with AsyncSessionLocal() as session:
+        job_ids = await list_job_ids_by_status(session, "running")
+    for job_id in job_ids:
+        start_batch_job(job_id)
+    if job_ids:
+        logger.info("继续运行倾听批量任务", extra={"job_ids": job_ids})
+
+
+async def stop_batch_jobs() -> None:
+    """应用关闭钩子：取消运行中的任务（状态保持 running，下次启动继续）。"""
+    tasks = list(_runner.tasks.values())
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
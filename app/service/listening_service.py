@@ -2,7 +2,9 @@
 
 职责：
   - generate_domain_content：取 vision Key → 查提示词 → 查指标目录 → 压缩图片
-    → AI 调用 → 指标星级归一化（缺失补默认 3 星）→ 审计
+    → AI 调用 → 指标星级归一化（缺失补默认 3 星）→ 审计；
+    同一用户相同领域 / 图片 / 上下文的请求进行中时经 single-flight 合并
+  - generate_all_domains：同上流程的多领域并行版本，按完成先后逐个产出结果，部分失败不影响其余领域
   - save_record_with_all：事务写 listening_record + 5×listening_domain
     + 各领域图片 + 指标结果
 
@@ -12,14 +14,31 @@
 """
 from __future__ import annotations
 
+import asyncio
+import copy
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
+
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.audit import log_audit
+from app.core.config import settings
 from app.core.exceptions import AppError, ConfigError
+from app.core.logging import get_logger
+from app.core.single_flight import SingleFlight, fingerprint
 from app.integration.ai_client.listening_client import generate_listening_domain
+from app.integration.ai_client.telemetry import ai_call_tenant
+from app.integration.image_pool import run_image_task
 from app.integration.image_processing import CompressedImage, compress_image
 from app.integration.image_storage.base import ImageStorageBackend
-from app.repository.ai_key_repository import get_active_ai_key, get_decrypted_key
+from app.integration.upload_ingest import IngestedImage
+from app.integration.ai_client.hedging import AiProvider
+from app.repository.ai_key_repository import (
+    get_active_ai_key,
+    get_decrypted_key,
+    get_fallback_providers,
+)
+from app.repository.image_blob_repository import release_blobs
 from app.repository.indicator_repository import list_indicators, list_indicators_by_ids
 from app.repository.listening_image_repository import (
     add_image,
@@ -38,6 +57,12 @@ from app.repository.listening_repository import (
     update_record,
 )
 from app.repository.prompt_repository import get_active_prompt
+from app.service.image_store_service import load_image_bytes, load_image_urls
+from app.service.media_service import ensure_thumbnails
+
+logger = get_logger(__name__)
+
+_domain_flight = SingleFlight("generate_domain_content")
 
 
 def _clamp_star(value, default: int = 3) -> int:
@@ -49,55 +74,70 @@ def _clamp_star(value, default: int = 3) -> int:
     return max(1, min(3, s))
 
 
-async def generate_domain_content(
-    session: AsyncSession,
-    tenant_id: int,
-    user_id: int,
-    *,
-    domain: str,
-    images: list[bytes],
-    context: dict,
-    _ai_client=None,
-) -> dict:
-    """调用视觉 AI 生成某领域的一对一倾听内容，返回结构化结果。
+@dataclass(frozen=True)
+class _VisionConfig:
+    """一次生成所需的视觉 Key 与提示词（同一用户的各领域共用）。"""
 
-    Args:
-        session: 异步数据库会话。
-        tenant_id / user_id: 隔离字段。
-        domain: 领域（健康/语言/社会/艺术/科学）。
-        images: 该领域原始图片字节列表（至少 1 张）。
-        context: 上下文 dict，须含 grade、term；可含 child_name、child_age。
-        _ai_client: 可选 httpx 客户端（测试用）。
+    api_base_url: str
+    api_key: str = field(repr=False)
+    model_name: str
+    fallbacks: list[AiProvider]
+    system_prompt: str | None
 
-    Returns:
-        dict，包含：
-          goals / image_descriptions / evaluation / support_strategy
-          indicator_results: list[{catalog_id, sort_order, level2_name, stars}]
-          compressed_images: list[CompressedImage]
 
-    Raises:
-        ConfigError: 未配置视觉 AI Key。
-        AiCallError / AiParseError: AI 调用或解析失败。
-    """
-    # 1. 取视觉 Key
+@dataclass(frozen=True)
+class DomainOutcome:
+    """generate_all_domains 逐个产出的单领域结果：成功时 result 非空，失败时 error 为异常。"""
+
+    domain: str
+    result: dict | None = None
+    error: Exception | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+async def _load_vision_config(session: AsyncSession, tenant_id: int, user_id: int) -> _VisionConfig:
     ai_key_record = await get_active_ai_key(
         session, tenant_id=tenant_id, user_id=user_id, key_type="vision"
     )
     if ai_key_record is None:
         raise ConfigError("尚未配置视觉模型 API Key，请先在设置页面配置")
-    plain_key = get_decrypted_key(ai_key_record)
-
-    # 2. 查提示词激活版本
     prompt_record = await get_active_prompt(
         session, tenant_id=tenant_id, user_id=user_id,
         task_type="one_on_one_listening",
     )
-    system_prompt = prompt_record.content if prompt_record else None
+    return _VisionConfig(
+        api_base_url=ai_key_record.api_base_url,
+        api_key=get_decrypted_key(ai_key_record),
+        model_name=ai_key_record.model_name,
+        fallbacks=[AiProvider(**p) for p in get_fallback_providers(ai_key_record)],
+        system_prompt=prompt_record.content if prompt_record else None,
+    )
+
+
+async def _compress_images(images: list[bytes | IngestedImage]) -> list[CompressedImage]:
+    """压缩一个领域的图片（图片进程池）；上传对象复用其后台压缩结果。"""
+    return list(await asyncio.gather(*(
+        img.compressed() if isinstance(img, IngestedImage) else run_image_task(compress_image, img)
+        for img in images
+    )))
+
 
-    # 3. 查该领域二级指标目录
-    grade = context.get("grade") or ""
-    term = context.get("term") or ""
-    catalog = await list_indicators(session, tenant_id, grade, term, domain)
+async def _generate_domain(
+    config: _VisionConfig,
+    catalog: list,
+    tenant_id: int,
+    user_id: int,
+    *,
+    domain: str,
+    images: list[bytes | IngestedImage],
+    context: dict,
+    compressed: asyncio.Future | None = None,
+    _ai_client=None,
+) -> dict:
+    """单领域：压缩图片 → AI 调用 → 指标星级归一化 → 审计（经 single-flight 合并）。"""
     indicators_for_ai = [
         {
             "sort_order": c.sort_order,
@@ -111,56 +151,160 @@ async def generate_domain_content(
         for c in catalog
     ]
 
-    # 4. 压缩图片
-    compressed_images: list[CompressedImage] = [compress_image(b) for b in images]
-    compressed_bytes = [ci.data for ci in compressed_images]
-
-    # 5. 调用视觉 AI
-    result = await generate_listening_domain(
-        images=compressed_bytes,
-        context={"domain": domain, **context},
-        indicators=indicators_for_ai,
-        api_base_url=ai_key_record.api_base_url,
-        api_key=plain_key,
-        model_name=ai_key_record.model_name,
-        system_prompt=system_prompt,
-        _client=_ai_client,
-    )
+    async def _generate() -> dict:
+        # 压缩图片（整条记录生成时已提前提交到进程池）
+        compressed_images = await (compressed if compressed is not None else _compress_images(images))
+        compressed_bytes = [ci.data for ci in compressed_images]
+
+        with ai_call_tenant(tenant_id):
+            result = await generate_listening_domain(
+                images=compressed_bytes,
+                context={"domain": domain, **context},
+                indicators=indicators_for_ai,
+                api_base_url=config.api_base_url,
+                api_key=config.api_key,
+                model_name=config.model_name,
+                system_prompt=config.system_prompt,
+                fallbacks=config.fallbacks,
+                _client=_ai_client,
+            )
 
-    # 6. 指标星级归一化：覆盖全部目录指标，AI 未给的默认 3 星
-    ai_stars = {
-        item.get("sort_order"): item.get("stars")
-        for item in result["indicators"]
-        if isinstance(item, dict)
-    }
-    indicator_results = [
-        {
-            "catalog_id": c.id,
-            "sort_order": c.sort_order,
-            "level2_name": c.level2_name,
-            "stars": _clamp_star(ai_stars.get(c.sort_order, 3)),
+        # 指标星级归一化：覆盖全部目录指标，AI 未给的默认 3 星
+        ai_stars = {
+            item.get("sort_order"): item.get("stars")
+            for item in result["indicators"]
+            if isinstance(item, dict)
+        }
+        indicator_results = [
+            {
+                "catalog_id": c.id,
+                "sort_order": c.sort_order,
+                "level2_name": c.level2_name,
+                "stars": _clamp_star(ai_stars.get(c.sort_order, 3)),
+            }
+            for c in catalog
+        ]
+        return {
+            "goals": result["goals"],
+            "image_descriptions": result["image_descriptions"],
+            "indicator_results": indicator_results,
+            "evaluation": result["evaluation"],
+            "support_strategy": result["support_strategy"],
+            "compressed_images": compressed_images,
         }
-        for c in catalog
-    ]
 
-    # 7. 审计
+    image_keys = [img.fingerprint_key if isinstance(img, IngestedImage) else img for img in images]
+    flight_key = fingerprint(tenant_id, user_id, domain, context, image_keys)
+    coalesced = _domain_flight.in_flight(flight_key)
+    # 合并的请求共享同一结果对象，复制一份避免调用方之间互相修改
+    domain_result = copy.deepcopy(await _domain_flight.do(flight_key, _generate))
+
     log_audit(
         "ai_listening",
         tenant_id=tenant_id,
         user_id=user_id,
         domain=domain,
-        model_name=ai_key_record.model_name,
+        model_name=config.model_name,
         image_count=len(images),
+        coalesced=coalesced,
     )
 
-    return {
-        "goals": result["goals"],
-        "image_descriptions": result["image_descriptions"],
-        "indicator_results": indicator_results,
-        "evaluation": result["evaluation"],
-        "support_strategy": result["support_strategy"],
-        "compressed_images": compressed_images,
-    }
+    return domain_result
+
+
+async def generate_domain_content(
+    session: AsyncSession,
+    tenant_id: int,
+    user_id: int,
+    *,
+    domain: str,
+    images: list[bytes | IngestedImage],
+    context: dict,
+    _ai_client=None,
+) -> dict:
+    """调用视觉 AI 生成某领域的一对一倾听内容，返回结构化结果。
+
+    Args:
+        session: 异步数据库会话。
+        tenant_id / user_id: 隔离字段。
+        domain: 领域（健康/语言/社会/艺术/科学）。
+        images: 该领域原始图片字节或已摄取的上传（至少 1 张；上传对象复用其后台压缩结果）。
+        context: 上下文 dict，须含 grade、term；可含 child_name、child_age。
+        _ai_client: 可选 httpx 客户端（测试用）。
+
+    Returns:
+        dict，包含：
+          goals / image_descriptions / evaluation / support_strategy
+          indicator_results: list[{catalog_id, sort_order, level2_name, stars}]
+          compressed_images: list[CompressedImage]
+
+    Raises:
+        ConfigError: 未配置视觉 AI Key。
+        AiCallError / AiParseError: AI 调用或解析失败。
+    """
+    config = await _load_vision_config(session, tenant_id, user_id)
+    catalog = await list_indicators(
+        session, tenant_id, context.get("grade") or "", context.get("term") or "", domain
+    )
+    return await _generate_domain(
+        config, catalog, tenant_id, user_id,
+        domain=domain, images=images, context=context, _ai_client=_ai_client,
+    )
+
+
+async def generate_all_domains(
+    session: AsyncSession,
+    tenant_id: int,
+    user_id: int,
+    *,
+    domain_images: dict[str, list[bytes | IngestedImage]],
+    context: dict,
+    concurrency: int | None = None,
+    _ai_client=None,
+) -> AsyncIterator[DomainOutcome]:
+    """并行生成多个领域，按完成先后逐个产出 DomainOutcome。
+
+    视觉 Key、提示词与各领域指标目录先经 session 顺序查好（此后不再使用 session）；
+    全部领域的图片一次性提交到图片进程池压缩，各领域 AI 调用在 concurrency
+    （缺省 LISTENING_DOMAIN_CONCURRENCY）个名额内并行。单个领域失败只产出带 error 的结果，
+    其余领域照常完成；调用方中途停止迭代时取消未完成的领域。
+
+    Args:
+        domain_images: {领域: 该领域图片}，按此顺序启动。
+        context: 同 generate_domain_content。
+
+    Raises:
+        ConfigError: 未配置视觉 AI Key（在产出任何结果之前抛出）。
+    """
+    config = await _load_vision_config(session, tenant_id, user_id)
+    grade, term = context.get("grade") or "", context.get("term") or ""
+    catalogs = {d: await list_indicators(session, tenant_id, grade, term, d) for d in domain_images}
+
+    slots = asyncio.Semaphore(max(1, concurrency or settings.LISTENING_DOMAIN_CONCURRENCY))
+    compressing = {d: asyncio.ensure_future(_compress_images(imgs)) for d, imgs in domain_images.items()}
+
+    async def _run(domain: str) -> DomainOutcome:
+        try:
+            async with slots:
+                result = await _generate_domain(
+                    config, catalogs[domain], tenant_id, user_id,
+                    domain=domain, images=domain_images[domain], context=context,
+                    compressed=compressing[domain], _ai_client=_ai_client,
+                )
+            return DomainOutcome(domain, result=result)
+        except Exception as exc:  # noqa: BLE001 — 单领域失败不影响其余领域
+            logger.warning("倾听领域生成失败", extra={"domain": domain, "error": str(exc)})
+            return DomainOutcome(domain, error=exc)
+
+    tasks = [asyncio.ensure_future(_run(d)) for d in domain_images]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for fut in (*tasks, *compressing.values()):
+            fut.cancel()
+        # 已失败且未被领域任务取回的压缩结果（领域在排队时被取消）在此取回，避免告警
+        await asyncio.gather(*tasks, *compressing.values(), return_exceptions=True)
 
 
 async def _persist_domains(
@@ -174,8 +318,10 @@ async def _persist_domains(
 ) -> None:
     """写入某记录下的各领域内容（领域 + 图片 + 指标结果）。
 
-    save_record_with_all（新建）与 update_record_with_all（覆盖）共用。
+    save_record_with_all（新建）与 update_record_with_all（覆盖）共用；
+    全部领域写完后统一生成缺失的缩略图。
     """
+    thumbnail_items: list[tuple[str, bytes]] = []
     for dom in domains:
         domain_name = dom["domain"]
         await save_domain(
@@ -196,8 +342,11 @@ async def _persist_domains(
 
         compressed = dom.get("compressed_images") or []
         descriptions = dom.get("image_descriptions") or []
-        for idx, ci in enumerate(compressed, start=1):
-            stored_ref = storage.put(ci.data, mime_type=ci.mime_type)
+        # 同一领域的图片并行上传；写库仍按顺序使用同一 session
+        stored_refs = await asyncio.gather(
+            *(storage.aput(ci.data, mime_type=ci.mime_type) for ci in compressed)
+        )
+        for idx, (ci, stored_ref) in enumerate(zip(compressed, stored_refs), start=1):
             desc = descriptions[idx - 1] if idx - 1 < len(descriptions) else None
             await add_image(
                 session,
@@ -208,12 +357,15 @@ async def _persist_domains(
                 image_index=idx,
                 storage_backend=stored_ref.get("storage_backend", "mysql_blob"),
                 blob_content=stored_ref.get("blob_content"),
+                object_key=stored_ref.get("object_key"),
+                content_hash=stored_ref.get("content_hash"),
                 mime_type=stored_ref.get("mime_type", ci.mime_type),
                 file_size=ci.file_size,
                 width=ci.width,
                 height=ci.height,
                 image_description=desc,
             )
+        thumbnail_items.extend((ref["content_hash"], ci.data) for ci, ref in zip(compressed, stored_refs))
 
         for ind in dom.get("indicator_results") or []:
             await save_indicator_result(
@@ -226,6 +378,8 @@ async def _persist_domains(
                 stars=ind.get("stars", 3),
             )
 
+    await ensure_thumbnails(session, storage, thumbnail_items)
+
 
 async def save_record_with_all(
     session: AsyncSession,
@@ -271,6 +425,8 @@ async def update_record_with_all(
     """覆盖更新整条记录：更新主表字段并删除重建全部子表，返回 record_id。
 
     采用「更新主表 + 删除重建子表」策略（与逐调用 commit 模式一致）。
+    图片内容按 SHA-256 去重：旧图片行的 image_blob 引用在新行写入之后才释放，
+    未变化的图片只增减引用计数，不重写字节；重建中途失败时回滚未提交部分后同样释放。
 
     Args:
         record_id: 目标记录 ID。
@@ -290,18 +446,26 @@ async def update_record_with_all(
     if not ok:
         raise AppError("记录不存在或无权限修改")
 
-    await delete_images_by_record(session, tenant_id, record_id)
-    await delete_indicator_results_by_record(session, tenant_id, record_id)
-    await delete_domains_by_record(session, tenant_id, record_id)
+    old_hashes = await delete_images_by_record(session, tenant_id, record_id, release=False)
+    try:
+        await delete_indicator_results_by_record(session, tenant_id, record_id)
+        await delete_domains_by_record(session, tenant_id, record_id)
 
-    await _persist_domains(
-        session,
-        tenant_id=tenant_id,
-        user_id=user_id,
-        record_id=record_id,
-        domains=domains,
-        storage=storage,
-    )
+        await _persist_domains(
+            session,
+            tenant_id=tenant_id,
+            user_id=user_id,
+            record_id=record_id,
+            domains=domains,
+            storage=storage,
+        )
+    except BaseException:
+        await session.rollback()
+        raise
+    finally:
+        # 旧图片行已随 delete_images_by_record 提交删除：重建失败也必须释放其引用，否则 image_blob 永久泄漏
+        await release_blobs(session, old_hashes)
+        await session.commit()
     return record_id
 
 
@@ -309,11 +473,15 @@ async def load_record_detail(
     session: AsyncSession,
     tenant_id: int,
     record_id: int,
+    *,
+    with_content: bool = True,
 ) -> dict | None:
     """从 DB 装配整条记录详情（主表 + 各领域 + 图片 + 指标结果）。
 
     指标的 sort_order 经 indicator_catalog 映射，供导出打勾定位与详情展示。
     强制 tenant_id 过滤；记录不存在返回 None。
+    每张图片附 id 与 url（存储后端支持直链时，如 s3 预签名地址，否则 None）；
+    with_content=False（仅页面展示，图片经 /media 接口加载）时不读取字节，data 为 None。
 
     Returns:
         dict | None，结构见 to_export_payload 的输入约定。
@@ -324,6 +492,9 @@ async def load_record_detail(
 
     domains = await list_domains_by_record(session, tenant_id, record_id)
     images = await list_images_by_record(session, tenant_id, record_id)
+    urls = dict(zip((img.id for img in images), await load_image_urls(session, images)))
+    to_read = images if with_content else []
+    contents = dict(zip((img.id for img in to_read), await load_image_bytes(session, to_read)))
     results = await list_indicator_results(session, tenant_id, record_id)
 
     catalog_map = await list_indicators_by_ids(
@@ -362,7 +533,9 @@ async def load_record_detail(
             "support_strategy": dom.support_strategy,
             "images": [
                 {
-                    "data": img.blob_content,
+                    "id": img.id,
+                    "data": contents.get(img.id),
+                    "url": urls[img.id],
                     "mime_type": img.mime_type,
                     "width": img.width,
                     "height": img.height,
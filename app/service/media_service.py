@@ -0,0 +1,254 @@
+"""图片媒体服务 — 缩略图生成与 /media 接口的签名地址、内容解析。
+
+- 保存图片时经 ensure_thumbnails 生成 THUMBNAIL_SIZES 各档缩略图（进程池中缩放），
+  与原图一样经存储后端保存；同一内容已有缩略图时跳过（覆盖保存不重复生成）
+- 页面通过 media_url 取带签名的 /media/{kind}/{id}?size= 地址：签名绑定图片、租户与过期时间，
+  过期时间按天取整，同一天内地址不变，浏览器缓存可命中
+- load_media 解析接口应返回的内容：ETag 为字节的 SHA-256（强校验）；缺失的缩略图
+  （迁移前的存量图片）不在请求中生成：本次先返回原图，并排入后台任务生成保存
+"""
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass
+from pathlib import Path
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.core.exceptions import AppError
+from app.core.logging import get_logger
+from app.integration.image_pool import run_image_task
+from app.integration.image_processing import THUMBNAIL_SIZES, make_thumbnails, probe_image
+from app.integration.image_storage import get_storage_backend
+from app.integration.image_storage.base import ImageStorageBackend
+from app.integration.image_storage.fs_backend import FilesystemImageStorage
+from app.repository import listening_image_repository, observation_image_repository
+from app.repository.image_blob_repository import add_thumbnail, get_blobs, get_thumbnails
+from app.service.image_store_service import load_image_bytes, stored_ref_of
+
+logger = get_logger(__name__)
+
+# kind → 按 (tenant_id, image_id) 查询图片行的仓库函数
+MEDIA_KINDS = {
+    "observation": observation_image_repository.get_image,
+    "listening": listening_image_repository.get_image,
+}
+MEDIA_SIZES = (*THUMBNAIL_SIZES, "orig")
+# 签名地址过期时间取整粒度（秒）：同一粒度内生成的地址相同
+_URL_BUCKET_SECONDS = 86400
+
+# 后台补齐缩略图中的原图 sha256 → 任务（同一内容的并发请求只排一次）
+_backfill_tasks: dict[str, asyncio.Task] = {}
+
+
+@dataclass
+class MediaContent:
+    """/media 接口的响应内容：data / path / redirect_url 三者恰有其一。
+
+    provisional 为 True 表示请求的缩略图尚未生成、暂以原图代替，响应不应长期缓存。
+    """
+
+    etag: str
+    mime_type: str
+    data: bytes | None = None
+    path: Path | None = None
+    redirect_url: str | None = None
+    provisional: bool = False
+
+
+def _sign(kind: str, image_id: int, tenant_id: int, exp: int) -> str:
+    message = f"{kind}:{image_id}:{tenant_id}:{exp}".encode("utf-8")
+    return hmac.new(settings.JWT_SECRET.encode("utf-8"), message, hashlib.sha256).hexdigest()
+
+
+def media_url(kind: str, image_id: int, tenant_id: int, size: str = "sm", *, now: float | None = None) -> str:
+    """返回图片的签名访问地址（有效期至少 1 天）。"""
+    current = int(now if now is not None else time.time())
+    exp = (current // _URL_BUCKET_SECONDS + 2) * _URL_BUCKET_SECONDS
+    sig = _sign(kind, image_id, tenant_id, exp)
+    return f"/media/{kind}/{image_id}?size={size}&t={tenant_id}&exp={exp}&sig={sig}"
+
+
+def verify_media_signature(
+    kind: str, image_id: int, tenant_id: int, exp: int, sig: str, *, now: float | None = None,
+) -> bool:
+    """校验签名地址未过期且未被篡改。"""
+    current = now if now is not None else time.time()
+    if exp < current:
+        return False
+    return hmac.compare_digest(_sign(kind, image_id, tenant_id, exp), sig)
+
+
+async def ensure_thumbnails(
+    session: AsyncSession,
+    storage: ImageStorageBackend,
+    items: Sequence[tuple[str, bytes]],
+) -> int:
+    """为 (原图 sha256, 原图字节) 中尚缺缩略图的内容生成并保存各档缩略图，返回生成的原图数。
+
+    缩放在图片进程池中并行执行；缩略图字节经 storage 保存后写入 image_thumbnail 并提交。
+    无法解码的内容记录告警后跳过，不影响原图保存。
+    """
+    pending = {sha: data for sha, data in items if sha}
+    if not pending:
+        return 0
+    existing = await get_thumbnails(session, pending)
+    missing = {
+        sha: tuple(size for size in THUMBNAIL_SIZES if (sha, size) not in existing)
+        for sha in pending
+    }
+    missing = {sha: sizes for sha, sizes in missing.items() if sizes}
+    if not missing:
+        return 0
+
+    generated = await asyncio.gather(
+        *(run_image_task(make_thumbnails, pending[sha], sizes) for sha, sizes in missing.items()),
+        return_exceptions=True,
+    )
+    flat = []
+    for sha, thumbs in zip(missing, generated):
+        if isinstance(thumbs, Exception):
+            # 无法解码的内容不生成缩略图，/media 请求缩略图时回退为原图
+            logger.warning("缩略图生成失败", extra={"sha256": sha, "error": str(thumbs)})
+            continue
+        flat.extend((sha, size, thumb) for size, thumb in thumbs.items())
+    if not flat:
+        return 0
+    refs = await asyncio.gather(*(storage.aput(t.data, mime_type=t.mime_type) for _, _, t in flat))
+    for (sha, size, thumb), ref in zip(flat, refs):
+        await add_thumbnail(
+            session,
+            sha256=sha,
+            size=size,
+            content_hash=ref["content_hash"],
+            storage_backend=ref.get("storage_backend", "mysql_blob"),
+            blob_content=ref.get("blob_content"),
+            object_key=ref.get("object_key"),
+            mime_type=ref.get("mime_type", thumb.mime_type),
+            width=thumb.width,
+            height=thumb.height,
+            file_size=thumb.file_size,
+        )
+    await session.commit()
+    return len({sha for sha, _, _ in flat})
+
+
+async def _backfill_thumbnails(
+    sessions: async_sessionmaker, kind: str, image_id: int, tenant_id: int,
+) -> None:
+    """后台任务：读取图片原图并补齐缺失的缩略图（失败只记日志，下次请求会再排入）。"""
+    try:
+        async with sessions() as session:
+            row = await MEDIA_KINDS[kind](session, tenant_id, image_id)
+            if row is None or row.content_hash is None:
+                return
+            original = (await load_image_bytes(session, [row]))[0]
+            if original is not None:
+                await ensure_thumbnails(session, get_storage_backend(), [(row.content_hash, original)])
+    except Exception as exc:  # noqa: BLE001 — 补齐失败时继续返回原图
+        logger.warning(
+            "缩略图补齐失败", extra={"kind": kind, "image_id": image_id, "error": str(exc)},
+        )
+
+
+def _queue_thumbnail_backfill(
+    session: AsyncSession, sha: str, kind: str, image_id: int, tenant_id: int,
+) -> None:
+    """把缺失缩略图的生成排入后台任务（使用独立 session，不在请求的 session 中提交）。"""
+    task = _backfill_tasks.get(sha)
+    if task is not None and not task.done():
+        return
+    sessions = async_sessionmaker(session.bind, class_=AsyncSession, expire_on_commit=False)
+    task = asyncio.ensure_future(_backfill_thumbnails(sessions, kind, image_id, tenant_id))
+    _backfill_tasks[sha] = task
+    task.add_done_callback(lambda t: _backfill_tasks.pop(sha, None) if _backfill_tasks.get(sha) is t else None)
+
+
+def _legacy_mime_type(row, data: bytes) -> str:
+    """迁移前的存量行按字节识别格式；无法识别时沿用行上记录的类型。"""
+    try:
+        return probe_image(data).mime_type
+    except AppError:
+        return getattr(row, "mime_type", None) or "image/jpeg"
+
+
+async def _resolve(ref: dict, etag: str) -> MediaContent:
+    storage = get_storage_backend(ref["storage_backend"])
+    mime_type = ref.get("mime_type") or "image/jpeg"
+    url = storage.public_url(ref)
+    if url:
+        return MediaContent(etag=etag, mime_type=mime_type, redirect_url=url)
+    if isinstance(storage, FilesystemImageStorage):
+        return MediaContent(etag=etag, mime_type=mime_type, path=storage.local_path(ref))
+    return MediaContent(etag=etag, mime_type=mime_type, data=await storage.aget(ref))
+
+
+async def load_media(
+    session: AsyncSession,
+    kind: str,
+    image_id: int,
+    tenant_id: int,
+    size: str = "sm",
+) -> MediaContent | None:
+    """解析 /media 接口内容；图片不存在（或不属于该租户）时返回 None。
+
+    Raises:
+        ValueError: kind / size 非法时抛出。
+    """
+    if kind not in MEDIA_KINDS or size not in MEDIA_SIZES:
+        raise ValueError(f"非法的媒体参数：{kind}/{size}")
+    row = await MEDIA_KINDS[kind](session, tenant_id, image_id)
+    if row is None:
+        return None
+
+    if row.content_hash is None:
+        # 迁移前的存量行：字节内联，缩略图即时生成、不落库
+        data = (await load_image_bytes(session, [row]))[0]
+        if data is None:
+            return None
+        mime_type = _legacy_mime_type(row, data)
+        if size != "orig":
+            try:
+                thumb = (await run_image_task(make_thumbnails, data, (size,)))[size]
+                data, mime_type = thumb.data, thumb.mime_type
+            except AppError:
+                pass
+        return MediaContent(etag=f'"{hashlib.sha256(data).hexdigest()}"', mime_type=mime_type, data=data)
+
+    sha = row.content_hash
+    if size == "orig":
+        blob = (await get_blobs(session, [sha], with_content=True)).get(sha)
+        if blob is None:
+            return None
+        return await _resolve(stored_ref_of(blob), f'"{sha}"')
+
+    thumb = (await get_thumbnails(session, [sha], size, with_content=True)).get((sha, size))
+    if thumb is None:
+        # 缩略图缺失（存量图片或无法解码）：本次返回原图，后台补齐后续请求即命中缩略图
+        _queue_thumbnail_backfill(session, sha, kind, image_id, tenant_id)
+        content = await load_media(session, kind, image_id, tenant_id, "orig")
+        if content is not None:
+            content.provisional = True
+        return content
+    return await _resolve(
+        {
+            "storage_backend": thumb.storage_backend,
+            "content_hash": thumb.content_hash,
+            "blob_content": thumb.blob_content,
+            "object_key": thumb.object_key,
+            "mime_type": thumb.mime_type,
+        },
+        f'"{thumb.content_hash}"',
+    )
+
+
+async def thumbnail_data_url(data: bytes, size: str = "sm") -> str:
+    """尚未保存的上传图片的缩略图 data URL（页面即时预览用，避免把原图整张推给浏览器）。"""
+    thumb = (await run_image_task(make_thumbnails, data, (size,)))[size]
+    return f"data:{thumb.mime_type};base64,{base64.b64encode(thumb.data).decode()}"
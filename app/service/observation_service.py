@@ -1,7 +1,7 @@
 """游戏观察服务层 — 生成与持久化。
 
 职责：
-  - generate_observation_content：取 vision Key → 查提示词 → 压缩图片 → AI 调用 → 审计
+  - generate_observation_content：取 vision Key → 查提示词 → 压缩图片（图片进程池）→ AI 调用 → 审计
   - save_observation_with_images：事务写 game_observation + 逐图存储
 
 安全约定：
@@ -10,6 +10,7 @@
 """
 from __future__ import annotations
 
+import asyncio
 from datetime import date
 
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -17,19 +18,28 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.audit import log_audit
 from app.core.exceptions import ConfigError
 from app.integration.ai_client.observation_client import generate_observation
+from app.integration.ai_client.telemetry import ai_call_tenant
+from app.integration.image_pool import run_image_task
 from app.integration.image_processing import CompressedImage, compress_image
 from app.integration.image_storage.base import ImageStorageBackend
-from app.repository.ai_key_repository import get_active_ai_key, get_decrypted_key
+from app.integration.upload_ingest import IngestedImage
+from app.integration.ai_client.hedging import AiProvider
+from app.repository.ai_key_repository import (
+    get_active_ai_key,
+    get_decrypted_key,
+    get_fallback_providers,
+)
 from app.repository.observation_image_repository import add_image
 from app.repository.observation_repository import save_observation
 from app.repository.prompt_repository import get_active_prompt
+from app.service.media_service import ensure_thumbnails
 
 
 async def generate_observation_content(
     session: AsyncSession,
     tenant_id: int,
     user_id: int,
-    images: list[bytes],
+    images: list[bytes | IngestedImage],
     context: dict,
     *,
     _ai_client=None,
@@ -40,7 +50,7 @@ async def generate_observation_content(
         session: 异步数据库会话。
         tenant_id: 租户 ID。
         user_id: 用户 ID。
-        images: 原始图片字节列表（1~3 张）。
+        images: 原始图片字节或已摄取的上传（1~3 张；上传对象复用其后台压缩结果）。
         context: 上下文 dict（grade、game_area、big_env 等）。
         _ai_client: 可选 httpx 客户端（测试用）。
 
@@ -62,6 +72,7 @@ async def generate_observation_content(
         raise ConfigError("尚未配置视觉模型 API Key，请先在设置页面配置")
 
     plain_key = get_decrypted_key(ai_key_record)
+    fallbacks = [AiProvider(**p) for p in get_fallback_providers(ai_key_record)]
 
     # 2. 查 game_observation 提示词激活版本
     prompt_record = await get_active_prompt(
@@ -72,24 +83,25 @@ async def generate_observation_content(
     )
     system_prompt = prompt_record.content if prompt_record else None
 
-    # 3. 压缩图片
-    compressed_images: list[CompressedImage] = []
-    compressed_bytes: list[bytes] = []
-    for img_bytes in images:
-        ci = compress_image(img_bytes)
-        compressed_images.append(ci)
-        compressed_bytes.append(ci.data)
+    # 3. 压缩图片（图片进程池并行处理，不阻塞事件循环；上传时已开始压缩的直接取结果）
+    compressed_images: list[CompressedImage] = list(await asyncio.gather(*(
+        img.compressed() if isinstance(img, IngestedImage) else run_image_task(compress_image, img)
+        for img in images
+    )))
+    compressed_bytes = [ci.data for ci in compressed_images]
 
     # 4. 调用视觉 AI
-    result = await generate_observation(
-        images=compressed_bytes,
-        context=context,
-        api_base_url=ai_key_record.api_base_url,
-        api_key=plain_key,
-        model_name=ai_key_record.model_name,
-        system_prompt=system_prompt,
-        _client=_ai_client,
-    )
+    with ai_call_tenant(tenant_id):
+        result = await generate_observation(
+            images=compressed_bytes,
+            context=context,
+            api_base_url=ai_key_record.api_base_url,
+            api_key=plain_key,
+            model_name=ai_key_record.model_name,
+            system_prompt=system_prompt,
+            fallbacks=fallbacks,
+            _client=_ai_client,
+        )
 
     # 5. 审计
     log_audit(
@@ -131,8 +143,11 @@ async def save_observation_with_images(
     tenant_id: int = obs_data["tenant_id"]
     user_id: int = obs_data["user_id"]
 
-    for idx, ci in enumerate(compressed_images, start=1):
-        stored_ref = storage.put(ci.data, mime_type=ci.mime_type)
+    # 上传可并行（远端后端耗时主要在网络）；写库仍按顺序使用同一 session
+    stored_refs = await asyncio.gather(
+        *(storage.aput(ci.data, mime_type=ci.mime_type) for ci in compressed_images)
+    )
+    for idx, (ci, stored_ref) in enumerate(zip(compressed_images, stored_refs), start=1):
         await add_image(
             session,
             tenant_id=tenant_id,
@@ -141,10 +156,15 @@ async def save_observation_with_images(
             image_index=idx,
             storage_backend=stored_ref.get("storage_backend", "mysql_blob"),
             blob_content=stored_ref.get("blob_content"),
+            object_key=stored_ref.get("object_key"),
+            content_hash=stored_ref.get("content_hash"),
             mime_type=stored_ref.get("mime_type", ci.mime_type),
             file_size=ci.file_size,
             width=ci.width,
             height=ci.height,
         )
 
+    await ensure_thumbnails(
+        session, storage, [(ref["content_hash"], ci.data) for ci, ref in zip(compressed_images, stored_refs)]
+    )
     return obs.id
@@ -0,0 +1,249 @@
+"""
+学期日历索引 — 按学期一次性预计算每一天的日期信息，之后按日期 O(1) 查询。
+
+选择日期、随机选取观察工作日、批量导出时，原先需要对每个日期分别调用
+date_service（周次 / 星期 / 工作日 / 学期范围）与 holiday_client（法定节假日 / 节前 /
+调班 / 名称 / 特殊节日标签）。SemesterCalendar 把这些信息按「距 first_year 1 月 1 日的天数」
+存成紧凑数组：
+- _flags：bytearray，每天一个字节的位标志（工作日 / 法定节假日 / 调班 / 节前 / 数据可用 / 学期内）
+- _weeks：array('h')，每天的学期周次（无学期开始日期时不使用）
+- _names / _tags：稀疏字典，仅存有节日名称 / 特殊节日标签的日期
+
+索引覆盖学期所跨的完整自然年（以及额外请求覆盖的日期所在年份）。
+失效：
+- 节假日数据变化（同步 / 刷新 / 清空）→ holiday_client.calendar_version() 递增，下次获取时重建
+- 学期变化 → 缓存键包含学期起止日期；保存学期配置后另调用 invalidate_semester_calendars()
+某年节假日数据不可用时，该年各天的节假日相关查询返回 None（降级）。不完整的索引同样缓存，
+版本号不变期间直接复用（不反复请求接口）；后台刷新 / 按需加载到该年数据时版本号递增，
+下次获取即重建补全。
+"""
+from array import array
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+from app.integration.holiday_client.client import (
+    ADJUSTED_WORKDAY,
+    LEGAL_HOLIDAY,
+    YearCalendar,
+    calendar_version,
+    get_special_day_tags,
+    get_year_calendar,
+)
+from app.service.date_service import get_week_number, get_weekday_cn
+
+# 每日位标志
+_WEEKDAY = 1          # 周一~周五
+_LEGAL_HOLIDAY = 2    # 法定节假日
+_ADJUSTED = 4         # 调班工作日
+_NEAR_HOLIDAY = 8     # 次日为法定节假日
+_KNOWN = 16           # 当天节假日数据可用
+_NEXT_KNOWN = 32      # 次日节假日数据可用（节前判断依赖次日）
+_IN_SEMESTER = 64     # 在学期范围内（含首尾）
+
+# 进程内最多保留的索引数（不同学期 / 覆盖范围）
+_MAX_CACHED = 16
+
+
+@dataclass(frozen=True)
+class DayInfo:
+    """单日信息；节假日相关字段为 None 表示该年节假日数据不可用。"""
+
+    day: date
+    weekday_cn: str
+    is_workday: bool
+    week_number: int | None
+    within_semester: bool | None
+    is_holiday: bool | None
+    is_near_holiday: bool | None
+    is_adjusted_workday: bool | None
+    holiday_name: str | None
+    special_tags: tuple[str, ...]
+
+
+class SemesterCalendar:
+    """覆盖 first_year ~ last_year 全部日期的预计算索引（只读）。"""
+
+    def __init__(
+        self,
+        first_year: int,
+        last_year: int,
+        semester_start: date | None,
+        semester_end: date | None,
+        flags: bytearray,
+        weeks: array,
+        names: dict[int, str],
+        tags: dict[int, tuple[str, ...]],
+        known_years: frozenset[int],
+        holiday_version: int,
+    ) -> None:
+        self.first_year = first_year
+        self.last_year = last_year
+        self.semester_start = semester_start
+        self.semester_end = semester_end
+        self.holiday_version = holiday_version
+        self._base = date(first_year, 1, 1)
+        self._flags = flags
+        self._weeks = weeks
+        self._names = names
+        self._tags = tags
+        self._known_years = known_years
+        # 覆盖的每一年（含节前判断所需的次年）节假日数据均可用
+        self.complete = all(y in known_years for y in range(first_year, last_year + 2))
+        # 已查询过的 DayInfo / 月工作日（只读，可共享）
+        self._infos: dict[int, DayInfo] = {}
+        self._month_workdays: dict[tuple[int, int], tuple[date, ...]] = {}
+
+    def holidays_known(self, year: int) -> bool:
+        return year in self._known_years
+
+    def _offset(self, target: date) -> int | None:
+        offset = (target - self._base).days
+        return offset if 0 <= offset < len(self._flags) else None
+
+    def covers(self, target: date) -> bool:
+        return self._offset(target) is not None
+
+    def day(self, target: date) -> DayInfo | None:
+        """返回 target 的全部日期信息；不在索引范围内返回 None。"""
+        i = self._offset(target)
+        if i is None:
+            return None
+        info = self._infos.get(i)
+        if info is None:
+            info = self._infos[i] = self._build_info(i, target)
+        return info
+
+    def _build_info(self, i: int, target: date) -> DayInfo:
+        f = self._flags[i]
+        known = bool(f & _KNOWN)
+        return DayInfo(
+            day=target,
+            weekday_cn=get_weekday_cn(target),
+            is_workday=bool(f & _WEEKDAY),
+            week_number=self._weeks[i] if self.semester_start else None,
+            within_semester=bool(f & _IN_SEMESTER) if self.semester_start and self.semester_end else None,
+            is_holiday=bool(f & _LEGAL_HOLIDAY) if known else None,
+            is_near_holiday=bool(f & _NEAR_HOLIDAY) if f & _NEXT_KNOWN else None,
+            is_adjusted_workday=bool(f & _ADJUSTED) if known else None,
+            holiday_name=self._names.get(i) if f & _LEGAL_HOLIDAY else None,
+            special_tags=self._tags.get(i, ()),
+        )
+
+    def workdays_in_month(self, year: int, month: int) -> list[date]:
+        """本月周一~周五且非法定节假日的日期（升序）；节假日数据不可用时按非节假日处理。"""
+        cached = self._month_workdays.get((year, month))
+        if cached is None:
+            cached = self._month_workdays[(year, month)] = tuple(self._scan_month(year, month))
+        return list(cached)
+
+    def _scan_month(self, year: int, month: int) -> list[date]:
+        first = date(year, month, 1)
+        start = self._offset(first)
+        if start is None:
+            raise ValueError(f"{year}-{month:02d} 不在学期日历范围内")
+        result = []
+        for i in range(start, len(self._flags)):
+            d = self._base + timedelta(days=i)
+            if d.month != month:
+                break
+            f = self._flags[i]
+            if f & _WEEKDAY and not f & _LEGAL_HOLIDAY:
+                result.append(d)
+        return result
+
+
+def build_semester_calendar(
+    first_year: int,
+    last_year: int,
+    semester_start: date | None,
+    semester_end: date | None,
+    years: Mapping[int, YearCalendar | None],
+    *,
+    holiday_version: int = 0,
+) -> SemesterCalendar:
+    """由学期起止日期与各年节假日日历构建索引（纯函数；years 缺失或为 None 的年份视为不可用）。"""
+    base = date(first_year, 1, 1)
+    total = (date(last_year, 12, 31) - base).days + 1
+    flags = bytearray(total)
+    weeks = array("h", bytes(2 * total))
+    names: dict[int, str] = {}
+    tags: dict[int, tuple[str, ...]] = {}
+
+    for i in range(total):
+        d = base + timedelta(days=i)
+        f = _WEEKDAY if d.weekday() < 5 else 0
+        year_days = years.get(d.year)
+        if year_days is not None:
+            f |= _KNOWN
+            day_type, name = year_days.get(d, (None, None))
+            if day_type == LEGAL_HOLIDAY:
+                f |= _LEGAL_HOLIDAY
+                if name:
+                    names[i] = name
+            elif day_type == ADJUSTED_WORKDAY:
+                f |= _ADJUSTED
+        nxt = d + timedelta(days=1)
+        next_days = years.get(nxt.year)
+        if next_days is not None:
+            f |= _NEXT_KNOWN
+            if next_days.get(nxt, (None,))[0] == LEGAL_HOLIDAY:
+                f |= _NEAR_HOLIDAY
+        if semester_start is not None:
+            weeks[i] = get_week_number(semester_start, d)
+            if semester_end is not None and semester_start <= d <= semester_end:
+                f |= _IN_SEMESTER
+        special = get_special_day_tags(d)
+        if special:
+            tags[i] = tuple(special)
+        flags[i] = f
+
+    return SemesterCalendar(
+        first_year, last_year, semester_start, semester_end,
+        flags, weeks, names, tags,
+        frozenset(y for y, days in years.items() if days is not None),
+        holiday_version,
+    )
+
+
+# ──────────────────────────────────────────────
+# 进程内缓存
+# ──────────────────────────────────────────────
+
+_cache: dict[tuple, SemesterCalendar] = {}
+
+
+def invalidate_semester_calendars() -> None:
+    """清空全部学期日历索引（学期配置变更后调用；测试用）。"""
+    _cache.clear()
+
+
+async def get_semester_calendar(
+    semester_start: date | None = None,
+    semester_end: date | None = None,
+    *,
+    covering: Iterable[date] = (),
+) -> SemesterCalendar:
+    """返回覆盖学期（及 covering 中各日期）所在自然年的索引，命中缓存时不做任何计算。
+
+    无学期且未给 covering 时覆盖今年。
+    """
+    anchors = [d for d in (semester_start, semester_end, *covering) if d is not None] or [date.today()]
+    first_year = min(d.year for d in anchors)
+    last_year = max(d.year for d in anchors)
+    key = (first_year, last_year, semester_start, semester_end)
+    cached = _cache.get(key)
+    if cached is not None and cached.holiday_version == calendar_version():
+        return cached
+
+    # 次年日历用于判断 12 月 31 日是否为节前
+    years = {y: await get_year_calendar(y) for y in range(first_year, last_year + 2)}
+    built = build_semester_calendar(
+        first_year, last_year, semester_start, semester_end, years,
+        holiday_version=calendar_version(),
+    )
+    _cache.pop(key, None)
+    _cache[key] = built
+    while len(_cache) > _MAX_CACHED:
+        _cache.pop(next(iter(_cache)))
+    return built
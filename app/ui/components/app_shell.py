@@ -46,6 +46,14 @@ _ALL_MENU_ITEMS: list[dict] = [
         "route": "/one-on-one-listening",
         "roles": None,
     },
+    {
+        "group": "教学管理",
+        "key": "listening-batch",
+        "label": "倾听全班批量生成",
+        "icon": "groups",
+        "route": "/listening-batch",
+        "roles": None,
+    },
     {
         "group": "教学管理",
         "key": "homemade-teaching",
@@ -79,6 +87,14 @@ _ALL_MENU_ITEMS: list[dict] = [
         "route": "/prompts",
         "roles": None,
     },
+    {
+        "group": "配置中心",
+        "key": "ai-metrics",
+        "label": "AI 调用统计",
+        "icon": "monitoring",
+        "route": "/ai-metrics",
+        "roles": None,
+    },
 ]
 
 
@@ -10,6 +10,7 @@
     - 法定节假日前一天   → 橙色附加提示
     - 不放假特殊节日     → 蓝色标签提示
 - 整合学期信息时额外显示"第X周/周X"
+- 全部日期信息取自学期日历索引（SemesterCalendar），每次选择日期只做一次查表
 
 用法示例：
     from app.ui.components.date_panel import DatePanel
@@ -21,19 +22,8 @@ from datetime import date as date_type
 
 from nicegui import ui
 
-from app.integration.holiday_client.client import (
-    get_holiday_name,
-    get_special_day_tags,
-    is_adjusted_workday,
-    is_holiday,
-    is_near_holiday,
-)
-from app.service.date_service import (
-    get_week_number,
-    get_weekday_cn,
-    is_workday,
-    is_within_semester,
-)
+from app.service.date_service import get_weekday_cn
+from app.service.semester_calendar import DayInfo, get_semester_calendar
 
 
 class DatePanel:
@@ -145,30 +135,55 @@ class DatePanel:
 
         self.selected_date = target
 
+        # 学期日历索引（按学期缓存，节假日数据变化后自动重建）
+        semester_calendar = await get_semester_calendar(
+            self.semester_start, self.semester_end, covering=[target]
+        )
+        info = semester_calendar.day(target)
+        if info is None:
+            # 索引未覆盖该日期：只显示星期，周次与节假日信息降级
+            self._show_unavailable(target)
+        else:
+            self._show_day_info(info)
+
+        # ── 回调（支持 sync 和 async 回调） ───────────────────────────────────────
+        if self.on_date_change:
+            import asyncio
+            result = self.on_date_change(target)
+            if asyncio.iscoroutine(result):
+                await result
+
+    def _show_unavailable(self, target: date_type) -> None:
+        """日期信息不可用时仅显示星期，节假日状态显示灰色提示。"""
+        self._week_label.text = get_weekday_cn(target)
+        self._holiday_label.text = "节假日信息暂不可用"
+        self._holiday_label.classes(
+            remove="text-orange-500 text-blue-600", add="text-gray-400"
+        )
+        self._holiday_label.visible = True
+
+    def _show_day_info(self, info: DayInfo) -> None:
+        """按日历索引的 DayInfo 显示周次 / 星期 / 节假日状态与特殊节日标签。"""
         # ── 周次 / 星期 / 学期信息 ──────────────────────────────────────────
-        weekday_cn = get_weekday_cn(target)
-        week_info_parts = [weekday_cn]
+        week_info_parts = [info.weekday_cn]
 
-        if self.semester_start:
-            week_num = get_week_number(self.semester_start, target)
-            if week_num >= 1:
-                week_info_parts.insert(0, f"第 {week_num} 周")
+        if info.week_number is not None:
+            if info.week_number >= 1:
+                week_info_parts.insert(0, f"第 {info.week_number} 周")
             else:
                 week_info_parts.append("（学期开始前）")
 
-        if self.semester_start and self.semester_end:
-            if not is_within_semester(self.semester_start, self.semester_end, target):
-                week_info_parts.append("⚠ 不在学期范围内")
+        if info.within_semester is False:
+            week_info_parts.append("⚠ 不在学期范围内")
 
         self._week_label.text = "  ".join(week_info_parts)
 
         # ── 工作日 / 节假日状态 ─────────────────────────────────────────────
-        workday = is_workday(target)
-
-        holiday_result = await is_holiday(target)
-        near_result = await is_near_holiday(target)
-        holiday_name = await get_holiday_name(target)
-        adjusted_result = await is_adjusted_workday(target)
+        workday = info.is_workday
+        holiday_result = info.is_holiday
+        near_result = info.is_near_holiday
+        holiday_name = info.holiday_name
+        adjusted_result = info.is_adjusted_workday
 
         if holiday_result is None and near_result is None:
             # API 不可用
@@ -209,14 +224,6 @@ class DatePanel:
                 ui.badge("明天是法定节假日", color="orange").classes("text-xs")
 
         # ── 不放假特殊节日标签 ───────────────────────────────────────────────
-        special_tags = get_special_day_tags(target)
-        for tag in special_tags:
+        for tag in info.special_tags:
             with self._tag_row:
                 ui.badge(tag, color="blue").classes("text-xs")
-
-        # ── 回调（支持 sync 和 async 回调） ───────────────────────────────────────
-        if self.on_date_change:
-            import asyncio
-            result = self.on_date_change(target)
-            if asyncio.iscoroutine(result):
-                await result
@@ -0,0 +1,107 @@
+"""AI 调用统计页面（路由：/ai-metrics）。
+
+展示当前租户的 ai_call_log 遥测汇总：
+- 按任务类型的调用数、失败数、缓存命中数与耗时 p50 / p95 / p99
+- 按日期 × 任务类型的 token 用量
+用于判断优化与费用投入的优先级；同样的数据可经 GET /api/v1/ai/telemetry 获取。
+"""
+from nicegui import ui
+
+from app.core.database import AsyncSessionLocal
+from app.core.user_context import get_current_user
+from app.integration.ai_client.json_repair import repair_stats
+from app.service.ai_telemetry_service import get_ai_call_summary
+from app.ui.components.app_shell import render_shell
+
+_DAY_OPTIONS = {1: "最近 1 天", 7: "最近 7 天", 30: "最近 30 天", 90: "最近 90 天"}
+
+_LATENCY_COLUMNS = [
+    {"name": "task_type", "label": "任务类型", "field": "task_type", "align": "left"},
+    {"name": "calls", "label": "请求数", "field": "calls"},
+    {"name": "errors", "label": "失败", "field": "errors"},
+    {"name": "cached", "label": "缓存命中", "field": "cached"},
+    {"name": "p50", "label": "p50", "field": "p50"},
+    {"name": "p95", "label": "p95", "field": "p95"},
+    {"name": "p99", "label": "p99", "field": "p99"},
+]
+
+_TOKEN_COLUMNS = [
+    {"name": "day", "label": "日期（UTC）", "field": "day", "align": "left"},
+    {"name": "task_type", "label": "任务类型", "field": "task_type", "align": "left"},
+    {"name": "calls", "label": "调用数", "field": "calls"},
+    {"name": "prompt_tokens", "label": "输入 token", "field": "prompt_tokens"},
+    {"name": "completion_tokens", "label": "输出 token", "field": "completion_tokens"},
+]
+
+
+def format_ms(value: int | None) -> str:
+    """毫秒数转展示文本：≥1 秒显示为秒（1 位小数），无数据显示 —。"""
+    if value is None:
+        return "—"
+    if value >= 1000:
+        return f"{value / 1000:.1f}s"
+    return f"{value}ms"
+
+
+def latency_rows(tasks: list[dict]) -> list[dict]:
+    """将耗时汇总转换为表格行。"""
+    return [
+        {
+            "task_type": t["task_type"] or "（未标注）",
+            "calls": t["calls"],
+            "errors": t["errors"],
+            "cached": t["cached"],
+            "p50": format_ms(t["p50_ms"]),
+            "p95": format_ms(t["p95_ms"]),
+            "p99": format_ms(t["p99_ms"]),
+        }
+        for t in tasks
+    ]
+
+
+@ui.page("/ai-metrics")
+async def ai_metrics_page() -> None:
+    user = get_current_user()
+
+    await render_shell(user, active="ai-metrics")
+
+    with ui.column().classes("w-full max-w-4xl mx-auto p-6 gap-6"):
+        ui.label("AI 调用统计").classes("text-xl font-bold text-blue-700")
+        ui.label(
+            "按任务统计 AI 调用耗时与 token 用量。命中缓存的调用不计入耗时百分位。"
+        ).classes("text-sm text-gray-500")
+
+        with ui.row().classes("items-center gap-4"):
+            days_select = ui.select(_DAY_OPTIONS, value=7, label="统计范围").classes("w-40")
+            refresh_btn = ui.button("刷新").classes("bg-blue-600 text-white")
+
+        with ui.card().classes("w-full"):
+            ui.label("耗时（按任务）").classes("text-lg font-bold mb-2")
+            latency_table = ui.table(columns=_LATENCY_COLUMNS, rows=[], row_key="task_type").classes(
+                "w-full"
+            )
+
+        with ui.card().classes("w-full"):
+            ui.label("每日 token 用量").classes("text-lg font-bold mb-2")
+            token_table = ui.table(columns=_TOKEN_COLUMNS, rows=[]).classes("w-full")
+
+        status_label = ui.label("").classes("text-xs text-gray-400")
+
+    async def load() -> None:
+        async with AsyncSessionLocal() as session:
+            summary = await get_ai_call_summary(session, user["tenant_id"], days=days_select.value)
+        latency_table.rows = latency_rows(summary["tasks"])
+        token_table.rows = [{**d, "day": d["day"].isoformat()} for d in summary["daily_tokens"]]
+        latency_table.update()
+        token_table.update()
+        stats = summary["telemetry"]
+        repair = repair_stats()
+        status_label.text = (
+            f"本进程已记录 {stats['recorded']} 次调用，写入 {stats['written']} 条，丢弃 {stats['dropped']} 条；"
+            f"JSON 本地修复 {repair['repaired']} 次、追问修复 {repair['reasked']} 次、"
+            f"修复失败 {repair['failed']} 次（修复率 {repair['repair_rate']:.1%}）"
+        )
+
+    refresh_btn.on_click(load)
+    days_select.on_value_change(load)
+    await load()
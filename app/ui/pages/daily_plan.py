@@ -25,14 +25,14 @@ from app.repository.daily_plan_repository import (
     delete_daily_plan,
     get_daily_plan_by_date,
     list_daily_plans,
-    save_daily_plan,
 )
 from app.repository.export_repository import save_export_record
 from app.repository.semester_repository import get_active_semester
-from app.service.date_service import get_week_number, get_weekday_cn
-from app.service.diff_service import compute_diff
+from app.service.date_service import get_weekday_cn
+from app.service.diff_service import IncrementalDiff, plan_diff, save_plan_with_diff
 from app.service.generate_service import generate_activity_content
 from app.service.lesson_plan_service import process_lesson_plan
+from app.service.semester_calendar import get_semester_calendar
 from app.ui.components.date_panel import DatePanel
 from app.ui.components.app_shell import render_shell
 
@@ -81,8 +81,15 @@ async def daily_plan_page() -> None:
         async def _on_date_change(selected: date | None) -> None:
             state["selected_date"] = selected
             if selected and sem_start:
-                state["week_number"] = get_week_number(sem_start, selected)
-                state["weekday_cn"] = get_weekday_cn(selected)
+                semester_calendar = await get_semester_calendar(sem_start, sem_end, covering=[selected])
+                info = semester_calendar.day(selected)
+                if info is None:
+                    # 索引未覆盖该日期：只取星期，不填周次
+                    state["week_number"] = None
+                    state["weekday_cn"] = get_weekday_cn(selected)
+                else:
+                    state["week_number"] = info.week_number
+                    state["weekday_cn"] = info.weekday_cn
             else:
                 state["week_number"] = None
                 state["weekday_cn"] = ""
@@ -195,6 +202,7 @@ async def daily_plan_page() -> None:
             adapted_area = ui.textarea(label="活动过程（改写后）").classes("w-full").props(
                 "rows=6 autogrow"
             )
+            diff_hint = ui.label("").classes("text-xs text-gray-500")
 
             # 折叠：查看拆分原文
             with ui.expansion("查看 AI 拆分原文（改写前）", icon="history").classes(
@@ -204,6 +212,19 @@ async def daily_plan_page() -> None:
                     "w-full"
                 ).props("rows=5 autogrow readonly")
 
+            # 编辑改写文时增量更新逐句差异提示（只重新比对改动的句子）；保存时由 save_plan_with_diff 全量计算入库
+            process_diff = IncrementalDiff()
+
+            def _refresh_diff() -> list[dict]:
+                result = process_diff.diff(original_area.value or "", adapted_area.value or "")
+                state["diff_result"] = result
+                changed = sum(1 for item in result if item["changed"])
+                diff_hint.text = f"与原文相比改写 {changed} / {len(result)} 句" if result else ""
+                return result
+
+            adapted_area.on_value_change(lambda _e: _refresh_diff())
+            original_area.on_value_change(lambda _e: _refresh_diff())
+
         # ══════════════════════════════════════════════════════════════════════
         # 区块三-A：一键生成一日活动（晨间活动 / 晨间谈话 / 区域游戏 / 户外游戏）
         # ══════════════════════════════════════════════════════════════════════
@@ -217,6 +238,10 @@ async def daily_plan_page() -> None:
                 "点击下方按钮一次性生成「晨间活动 / 晨间谈话 / 室内区域游戏 / 户外游戏」，"
                 "生成后各区块内容均可手动修改。"
             ).classes("text-xs text-gray-500")
+            # 相同输入默认命中 AI 响应缓存；勾选后强制重新生成（同时作用于一日活动反思）
+            regenerate_chk = ui.checkbox("重新生成（忽略缓存）", value=False).classes(
+                "text-sm"
+            )
 
             async def _gen_all_daily() -> None:
                 if not state["selected_date"]:
@@ -282,15 +307,22 @@ async def daily_plan_page() -> None:
                     ),
                 ]
 
-                async def _run_one(task_type: str, extra: dict) -> str:
+                async def _run_one(task_type: str, extra: dict, area) -> str:
                     ctx = {**base_ctx, **extra}
+
+                    # 流式生成：token 到达即回填对应文本框（首 token 即可见）
+                    def _show_partial(text: str) -> None:
+                        area.value = text
+
                     async with AsyncSessionLocal() as session:
                         return await generate_activity_content(
-                            session, tenant_id, user_id, task_type, ctx
+                            session, tenant_id, user_id, task_type, ctx,
+                            on_partial=_show_partial,
+                            refresh=regenerate_chk.value,
                         )
 
                 results = await asyncio.gather(
-                    *[_run_one(t, extra) for t, extra, *_ in tasks],
+                    *[_run_one(t, extra, area) for t, extra, area, *_ in tasks],
                     return_exceptions=True,
                 )
 
@@ -408,9 +440,14 @@ async def daily_plan_page() -> None:
                         "indoor_area": area_game_area.value,
                         "outdoor_activity": outdoor_activity_area.value,
                     }
+                    def _show_partial(text: str) -> None:
+                        daily_reflection_area.value = text
+
                     async with AsyncSessionLocal() as session:
                         content = await generate_activity_content(
-                            session, tenant_id, user_id, "daily_reflection", context
+                            session, tenant_id, user_id, "daily_reflection", context,
+                            on_partial=_show_partial,
+                            refresh=regenerate_chk.value,
                         )
                     daily_reflection_area.value = content
                     daily_reflection_msg.classes(add="text-green-600")
@@ -457,7 +494,7 @@ async def daily_plan_page() -> None:
                 try:
                     async with AsyncSessionLocal() as session:
                         async with session.begin():
-                            await save_daily_plan(
+                            await save_plan_with_diff(
                                 session=session,
                                 tenant_id=tenant_id,
                                 user_id=user_id,
@@ -569,11 +606,8 @@ async def daily_plan_page() -> None:
                         export_msg.text = "⚠ 请先保存草稿再导出"
                         return
 
-                    # 从已存储的原文与改写文重新计算差异
-                    diff = compute_diff(
-                        plan.activity_process_original or "",
-                        plan.activity_process_adapted or "",
-                    )
+                    # 保存时已存储差异（原文 / 改写文未变时直接读取）
+                    diff = plan_diff(plan)
 
                     # 生成 Word 字节流
                     doc_bytes = export_daily_plan(plan, diff)
@@ -709,16 +743,22 @@ async def daily_plan_page() -> None:
 
                 batch_msg.text = f"正在导出 {len(plans)} 条计划……"
 
-                plans_with_diffs = [
-                    (
-                        plan,
-                        compute_diff(
-                            plan.activity_process_original or "",
-                            plan.activity_process_adapted or "",
-                        ),
+                # 周次 / 星期以当前学期日历为准（整段范围一次建索引，逐条查表；
+                # 仅修正导出内容，不回写数据库）
+                if sem_start:
+                    semester_calendar = await get_semester_calendar(
+                        sem_start, sem_end, covering=[start_date, end_date]
                     )
-                    for plan in plans
-                ]
+                    for plan in plans:
+                        info = semester_calendar.day(plan.plan_date)
+                        if info and info.week_number and info.week_number >= 1:
+                            plan.week_number = info.week_number
+                            plan.weekday_cn = info.weekday_cn
+
+                # 读取保存时存储的差异；存量计划（未存差异）在线程中补算，不阻塞事件循环
+                plans_with_diffs = await asyncio.to_thread(
+                    lambda: [(plan, plan_diff(plan)) for plan in plans]
+                )
 
                 doc_bytes = export_batch_daily_plans(plans_with_diffs)
 
@@ -21,17 +21,20 @@ from datetime import date, datetime, timezone
 from nicegui import app, ui
 
 from app.core.audit import log_audit
+from app.core.config import settings
 from app.core.database import AsyncSessionLocal
 from app.core.exceptions import AiCallError, AiParseError, AppError, ConfigError
 from app.core.logging import get_logger
 from app.core.user_context import get_current_user
-from app.integration.image_storage.blob_backend import BlobImageStorage
+from app.integration.image_storage import get_storage_backend
+from app.integration.upload_ingest import ingest_upload
 from app.integration.word_export.observation_exporter import export_observation
 from app.repository.ai_key_repository import get_active_ai_key, get_decrypted_key
 from app.repository.class_repository import get_class_config
 from app.repository.export_repository import save_export_record
 from app.repository.observation_image_repository import (
     delete_images_by_observation,
+    list_image_ids_by_observations,
     list_images_by_observation,
 )
 from app.repository.observation_repository import (
@@ -39,6 +42,8 @@ from app.repository.observation_repository import (
     list_observations,
     get_observation_by_id,
 )
+from app.service.image_store_service import load_image_bytes
+from app.service.media_service import media_url, thumbnail_data_url
 from app.service.observation_service import (
     generate_observation_content,
     save_observation_with_images,
@@ -101,7 +106,7 @@ async def game_observation_page() -> None:
 
     # 保存当前表单状态（用于跨回调共享）
     state: dict = {
-        "images": [],          # list[bytes] — 上传的原始图片
+        "images": [],          # list[IngestedImage] — 已校验的上传（后台压缩中）
         "observation_id": None,  # 保存后的记录 ID
     }
 
@@ -182,17 +187,31 @@ async def game_observation_page() -> None:
                 if len(state["images"]) >= 3:
                     show_error("最多只能上传 3 张图片")
                     return
-                data = await e.file.read()
-                state["images"].append(data)
+                try:
+                    upload = await ingest_upload(e.file)
+                except AppError as ex:
+                    show_error(f"图片上传失败：{ex.message}")
+                    return
+                state["images"].append(upload)
                 image_count_label.set_text(f"已上传：{len(state['images'])} 张")
+                try:
+                    preview = await thumbnail_data_url((await upload.compressed()).data)
+                except AppError as ex:
+                    state["images"].remove(upload)
+                    upload.discard()
+                    image_count_label.set_text(f"已上传：{len(state['images'])} 张")
+                    show_error(f"图片处理失败：{ex.message}")
+                    return
                 with preview_row:
-                    ui.image(f"data:image/jpeg;base64,{__import__('base64').b64encode(data).decode()}").classes(
-                        "w-24 h-24 object-cover rounded border"
-                    )
+                    ui.image(preview).classes("w-24 h-24 object-cover rounded border")
 
             ui.upload(
                 label="上传照片",
                 on_upload=handle_upload,
+                on_rejected=lambda: show_error(
+                    f"图片过大（上限 {settings.UPLOAD_MAX_BYTES // (1024 * 1024)}MB），请压缩后再上传"
+                ),
+                max_file_size=settings.UPLOAD_MAX_BYTES,
                 auto_upload=True,
                 multiple=True,
             ).props("accept=image/*").classes("w-full")
@@ -292,7 +311,7 @@ async def game_observation_page() -> None:
                     "support_strategy": strategy_area.value or None,
                 }
                 compressed = state.get("compressed_images", [])
-                storage = BlobImageStorage()
+                storage = get_storage_backend()
                 async with AsyncSessionLocal() as session:
                     obs_id = await save_observation_with_images(
                         session=session,
@@ -388,6 +407,9 @@ async def game_observation_page() -> None:
                         limit=10,
                         offset=0,
                     )
+                    image_ids = await list_image_ids_by_observations(
+                        session, tenant_id, [rec.id for rec in records]
+                    )
                 with history_container:
                     if not records:
                         ui.label("暂无观察记录").classes("text-gray-400 text-sm")
@@ -398,6 +420,11 @@ async def game_observation_page() -> None:
                                     ui.label(
                                         f"{rec.obs_date}  {rec.big_env} · {rec.game_area or '-'}  {rec.observer or ''}"
                                     ).classes("text-sm text-gray-700")
+                                    with ui.row().classes("gap-1"):
+                                        for image_id in image_ids.get(rec.id, []):
+                                            ui.image(media_url("observation", image_id, tenant_id)).classes(
+                                                "w-12 h-12 object-cover rounded border"
+                                            )
 
                                     async def _reexport(r=rec) -> None:
                                         try:
@@ -405,6 +432,7 @@ async def game_observation_page() -> None:
                                                 imgs = await list_images_by_observation(
                                                     s, tenant_id=tenant_id, observation_id=r.id
                                                 )
+                                                contents = await load_image_bytes(s, imgs)
                                             obs_dict = {
                                                 "class_name": r.class_name,
                                                 "obs_date": str(r.obs_date),
@@ -421,7 +449,7 @@ async def game_observation_page() -> None:
                                                 "evaluation_analysis": r.evaluation_analysis,
                                                 "support_strategy": r.support_strategy,
                                             }
-                                            img_bytes = [img.blob_content for img in imgs if img.blob_content]
+                                            img_bytes = [c for c in contents if c]
                                             doc_bytes = export_observation(obs_dict, img_bytes)
                                             fname = build_export_filename(
                                                 tenant_id, user_id, r.grade or "", r.class_name or "", str(r.obs_date)
@@ -0,0 +1,326 @@
+"""一对一倾听全班批量生成页面（路由：/listening-batch）。
+
+功能：
+  - 整批填写观察年月、年级·学期、观察者，一次上传全班照片：文件名以幼儿姓名开头
+    （如「张三_01.jpg」「张三-2.jpg」「张三(3).jpg」），按姓名分组后每人按文件名排序取前 15 张，
+    依次分配五领域各 3 张（同单人页面的一键导入）
+  - 「创建并开始」：压缩照片并写入批量任务，后台逐个幼儿生成五领域并保存为倾听记录草稿
+    （在「一对一倾听」页面的历史记录中查看、修改与导出）
+  - 任务进度：定时刷新（任务状态存于数据库，刷新页面不影响后台运行）；显示已完成 / 失败 /
+    待处理人数与吞吐量（幼儿 / 小时）；失败或取消的任务可续跑，只生成尚未完成的领域
+
+辅助纯函数（供单测）：
+  - child_name_from_filename / group_files_by_child / format_batch_summary
+"""
+from __future__ import annotations
+
+import asyncio
+import re
+from pathlib import PurePath
+from typing import TypeVar
+
+from nicegui import ui
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.exceptions import AppError
+from app.core.logging import get_logger
+from app.core.user_context import get_current_user
+from app.integration.image_storage import get_storage_backend
+from app.integration.upload_ingest import ingest_upload
+from app.repository.class_repository import get_class_config
+from app.repository.indicator_repository import list_available_stages
+from app.repository.semester_repository import get_active_semester
+from app.service.listening_batch_service import (
+    BATCH_DOMAINS,
+    BatchChild,
+    BatchProgress,
+    cancel_batch_job,
+    create_batch_job,
+    delete_batch_job,
+    get_batch_progress,
+    resume_batch_job,
+    start_batch_job,
+)
+from app.ui.components.app_shell import get_display_name, render_shell
+from app.ui.pages.one_on_one_listening import (
+    default_year_month,
+    distribute_images_by_filename,
+    format_stage_label,
+    infer_age_by_grade,
+    parse_stage_label,
+    validate_bulk_import_count,
+)
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+_MONTHS = list(range(1, 13))
+# 进度刷新间隔（秒）
+_REFRESH_SECONDS = 3.0
+_STATUS_LABELS = {"running": "运行中", "finished": "已结束", "cancelled": "已取消"}
+# 文件名末尾的序号：分隔符（空格 _ - 全角连字符）或括号包裹的数字
+_INDEX_SUFFIX = re.compile(r"(?:[\s_\-－]*\d+|\s*[(（]\d+[)）])$")
+
+
+# ─── 纯函数（单测友好）────────────────────────────────────────────────────────
+
+
+def child_name_from_filename(filename: str) -> str:
+    """从照片文件名取幼儿姓名：去掉扩展名与末尾序号（「张三_01.jpg」→「张三」）。"""
+    stem = PurePath(filename or "").stem.strip()
+    name = _INDEX_SUFFIX.sub("", stem).strip(" _-－")
+    return name or stem
+
+
+def group_files_by_child(files: list[tuple[str, T]]) -> dict[str, list[tuple[str, T]]]:
+    """按文件名中的幼儿姓名分组（姓名按首次出现的顺序），组内保持原顺序。"""
+    groups: dict[str, list[tuple[str, T]]] = {}
+    for name, item in files:
+        child = child_name_from_filename(name)
+        if child:
+            groups.setdefault(child, []).append((name, item))
+    return groups
+
+
+def format_batch_summary(p: BatchProgress) -> str:
+    """任务列表条目摘要：年月、学段、状态、进度与吞吐量。"""
+    stage = format_stage_label(p.grade or "", p.term or "").strip("·")
+    status = _STATUS_LABELS.get(p.status, p.status)
+    parts = [
+        f"#{p.job_id}",
+        f"{p.obs_year}年{p.obs_month}月",
+        stage,
+        status,
+        f"完成 {p.done}/{p.total}",
+    ]
+    if p.failed:
+        parts.append(f"失败 {p.failed}")
+    rate = p.children_per_hour
+    if rate is not None:
+        parts.append(f"{rate:.1f} 人/小时")
+    return "  ".join(part for part in parts if part)
+
+
+# ─── 页面路由 ──────────────────────────────────────────────────────────────────
+
+
+@ui.page("/listening-batch")
+async def listening_batch_page() -> None:
+    user = get_current_user()
+    tenant_id: int = user["tenant_id"]
+    user_id: int = int(user["sub"])
+
+    grade_default = ""
+    class_name_default = ""
+    term_default = ""
+    async with AsyncSessionLocal() as session:
+        cls_cfg = await get_class_config(session, tenant_id, user_id)
+        if cls_cfg:
+            grade_default = cls_cfg.grade or ""
+            class_name_default = cls_cfg.class_name or ""
+        sem = await get_active_semester(session, tenant_id, user_id)
+        if sem and sem.semester_name:
+            if "下" in sem.semester_name:
+                term_default = "下学期"
+            elif "上" in sem.semester_name:
+                term_default = "上学期"
+        stages = await list_available_stages(session, tenant_id)
+
+    stage_labels = [format_stage_label(g, t) for g, t in stages] or ["小班·下学期"]
+    default_stage = format_stage_label(grade_default or "小班", term_default or "下学期")
+    if default_stage not in stage_labels:
+        default_stage = stage_labels[0]
+
+    await render_shell(user, active="listening-batch")
+
+    cur_year, cur_month = default_year_month()
+    # 上传暂存：list[(文件名, IngestedImage)]（分组挑选前不压缩）
+    upload_state: dict = {"files": []}
+
+    with ui.column().classes("w-full max-w-5xl mx-auto p-6 gap-4"):
+        ui.label("一对一倾听 · 全班批量生成").classes("text-2xl font-bold text-indigo-700")
+        if grade_default or class_name_default:
+            ui.label(f"班级：{grade_default} {class_name_default}").classes("text-gray-500 text-sm")
+
+        error_label = ui.label("").classes("text-red-600 text-sm hidden")
+        status_label = ui.label("").classes("text-blue-600 text-sm hidden")
+
+        def show_error(msg: str) -> None:
+            error_label.set_text(msg)
+            error_label.classes(remove="hidden")
+            status_label.classes(add="hidden")
+
+        def show_info(msg: str, ok: bool = False) -> None:
+            status_label.set_text(msg)
+            status_label.classes(remove="hidden text-blue-600 text-green-600")
+            status_label.classes(add="text-green-600" if ok else "text-blue-600")
+            error_label.classes(add="hidden")
+
+        with ui.card().classes("w-full"):
+            ui.label("整批信息").classes("font-semibold text-gray-700 mb-2")
+            with ui.row().classes("w-full gap-4 flex-wrap items-end"):
+                year_input = ui.number(label="观察年", value=cur_year, min=2020, max=2100,
+                                       format="%d").classes("w-28")
+                month_select = ui.select(label="观察月", options=_MONTHS, value=cur_month).classes("w-24")
+                stage_select = ui.select(
+                    label="年级·学期（指标版本）", options=stage_labels, value=default_stage,
+                ).classes("w-52")
+                observer_input = ui.input(label="观察者", value=get_display_name(user)).classes("flex-1 min-w-40")
+
+            ui.separator().classes("my-1")
+            ui.label(
+                "上传全班照片：文件名以幼儿姓名开头（如 张三_01.jpg），每人至少 15 张，"
+                "按文件名排序分配五领域各 3 张"
+            ).classes("text-sm text-gray-600")
+
+            def _on_rejected() -> None:
+                show_error(f"图片过大（上限 {settings.UPLOAD_MAX_BYTES // (1024 * 1024)}MB），请压缩后再上传")
+
+            async def _on_upload(e) -> None:
+                try:
+                    # 暂不压缩：分组挑出每人前 15 张后再开始后台处理
+                    upload = await ingest_upload(e.file, landscape=True, process=False)
+                except AppError as ex:
+                    show_error(f"图片上传失败：{ex.message}")
+                    return
+                name = upload.name or f"img{len(upload_state['files']):03d}"
+                upload_state["files"].append((name, upload))
+                _render_groups()
+
+            ui.upload(
+                on_upload=_on_upload, on_rejected=_on_rejected,
+                auto_upload=True, multiple=True, max_file_size=settings.UPLOAD_MAX_BYTES,
+            ).props("accept=image/*").classes("w-full")
+            groups_label = ui.label("已选 0 张").classes("text-gray-500 text-sm")
+
+            with ui.row().classes("w-full gap-3 items-center"):
+                create_btn = ui.button("创建并开始", icon="playlist_play").classes("bg-indigo-600 text-white")
+                clear_btn = ui.button("清空已选照片", icon="delete_sweep").props("flat")
+
+        def _render_groups() -> None:
+            files = upload_state["files"]
+            groups = group_files_by_child(files)
+            short = [c for c, imgs in groups.items() if not validate_bulk_import_count(len(imgs))]
+            text = f"已选 {len(files)} 张，{len(groups)} 位幼儿"
+            if short:
+                text += f"；照片不足 15 张：{'、'.join(short)}"
+            groups_label.set_text(text)
+
+        def do_clear() -> None:
+            upload_state["files"] = []
+            _render_groups()
+
+        # ── 任务进度 ──────────────────────────────────────────────
+        with ui.card().classes("w-full"):
+            with ui.row().classes("w-full items-center justify-between"):
+                ui.label("批量任务").classes("font-semibold text-gray-700")
+                ui.label("生成的记录为草稿，可在「一对一倾听」页面的历史记录中查看、修改与导出").classes(
+                    "text-xs text-gray-400"
+                )
+            jobs_column = ui.column().classes("w-full gap-2")
+
+        async def _job_action(action, job_id: int, done_msg: str) -> None:
+            try:
+                async with AsyncSessionLocal() as session:
+                    ok = await action(session, job_id, tenant_id, user_id)
+                if not ok:
+                    show_error("任务不存在")
+                    return
+                show_info(done_msg, ok=True)
+            except Exception as ex:  # noqa: BLE001
+                logger.error("倾听批量任务操作失败", exc_info=ex)
+                show_error(f"操作失败：{ex}")
+            await refresh_jobs()
+
+        async def refresh_jobs() -> None:
+            async with AsyncSessionLocal() as session:
+                progress = await get_batch_progress(session, tenant_id, user_id)
+            jobs_column.clear()
+            with jobs_column:
+                if not progress:
+                    ui.label("暂无批量任务").classes("text-gray-400 text-sm")
+                for p in progress:
+                    with ui.row().classes("w-full items-center gap-3 border-b pb-2"):
+                        with ui.column().classes("flex-1 gap-1"):
+                            ui.label(format_batch_summary(p)).classes("text-sm")
+                            ui.linear_progress(
+                                value=(p.done + p.failed) / p.total if p.total else 0, show_value=False,
+                            ).classes("w-full")
+                        if p.status == "running":
+                            ui.button(
+                                "取消", icon="stop",
+                                on_click=lambda _e, j=p.job_id: _job_action(cancel_batch_job, j, "已取消"),
+                            ).props("flat dense")
+                        if p.failed or p.status == "cancelled" or (p.status == "running" and not p.active):
+                            ui.button(
+                                "续跑", icon="replay",
+                                on_click=lambda _e, j=p.job_id: _job_action(resume_batch_job, j, "已重新开始"),
+                            ).props("outline dense")
+                        ui.button(
+                            icon="delete",
+                            on_click=lambda _e, j=p.job_id: _job_action(delete_batch_job, j, "已删除任务"),
+                        ).props("flat dense color=red")
+
+        async def do_create() -> None:
+            groups = group_files_by_child(upload_state["files"])
+            children = {c: imgs for c, imgs in groups.items() if validate_bulk_import_count(len(imgs))}
+            if not children:
+                show_error("没有照片满 15 张的幼儿，请检查文件名是否以幼儿姓名开头")
+                return
+            create_btn.props("loading=true")
+            try:
+                grade, term = parse_stage_label(stage_select.value or default_stage)
+                show_info(f"正在压缩 {len(children)} 位幼儿的照片…")
+                # 先把全班选中的照片都提交到后台压缩，再按幼儿依次取结果
+                dists = {
+                    child: distribute_images_by_filename(files, list(BATCH_DOMAINS), per_domain=3)
+                    for child, files in children.items()
+                }
+                for dist in dists.values():
+                    for imgs in dist.values():
+                        for upload in imgs:
+                            upload.start_processing()
+                batch: list[BatchChild] = []
+                for child, dist in dists.items():
+                    compressed = {
+                        d: list(await asyncio.gather(*(upload.compressed() for upload in imgs)))
+                        for d, imgs in dist.items()
+                    }
+                    batch.append(BatchChild(
+                        child_name=child, domain_images=compressed, child_age=infer_age_by_grade(grade) or None,
+                    ))
+                async with AsyncSessionLocal() as session:
+                    job_id = await create_batch_job(
+                        session,
+                        job_data={
+                            "tenant_id": tenant_id, "user_id": user_id,
+                            "obs_year": int(year_input.value or cur_year),
+                            "obs_month": int(month_select.value or cur_month),
+                            "grade": grade or None, "term": term or None,
+                            "class_name": class_name_default or None,
+                            "observer": observer_input.value or None,
+                        },
+                        children=batch,
+                        storage=get_storage_backend(),
+                    )
+                start_batch_job(job_id)
+                skipped = len(groups) - len(children)
+                note = f"（{skipped} 位幼儿照片不足 15 张未加入）" if skipped else ""
+                show_info(f"已创建批量任务 #{job_id}，共 {len(children)} 位幼儿，后台生成中{note}", ok=True)
+                do_clear()
+            except AppError as ex:
+                show_error(f"创建失败：{ex.message}")
+            except Exception as ex:  # noqa: BLE001
+                logger.error("创建倾听批量任务失败", exc_info=ex)
+                show_error(f"创建失败：{ex}")
+            finally:
+                create_btn.props(remove="loading")
+            await refresh_jobs()
+
+        create_btn.on("click", do_create)
+        clear_btn.on("click", do_clear)
+
+    await refresh_jobs()
+    ui.timer(_REFRESH_SECONDS, refresh_jobs)
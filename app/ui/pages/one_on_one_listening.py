@@ -14,25 +14,27 @@
 """
 from __future__ import annotations
 
-import base64
+import asyncio
 import io
 import zipfile
 from datetime import date
+from typing import TypeVar
 
 from nicegui import ui
 
 from app.core.audit import log_audit
+from app.core.config import settings
 from app.core.database import AsyncSessionLocal
 from app.core.exceptions import AiCallError, AiParseError, AppError, ConfigError
 from app.core.logging import get_logger
 from app.core.user_context import get_current_user
-from app.integration.holiday_client.client import get_legal_holidays_in_year
+from app.integration.image_pool import run_image_task
 from app.integration.image_processing import (
     CompressedImage,
     compress_image,
-    normalize_to_landscape,
 )
-from app.integration.image_storage.blob_backend import BlobImageStorage
+from app.integration.image_storage import get_storage_backend
+from app.integration.upload_ingest import IngestedImage, ingest_upload
 from app.integration.word_export.listening_exporter import (
     export_batch_by_domain,
     export_combined,
@@ -54,16 +56,21 @@ from app.repository.listening_repository import (
 from app.repository.semester_repository import get_active_semester
 from app.service.date_service import pick_three_workdays
 from app.service.listening_service import (
+    generate_all_domains,
     generate_domain_content,
     load_record_detail,
     save_record_with_all,
     to_export_payload,
     update_record_with_all,
 )
+from app.service.media_service import media_url, thumbnail_data_url
+from app.service.semester_calendar import get_semester_calendar
 from app.ui.components.app_shell import get_display_name, render_shell
 
 logger = get_logger(__name__)
 
+T = TypeVar("T")
+
 # 五大领域（页面展示顺序）
 _UI_DOMAINS = ["健康", "语言", "社会", "艺术", "科学"]
 _MONTHS = list(range(1, 13))
@@ -122,20 +129,20 @@ def validate_bulk_import_count(count: int, minimum: int = 15) -> bool:
 
 
 def distribute_images_by_filename(
-    files: list[tuple[str, bytes]], domains: list[str], per_domain: int = 3
-) -> dict[str, list[bytes]]:
+    files: list[tuple[str, T]], domains: list[str], per_domain: int = 3
+) -> dict[str, list[T]]:
     """按文件名排序后，每 per_domain 张依次分配给 domains 顺序的各领域。
 
     Args:
-        files: [(文件名, 字节), ...]。
+        files: [(文件名, 图片), ...]，图片为字节或 IngestedImage。
         domains: 领域顺序（如 [健康, 语言, 社会, 艺术, 科学]）。
         per_domain: 每领域分配张数。
 
     Returns:
-        {领域: [字节, ...]}。
+        {领域: [图片, ...]}。
     """
     ordered = sorted(files, key=lambda f: f[0])
-    result: dict[str, list[bytes]] = {}
+    result: dict[str, list[T]] = {}
     for i, domain in enumerate(domains):
         chunk = ordered[i * per_domain:(i + 1) * per_domain]
         result[domain] = [b for _name, b in chunk]
@@ -181,15 +188,14 @@ def _parse_iso_date(value: str | None) -> date | None:
 
 
 async def _auto_pick_workdays(year: int, month: int) -> tuple[list[date], bool]:
-    """单次查询整年法定节假日（避免逐日并发触发限流），随机返回本月 3 个工作日。
+    """从学期日历索引取本月预计算的工作日（已排除法定节假日），随机返回 3 个。
 
     Returns:
-        (dates, holidays_available)：holidays_available=False 表示节假日接口不可用（已降级，需人工核对）。
+        (dates, holidays_available)：holidays_available=False 表示节假日数据不可用（已降级，需人工核对）。
     """
-    holidays = await get_legal_holidays_in_year(year)
-    holiday_set = holidays or set()
-    dates = pick_three_workdays(year, month, is_holiday=lambda d: d in holiday_set)
-    return dates, holidays is not None
+    semester_calendar = await get_semester_calendar(covering=[date(year, month, 1)])
+    dates = pick_three_workdays(year, month, semester_calendar=semester_calendar)
+    return dates, semester_calendar.holidays_known(year)
 
 
 # ─── 页面路由 ──────────────────────────────────────────────────────────────────
@@ -231,7 +237,7 @@ async def one_on_one_listening_page() -> None:
 
     # 每领域状态：raw_images / compressed / 各 widget 引用 / 指标行
     domain_states: dict[str, dict] = {}
-    # 一键导入暂存：list[(文件名, 字节)]
+    # 一键导入暂存：list[(文件名, IngestedImage)]（分配前不压缩）
     bulk_state: dict = {"files": []}
     # 编辑状态：record_id 非空表示覆盖更新已有记录
     edit_state: dict = {"record_id": None}
@@ -293,8 +299,8 @@ async def one_on_one_listening_page() -> None:
                     "bg-indigo-600 text-white"
                 )
             ui.upload(
-                on_upload=lambda e: _on_bulk_upload(e),
-                auto_upload=True, multiple=True,
+                on_upload=lambda e: _on_bulk_upload(e), on_rejected=lambda: _on_rejected(),
+                auto_upload=True, multiple=True, max_file_size=settings.UPLOAD_MAX_BYTES,
             ).props("accept=image/*").classes("w-full")
 
         # ── 编辑状态横幅 ──────────────────────────────────────────
@@ -363,23 +369,31 @@ async def one_on_one_listening_page() -> None:
                 if len(s["raw_images"]) >= 3:
                     show_error(f"{d}领域最多 3 张图片")
                     return
-                raw = await e.file.read() if hasattr(e, "file") else e.content.read()
                 try:
-                    data = normalize_to_landscape(raw)
+                    # 校验通过后立即在后台归一横版并压缩，「生成」时直接取结果
+                    upload = await ingest_upload(e.file, landscape=True)
                 except AppError as ex:
-                    show_error(f"{d}领域图片处理失败：{ex.message}")
+                    show_error(f"{d}领域图片上传失败：{ex.message}")
                     return
-                s["raw_images"].append(data)
+                s["raw_images"].append(upload)
                 s["compressed"] = None  # 新图需重新生成
                 s["count_label"].set_text(f"已上传：{len(s['raw_images'])} 张")
+                try:
+                    preview = await thumbnail_data_url((await upload.compressed()).data)
+                except AppError as ex:
+                    if upload in s["raw_images"]:
+                        s["raw_images"].remove(upload)
+                    upload.discard()
+                    s["count_label"].set_text(f"已上传：{len(s['raw_images'])} 张")
+                    show_error(f"{d}领域图片处理失败：{ex.message}")
+                    return
                 with s["preview_row"]:
-                    ui.image(f"data:image/jpeg;base64,{base64.b64encode(data).decode()}").classes(
-                        "w-20 h-20 object-cover rounded border"
-                    )
+                    ui.image(preview).classes("w-20 h-20 object-cover rounded border")
 
-            ui.upload(on_upload=_on_upload, auto_upload=True, multiple=True).props(
-                "accept=image/*"
-            ).classes("w-full")
+            ui.upload(
+                on_upload=_on_upload, on_rejected=_on_rejected, auto_upload=True, multiple=True,
+                max_file_size=settings.UPLOAD_MAX_BYTES,
+            ).props("accept=image/*").classes("w-full")
 
             gen_btn = ui.button(f"生成{domain}领域", icon="auto_awesome").classes(
                 "bg-indigo-600 text-white"
@@ -434,16 +448,7 @@ async def one_on_one_listening_page() -> None:
                         session=session, tenant_id=tenant_id, user_id=user_id,
                         domain=d, images=s["raw_images"], context=ctx,
                     )
-                s["compressed"] = result["compressed_images"]
-                s["goals"].value = result["goals"]
-                descs = result["image_descriptions"]
-                for i, area in enumerate(s["desc_areas"]):
-                    area.value = descs[i] if i < len(descs) else ""
-                stars_by_order = {r["sort_order"]: r["stars"] for r in result["indicator_results"]}
-                for ind in s["indicators"]:
-                    ind["select"].value = stars_by_order.get(ind["sort_order"], 3)
-                s["eval"].value = result["evaluation"]
-                s["strategy"].value = result["support_strategy"]
+                _apply_result(d, result)
                 show_info(f"{d}领域生成成功，请检查后保存", ok=True)
             except ConfigError as ex:
                 show_error(f"配置错误：{ex.message}")
@@ -509,20 +514,37 @@ async def one_on_one_listening_page() -> None:
             autopick_btn.props(remove="loading")
 
     # ── 一键导入照片 ───────────────────────────────────────────────
+    def _on_rejected() -> None:
+        show_error(f"图片过大（上限 {settings.UPLOAD_MAX_BYTES // (1024 * 1024)}MB），请压缩后再上传")
+
     async def _on_bulk_upload(e) -> None:
-        raw = await e.file.read() if hasattr(e, "file") else e.content.read()
-        name = getattr(e, "name", "") or f"img{len(bulk_state['files']):02d}"
-        bulk_state["files"].append((name, raw))
+        try:
+            # 暂不压缩：按文件名挑出前 15 张后再开始后台处理
+            upload = await ingest_upload(e.file, landscape=True, process=False)
+        except AppError as ex:
+            show_error(f"图片上传失败：{ex.message}")
+            return
+        name = upload.name or f"img{len(bulk_state['files']):02d}"
+        bulk_state["files"].append((name, upload))
         bulk_count_label.set_text(f"已选 {len(bulk_state['files'])} 张")
 
-    def _render_domain_previews(st: dict) -> None:
+    async def _preview_source(img) -> bytes:
+        # 上传对象取后台压缩结果（已归一横版）；编辑载入的图片本身即压缩后字节
+        return (await img.compressed()).data if isinstance(img, IngestedImage) else img
+
+    async def _render_domain_previews(st: dict, image_ids: list[int] | None = None) -> None:
+        """重绘领域图片预览：已保存的图片走 /media 缩略图地址，新上传的图片现场生成缩略图。"""
+        if image_ids is not None:
+            previews = [media_url("listening", image_id, tenant_id) for image_id in image_ids]
+        else:
+            previews = await asyncio.gather(*(
+                thumbnail_data_url(await _preview_source(img)) for img in st["raw_images"]
+            ))
         st["preview_row"].clear()
         st["count_label"].set_text(f"已上传：{len(st['raw_images'])} 张")
         with st["preview_row"]:
-            for b in st["raw_images"]:
-                ui.image(f"data:image/jpeg;base64,{base64.b64encode(b).decode()}").classes(
-                    "w-20 h-20 object-cover rounded border"
-                )
+            for src in previews:
+                ui.image(src).classes("w-20 h-20 object-cover rounded border")
 
     async def do_apply_bulk() -> None:
         files = bulk_state["files"]
@@ -532,13 +554,20 @@ async def one_on_one_listening_page() -> None:
         try:
             total = len(files)
             dist = distribute_images_by_filename(files, _UI_DOMAINS, per_domain=3)
+            chosen = {id(upload) for imgs in dist.values() for upload in imgs}
+            for _name, upload in files:
+                if id(upload) not in chosen:
+                    upload.discard()
+            for imgs in dist.values():
+                for upload in imgs:
+                    upload.start_processing()
             for d, imgs in dist.items():
                 st = domain_states.get(d)
                 if not st:
                     continue
-                st["raw_images"] = [normalize_to_landscape(b) for b in imgs]
+                st["raw_images"] = list(imgs)
                 st["compressed"] = None
-                _render_domain_previews(st)
+                await _render_domain_previews(st)
             bulk_state["files"] = []
             bulk_count_label.set_text("已选 0 张")
             extra = f"（共上传 {total} 张，已按文件名取前 15 张）" if total > 15 else ""
@@ -549,19 +578,70 @@ async def one_on_one_listening_page() -> None:
             logger.error("一键导入分配失败", exc_info=ex)
             show_error(f"导入失败：{ex}")
 
+    def _apply_result(d: str, result: dict) -> None:
+        """把单领域生成结果填入该领域的表单。"""
+        s = domain_states[d]
+        s["compressed"] = result["compressed_images"]
+        s["goals"].value = result["goals"]
+        descs = result["image_descriptions"]
+        for i, area in enumerate(s["desc_areas"]):
+            area.value = descs[i] if i < len(descs) else ""
+        stars_by_order = {r["sort_order"]: r["stars"] for r in result["indicator_results"]}
+        for ind in s["indicators"]:
+            ind["select"].value = stars_by_order.get(ind["sort_order"], 3)
+        s["eval"].value = result["evaluation"]
+        s["strategy"].value = result["support_strategy"]
+
     async def do_generate_all() -> None:
+        target = [d for d in _UI_DOMAINS
+                  if domain_states.get(d) and domain_states[d]["raw_images"]]
+        if not target:
+            show_error("请先上传/导入照片再生成")
+            return
+        invalid = [d for d in target if not validate_image_count(len(domain_states[d]["raw_images"]))]
+        if invalid:
+            show_error(f"{'、'.join(invalid)}领域请上传 1~3 张绘画照片")
+            return
+        grade, term = parse_stage_label(stage_select.value or default_stage)
+        ctx = {
+            "grade": grade, "term": term,
+            "child_name": child_name_input.value,
+            "child_age": child_age_input.value,
+        }
         generate_all_btn.props("loading=true")
+        for d in target:
+            domain_states[d]["gen_btn"].props("loading=true")
+        done: list[str] = []
+        failed: list[str] = []
+        show_info(f"⏳ 正在同时生成{len(target)}个领域……")
         try:
-            target = [d for d in _UI_DOMAINS
-                      if domain_states.get(d) and domain_states[d]["raw_images"]]
-            if not target:
-                show_error("请先上传/导入照片再生成")
-                return
-            for d in target:
-                await domain_states[d]["do_generate"]()
-            show_info("全部领域生成完成，请检查后保存", ok=True)
+            async with AsyncSessionLocal() as session:
+                async for outcome in generate_all_domains(
+                    session, tenant_id, user_id,
+                    domain_images={d: domain_states[d]["raw_images"] for d in target},
+                    context=ctx,
+                ):
+                    domain_states[outcome.domain]["gen_btn"].props(remove="loading")
+                    if outcome.ok:
+                        _apply_result(outcome.domain, outcome.result)
+                        done.append(outcome.domain)
+                    else:
+                        err = outcome.error
+                        failed.append(f"{outcome.domain}（{getattr(err, 'message', None) or err}）")
+                    show_info(f"⏳ 已完成 {len(done) + len(failed)}/{len(target)} 个领域……")
+            if failed:
+                show_error(f"以下领域生成失败，可单独重试：{'；'.join(failed)}")
+            else:
+                show_info("全部领域生成完成，请检查后保存", ok=True)
+        except ConfigError as ex:
+            show_error(f"配置错误：{ex.message}")
+        except Exception as ex:  # noqa: BLE001
+            logger.error("批量生成倾听领域失败", exc_info=ex)
+            show_error(f"生成失败：{ex}")
         finally:
             generate_all_btn.props(remove="loading")
+            for d in target:
+                domain_states[d]["gen_btn"].props(remove="loading")
 
     autopick_btn.on("click", do_autopick_all)
     apply_bulk_btn.on("click", do_apply_bulk)
@@ -569,14 +649,17 @@ async def one_on_one_listening_page() -> None:
     stage_select.on("update:model-value", lambda _e: (_on_grade_age_sync(), None))
     stage_select.on("update:model-value", lambda _e: render_domains())
 
-    def _build_domain_payload(domain: str) -> dict | None:
+    async def _build_domain_payload(domain: str) -> dict | None:
         """从领域 widget 状态构建完整 payload（保存 + 导出共用）。返回 None 表示该领域无内容。"""
         st = domain_states.get(domain)
         if not st:
             return None
         compressed = st.get("compressed")
         if compressed is None and st["raw_images"]:
-            compressed = [compress_image(b) for b in st["raw_images"]]
+            compressed = list(await asyncio.gather(*(
+                img.compressed() if isinstance(img, IngestedImage) else run_image_task(compress_image, img)
+                for img in st["raw_images"]
+            )))
             st["compressed"] = compressed
         compressed = compressed or []
         descriptions = [a.value or "" for a in st["desc_areas"]][: len(compressed)]
@@ -608,7 +691,7 @@ async def one_on_one_listening_page() -> None:
             "indicators": indicator_results,
         }
 
-    def _collect() -> tuple[dict, list[dict]]:
+    async def _collect() -> tuple[dict, list[dict]]:
         grade, term = parse_stage_label(stage_select.value or default_stage)
         record = {
             "child_name": (child_name_input.value or "").strip(),
@@ -624,13 +707,13 @@ async def one_on_one_listening_page() -> None:
             "observer": observer_input.value or None,
             **record,
         }
-        domains = [p for d in _UI_DOMAINS if (p := _build_domain_payload(d))]
+        domains = [p for d in _UI_DOMAINS if (p := await _build_domain_payload(d))]
         return record_full, domains
 
     async def do_save() -> None:
         save_btn.props("loading=true")
         try:
-            record_full, domains = _collect()
+            record_full, domains = await _collect()
             if not record_full["child_name"]:
                 show_error("请填写幼儿姓名")
                 return
@@ -642,13 +725,13 @@ async def one_on_one_listening_page() -> None:
                     rid = await update_record_with_all(
                         session, record_id=edit_state["record_id"],
                         record_data=record_full, domains=domains,
-                        storage=BlobImageStorage(),
+                        storage=get_storage_backend(),
                     )
                     show_info(f"覆盖保存成功（记录 ID：{rid}）", ok=True)
                 else:
                     rid = await save_record_with_all(
                         session, record_data=record_full, domains=domains,
-                        storage=BlobImageStorage(),
+                        storage=get_storage_backend(),
                     )
                     show_info(f"保存成功（记录 ID：{rid}）", ok=True)
             await refresh_history()
@@ -670,7 +753,7 @@ async def one_on_one_listening_page() -> None:
     async def do_export_combined() -> None:
         export_combined_btn.props("loading=true")
         try:
-            _record_full, domains = _collect()
+            _record_full, domains = await _collect()
             if not domains:
                 show_error("没有可导出的领域内容，请先生成")
                 return
@@ -700,7 +783,7 @@ async def one_on_one_listening_page() -> None:
     async def do_export_split() -> None:
         export_split_btn.props("loading=true")
         try:
-            _record_full, domains = _collect()
+            _record_full, domains = await _collect()
             if not domains:
                 show_error("没有可导出的领域内容，请先生成")
                 return
@@ -780,7 +863,7 @@ async def one_on_one_listening_page() -> None:
             imgs = dom.get("images") or []
             st["raw_images"] = [im["data"] for im in imgs]
             st["compressed"] = [_rebuild_compressed(im) for im in imgs]
-            _render_domain_previews(st)
+            await _render_domain_previews(st, [im["id"] for im in imgs])
             for i, area in enumerate(st["desc_areas"]):
                 area.value = (imgs[i].get("description") or "") if i < len(imgs) else ""
             stars_by_order = {ind["sort_order"]: ind["stars"] for ind in dom.get("indicators") or []}
@@ -824,7 +907,7 @@ async def one_on_one_listening_page() -> None:
 
     async def _show_detail(rid: int) -> None:
         async with AsyncSessionLocal() as session:
-            detail = await load_record_detail(session, tenant_id, rid)
+            detail = await load_record_detail(session, tenant_id, rid, with_content=False)
         if not detail:
             show_error("记录不存在")
             return
@@ -839,11 +922,9 @@ async def one_on_one_listening_page() -> None:
                     ui.label(f"目标：{dom.get('goals') or '-'}").classes("text-sm whitespace-pre-wrap")
                     with ui.row().classes("gap-2 flex-wrap"):
                         for im in dom.get("images") or []:
-                            if im.get("data"):
-                                mime = im.get("mime_type") or "image/jpeg"
-                                ui.image(
-                                    f"data:{mime};base64,{base64.b64encode(im['data']).decode()}"
-                                ).classes("w-24 h-24 object-cover rounded border")
+                            ui.image(media_url("listening", im["id"], tenant_id)).classes(
+                                "w-24 h-24 object-cover rounded border"
+                            )
                     for i, im in enumerate(dom.get("images") or []):
                         ui.label(f"图{i+1}描述：{im.get('description') or '-'}").classes(
                             "text-xs text-gray-600 whitespace-pre-wrap"
@@ -37,6 +37,7 @@ from app.integration.ai_client.homemade_teaching_client import DEFAULT_HOMEMADE_
 from app.integration.ai_client.lesson_plan_client import DEFAULT_SPLIT_PROMPT, split_lesson_plan
 from app.integration.ai_client.listening_client import DEFAULT_LISTENING_PROMPT
 from app.integration.ai_client.observation_client import DEFAULT_OBSERVATION_PROMPT
+from app.integration.ai_client.telemetry import ai_call_tenant
 from app.repository.ai_key_repository import get_active_ai_key, get_decrypted_key
 from app.repository.prompt_repository import (
     get_active_prompt,
@@ -357,44 +358,45 @@ async def _build_task_panel(tenant_id: int, user_id: int, task_type: str) -> Non
                     model = ai_key.model_name
                     current_prompt = content_area.value.strip()
 
-                    if task_type == "split":
-                        result = await split_lesson_plan(
-                            raw_text=test_input.value,
-                            api_base_url=base_url,
-                            api_key=api_key_plain,
-                            model_name=model,
-                            system_prompt=current_prompt,
-                        )
-                        test_goal_out.value = result.get("activity_goal", "")
-                        test_prep_out.value = result.get("activity_prep", "")
-                        test_key_out.value = result.get("activity_key", "")
-                        test_diff_out.value = result.get("activity_difficult", "")
-                        test_proc_out.value = result.get("activity_process", "")
-
-                    elif task_type == "adapt":
-                        grade = test_grade_select.value if test_grade_select else "中班"
-                        adapted = await adapt_activity_process(
-                            original=test_input.value,
-                            grade=grade,
-                            api_base_url=base_url,
-                            api_key=api_key_plain,
-                            model_name=model,
-                            system_prompt=current_prompt,
-                        )
-                        test_result_out.value = adapted
-
-                    else:
-                        # 生成类任务：直接用 call_ai_text，以 test_input 为用户消息
-                        text = await call_ai_text(
-                            messages=[
-                                {"role": "system", "content": current_prompt},
-                                {"role": "user", "content": test_input.value},
-                            ],
-                            api_base_url=base_url,
-                            api_key=api_key_plain,
-                            model_name=model,
-                        )
-                        test_result_out.value = text
+                    with ai_call_tenant(tenant_id):
+                        if task_type == "split":
+                            result = await split_lesson_plan(
+                                raw_text=test_input.value,
+                                api_base_url=base_url,
+                                api_key=api_key_plain,
+                                model_name=model,
+                                system_prompt=current_prompt,
+                            )
+                            test_goal_out.value = result.get("activity_goal", "")
+                            test_prep_out.value = result.get("activity_prep", "")
+                            test_key_out.value = result.get("activity_key", "")
+                            test_diff_out.value = result.get("activity_difficult", "")
+                            test_proc_out.value = result.get("activity_process", "")
+
+                        elif task_type == "adapt":
+                            grade = test_grade_select.value if test_grade_select else "中班"
+                            adapted = await adapt_activity_process(
+                                original=test_input.value,
+                                grade=grade,
+                                api_base_url=base_url,
+                                api_key=api_key_plain,
+                                model_name=model,
+                                system_prompt=current_prompt,
+                            )
+                            test_result_out.value = adapted
+
+                        else:
+                            # 生成类任务：直接用 call_ai_text，以 test_input 为用户消息
+                            text = await call_ai_text(
+                                messages=[
+                                    {"role": "system", "content": current_prompt},
+                                    {"role": "user", "content": test_input.value},
+                                ],
+                                api_base_url=base_url,
+                                api_key=api_key_plain,
+                                model_name=model,
+                            )
+                            test_result_out.value = text
 
                     test_msg.classes(replace="text-sm text-green-600")
                     test_msg.set_text("✅ 测试完成")
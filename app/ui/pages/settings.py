@@ -20,6 +20,7 @@ from app.core.user_context import get_current_user
 from app.repository.ai_key_repository import (
     get_active_ai_key,
     get_decrypted_key,
+    get_fallback_providers,
     save_ai_key,
 )
 from app.repository.class_repository import get_class_config, upsert_class_config
@@ -27,6 +28,7 @@ from app.repository.semester_repository import (
     get_active_semester,
     upsert_active_semester,
 )
+from app.service.semester_calendar import invalidate_semester_calendars
 from app.ui.components.app_shell import render_shell
 
 _GRADES = ["小班", "中班", "大班"]
@@ -39,6 +41,39 @@ def _mask_api_key(plain: str) -> str:
     return "sk-****"
 
 
+def _format_fallback_lines(providers: list[dict]) -> str:
+    """备用服务商列表 → 文本框内容（每行：API 地址 | 模型名称 | 脱敏 Key）。"""
+    return "\n".join(
+        f"{p['api_base_url']} | {p['model_name']} | {_mask_api_key(p['api_key'])}"
+        for p in providers
+    )
+
+
+def _parse_fallback_lines(text: str, existing: list[dict]) -> list[dict]:
+    """解析备用服务商文本框；Key 仍为脱敏值时沿用已保存的同地址同模型 Key。
+
+    Raises:
+        ValueError: 某行格式不正确或脱敏 Key 找不到对应的已保存记录。
+    """
+    stored = {(p["api_base_url"], p["model_name"]): p["api_key"] for p in existing}
+    providers: list[dict] = []
+    for lineno, raw in enumerate(text.splitlines(), start=1):
+        line = raw.strip()
+        if not line:
+            continue
+        parts = [part.strip() for part in line.split("|")]
+        if len(parts) != 3 or not all(parts):
+            raise ValueError(f"第 {lineno} 行格式应为：API 地址 | 模型名称 | API Key")
+        url, model, key = parts
+        if key.startswith("sk-****"):
+            old = stored.get((url, model))
+            if old is None or _mask_api_key(old) != key:
+                raise ValueError(f"第 {lineno} 行请重新输入完整 API Key")
+            key = old
+        providers.append({"api_base_url": url, "model_name": model, "api_key": key})
+    return providers
+
+
 @ui.page("/settings")
 async def settings_page() -> None:
     user = get_current_user()
@@ -127,6 +162,7 @@ async def settings_page() -> None:
                         await upsert_active_semester(
                             session, tenant_id, user_id, name, start_date, end_date
                         )
+                invalidate_semester_calendars()
 
                 semester_msg.text = "学期配置已保存"
                 semester_msg.classes(add="text-green-600")
@@ -364,6 +400,14 @@ async def settings_page() -> None:
                 password_toggle_button=True,
             ).classes("w-full mt-2")
 
+            vision_fallback_input = ui.textarea(
+                label="备用视觉服务商（可选，按优先级每行一个）",
+                placeholder="API 地址 | 模型名称 | API Key",
+            ).classes("w-full mt-2")
+            ui.label(
+                "主服务商响应过慢时同时请求下一个备用服务商，先返回者胜出；主服务商报错时直接改用备用。"
+            ).classes("text-xs text-gray-500")
+
             vision_msg = ui.label("").classes("text-sm mt-1")
             _vision_masked: list[str] = [""]
 
@@ -382,12 +426,22 @@ async def settings_page() -> None:
                     vision_msg.classes(add="text-red-500")
                     return
 
+                async with AsyncSessionLocal() as session:
+                    existing = await get_active_ai_key(session, tenant_id, user_id, key_type="vision")
+                try:
+                    fallbacks = _parse_fallback_lines(
+                        vision_fallback_input.value or "",
+                        get_fallback_providers(existing) if existing else [],
+                    )
+                except (ValueError, CryptoError) as exc:
+                    vision_msg.text = f"备用服务商配置有误：{exc}"
+                    vision_msg.classes(add="text-red-500")
+                    return
+
                 key_changed = key_val and key_val != _vision_masked[0]
                 if key_changed:
                     plain_key = key_val
                 else:
-                    async with AsyncSessionLocal() as session:
-                        existing = await get_active_ai_key(session, tenant_id, user_id, key_type="vision")
                     if existing is None:
                         if not key_val:
                             vision_msg.text = "请输入视觉模型 API Key"
@@ -403,11 +457,15 @@ async def settings_page() -> None:
                             return
 
                 async with AsyncSessionLocal() as session:
-                    await save_ai_key(session, tenant_id, user_id, url, plain_key, model, key_type="vision")
+                    await save_ai_key(
+                        session, tenant_id, user_id, url, plain_key, model,
+                        key_type="vision", fallback_providers=fallbacks,
+                    )
 
                 masked = _mask_api_key(plain_key)
                 _vision_masked[0] = masked
                 vision_key_input.value = masked
+                vision_fallback_input.value = _format_fallback_lines(fallbacks)
                 vision_msg.text = "视觉模型配置已保存"
                 vision_msg.classes(add="text-green-600")
 
@@ -494,6 +552,9 @@ async def settings_page() -> None:
             masked_v = _mask_api_key(plain_v)
             _vision_masked[0] = masked_v
             vision_key_input.value = masked_v
+            vision_fallback_input.value = _format_fallback_lines(
+                get_fallback_providers(ai_vision_record)
+            )
         except CryptoError:
             vision_key_input.value = ""
             vision_msg.text = "视觉模型 Key 解密失败，请重新配置"
@@ -0,0 +1,4 @@
+"""性能基准脚本（不随应用发布，不被 pytest 收集）。
+
+运行方式：python -m benchmarks.<脚本名>
+"""
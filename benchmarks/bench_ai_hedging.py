@@ -0,0 +1,67 @@
+"""负载测试：视觉调用单服务商 vs 主 + 备用服务商对冲的延迟分布。
+
+运行：python -m benchmarks.bench_ai_hedging [--requests 200] [--latency 0.05] [--stall-rate 0.02]
+
+两个桩服务器：A 为主服务商，以 stall_rate 概率额外卡顿 stall_latency 秒（长尾）；
+B 为稳定的备用服务商。基线只调用 A；对照组配置 B 为备用并开启对冲。
+对冲延迟样本由预热阶段积累。输出 p50 / p95 / p99 / max 与对冲、胜出统计。
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.core.config import settings
+from app.integration.ai_client.hedging import AiProvider, hedge_stats, reset_hedge_state
+from app.integration.ai_client.http_pool import close_all_clients
+from app.integration.ai_client.vision_base import call_ai_vision
+from benchmarks.stub_server import run_stub
+
+
+def _pct(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+
+async def _run(url_a: str, fallbacks: list[AiProvider], requests: int, tag: str) -> list[float]:
+    latencies: list[float] = []
+    for i in range(requests):
+        messages = [{"role": "user", "content": [{"type": "text", "text": f"{tag}-{i}"}]}]
+        start = time.perf_counter()
+        await call_ai_vision(messages, url_a, "sk-a", "model-a", refresh=True, fallbacks=fallbacks)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def main(requests: int, latency: float, stall_rate: float, stall_latency: float) -> None:
+    settings.AI_RATE_LIMIT_ENABLED = False
+    settings.AI_HEDGE_MIN_SAMPLES = 20
+    settings.AI_HEDGE_MIN_DELAY_SECONDS = 0.01
+    async with (
+        run_stub(latency=latency, stall_rate=stall_rate, stall_latency=stall_latency, seed=7) as url_a,
+        run_stub(latency=latency) as url_b,
+    ):
+        backup = [AiProvider(url_b, "model-b", "sk-b")]
+        for name, fallbacks in (("single", []), ("hedged", backup)):
+            reset_hedge_state()
+            await _run(url_a, fallbacks, 40, f"warmup-{name}")
+            reset_counts = hedge_stats()
+            samples = await _run(url_a, fallbacks, requests, name)
+            stats = hedge_stats()
+            print(
+                f"{name:>7}: p50={statistics.median(samples) * 1000:.0f}ms "
+                f"p95={_pct(samples, 95) * 1000:.0f}ms p99={_pct(samples, 99) * 1000:.0f}ms "
+                f"max={max(samples) * 1000:.0f}ms "
+                f"hedges={stats['hedges'] - reset_counts['hedges']} wins={stats['wins']}"
+            )
+    await close_all_clients()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--stall-rate", type=float, default=0.02)
+    parser.add_argument("--stall-latency", type=float, default=1.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.latency, args.stall_rate, args.stall_latency))
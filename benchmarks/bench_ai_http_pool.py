@@ -0,0 +1,73 @@
+"""基准：AI 调用每次新建 httpx.AsyncClient vs 共享连接池。
+
+运行：python -m benchmarks.bench_ai_http_pool [--requests 200] [--concurrency 4]
+
+输出两种模式下单次 call_ai 的 p50 / p99 延迟（毫秒）。
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from app.core.config import settings
+from app.integration.ai_client.base import call_ai
+from app.integration.ai_client.http_pool import close_all_clients
+from benchmarks.stub_server import run_stub
+
+_MESSAGES = [{"role": "user", "content": "ping"}]
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[idx]
+
+
+async def _one_fresh_client(base_url: str) -> None:
+    # 基线：与改造前一致，每次调用新建并关闭客户端
+    async with httpx.AsyncClient() as client:
+        await call_ai(_MESSAGES, base_url, "sk-bench", refresh=True, _client=client)
+
+
+async def _one_pooled(base_url: str) -> None:
+    await call_ai(_MESSAGES, base_url, "sk-bench", refresh=True)
+
+
+async def _measure(fn, base_url: str, total: int, concurrency: int) -> list[float]:
+    samples: list[float] = []
+    sem = asyncio.Semaphore(concurrency)
+
+    async def _timed() -> None:
+        async with sem:
+            start = time.perf_counter()
+            await fn(base_url)
+            samples.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*[_timed() for _ in range(total)])
+    return samples
+
+
+async def main(total: int, concurrency: int) -> None:
+    # 只比较连接复用：关闭限流（本地桩无配额），并以 refresh=True 绕过响应缓存
+    settings.AI_RATE_LIMIT_ENABLED = False
+    async with run_stub() as base_url:
+        # 预热
+        await _measure(_one_pooled, base_url, 10, concurrency)
+        for name, fn in (("fresh-client", _one_fresh_client), ("pooled", _one_pooled)):
+            samples = await _measure(fn, base_url, total, concurrency)
+            print(
+                f"{name:>13}: n={len(samples)} "
+                f"p50={statistics.median(samples):.2f}ms "
+                f"p99={_percentile(samples, 99):.2f}ms"
+            )
+        await close_all_clients()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
@@ -0,0 +1,170 @@
+"""端到端基准：N 位教师并发走完 AI 主流程，统计吞吐与各步骤延迟百分位。
+
+运行：python -m benchmarks.bench_ai_pipeline [--users 10] [--rounds 3] [--latency lognormal:0.3,0.4]
+                                             [--error-rate-5xx 0] [--error-rate-429 0] [--shared-key]
+
+每位教师（独立 tenant 内的 user，使用独立数据库会话）每轮依次调用：
+  process_lesson_plan → generate_activity_content → generate_observation_content → generate_domain_content
+AI 请求发往本地桩服务器（benchmarks.stub_server），视觉请求会经桩服务器校验图片负载。
+数据库为临时目录中的 SQLite 文件；为测量真实调用，关闭 AI 响应缓存，且每轮上下文不同（不触发 single-flight 合并）。
+默认每位教师使用各自的 API Key（各自的限流桶）；--shared-key 模拟全园共用一个 Key。
+
+输出：每个步骤的次数 / 失败数 / p50 / p95 / p99，总吞吐（步骤/秒），以及桩服务器计数。
+这是 AI 路径性能改动的基线：改动前后以相同参数各跑一次对比。
+"""
+import argparse
+import asyncio
+import io
+import statistics
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from PIL import Image
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+import app.core.models  # noqa: F401 — 注册全部表
+from app.core.config import settings
+from app.core.database import Base
+from app.core.exceptions import AppError
+from app.integration.ai_client.http_pool import close_all_clients
+from app.integration.ai_client.rate_limiter import reset_limiters
+from app.repository.ai_key_repository import save_ai_key
+from app.service.generate_service import generate_activity_content
+from app.service.lesson_plan_service import process_lesson_plan
+from app.service.listening_service import generate_domain_content
+from app.service.observation_service import generate_observation_content
+from benchmarks.stub_server import run_stub
+
+_STEPS = ("process_lesson_plan", "generate_activity_content",
+          "generate_observation_content", "generate_domain_content")
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[idx]
+
+
+def _photo(seed: int, size: tuple[int, int] = (1600, 1200)) -> bytes:
+    """生成一张带噪点的 JPEG（模拟手机照片，需经 compress_image 实际压缩）。"""
+    img = Image.effect_noise(size, 40 + seed % 30).convert("RGB")
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=95)
+    return buf.getvalue()
+
+
+async def _seed_keys(sessions: async_sessionmaker, base_url: str, users: int, shared_key: bool) -> None:
+    async with sessions() as session:
+        for uid in range(1, users + 1):
+            key = "sk-bench-shared" if shared_key else f"sk-bench-{uid}"
+            await save_ai_key(session, 1, uid, base_url, key, "stub-text", key_type="text")
+            await save_ai_key(session, 1, uid, base_url, key, "stub-vision", key_type="vision")
+
+
+async def _teacher(
+    sessions: async_sessionmaker,
+    uid: int,
+    rounds: int,
+    photos: list[bytes],
+    latencies: dict[str, list[float]],
+    failures: dict[str, int],
+) -> None:
+    async def _timed(step: str, coro) -> None:
+        start = time.perf_counter()
+        try:
+            await coro
+        except AppError:
+            failures[step] += 1
+        else:
+            latencies[step].append(time.perf_counter() - start)
+
+    for r in range(rounds):
+        tag = f"u{uid}-r{r}"
+        async with sessions() as session:
+            await _timed("process_lesson_plan", process_lesson_plan(
+                session, 1, uid, f"活动名称：认识水果（{tag}）\n活动目标：……", "中班"
+            ))
+            await _timed("generate_activity_content", generate_activity_content(
+                session, 1, uid, "morning_talk", {"grade": "中班", "activity_goal": tag}
+            ))
+            await _timed("generate_observation_content", generate_observation_content(
+                session, 1, uid, photos[:2], {"grade": "中班", "game_area": tag}
+            ))
+            await _timed("generate_domain_content", generate_domain_content(
+                session, 1, uid, domain="语言", images=photos[:1],
+                context={"grade": "中班", "term": "上学期", "child_name": tag},
+            ))
+
+
+async def main(args: argparse.Namespace) -> None:
+    settings.AI_CACHE_ENABLED = False
+    settings.AI_POOL_MAX_CONNECTIONS = max(settings.AI_POOL_MAX_CONNECTIONS, args.users * 2)
+    reset_limiters()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        photos = [_photo(i) for i in range(2)]
+
+        stats: dict = {}
+        async with run_stub(
+            latency=args.latency,
+            tokens=args.tokens,
+            error_rate_429=args.error_rate_429,
+            error_rate_5xx=args.error_rate_5xx,
+            max_concurrency=args.max_concurrency,
+            seed=args.seed,
+            stats=stats,
+        ) as base_url:
+            await _seed_keys(sessions, base_url, args.users, args.shared_key)
+            latencies: dict[str, list[float]] = defaultdict(list)
+            failures: dict[str, int] = defaultdict(int)
+            start = time.perf_counter()
+            await asyncio.gather(*[
+                _teacher(sessions, uid, args.rounds, photos, latencies, failures)
+                for uid in range(1, args.users + 1)
+            ])
+            elapsed = time.perf_counter() - start
+
+        await close_all_clients()
+        await engine.dispose()
+
+    print(f"users={args.users} rounds={args.rounds} latency={args.latency} elapsed={elapsed:.2f}s")
+    completed = 0
+    for step in _STEPS:
+        samples = latencies.get(step, [])
+        completed += len(samples)
+        if not samples:
+            print(f"{step:>30}: ok=0 failed={failures[step]}")
+            continue
+        print(
+            f"{step:>30}: ok={len(samples)} failed={failures[step]} "
+            f"p50={statistics.median(samples) * 1000:.0f}ms "
+            f"p95={_percentile(samples, 95) * 1000:.0f}ms "
+            f"p99={_percentile(samples, 99) * 1000:.0f}ms"
+        )
+    print(f"{'throughput':>30}: {completed / elapsed:.2f} steps/s")
+    print(
+        f"{'stub':>30}: requests={stats['requests']} ok={stats['ok']} "
+        f"429={stats['throttled'] + stats['injected_429']} 5xx={stats['injected_5xx']} "
+        f"images={stats['images']} image_kb={stats['image_bytes'] // 1024} "
+        f"vision_rejected={stats['vision_rejected']}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--latency", default="lognormal:0.3,0.4", help="桩服务器延迟分布")
+    parser.add_argument("--tokens", type=int, default=200)
+    parser.add_argument("--error-rate-429", type=float, default=0.0)
+    parser.add_argument("--error-rate-5xx", type=float, default=0.0)
+    parser.add_argument("--max-concurrency", type=int, default=0)
+    parser.add_argument("--shared-key", action="store_true")
+    parser.add_argument("--seed", type=int, default=1)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,63 @@
+"""负载测试：多位教师同时「一键生成」时，无限流直发 vs 共享限流器排队。
+
+运行：python -m benchmarks.bench_ai_rate_limit [--users 40] [--quota 4] [--latency 0.3]
+
+桩服务器模拟服务商并发配额（超出即 429 + Retry-After）。基线关闭 AI 限流，
+所有请求同时发出，依赖 tenacity 固定退避重试；对照组开启限流器（并发上限 = 配额）。
+输出完成数 / 失败数、总耗时与完成吞吐（次/秒）、桩服务器收到的 429 次数。
+"""
+import argparse
+import asyncio
+import time
+
+from app.core.config import settings
+from app.core.exceptions import AiCallError
+from app.integration.ai_client.base import call_ai
+from app.integration.ai_client.http_pool import close_all_clients
+from app.integration.ai_client.rate_limiter import reset_limiters
+from benchmarks.stub_server import run_stub
+
+
+async def _run(base_url: str, users: int, tag: str) -> tuple[int, int, float]:
+    async def _one(i: int) -> bool:
+        messages = [{"role": "user", "content": f"{tag}-{i}"}]
+        try:
+            await call_ai(messages, base_url, "sk-bench", refresh=True)
+        except AiCallError:
+            return False
+        return True
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*[_one(i) for i in range(users)])
+    elapsed = time.perf_counter() - start
+    ok = sum(results)
+    return ok, users - ok, elapsed
+
+
+async def main(users: int, quota: int, latency: float) -> None:
+    settings.AI_POOL_MAX_CONNECTIONS = max(settings.AI_POOL_MAX_CONNECTIONS, users)
+    for name, enabled in (("unlimited", False), ("limited", True)):
+        settings.AI_RATE_LIMIT_ENABLED = enabled
+        settings.AI_RATE_LIMIT_CONCURRENCY = quota
+        settings.AI_RATE_LIMIT_RPS = 0
+        reset_limiters()
+        stats: dict = {}
+        async with run_stub(
+            latency=latency, max_concurrency=quota, retry_after=latency, stats=stats
+        ) as url:
+            ok, failed, elapsed = await _run(url, users, name)
+            print(
+                f"{name:>10}: completed={ok}/{users} failed={failed} "
+                f"elapsed={elapsed:.2f}s throughput={ok / elapsed:.2f}/s "
+                f"stub_429={stats['throttled']}"
+            )
+        await close_all_clients()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=40)
+    parser.add_argument("--quota", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.3)
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.quota, args.latency))
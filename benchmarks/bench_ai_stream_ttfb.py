@@ -0,0 +1,43 @@
+"""基准：call_ai_text（整段返回）vs call_ai_text_stream（SSE）的首字节时间。
+
+运行：python -m benchmarks.bench_ai_stream_ttfb [--tokens 200] [--token-delay 0.02]
+
+桩服务器模拟「首 token 延迟 latency + 每 token token_delay」的生成过程，
+分别测量两种模式下用户看到第一段文字的时间（TTFB）与完成时间。
+"""
+import argparse
+import asyncio
+import time
+
+from app.integration.ai_client.base import call_ai_text, call_ai_text_stream
+from app.integration.ai_client.http_pool import close_all_clients
+from benchmarks.stub_server import run_stub
+
+_MESSAGES = [{"role": "user", "content": "ping"}]
+
+
+async def main(tokens: int, token_delay: float, latency: float) -> None:
+    async with run_stub(tokens=tokens, token_delay=token_delay, latency=latency) as base_url:
+        start = time.perf_counter()
+        await call_ai_text(_MESSAGES, base_url, "sk-bench")
+        full = time.perf_counter() - start
+        print(f"   blocking: ttfb={full * 1000:.0f}ms total={full * 1000:.0f}ms")
+
+        start = time.perf_counter()
+        ttfb = None
+        # refresh=True：与上一次调用同键，跳过响应缓存以测量真实流式耗时
+        async for _ in call_ai_text_stream(_MESSAGES, base_url, "sk-bench", refresh=True):
+            if ttfb is None:
+                ttfb = time.perf_counter() - start
+        total = time.perf_counter() - start
+        print(f"  streaming: ttfb={ttfb * 1000:.0f}ms total={total * 1000:.0f}ms")
+        await close_all_clients()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tokens", type=int, default=200)
+    parser.add_argument("--token-delay", type=float, default=0.02)
+    parser.add_argument("--latency", type=float, default=0.3)
+    args = parser.parse_args()
+    asyncio.run(main(args.tokens, args.token_delay, args.latency))
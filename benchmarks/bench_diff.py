@@ -0,0 +1,84 @@
+"""基准：长教案（5k+ 字）活动过程差异 —— 全量重算 vs 保存时存储 vs 编辑时增量。
+
+运行：python -m benchmarks.bench_diff [--sentences 160] [--plans 200] [--edits 200]
+
+- export：单条导出取差异。compute_diff 全量重跑 vs plan_diff 读取保存时存储的结果
+- batch：批量导出 N 条计划取差异的总耗时（改造前在事件循环上逐条 compute_diff）
+- edit：教师每次修改改写文中的一句后重新取差异。compute_diff 全量 vs IncrementalDiff 增量
+
+输出：每次操作的平均耗时（毫秒）与加速比。
+"""
+import argparse
+import random
+import time
+from types import SimpleNamespace
+
+from app.service.diff_service import IncrementalDiff, compute_diff, diff_key, encode_diff, plan_diff
+
+
+def _texts(sentences: int, seed: int) -> tuple[str, str]:
+    rng = random.Random(seed)
+    original = [
+        f"第{i}步：教师出示第{i}组材料（{rng.choice(['积木', '彩泥', '绘本', '沙盘'])}），"
+        f"引导幼儿仔细观察颜色、形状和数量的变化，并鼓励幼儿用完整的语言表达自己的发现。"
+        for i in range(sentences)
+    ]
+    adapted = [s.replace("教师", "老师", 1) if rng.random() < 0.4 else s for s in original]
+    return "".join(original), "".join(adapted)
+
+
+def _timed(fn, count: int) -> float:
+    start = time.perf_counter()
+    for i in range(count):
+        fn(i)
+    return (time.perf_counter() - start) / count * 1e3
+
+
+def main(args: argparse.Namespace) -> None:
+    original, adapted = _texts(args.sentences, 0)
+    print(f"原文 {len(original)} 字 / 改写文 {len(adapted)} 字 / {args.sentences} 句")
+
+    plans = []
+    for seed in range(args.plans):
+        o, a = _texts(args.sentences, seed)
+        plans.append(SimpleNamespace(
+            activity_process_original=o, activity_process_adapted=a,
+            process_diff_key=diff_key(o, a), process_diff_json=encode_diff(compute_diff(o, a)),
+        ))
+
+    full = _timed(lambda i: compute_diff(original, adapted), 50)
+    stored = _timed(lambda i: plan_diff(plans[0]), 50)
+    print(f"      export: compute_diff {full:7.3f} ms   plan_diff(已存) {stored:7.3f} ms   ×{full / stored:5.1f}")
+
+    start = time.perf_counter()
+    for p in plans:
+        compute_diff(p.activity_process_original, p.activity_process_adapted)
+    batch_full = (time.perf_counter() - start) * 1e3
+    start = time.perf_counter()
+    for p in plans:
+        plan_diff(p)
+    batch_stored = (time.perf_counter() - start) * 1e3
+    print(f"batch({args.plans:>3}): compute_diff {batch_full:7.1f} ms   plan_diff(已存) {batch_stored:7.1f} ms   "
+          f"×{batch_full / batch_stored:5.1f}")
+
+    rng = random.Random(1)
+    sentences = [item["text"] for item in compute_diff(adapted, adapted)]
+    edits = []
+    for step in range(args.edits):
+        i = rng.randrange(len(sentences))
+        sentences[i] = sentences[i][:-1] + f"（修改{step}）。"
+        edits.append("".join(sentences))
+    inc = IncrementalDiff()
+    inc.diff(original, adapted)
+    full_edit = _timed(lambda i: compute_diff(original, edits[i]), args.edits)
+    inc_edit = _timed(lambda i: inc.diff(original, edits[i]), args.edits)
+    print(f"        edit: compute_diff {full_edit:7.3f} ms   IncrementalDiff {inc_edit:7.3f} ms   "
+          f"×{full_edit / inc_edit:5.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sentences", type=int, default=160, help="每份教案活动过程的句数（160 句约 8k 字）")
+    parser.add_argument("--plans", type=int, default=200)
+    parser.add_argument("--edits", type=int, default=200)
+    main(parser.parse_args())
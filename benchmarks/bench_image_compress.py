@@ -0,0 +1,164 @@
+"""基准：compress_image 改造前（逐级降质 + 20% 缩放，每步 optimize）vs 当前实现（draft 解码 + 二分质量）。
+
+运行：python -m benchmarks.bench_image_compress [--max-bytes 1048576] [--repeat 3] [--corpus DIR]
+
+语料：默认在内存中合成接近手机照片尺寸的样本——
+  12MP JPEG（4032x3024，q95，相机直出）、8MP JPEG（3264x2448）、
+  HEIC 转 JPEG（4032x3024，q90，iOS 导出 / 转换工具的常见参数）、
+  截图式 PNG（2532x1170，含透明通道）与 4MP 照片 PNG；
+--corpus 指定目录时改用目录下的真实 jpg / jpeg / png / webp 文件。
+样本由平滑渐变 + 色块 + 噪点构成，体积与真实照片同量级（纯噪声图会严重夸大编码开销）。
+
+每个（实现, 样本）在独立子进程中运行，输出：耗时中位数、峰值 RSS 增量（MB）、输出体积与尺寸。
+"""
+import argparse
+import io
+import resource
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from PIL import Image, ImageDraw, ImageFilter
+
+from app.integration.image_processing import compress_image
+
+_CORPUS = (
+    ("jpeg_12mp", (4032, 3024), "JPEG", 95),
+    ("jpeg_8mp", (3264, 2448), "JPEG", 95),
+    ("heic_to_jpeg_12mp", (4032, 3024), "JPEG", 90),
+    ("png_screenshot", (2532, 1170), "PNG", None),
+    ("png_photo_4mp", (2304, 1728), "PNG", None),
+)
+
+
+def _legacy_compress(data: bytes, max_bytes: int) -> tuple[bytes, int, int]:
+    """改造前的 compress_image（保留作对比基线）：q95 → 逐级降质，每轮缩小 20%，每次 optimize。"""
+    img = Image.open(io.BytesIO(data))
+    img.load()
+    if img.mode in ("RGBA", "LA", "P"):
+        bg = Image.new("RGB", img.size, (255, 255, 255))
+        if img.mode == "P":
+            img = img.convert("RGBA")
+        bg.paste(img, mask=img.split()[-1] if img.mode in ("RGBA", "LA") else None)
+        img = bg
+    elif img.mode != "RGB":
+        img = img.convert("RGB")
+    width, height = img.size
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=95, optimize=True)
+    if buf.tell() <= max_bytes:
+        return buf.getvalue(), width, height
+    scale = 1.0
+    for quality in (85, 75, 65, 50, 40, 30):
+        buf = io.BytesIO()
+        w, h = max(1, int(width * scale)), max(1, int(height * scale))
+        resized = img.resize((w, h), Image.LANCZOS) if scale < 1.0 else img
+        resized.save(buf, format="JPEG", quality=quality, optimize=True)
+        if buf.tell() <= max_bytes:
+            return buf.getvalue(), w, h
+        scale *= 0.8
+    buf = io.BytesIO()
+    w, h = max(1, int(width * scale)), max(1, int(height * scale))
+    img.resize((w, h), Image.LANCZOS).save(buf, format="JPEG", quality=20, optimize=True)
+    return buf.getvalue(), w, h
+
+
+def _current_compress(data: bytes, max_bytes: int) -> tuple[bytes, int, int]:
+    result = compress_image(data, max_bytes=max_bytes)
+    return result.data, result.width, result.height
+
+
+_IMPLS = {"legacy": _legacy_compress, "current": _current_compress}
+
+
+def _synthetic_photo(size: tuple[int, int], seed: int, alpha: bool = False) -> Image.Image:
+    """合成「照片感」样本：渐变背景 + 随机色块（模糊后有自然边缘）+ 传感器噪点。"""
+    import random
+
+    rng = random.Random(seed)
+    w, h = size
+    base = Image.linear_gradient("L").resize(size).convert("RGB")
+    base = Image.merge("RGB", [
+        base.getchannel(0).point(lambda v, k=k: (v * k) // 3 + 40) for k in (1, 2, 3)
+    ])
+    draw = ImageDraw.Draw(base)
+    for _ in range(60):
+        x, y = rng.randrange(w), rng.randrange(h)
+        r = rng.randrange(w // 40, w // 6)
+        color = tuple(rng.randrange(256) for _ in range(3))
+        (draw.ellipse if rng.random() < 0.5 else draw.rectangle)((x, y, x + r, y + r), fill=color)
+    base = base.filter(ImageFilter.GaussianBlur(2))
+    noise = Image.effect_noise(size, 40).convert("RGB")
+    img = Image.blend(base, noise, 0.2)
+    if alpha:
+        img = img.convert("RGBA")
+        img.putalpha(Image.linear_gradient("L").resize(size))
+    return img
+
+
+def _build_corpus(corpus_dir: str | None) -> list[tuple[str, bytes]]:
+    if corpus_dir:
+        files = sorted(
+            p for p in Path(corpus_dir).iterdir()
+            if p.suffix.lower() in (".jpg", ".jpeg", ".png", ".webp")
+        )
+        return [(p.name, p.read_bytes()) for p in files]
+    samples = []
+    for seed, (name, size, fmt, quality) in enumerate(_CORPUS):
+        img = _synthetic_photo(size, seed, alpha=name == "png_screenshot")
+        buf = io.BytesIO()
+        if fmt == "JPEG":
+            img.save(buf, format="JPEG", quality=quality)
+        else:
+            img.save(buf, format="PNG")
+        samples.append((name, buf.getvalue()))
+    return samples
+
+
+def _run_one(impl: str, data: bytes, max_bytes: int, repeat: int) -> tuple[float, float, int, int, int]:
+    """子进程内运行：返回（耗时中位数秒, 峰值 RSS 增量 MB, 输出字节, 宽, 高）。"""
+    fn = _IMPLS[impl]
+    # ru_maxrss：Linux 为 KB，macOS 为字节
+    unit = 1 if sys.platform == "darwin" else 1024
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out, w, h = fn(data, max_bytes)
+        samples.append(time.perf_counter() - start)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit
+    return statistics.median(samples), (peak - baseline) / 2**20, len(out), w, h
+
+
+def main(args: argparse.Namespace) -> None:
+    corpus = _build_corpus(args.corpus)
+    print(f"max_bytes={args.max_bytes} repeat={args.repeat} samples={len(corpus)}")
+    totals = {impl: 0.0 for impl in _IMPLS}
+    for name, data in corpus:
+        src = Image.open(io.BytesIO(data))
+        print(f"\n{name}: {src.format} {src.width}x{src.height} {len(data) / 2**20:.1f}MB")
+        for impl in _IMPLS:
+            # 每次新进程：峰值 RSS 互不干扰
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                elapsed, rss_mb, out_bytes, w, h = pool.submit(
+                    _run_one, impl, data, args.max_bytes, args.repeat
+                ).result()
+            totals[impl] += elapsed
+            print(
+                f"  {impl:>8}: {elapsed * 1000:7.0f}ms  peak_rss=+{rss_mb:6.1f}MB  "
+                f"out={out_bytes / 1024:6.0f}KB  {w}x{h}"
+            )
+    print()
+    for impl, total in totals.items():
+        print(f"{impl:>10} total: {total * 1000:.0f}ms")
+    print(f"{'speedup':>10}: {totals['legacy'] / totals['current']:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-bytes", type=int, default=1_048_576)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--corpus", default=None, help="真实图片目录（jpg / png / webp）")
+    main(parser.parse_args())
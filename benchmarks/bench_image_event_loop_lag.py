@@ -0,0 +1,93 @@
+"""基准：图片压缩对事件循环的阻塞 —— 协程内直接调用 compress_image（改造前）vs 图片进程池。
+
+运行：python -m benchmarks.bench_image_event_loop_lag [--teachers 5] [--photos 3] [--workers 0]
+
+N 位教师同时提交照片（每位 --photos 张 12MP 相机 JPEG），与此同时一个心跳协程每 10ms 醒来一次，
+记录实际唤醒时间与预期的差值（事件循环延迟）。事件循环被阻塞时，所有在线页面的
+WebSocket 心跳、按钮响应都会同样延迟。
+
+输出：两种模式的总耗时、事件循环延迟 p50 / p99 / max（毫秒）。
+"""
+import argparse
+import asyncio
+import io
+import statistics
+import time
+
+from app.core.config import settings
+from app.integration.image_pool import image_pool_stats, run_image_task, shutdown_image_pool
+from app.integration.image_processing import compress_image
+from benchmarks.bench_image_compress import _synthetic_photo
+
+_TICK = 0.01
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[idx]
+
+
+def _camera_jpeg(seed: int) -> bytes:
+    buf = io.BytesIO()
+    _synthetic_photo((4032, 3024), seed).save(buf, format="JPEG", quality=95)
+    return buf.getvalue()
+
+
+async def _heartbeat(lags: list[float], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        expected = time.perf_counter() + _TICK
+        await asyncio.sleep(_TICK)
+        lags.append(max(0.0, time.perf_counter() - expected))
+
+
+async def _inline(data: bytes) -> None:
+    compress_image(data)  # 改造前：在协程内同步执行
+
+
+async def _pooled(data: bytes) -> None:
+    await run_image_task(compress_image, data)
+
+
+async def _measure(worker, photos: list[list[bytes]]) -> tuple[float, list[float]]:
+    lags: list[float] = []
+    stop = asyncio.Event()
+    beat = asyncio.create_task(_heartbeat(lags, stop))
+    await asyncio.sleep(_TICK * 5)
+
+    async def _teacher(batch: list[bytes]) -> None:
+        await asyncio.gather(*(worker(data) for data in batch))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(_teacher(batch) for batch in photos))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await beat
+    return elapsed, lags
+
+
+async def main(args: argparse.Namespace) -> None:
+    settings.IMAGE_POOL_WORKERS = args.workers
+    samples = [_camera_jpeg(i) for i in range(args.photos)]
+    photos = [samples for _ in range(args.teachers)]
+    print(f"teachers={args.teachers} photos={args.photos} (12MP JPEG) workers={args.workers or 'auto'}")
+
+    # 预热进程池（首次启动工作进程的开销不计入对比）
+    await asyncio.gather(*(run_image_task(compress_image, samples[0]) for _ in range(2)))
+
+    for name, worker in (("inline", _inline), ("process_pool", _pooled)):
+        elapsed, lags = await _measure(worker, photos)
+        print(
+            f"{name:>14}: total={elapsed:.2f}s  loop_lag p50={statistics.median(lags) * 1000:.1f}ms "
+            f"p99={_percentile(lags, 99) * 1000:.1f}ms max={max(lags) * 1000:.1f}ms"
+        )
+    print(f"{'pool':>14}: {image_pool_stats()}")
+    shutdown_image_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--teachers", type=int, default=5)
+    parser.add_argument("--photos", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=0, help="进程数，0 = min(4, CPU 数)")
+    asyncio.run(main(parser.parse_args()))
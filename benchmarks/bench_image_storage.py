@@ -0,0 +1,112 @@
+"""基准：图片存储后端保存 / 读取吞吐 —— mysql_blob（字节进数据库）vs filesystem（分片目录）。
+
+运行：python -m benchmarks.bench_image_storage [--records 50] [--photos 3] [--size-kb 400]
+                                              [--mysql-url mysql+aiomysql://user:pw@host/db]
+
+每条记录保存 --photos 张互不相同的压缩后 JPEG 大小的随机字节（经 save_observation_with_images，
+与页面保存路径一致），随后逐条读取全部图片（load_image_bytes）。默认在临时 SQLite 文件上运行；
+给出 --mysql-url 时额外在该 MySQL 库上运行：该库必须是专用的空测试库，基准会在其中
+重建并最终删除全部应用数据表。
+
+输出：每种组合的保存 / 读取耗时、MB/s、数据库文件大小（仅 SQLite）。
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+import app.core.models  # noqa: F401 — 注册全部 model
+from app.core.config import settings
+from app.core.database import Base
+from app.integration.image_processing import CompressedImage
+from app.integration.image_storage.blob_backend import BlobImageStorage
+from app.integration.image_storage.fs_backend import FilesystemImageStorage
+from app.repository.observation_image_repository import list_images_by_observation
+from app.service.image_store_service import load_image_bytes
+from app.service.observation_service import save_observation_with_images
+
+_OBS = {"tenant_id": 1, "user_id": 1, "obs_date": date(2026, 6, 10), "big_env": "户外"}
+
+
+def _photos(records: int, photos: int, size: int) -> list[list[CompressedImage]]:
+    return [
+        [
+            CompressedImage(data=os.urandom(size), mime_type="image/jpeg", width=1600, height=1200)
+            for _ in range(photos)
+        ]
+        for _ in range(records)
+    ]
+
+
+async def _run(url: str, storage, batches: list[list[CompressedImage]]) -> tuple[float, float]:
+    engine = create_async_engine(url)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+        factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+        start = time.perf_counter()
+        ids = []
+        for batch in batches:
+            async with factory() as session:
+                ids.append(await save_observation_with_images(
+                    session, obs_data=_OBS, compressed_images=batch, storage=storage,
+                ))
+        save_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for obs_id in ids:
+            async with factory() as session:
+                images = await list_images_by_observation(session, 1, obs_id)
+                contents = await load_image_bytes(session, images)
+                assert all(contents)
+        load_s = time.perf_counter() - start
+
+        if not url.startswith("sqlite"):
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.drop_all)
+        return save_s, load_s
+    finally:
+        await engine.dispose()
+
+
+async def main(args: argparse.Namespace) -> None:
+    batches = _photos(args.records, args.photos, args.size_kb * 1024)
+    total_mb = args.records * args.photos * args.size_kb / 1024
+    print(f"records={args.records} photos={args.photos} size={args.size_kb}KB total={total_mb:.1f}MB")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_dir = Path(tmp)
+        settings.IMAGE_STORAGE_DIR = str(tmp_dir / "images")
+        targets = [("sqlite", lambda name: f"sqlite+aiosqlite:///{tmp_dir / name}.db")]
+        if args.mysql_url:
+            targets.append(("mysql", lambda name: args.mysql_url))
+
+        for db_name, url_for in targets:
+            for backend_name, storage in (
+                ("mysql_blob", BlobImageStorage()),
+                ("filesystem", FilesystemImageStorage()),
+            ):
+                save_s, load_s = await _run(url_for(backend_name), storage, batches)
+                db_size = ""
+                if db_name == "sqlite":
+                    db_size = f"  db_file={(tmp_dir / f'{backend_name}.db').stat().st_size / 1e6:.1f}MB"
+                print(
+                    f"{db_name:>6}/{backend_name:<10}: save={save_s:.2f}s ({total_mb / save_s:.1f}MB/s)  "
+                    f"load={load_s:.2f}s ({total_mb / load_s:.1f}MB/s){db_size}"
+                )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=50)
+    parser.add_argument("--photos", type=int, default=3)
+    parser.add_argument("--size-kb", type=int, default=400)
+    parser.add_argument("--mysql-url", default="", help="可选：专用空测试库的 MySQL 异步连接 URL（会删表）")
+    asyncio.run(main(parser.parse_args()))
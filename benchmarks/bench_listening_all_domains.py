@@ -0,0 +1,94 @@
+"""基准：一位幼儿五领域的生成耗时 —— 逐领域顺序调用（改造前）vs generate_all_domains 并行。
+
+运行：python -m benchmarks.bench_listening_all_domains [--children 3] [--latency 2.0] [--concurrency 5]
+
+每位幼儿 5 领域 × 3 张照片（1600x1200 JPEG，需实际压缩）；AI 请求发往本地桩服务器
+（benchmarks.stub_server，固定或分布延迟模拟视觉模型耗时）。关闭 AI 响应缓存，每位幼儿上下文不同。
+- sequential：for 领域 in 五领域: await generate_domain_content(...)（改造前页面「生成全部领域」）
+- parallel：async for outcome in generate_all_domains(...)
+
+输出：每位幼儿的墙钟耗时（中位数）及相对单次调用延迟的倍数、首个领域完成时间。
+"""
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+import app.core.models  # noqa: F401 — 注册全部表
+from app.core.config import settings
+from app.core.database import Base
+from app.integration.ai_client.http_pool import close_all_clients
+from app.integration.ai_client.rate_limiter import reset_limiters
+from app.repository.ai_key_repository import save_ai_key
+from app.service.listening_service import generate_all_domains, generate_domain_content
+from benchmarks.bench_ai_pipeline import _photo
+from benchmarks.stub_server import run_stub
+
+_DOMAINS = ("健康", "语言", "社会", "艺术", "科学")
+
+
+async def _sequential(session, photos: dict, ctx: dict) -> tuple[float, float]:
+    start = time.perf_counter()
+    first = None
+    for domain in _DOMAINS:
+        await generate_domain_content(session, 1, 1, domain=domain, images=photos[domain], context=ctx)
+        first = first or time.perf_counter() - start
+    return time.perf_counter() - start, first
+
+
+async def _parallel(session, photos: dict, ctx: dict, concurrency: int) -> tuple[float, float]:
+    start = time.perf_counter()
+    first = None
+    async for outcome in generate_all_domains(
+        session, 1, 1, domain_images=photos, context=ctx, concurrency=concurrency,
+    ):
+        if not outcome.ok:
+            raise outcome.error
+        first = first or time.perf_counter() - start
+    return time.perf_counter() - start, first
+
+
+async def main(args: argparse.Namespace) -> None:
+    settings.AI_CACHE_ENABLED = False
+    reset_limiters()
+    photos = {d: [_photo(i * 3 + j) for j in range(3)] for i, d in enumerate(_DOMAINS)}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+        async with run_stub(latency=args.latency) as base_url:
+            async with sessions() as session:
+                await save_ai_key(session, 1, 1, base_url, "sk-bench", "stub-vision", key_type="vision")
+            for name in ("sequential", "parallel"):
+                totals, firsts = [], []
+                for child in range(args.children):
+                    ctx = {"grade": "中班", "term": "上学期", "child_name": f"{name}-{child}"}
+                    async with sessions() as session:
+                        if name == "sequential":
+                            total, first = await _sequential(session, photos, ctx)
+                        else:
+                            total, first = await _parallel(session, photos, ctx, args.concurrency)
+                    totals.append(total)
+                    firsts.append(first)
+                p50 = statistics.median(totals)
+                print(
+                    f"{name:>10}: per_child p50={p50:6.2f}s ({p50 / args.latency:4.1f}× single call)  "
+                    f"first_domain p50={statistics.median(firsts):5.2f}s"
+                )
+        await close_all_clients()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--children", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=2.0, help="桩服务器单次视觉调用延迟（秒）")
+    parser.add_argument("--concurrency", type=int, default=5)
+    asyncio.run(main(parser.parse_args()))
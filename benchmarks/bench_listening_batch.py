@@ -0,0 +1,124 @@
+"""基准：全班一对一倾听的吞吐量（幼儿 / 小时）—— 单人页面逐个幼儿 vs 批量后台任务。
+
+运行：python -m benchmarks.bench_listening_batch [--children 30] [--latency 8] [--budgets 5,10]
+
+每位幼儿 5 领域 × 3 张照片（上传时已压缩，与批量任务存储的照片一致）；AI 请求发往本地桩服务器
+（benchmarks.stub_server，固定延迟模拟视觉模型耗时）。关闭 AI 响应缓存；限流速率放开，
+并发上限取对应预算（相当于服务商给足配额，只比较调度方式）。
+- per_child：逐个幼儿 generate_all_domains（五领域并行）+ save_record_with_all（改造前老师在页面上的做法）
+- batch@N：create_batch_job + run_batch_job，全局预算 N 个在途领域，幼儿之间的生成、落库与照片读取重叠
+
+输出：墙钟耗时、幼儿 / 小时、相对单次调用延迟的每人耗时。
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+import app.core.models  # noqa: F401 — 注册全部表
+from app.core.config import settings
+from app.core.database import Base
+from app.integration.ai_client.http_pool import close_all_clients
+from app.integration.ai_client.rate_limiter import reset_limiters
+from app.integration.image_processing import compress_image
+from app.integration.image_storage.blob_backend import BlobImageStorage
+from app.repository.ai_key_repository import save_ai_key
+from app.service import listening_batch_service
+from app.service.listening_batch_service import (
+    BATCH_DOMAINS,
+    BatchChild,
+    children_per_hour,
+    create_batch_job,
+    reset_batch_runner,
+    run_batch_job,
+)
+from app.service.listening_service import generate_all_domains, save_record_with_all
+from app.service.semester_calendar import SemesterCalendar, build_semester_calendar
+from benchmarks.bench_ai_pipeline import _photo
+from benchmarks.stub_server import run_stub
+
+_JOB = {"tenant_id": 1, "user_id": 1, "obs_year": 2026, "obs_month": 3, "grade": "中班", "term": "上学期"}
+
+
+async def _no_holidays(**_kwargs) -> SemesterCalendar:
+    return build_semester_calendar(2026, 2026, None, None, {})
+
+
+def _children(count: int, photos: dict, tag: str) -> list[BatchChild]:
+    return [BatchChild(child_name=f"{tag}-{i}", domain_images=photos, child_age="5岁") for i in range(count)]
+
+
+async def _per_child(sessions, children: list[BatchChild], storage) -> float:
+    start = time.perf_counter()
+    for child in children:
+        ctx = {"grade": "中班", "term": "上学期", "child_name": child.child_name}
+        domains = []
+        async with sessions() as session:
+            images = {d: [ci.data for ci in imgs] for d, imgs in child.domain_images.items()}
+            async for outcome in generate_all_domains(session, 1, 1, domain_images=images, context=ctx):
+                if not outcome.ok:
+                    raise outcome.error
+                domains.append({"domain": outcome.domain, "obs_year": 2026, "obs_month": 3, **outcome.result})
+            await save_record_with_all(
+                session, record_data={**_JOB, "child_name": child.child_name}, domains=domains, storage=storage,
+            )
+    return time.perf_counter() - start
+
+
+async def _batch(sessions, children: list[BatchChild], storage, budget: int) -> float:
+    settings.LISTENING_BATCH_CONCURRENCY = budget
+    reset_batch_runner()
+    async with sessions() as session:
+        job_id = await create_batch_job(session, job_data=_JOB, children=children, storage=storage)
+    start = time.perf_counter()
+    await run_batch_job(job_id, sessions=sessions, storage=storage)
+    return time.perf_counter() - start
+
+
+async def main(args: argparse.Namespace) -> None:
+    settings.AI_CACHE_ENABLED = False
+    settings.AI_RATE_LIMIT_RPS = 0
+    listening_batch_service.get_semester_calendar = _no_holidays
+    budgets = [int(b) for b in args.budgets.split(",")]
+    photos = {
+        d: [compress_image(_photo(i * 3 + j), settings.IMAGE_MAX_BYTES) for j in range(3)]
+        for i, d in enumerate(BATCH_DOMAINS)
+    }
+    storage = BlobImageStorage()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+        async with run_stub(latency=args.latency) as base_url:
+            async with sessions() as session:
+                await save_ai_key(session, 1, 1, base_url, "sk-bench", "stub-vision", key_type="vision")
+            runs = [("per_child", 5)] + [(f"batch@{b}", b) for b in budgets]
+            for name, budget in runs:
+                settings.AI_RATE_LIMIT_CONCURRENCY = budget
+                reset_limiters()
+                children = _children(args.children, photos, name)
+                if name == "per_child":
+                    elapsed = await _per_child(sessions, children, storage)
+                else:
+                    elapsed = await _batch(sessions, children, storage, budget)
+                rate = children_per_hour(args.children, elapsed)
+                print(
+                    f"{name:>10}: children={args.children}  wall={elapsed:7.1f}s  "
+                    f"children/hour={rate:7.1f}  per_child={elapsed / args.children / args.latency:4.2f}× single call"
+                )
+        await close_all_clients()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--children", type=int, default=30)
+    parser.add_argument("--latency", type=float, default=8.0, help="桩服务器单次视觉调用延迟（秒）")
+    parser.add_argument("--budgets", default="5,10", help="批量任务的全局领域名额，逗号分隔")
+    asyncio.run(main(parser.parse_args()))
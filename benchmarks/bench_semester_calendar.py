@@ -0,0 +1,104 @@
+"""基准：学期内逐日取日期信息 —— 逐项调用 date_service / holiday_client vs 学期日历索引。
+
+运行：python -m benchmarks.bench_semester_calendar [--rounds 20]
+
+节假日日历预先放入进程内（与首次同步后的线上状态一致，不发 HTTP 请求），只比较计算方式：
+- per_call：每个日期分别调用周次 / 星期 / 工作日 / 学期范围 / 法定节假日 / 节前 / 名称 / 调班 / 特殊标签
+  （改造前 DatePanel 每次选择日期的做法）
+- index：get_semester_calendar 命中缓存后 SemesterCalendar.day 一次查表
+- workdays：pick_three_workdays 按月选取（回调判定节假日 vs 索引预计算的本月工作日）
+
+输出：每个日期的平均耗时（微秒）与加速比。
+"""
+import argparse
+import asyncio
+import time
+from datetime import date, timedelta
+
+from app.integration.holiday_client.client import (
+    build_year_calendar,
+    get_holiday_name,
+    get_legal_holidays_in_year,
+    get_special_day_tags,
+    install_year_calendar,
+    is_adjusted_workday,
+    is_holiday,
+    is_near_holiday,
+)
+from app.service.date_service import (
+    get_week_number,
+    get_weekday_cn,
+    is_within_semester,
+    is_workday,
+    pick_three_workdays,
+)
+from app.service.semester_calendar import get_semester_calendar
+
+_START, _END = date(2025, 9, 1), date(2026, 1, 16)
+_HOLIDAYS = {
+    2025: {"10-01": True, "10-02": True, "10-03": True, "09-28": False, "10-11": False},
+    2026: {"01-01": True, "01-02": True, "01-04": False},
+    2027: {},
+}
+
+
+async def _per_call(days: list[date]) -> None:
+    for d in days:
+        get_week_number(_START, d)
+        get_weekday_cn(d)
+        is_workday(d)
+        is_within_semester(_START, _END, d)
+        await is_holiday(d)
+        await is_near_holiday(d)
+        await get_holiday_name(d)
+        await is_adjusted_workday(d)
+        get_special_day_tags(d)
+
+
+async def _index(days: list[date]) -> None:
+    for d in days:
+        (await get_semester_calendar(_START, _END, covering=[d])).day(d)
+
+
+async def _workdays_callback(months: list[tuple[int, int]]) -> None:
+    for y, m in months:
+        holidays = await get_legal_holidays_in_year(y) or set()
+        pick_three_workdays(y, m, is_holiday=lambda d: d in holidays)
+
+
+async def _workdays_index(months: list[tuple[int, int]]) -> None:
+    for y, m in months:
+        pick_three_workdays(y, m, semester_calendar=await get_semester_calendar(covering=[date(y, m, 1)]))
+
+
+async def _timed(fn, arg, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        await fn(arg)
+    return time.perf_counter() - start
+
+
+async def main(args: argparse.Namespace) -> None:
+    for year, entries in _HOLIDAYS.items():
+        install_year_calendar(year, build_year_calendar(year, {
+            md: {"holiday": flag, "name": "节日", "date": f"{year}-{md}"} for md, flag in entries.items()
+        }))
+    days = [_START + timedelta(days=i) for i in range((_END - _START).days + 1)]
+    months = [(2025, m) for m in range(9, 13)] + [(2026, 1)]
+    # 预热：建索引（一次）
+    await get_semester_calendar(_START, _END)
+
+    for name, fn, arg, per in (
+        ("per_call", _per_call, days, len(days)),
+        ("index", _index, days, len(days)),
+        ("workdays/cb", _workdays_callback, months, len(months)),
+        ("workdays/idx", _workdays_index, months, len(months)),
+    ):
+        elapsed = await _timed(fn, arg, args.rounds)
+        print(f"{name:>12}: {elapsed / args.rounds / per * 1e6:8.2f} µs per item  ({per} items × {args.rounds} rounds)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
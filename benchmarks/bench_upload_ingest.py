@@ -0,0 +1,88 @@
+"""基准：并发上传时主进程的内存占用 —— 整张读入（改造前）vs 流式摄取（upload_ingest）。
+
+运行：python -m benchmarks.bench_upload_ingest [--uploads 15] [--megapixels 12]
+
+模拟 N 张照片同时上传（NiceGUI 已把超过 1MB 的请求体暂存为临时文件，即 LargeFileUpload）：
+- read_all：`await e.file.read()` 后把字节留在页面状态里（改造前）
+- ingest：ingest_upload 按块读取，只解析文件头，大文件另存临时文件，主进程只留元数据
+
+用 tracemalloc 统计主进程 Python 分配的峰值与上传完成后仍驻留的内存（后台压缩在图片进程池的
+工作进程中执行，不计入；此处 process=False 只测摄取阶段）。
+
+输出：两种模式的峰值 / 驻留内存（总量与每张上传平均）、耗时。
+"""
+import argparse
+import asyncio
+import io
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from nicegui.elements.upload_files import LargeFileUpload
+
+from app.integration.upload_ingest import ingest_upload
+from benchmarks.bench_image_compress import _synthetic_photo
+
+_MiB = 1024 * 1024
+
+
+def _camera_jpeg(megapixels: float, seed: int) -> bytes:
+    width = int((megapixels * 1_000_000 * 4 / 3) ** 0.5)
+    height = width * 3 // 4
+    buf = io.BytesIO()
+    _synthetic_photo((width, height), seed).save(buf, format="JPEG", quality=95)
+    return buf.getvalue()
+
+
+def _uploads(paths: list[Path]) -> list[LargeFileUpload]:
+    return [LargeFileUpload(p.name, "image/jpeg", p) for p in paths]
+
+
+async def _read_all(files: list[LargeFileUpload]) -> list:
+    return list(await asyncio.gather(*(f.read() for f in files)))
+
+
+async def _ingest(files: list[LargeFileUpload]) -> list:
+    return list(await asyncio.gather(*(ingest_upload(f, process=False) for f in files)))
+
+
+async def _measure(mode, files: list[LargeFileUpload]) -> tuple[int, int, float]:
+    tracemalloc.start()
+    started = time.perf_counter()
+    kept = await mode(files)
+    elapsed = time.perf_counter() - started
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    for item in kept:
+        if hasattr(item, "discard"):
+            item.discard()
+    return peak, retained, elapsed
+
+
+async def main(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory(prefix="bench-upload-") as tmp:
+        samples = [_camera_jpeg(args.megapixels, i) for i in range(3)]
+        avg_size = sum(len(s) for s in samples) / len(samples)
+        print(f"uploads={args.uploads}  photo≈{args.megapixels}MP / {avg_size / _MiB:.1f}MB JPEG")
+
+        for name, mode in (("read_all", _read_all), ("ingest", _ingest)):
+            # LargeFileUpload 回收时删除其临时文件，每种模式重新写一份
+            paths = []
+            for i in range(args.uploads):
+                path = Path(tmp) / f"{name}-{i:02d}.jpg"
+                path.write_bytes(samples[i % len(samples)])
+                paths.append(path)
+            peak, retained, elapsed = await _measure(mode, _uploads(paths))
+            print(
+                f"{name:>9}: peak={peak / _MiB:7.1f}MB ({peak / args.uploads / _MiB:5.2f}MB/upload)  "
+                f"retained={retained / _MiB:7.1f}MB ({retained / args.uploads / _MiB:5.2f}MB/upload)  "
+                f"time={elapsed:.2f}s"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uploads", type=int, default=15, help="同时上传的照片数（一键导入为 15）")
+    parser.add_argument("--megapixels", type=float, default=12)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,108 @@
+"""基准：视觉请求体积与耗时 —— 存档图片直发（改造前）vs 按模型档案缩放的 AI 副本（vision_profile）。
+
+运行：python -m benchmarks.bench_vision_payload [--images 3] [--model gpt-4o] [--uplink-mbps 10]
+
+样本：合成 12MP 手机照片，经 compress_image 压到 IMAGE_MAX_BYTES（与存档图片一致）。
+三种模式各调用 generate_observation 若干次（每次换上下文，避开 AI 响应缓存）：
+- archive：AI_VISION_OPTIMIZE=false，存档图片原字节 base64 发送
+- profile_cold：按档案缩放 + 编码（清空 data-url 缓存，相当于首次生成）
+- profile_warm：data-url 命中缓存（同一领域重新生成）
+
+输出：每次请求的图片字节数（桩服务器统计，base64 解码后）、请求准备 + 往返耗时中位数、
+按 --uplink-mbps 估算的上传耗时；OpenAI 档案另给出 high detail 的估算图片 token。
+"""
+import argparse
+import asyncio
+import io
+import math
+import statistics
+import time
+
+from app.core.config import settings
+from app.integration.ai_client.http_pool import close_all_clients
+from app.integration.ai_client.observation_client import generate_observation
+from app.integration.ai_client.vision_profile import profile_for_model, reset_vision_cache
+from app.integration.image_processing import compress_image
+from benchmarks.bench_image_compress import _synthetic_photo
+from benchmarks.stub_server import run_stub
+
+_MiB = 1024 * 1024
+
+
+def _archive_images(count: int) -> list:
+    images = []
+    for seed in range(count):
+        buf = io.BytesIO()
+        _synthetic_photo((4032, 3024), seed).save(buf, format="JPEG", quality=95)
+        images.append(compress_image(buf.getvalue(), settings.IMAGE_MAX_BYTES))
+    return images
+
+
+def _openai_tokens(width: int, height: int) -> int:
+    """OpenAI high detail 估算：85 + 170 × 512 块数（按发送尺寸，服务端再缩放）。"""
+    scale = min(1.0, 2048 / max(width, height))
+    width, height = width * scale, height * scale
+    scale = min(1.0, 768 / min(width, height))
+    width, height = width * scale, height * scale
+    return 85 + 170 * math.ceil(width / 512) * math.ceil(height / 512)
+
+
+async def _run(
+    base_url: str, stats: dict, images: list[bytes], model: str, repeat: int, *, cold: bool,
+) -> tuple[float, float]:
+    before = stats["image_bytes"]
+    elapsed = []
+    for i in range(repeat):
+        if cold:
+            reset_vision_cache()
+        started = time.perf_counter()
+        await generate_observation(images, {"game_area": f"建构区-{i}-{cold}"}, base_url, "sk-bench", model)
+        elapsed.append(time.perf_counter() - started)
+    return (stats["image_bytes"] - before) / repeat, statistics.median(elapsed)
+
+
+async def main(args: argparse.Namespace) -> None:
+    archive = _archive_images(args.images)
+    images = [c.data for c in archive]
+    profile = profile_for_model(args.model)
+    target = [profile.target_size(c.width, c.height) for c in archive]
+    print(
+        f"images={args.images}  archive={archive[0].width}x{archive[0].height} "
+        f"≈{sum(len(b) for b in images) / len(images) / _MiB:.2f}MB  "
+        f"model={args.model} profile={profile.name} → {target[0][0]}x{target[0][1]}"
+    )
+
+    stats: dict = {}
+    async with run_stub(latency=args.latency, stats=stats) as base_url:
+        modes = (
+            ("archive", False, True),
+            ("profile_cold", True, True),
+            ("profile_warm", True, False),
+        )
+        for name, optimize, cold in modes:
+            settings.AI_VISION_OPTIMIZE = optimize
+            reset_vision_cache()
+            if not cold:
+                await generate_observation(images, {"game_area": "预热"}, base_url, "sk-bench", args.model)
+            sent, latency = await _run(base_url, stats, images, args.model, args.repeat, cold=cold)
+            upload = sent * 4 / 3 * 8 / (args.uplink_mbps * 1_000_000)
+            print(
+                f"{name:>13}: image_bytes/request={sent / _MiB:6.2f}MB  "
+                f"latency(p50)={latency * 1000:6.0f}ms  est_upload@{args.uplink_mbps:g}Mbps={upload:5.2f}s"
+            )
+        await close_all_clients()
+
+    if profile.name == "openai":
+        before = sum(_openai_tokens(c.width, c.height) for c in archive)
+        after = sum(_openai_tokens(w, h) for w, h in target)
+        print(f"openai high-detail image tokens/request: archive={before}  profile={after}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", type=int, default=3, help="每次请求的图片数（游戏观察 1~3 张）")
+    parser.add_argument("--model", default="gpt-4o")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--uplink-mbps", type=float, default=10, help="估算上传耗时用的上行带宽")
+    asyncio.run(main(parser.parse_args()))
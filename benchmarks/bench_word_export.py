@@ -0,0 +1,108 @@
+"""基准：Word 批量导出 —— 每份文档重新解析模板 vs 进程级模板缓存（克隆已解析的模板）。
+
+运行：python -m benchmarks.bench_word_export [--plans 100] [--children 30] [--rounds 3]
+
+- daily×N：export_batch_daily_plans 导出 N 天计划（teacherplan.docx）
+- listening×N：export_batch_by_domain 导出 N 位幼儿五领域（OneOnOneListeningSmallSecond.docx，
+  每个领域一个文档，每个文档含全部幼儿的该领域表格）
+
+uncached 模式把导出器中的 open_template / template_document / template_derived 换成每次
+Document(str(模板)) 并现场计算的实现，等同改造前的做法（倾听领域文档打开两次模板，每张表格重新定位各行）。
+
+输出：各模式平均墙钟耗时与加速比。
+"""
+import argparse
+import time
+from datetime import date
+
+from docx import Document
+
+from app.core.models.daily_plan import DailyPlan
+from app.integration.word_export import exporter, listening_exporter
+from app.integration.word_export.exporter import export_batch_daily_plans
+from app.integration.word_export.listening_exporter import DOMAINS, export_batch_by_domain
+from app.integration.word_export.template_cache import (
+    clear_template_cache,
+    open_template,
+    template_derived,
+    template_document,
+)
+
+
+def _uncached_open(path, *, prepare=None):
+    doc = Document(str(path))
+    if prepare is not None:
+        prepare(doc)
+    return doc
+
+
+def _uncached_pristine(path):
+    return Document(str(path))
+
+
+def _uncached_derived(path, key, build):
+    return build(Document(str(path)))
+
+
+def _use_cache(enabled: bool) -> None:
+    exporter.open_template = open_template if enabled else _uncached_open
+    listening_exporter.open_template = open_template if enabled else _uncached_open
+    listening_exporter.template_document = template_document if enabled else _uncached_pristine
+    listening_exporter.template_derived = template_derived if enabled else _uncached_derived
+    clear_template_cache()
+
+
+def _plans(count: int) -> list[tuple[DailyPlan, list[dict]]]:
+    process = [f"第{i}步：教师引导幼儿观察材料并表达发现。" for i in range(12)]
+    return [
+        (DailyPlan(
+            plan_date=date.fromordinal(date(2026, 3, 2).toordinal() + i), week_number=i // 5 + 1,
+            weekday_cn="周一", grade="中班", class_name="一班", activity_goal="目标：认识颜色。",
+            activity_process_adapted="".join(process), morning_activity="体能大循环：跳圈。",
+        ), [{"text": s, "changed": i % 2 == 0} for i, s in enumerate(process)])
+        for i in range(count)
+    ]
+
+
+def _children(count: int) -> list[tuple[dict, list[dict]]]:
+    return [
+        ({"child_name": f"幼儿{i}", "child_age": "4岁", "class_name": "一班", "observer": "王老师"}, [
+            {"domain": d, "obs_year": 2026, "obs_month": 3, "goals": f"{d}目标", "evaluation": "评价",
+             "support_strategy": "策略", "image_descriptions": ["图1", "图2", "图3"], "indicators": []}
+            for d in DOMAINS
+        ])
+        for i in range(count)
+    ]
+
+
+def _timed(fn, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - start) / rounds
+
+
+def main(args: argparse.Namespace) -> None:
+    plans, children = _plans(args.plans), _children(args.children)
+    cases = [
+        (f"daily×{args.plans}", lambda: export_batch_daily_plans(plans)),
+        (f"listening×{args.children}", lambda: export_batch_by_domain(children)),
+    ]
+    for name, fn in cases:
+        results = {}
+        for mode, enabled in (("uncached", False), ("cached", True)):
+            _use_cache(enabled)
+            results[mode] = _timed(fn, args.rounds)
+        print(
+            f"{name:>14}: uncached {results['uncached']:6.2f}s   cached {results['cached']:6.2f}s   "
+            f"×{results['uncached'] / results['cached']:4.2f}"
+        )
+    _use_cache(True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--plans", type=int, default=100)
+    parser.add_argument("--children", type=int, default=30)
+    parser.add_argument("--rounds", type=int, default=3)
+    main(parser.parse_args())
@@ -0,0 +1,278 @@
+"""本地 S3 兼容桩服务器（MinIO 风格的内存对象存储，测试 / 基准 / 本地联调用）。
+
+实现 s3 图片后端用到的路径风格接口：PUT / GET / HEAD / DELETE 对象，CopyObject（PUT 带
+x-amz-copy-source，刷新 LastModified），ListObjectsV2（按
+list_page_size 分页），分片上传（CreateMultipartUpload / UploadPart / CompleteMultipartUpload /
+AbortMultipartUpload）。
+- 每个请求独立校验 AWS Signature V4（Authorization 头或预签名查询参数），签名错误返回 403，
+  预签名过期返回 403，x-amz-content-sha256 与请求体不符返回 400
+- latency：每个请求的固定延迟（秒）；fail_part：该分片号的 UploadPart 返回 500（故障注入）
+- stats：可选 dict，原地累计 requests / puts / copies / gets / heads / deletes / lists / parts /
+  completed / aborted / max_parallel_parts / denied 计数供调用方读取
+- build_app 返回的 store 附带 modified 映射（store.modified[(bucket, key)]），测试可据此回拨 LastModified
+
+代码内使用：`async with run_s3_stub(access_key=..., secret_key=...) as (endpoint_url, store)`；
+独立运行：python -m benchmarks.s3_stub_server --port 9000 --access-key minio --secret-key minio123
+"""
+import argparse
+import asyncio
+import hashlib
+import hmac
+import re
+import socket
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from urllib.parse import parse_qsl, quote, unquote
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+
+_AUTH = re.compile(
+    r"AWS4-HMAC-SHA256 Credential=(?P<ak>[^/]+)/(?P<scope>[^,]+), "
+    r"SignedHeaders=(?P<signed>[^,]+), Signature=(?P<sig>[0-9a-f]{64})"
+)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _enc(value: str) -> str:
+    return quote(value, safe="-_.~")
+
+
+def _expected_signature(secret_key: str, amz_date: str, scope: str, canonical: str) -> str:
+    _, region, service, _ = scope.split("/", 3)
+    key = ("AWS4" + secret_key).encode()
+    for part in (amz_date[:8], region, service, "aws4_request"):
+        key = hmac.new(key, part.encode(), hashlib.sha256).digest()
+    string_to_sign = "\n".join([
+        "AWS4-HMAC-SHA256", amz_date, scope, hashlib.sha256(canonical.encode()).hexdigest(),
+    ])
+    return hmac.new(key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+
+
+class ObjectStore(dict):
+    """{bucket: {key: (bytes, content_type)}}，另以 modified 记录 (bucket, key) → LastModified。"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.modified: dict[tuple[str, str], datetime] = {}
+
+
+def build_app(
+    *,
+    access_key: str = "minio",
+    secret_key: str = "minio123",
+    latency: float = 0.0,
+    fail_part: int | None = None,
+    list_page_size: int = 1000,
+    stats: dict | None = None,
+) -> tuple[Starlette, ObjectStore]:
+    """构造桩应用，返回 (app, store)；store 为 {bucket: {key: (bytes, content_type)}}（见 ObjectStore）。"""
+    stats = stats if stats is not None else {}
+    stats.update(
+        requests=0, puts=0, copies=0, gets=0, heads=0, deletes=0, lists=0, parts=0, completed=0,
+        aborted=0, max_parallel_parts=0, denied=0,
+    )
+    store = ObjectStore()
+    modified = store.modified
+    uploads: dict[str, dict] = {}
+    parallel_parts = 0
+
+    def _verify(request: Request, body: bytes) -> Response | None:
+        raw_path = request.scope["raw_path"].decode()
+        query = dict(parse_qsl(request.url.query, keep_blank_values=True))
+        host = request.headers.get("host", "")
+        if "X-Amz-Signature" in query:
+            signature = query.pop("X-Amz-Signature")
+            amz_date = query.get("X-Amz-Date", "")
+            issued = datetime.strptime(amz_date, "%Y%m%dT%H%M%SZ").replace(tzinfo=timezone.utc)
+            if datetime.now(timezone.utc) > issued + timedelta(seconds=int(query["X-Amz-Expires"])):
+                return Response("Request has expired", status_code=403)
+            ak, scope = query["X-Amz-Credential"].split("/", 1)
+            canonical_query = "&".join(f"{_enc(k)}={_enc(v)}" for k, v in sorted(query.items()))
+            canonical = "\n".join([
+                request.method, raw_path, canonical_query, f"host:{host}\n", "host", "UNSIGNED-PAYLOAD",
+            ])
+        else:
+            match = _AUTH.fullmatch(request.headers.get("authorization", ""))
+            if not match:
+                return Response("AccessDenied", status_code=403)
+            ak, scope, signature = match["ak"], match["scope"], match["sig"]
+            amz_date = request.headers.get("x-amz-date", "")
+            payload_hash = request.headers.get("x-amz-content-sha256", "")
+            if payload_hash != hashlib.sha256(body).hexdigest():
+                return Response("XAmzContentSHA256Mismatch", status_code=400)
+            names = match["signed"].split(";")
+            canonical_query = "&".join(f"{_enc(k)}={_enc(v)}" for k, v in sorted(query.items()))
+            canonical = "\n".join([
+                request.method, raw_path, canonical_query,
+                "".join(f"{n}:{request.headers.get(n, '').strip()}\n" for n in names),
+                match["signed"], payload_hash,
+            ])
+        if ak != access_key or not hmac.compare_digest(
+            signature, _expected_signature(secret_key, amz_date, scope, canonical),
+        ):
+            return Response("SignatureDoesNotMatch", status_code=403)
+        return None
+
+    async def handle(request: Request) -> Response:
+        nonlocal parallel_parts
+        stats["requests"] += 1
+        body = await request.body()
+        denied = _verify(request, body)
+        if denied is not None:
+            stats["denied"] += 1
+            return denied
+        if latency:
+            await asyncio.sleep(latency)
+
+        bucket = request.path_params["bucket"]
+        key = unquote(request.path_params.get("key", ""))
+        objects = store.setdefault(bucket, {})
+        params = request.query_params
+        method = request.method
+
+        if not key:
+            if method != "GET" or params.get("list-type") != "2":
+                return Response("MethodNotAllowed", status_code=405)
+            stats["lists"] += 1
+            token = params.get("continuation-token", "")
+            keys = sorted(k for k in objects if k.startswith(params.get("prefix", "")) and k > token)
+            page, truncated = keys[:list_page_size], len(keys) > list_page_size
+            now = datetime.now(timezone.utc)
+            contents = "".join(
+                f"<Contents><Key>{k}</Key><LastModified>"
+                f"{modified.get((bucket, k), now).strftime('%Y-%m-%dT%H:%M:%S.000Z')}</LastModified>"
+                f"<Size>{len(objects[k][0])}</Size></Contents>"
+                for k in page
+            )
+            next_token = f"<NextContinuationToken>{page[-1]}</NextContinuationToken>" if truncated else ""
+            return Response(
+                '<ListBucketResult xmlns="http://s3.amazonaws.com/doc/2006-03-01/">'
+                f"<Name>{bucket}</Name><KeyCount>{len(page)}</KeyCount>"
+                f"<IsTruncated>{'true' if truncated else 'false'}</IsTruncated>{next_token}{contents}"
+                "</ListBucketResult>",
+                media_type="application/xml",
+            )
+
+        if method == "POST" and "uploads" in params:
+            upload_id = uuid.uuid4().hex
+            uploads[upload_id] = {"key": key, "parts": {}, "type": request.headers.get("content-type", "")}
+            return Response(
+                f"<InitiateMultipartUploadResult><Bucket>{bucket}</Bucket><Key>{key}</Key>"
+                f"<UploadId>{upload_id}</UploadId></InitiateMultipartUploadResult>",
+                media_type="application/xml",
+            )
+        if "uploadId" in params:
+            upload = uploads.get(params["uploadId"])
+            if upload is None or upload["key"] != key:
+                return Response("NoSuchUpload", status_code=404)
+            if method == "PUT":
+                number = int(params["partNumber"])
+                parallel_parts += 1
+                stats["max_parallel_parts"] = max(stats["max_parallel_parts"], parallel_parts)
+                try:
+                    await asyncio.sleep(latency)
+                    if number == fail_part:
+                        return Response("InternalError", status_code=500)
+                    upload["parts"][number] = body
+                    stats["parts"] += 1
+                    return Response(headers={"ETag": f'"{hashlib.md5(body).hexdigest()}"'})
+                finally:
+                    parallel_parts -= 1
+            if method == "POST":
+                numbers = [int(n) for n in re.findall(r"<PartNumber>(\d+)</PartNumber>", body.decode())]
+                if not numbers or any(n not in upload["parts"] for n in numbers):
+                    return Response("InvalidPart", status_code=400)
+                objects[key] = (b"".join(upload["parts"][n] for n in numbers), upload["type"])
+                modified[(bucket, key)] = datetime.now(timezone.utc)
+                del uploads[params["uploadId"]]
+                stats["completed"] += 1
+                return Response(
+                    f"<CompleteMultipartUploadResult><Key>{key}</Key></CompleteMultipartUploadResult>",
+                    media_type="application/xml",
+                )
+            if method == "DELETE":
+                del uploads[params["uploadId"]]
+                stats["aborted"] += 1
+                return Response(status_code=204)
+
+        if method == "PUT" and "x-amz-copy-source" in request.headers:
+            source_bucket, _, source_key = unquote(request.headers["x-amz-copy-source"]).lstrip("/").partition("/")
+            source = store.get(source_bucket, {}).get(source_key)
+            if source is None:
+                return Response("NoSuchKey", status_code=404)
+            stats["copies"] += 1
+            objects[key] = (source[0], request.headers.get("content-type", source[1]))
+            modified[(bucket, key)] = datetime.now(timezone.utc)
+            return Response(
+                "<CopyObjectResult><ETag>\"" + hashlib.md5(source[0]).hexdigest() + "\"</ETag></CopyObjectResult>",
+                media_type="application/xml",
+            )
+        if method == "PUT":
+            stats["puts"] += 1
+            objects[key] = (body, request.headers.get("content-type", "application/octet-stream"))
+            modified[(bucket, key)] = datetime.now(timezone.utc)
+            return Response(headers={"ETag": f'"{hashlib.md5(body).hexdigest()}"'})
+        if method in ("GET", "HEAD"):
+            stats["gets" if method == "GET" else "heads"] += 1
+            if key not in objects:
+                return Response("NoSuchKey", status_code=404)
+            data, content_type = objects[key]
+            if method == "HEAD":
+                last_modified = modified.get((bucket, key), datetime.now(timezone.utc))
+                return Response(headers={
+                    "content-length": str(len(data)), "content-type": content_type,
+                    "last-modified": last_modified.strftime("%a, %d %b %Y %H:%M:%S GMT"),
+                })
+            return Response(data, media_type=content_type)
+        if method == "DELETE":
+            stats["deletes"] += 1
+            objects.pop(key, None)
+            modified.pop((bucket, key), None)
+            return Response(status_code=204)
+        return Response("MethodNotAllowed", status_code=405)
+
+    methods = ["GET", "PUT", "HEAD", "POST", "DELETE"]
+    routes = [
+        Route("/{bucket}", handle, methods=methods),
+        Route("/{bucket}/{key:path}", handle, methods=methods),
+    ]
+    return Starlette(routes=routes), store
+
+
+@asynccontextmanager
+async def run_s3_stub(**kwargs):
+    """启动桩服务器，yield (endpoint_url, store)；退出时关闭。"""
+    port = _free_port()
+    app, store = build_app(**kwargs)
+    config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    try:
+        yield f"http://127.0.0.1:{port}", store
+    finally:
+        server.should_exit = True
+        await task
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--access-key", default="minio")
+    parser.add_argument("--secret-key", default="minio123")
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+    stub_app, _ = build_app(access_key=args.access_key, secret_key=args.secret_key, latency=args.latency)
+    uvicorn.run(stub_app, host=args.host, port=args.port)
@@ -0,0 +1,305 @@
+"""本地 OpenAI 兼容桩服务器（基准测试 / 本地联调用）。
+
+实现 POST /v1/chat/completions 的 JSON 与流式（"stream": true，SSE 逐 token）两种形态：
+- 延迟：latency 可为固定秒数或分布描述（见 latency_sampler），stall_rate / stall_latency 模拟长尾卡顿
+- 故障注入：error_rate_429 / error_rate_5xx 按比例随机返回 429（带 Retry-After）/ 503；
+  max_concurrency > 0 时超过在途上限的请求返回 429（带 Retry-After 与 x-ratelimit-* 头）
+- 视觉请求校验：content 为多段列表时检查每个 image_url 是合法的 data:image/...;base64 且
+  与 magic bytes 一致（可限制单图大小），不合格返回 400
+- 响应内容：按 system prompt 中的字段名识别本项目的任务（教案拆分 / 年龄适配 / 游戏观察 /
+  一对一倾听），返回能通过各客户端校验的 JSON；纯文本模式返回 tokens 个字
+
+代码内使用：`async with run_stub(**kwargs) as base_url`；
+独立运行（把设置页的 API 地址指向它）：
+    python -m benchmarks.stub_server --port 8001 --latency lognormal:0.8,0.5 --error-rate-5xx 0.02
+"""
+import argparse
+import asyncio
+import base64
+import binascii
+import json
+import math
+import random
+import re
+import socket
+from collections.abc import Callable
+from contextlib import asynccontextmanager
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+LatencySpec = float | str | Callable[[random.Random], float]
+
+_DATA_URL = re.compile(r"^data:(image/(?:jpeg|png|gif|webp));base64,(.+)$", re.S)
+_MAGIC = {
+    "image/jpeg": (b"\xff\xd8\xff",),
+    "image/png": (b"\x89PNG\r\n\x1a\n",),
+    "image/gif": (b"GIF87a", b"GIF89a"),
+    "image/webp": (b"RIFF",),
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def latency_sampler(spec: LatencySpec) -> Callable[[random.Random], float]:
+    """把延迟描述转换为采样函数（秒，非负）。
+
+    支持：
+      0.2 / "0.2" / "fixed:0.2"   固定延迟
+      "uniform:0.1,0.5"           均匀分布 [a, b]
+      "normal:0.3,0.05"           正态（均值, 标准差），截断到 ≥0
+      "lognormal:0.8,0.5"         对数正态（中位数, σ），模拟长尾
+      "exp:0.3"                   指数分布（均值）
+    也可直接传入 callable(rng) -> float。
+    """
+    if callable(spec):
+        return spec
+    if isinstance(spec, (int, float)):
+        value = float(spec)
+        return lambda rng: value
+    kind, _, args = spec.partition(":")
+    if not args:
+        kind, args = "fixed", kind
+    params = [float(p) for p in args.split(",")]
+    if kind == "fixed":
+        return lambda rng: params[0]
+    if kind == "uniform":
+        return lambda rng: rng.uniform(params[0], params[1])
+    if kind == "normal":
+        return lambda rng: max(0.0, rng.gauss(params[0], params[1]))
+    if kind == "lognormal":
+        mu = math.log(params[0]) if params[0] > 0 else 0.0
+        return lambda rng: rng.lognormvariate(mu, params[1])
+    if kind == "exp":
+        return lambda rng: rng.expovariate(1 / params[0]) if params[0] > 0 else 0.0
+    raise ValueError(f"不支持的延迟分布: {spec}")
+
+
+def inspect_vision(messages: list[dict], max_image_bytes: int = 0) -> tuple[int, int, str | None]:
+    """检查多模态消息中的图片，返回 (图片数, 解码后总字节数, 错误描述或 None)。"""
+    count = 0
+    total = 0
+    for message in messages:
+        content = message.get("content")
+        if not isinstance(content, list):
+            continue
+        for part in content:
+            if not isinstance(part, dict) or part.get("type") not in ("text", "image_url"):
+                return count, total, f"不支持的 content 段: {part!r:.80}"
+            if part["type"] == "text":
+                continue
+            url = (part.get("image_url") or {}).get("url", "")
+            match = _DATA_URL.match(url)
+            if match is None:
+                return count, total, "image_url 不是 data:image/...;base64 格式"
+            try:
+                raw = base64.b64decode(match.group(2), validate=True)
+            except (binascii.Error, ValueError):
+                return count, total, "image_url base64 解码失败"
+            if not raw.startswith(_MAGIC[match.group(1)]):
+                return count, total, f"图片内容与声明的 {match.group(1)} 不符"
+            if max_image_bytes and len(raw) > max_image_bytes:
+                return count, total, f"单张图片 {len(raw)} 字节超过上限 {max_image_bytes}"
+            count += 1
+            total += len(raw)
+    return count, total, None
+
+
+def default_responder(body: dict, image_count: int) -> dict:
+    """按 system prompt 中的字段名返回能通过本项目各客户端校验的 JSON 内容。"""
+    system = " ".join(
+        m["content"] for m in body.get("messages", [])
+        if m.get("role") == "system" and isinstance(m.get("content"), str)
+    )
+    if "observation_goal" in system:
+        return {
+            "observation_goal": "观察幼儿在建构区的合作行为。",
+            "observation_record": "幼儿两两合作搭建城堡。",
+            "evaluation_analysis": "幼儿能协商分工。",
+            "support_strategy": "提供更多辅助材料。",
+        }
+    if "image_descriptions" in system:
+        return {
+            "goals": "倾听幼儿讲述作品。",
+            "image_descriptions": [f"第{i + 1}张图：幼儿绘画作品。" for i in range(image_count)],
+            "indicators": [],
+            "evaluation": "表达清晰。",
+            "support_strategy": "鼓励完整讲述。",
+        }
+    if "adapted_process" in system:
+        return {"adapted_process": "一、导入：教师出示图片。\n二、操作：幼儿分组尝试。"}
+    if "activity_difficult" in system:
+        return {
+            "activity_goal": "认识常见的秋季水果。",
+            "activity_prep": "水果图片、实物。",
+            "activity_key": "说出水果名称。",
+            "activity_difficult": "描述水果特征。",
+            "activity_process": "一、导入：出示水果。\n二、观察：说一说。",
+        }
+    return {"ok": True}
+
+
+def build_app(
+    *,
+    latency: LatencySpec = 0.0,
+    tokens: int = 50,
+    token_delay: float = 0.0,
+    max_concurrency: int = 0,
+    retry_after: float = 0.5,
+    stall_rate: float = 0.0,
+    stall_latency: float = 0.0,
+    error_rate_429: float = 0.0,
+    error_rate_5xx: float = 0.0,
+    check_vision: bool = True,
+    max_image_bytes: int = 0,
+    responder: Callable[[dict, int], dict] = default_responder,
+    seed: int | None = None,
+    stats: dict | None = None,
+) -> Starlette:
+    """构造桩应用。
+
+    非流式：等待采样延迟后返回 responder 给出的 JSON content（JSON 模式 / 视觉请求）或纯文本。
+    流式：等待采样延迟后逐个发送 tokens 个增量，间隔 token_delay 秒。
+    max_concurrency：在途请求上限（0 不限），超出返回 429。
+    error_rate_429 / error_rate_5xx：随机故障比例（在延迟之前判定，不占用在途名额）。
+    stall_rate / stall_latency：以 stall_rate 的概率额外等待 stall_latency 秒。
+    check_vision / max_image_bytes：视觉请求图片校验与单图大小上限（0 不限）。
+    seed：固定随机序列，便于复现。
+    stats：可选 dict，原地累计 requests / ok / throttled / injected_429 / injected_5xx /
+        stalled / vision_requests / images / image_bytes / vision_rejected 计数供调用方读取。
+    """
+    stats = stats if stats is not None else {}
+    stats.update(
+        requests=0, ok=0, throttled=0, injected_429=0, injected_5xx=0, stalled=0,
+        vision_requests=0, images=0, image_bytes=0, vision_rejected=0,
+    )
+    in_flight = 0
+    rng = random.Random(seed)
+    sample_latency = latency_sampler(latency)
+
+    def _rate_limited() -> JSONResponse:
+        return JSONResponse(
+            {"error": {"message": "Rate limit reached"}},
+            status_code=429,
+            headers={
+                "Retry-After": str(retry_after),
+                "x-ratelimit-remaining-requests": "0",
+                "x-ratelimit-reset-requests": f"{int(retry_after * 1000)}ms",
+            },
+        )
+
+    async def _sse():
+        for i in range(tokens):
+            chunk = {"choices": [{"index": 0, "delta": {"content": f"字{i}"}}]}
+            yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+            if token_delay:
+                await asyncio.sleep(token_delay)
+        usage = {"prompt_tokens": 0, "completion_tokens": tokens}
+        yield f"data: {json.dumps({'choices': [], 'usage': usage})}\n\n"
+        yield "data: [DONE]\n\n"
+
+    async def chat_completions(request: Request):
+        nonlocal in_flight
+        stats["requests"] += 1
+        if error_rate_429 and rng.random() < error_rate_429:
+            stats["injected_429"] += 1
+            return _rate_limited()
+        if error_rate_5xx and rng.random() < error_rate_5xx:
+            stats["injected_5xx"] += 1
+            return JSONResponse({"error": {"message": "upstream overloaded"}}, status_code=503)
+        if max_concurrency and in_flight >= max_concurrency:
+            stats["throttled"] += 1
+            return _rate_limited()
+        in_flight += 1
+        try:
+            return await _respond(request)
+        finally:
+            in_flight -= 1
+
+    async def _respond(request: Request):
+        body = json.loads(await request.body())
+        messages = body.get("messages", [])
+        is_vision = any(isinstance(m.get("content"), list) for m in messages)
+        image_count = 0
+        if is_vision:
+            stats["vision_requests"] += 1
+            image_count, image_bytes, error = inspect_vision(messages, max_image_bytes)
+            if check_vision and error:
+                stats["vision_rejected"] += 1
+                return JSONResponse({"error": {"message": error}}, status_code=400)
+            stats["images"] += image_count
+            stats["image_bytes"] += image_bytes
+
+        delay = sample_latency(rng)
+        if stall_rate and rng.random() < stall_rate:
+            stats["stalled"] += 1
+            delay += stall_latency
+        if delay:
+            await asyncio.sleep(delay)
+        stats["ok"] += 1
+
+        if body.get("stream"):
+            return StreamingResponse(_sse(), media_type="text/event-stream")
+        if "response_format" in body or is_vision:
+            content = json.dumps(responder(body, image_count), ensure_ascii=False)
+        else:
+            # 纯文本模式：一次性返回与流式等长的全部 token
+            await asyncio.sleep(token_delay * tokens)
+            content = "".join(f"字{i}" for i in range(tokens))
+        prompt_chars = sum(len(str(m.get("content", ""))) for m in messages)
+        return JSONResponse({
+            "choices": [{"message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": prompt_chars // 2, "completion_tokens": len(content) // 2},
+        })
+
+    return Starlette(routes=[Route("/v1/chat/completions", chat_completions, methods=["POST"])])
+
+
+@asynccontextmanager
+async def run_stub(**kwargs):
+    """启动桩服务器，yield 其 api_base_url；退出时关闭。"""
+    port = _free_port()
+    config = uvicorn.Config(build_app(**kwargs), host="127.0.0.1", port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    try:
+        yield f"http://127.0.0.1:{port}/v1"
+    finally:
+        server.should_exit = True
+        await task
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", default="0", help="延迟分布，如 0.5 / uniform:0.2,1 / lognormal:0.8,0.5")
+    parser.add_argument("--tokens", type=int, default=50)
+    parser.add_argument("--token-delay", type=float, default=0.0)
+    parser.add_argument("--max-concurrency", type=int, default=0)
+    parser.add_argument("--error-rate-429", type=float, default=0.0)
+    parser.add_argument("--error-rate-5xx", type=float, default=0.0)
+    parser.add_argument("--max-image-bytes", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    app = build_app(
+        latency=args.latency,
+        tokens=args.tokens,
+        token_delay=args.token_delay,
+        max_concurrency=args.max_concurrency,
+        error_rate_429=args.error_rate_429,
+        error_rate_5xx=args.error_rate_5xx,
+        max_image_bytes=args.max_image_bytes,
+        seed=args.seed,
+    )
+    print(f"OpenAI 兼容桩服务器：http://{args.host}:{args.port}/v1")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
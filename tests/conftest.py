@@ -3,11 +3,100 @@
 提供基于 SQLite 内存库的异步 session，用于仓库层集成测试，
 与真实 MySQL 连接完全隔离。
 """
+import pytest
 import pytest_asyncio
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 import app.core.models  # noqa: F401 — 确保所有 model 注册到 Base.metadata
 from app.core.database import Base
+from app.integration.ai_client.hedging import reset_hedge_state
+from app.integration.ai_client.json_repair import reset_repair_stats
+from app.integration.ai_client.rate_limiter import reset_limiters
+from app.integration.ai_client.response_cache import reset_response_cache
+from app.integration.ai_client.telemetry import reset_telemetry
+from app.integration.ai_client.vision_profile import reset_vision_cache
+from app.integration.holiday_client.client import reset_holiday_calendar
+from app.integration.image_pool import reset_image_pool
+from app.service.listening_batch_service import reset_batch_runner
+from app.service.semester_calendar import invalidate_semester_calendars
+
+
+@pytest.fixture(autouse=True)
+def _fresh_ai_response_cache():
+    """AI 响应缓存为进程级单例，每个测试前后清空，避免用例间串扰。"""
+    reset_response_cache()
+    yield
+    reset_response_cache()
+
+
+@pytest.fixture(autouse=True)
+def _fresh_ai_rate_limiters():
+    """限流器按服务商进程级共享（含暂停窗口），每个测试独立。"""
+    reset_limiters()
+    yield
+    reset_limiters()
+
+
+@pytest.fixture(autouse=True)
+def _fresh_ai_hedge_state():
+    """对冲耗时样本决定对冲延迟，每个测试从空样本开始。"""
+    reset_hedge_state()
+    yield
+    reset_hedge_state()
+
+
+@pytest.fixture(autouse=True)
+def _fresh_ai_telemetry():
+    """遥测缓冲为进程级单例；测试中不启动后台写库，每个测试从空缓冲开始。"""
+    reset_telemetry()
+    yield
+    reset_telemetry()
+
+
+@pytest.fixture(autouse=True)
+def _fresh_ai_json_repair_stats():
+    """JSON 修复计数为进程级，每个测试从零开始。"""
+    reset_repair_stats()
+    yield
+    reset_repair_stats()
+
+
+@pytest.fixture(autouse=True)
+def _fresh_ai_vision_cache():
+    """AI 图片副本 data-url 缓存为进程级，每个测试从空缓存开始。"""
+    reset_vision_cache()
+    yield
+    reset_vision_cache()
+
+
+@pytest.fixture(autouse=True)
+def _fresh_holiday_calendar():
+    """节假日日历与学期日历索引为进程级，每个测试从空日历开始（不注入读库的加载函数）。"""
+    reset_holiday_calendar()
+    invalidate_semester_calendars()
+    yield
+    reset_holiday_calendar()
+    invalidate_semester_calendars()
+
+
+@pytest.fixture(autouse=True)
+def _fresh_listening_batch_runner():
+    """倾听批量任务的运行表与全局名额为进程级，每个测试独立。"""
+    reset_batch_runner()
+    yield
+    reset_batch_runner()
+
+
+@pytest.fixture(autouse=True)
+def _in_process_image_pool(monkeypatch):
+    """测试默认不启动图片进程池（任务改在线程中执行，mock.patch 的函数无需可 pickle）；
+    需要真实进程池的用例自行打开 IMAGE_POOL_ENABLED。"""
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "IMAGE_POOL_ENABLED", False)
+    reset_image_pool()
+    yield
+    reset_image_pool()
 
 
 @pytest_asyncio.fixture
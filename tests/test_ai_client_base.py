@@ -150,29 +150,28 @@ async def test_call_ai_http_500_raises_ai_call_error():
 
 @pytest.mark.asyncio
 async def test_call_ai_http_400_raises_ai_call_error():
-    """HTTP 400 时抛出 AiCallError（不重试，因为是客户端错误）。"""
-    # 注：当前实现对 4xx 也会重试（tenacity 统一处理），这里只验证最终抛出异常
+    """HTTP 400 时抛出 AiCallError，且不重试（客户端错误）。"""
+    call_count = 0
+
     def _handler(req):
+        nonlocal call_count
+        call_count += 1
         return _make_error_response(400)
 
-    import unittest.mock as mock
-    from app.integration.ai_client import base as ai_base
-
-    def _fast_retry():
-        from tenacity import retry, stop_after_attempt, wait_none
-        return retry(stop=stop_after_attempt(1), wait=wait_none(), reraise=True)
+    transport = httpx.MockTransport(_handler)
+    client = httpx.AsyncClient(transport=transport)
 
-    with mock.patch.object(ai_base, "_make_retry_decorator", _fast_retry):
-        transport = httpx.MockTransport(_handler)
-        client = httpx.AsyncClient(transport=transport)
+    with pytest.raises(AiCallError) as exc_info:
+        await call_ai(
+            messages=[{"role": "user", "content": "test"}],
+            api_base_url="https://api.example.com/v1",
+            api_key="sk-test",
+            _client=client,
+        )
 
-        with pytest.raises(AiCallError):
-            await call_ai(
-                messages=[{"role": "user", "content": "test"}],
-                api_base_url="https://api.example.com/v1",
-                api_key="sk-test",
-                _client=client,
-            )
+    assert call_count == 1
+    assert exc_info.value.status_code == 400
+    assert exc_info.value.attempts == 1
 
 
 # -------------------------------------------------------------------
@@ -0,0 +1,176 @@
+"""tests/test_ai_client_stream.py — 流式文本生成（SSE）测试。
+
+使用 httpx.MockTransport 构造 SSE 响应体，隔离真实 HTTP 请求。
+"""
+
+import json
+import unittest.mock as mock
+
+import httpx
+import pytest
+from tenacity import retry, stop_after_attempt, wait_none
+
+from app.core.exceptions import AiCallError, AiParseError
+from app.integration.ai_client import base as ai_base
+from app.integration.ai_client.base import call_ai_text_stream
+from app.integration.ai_client.generate_client import generate_activity_stream
+
+
+def _sse_body(deltas: list[str], *, done: bool = True) -> bytes:
+    lines = []
+    for d in deltas:
+        chunk = {"choices": [{"index": 0, "delta": {"content": d}}]}
+        lines.append(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n")
+    if done:
+        lines.append("data: [DONE]\n\n")
+    return "".join(lines).encode()
+
+
+def _sse_response(deltas: list[str], **kwargs) -> httpx.Response:
+    return httpx.Response(
+        200,
+        content=_sse_body(deltas, **kwargs),
+        headers={"Content-Type": "text/event-stream"},
+    )
+
+
+def _fast_retry():
+    return retry(stop=stop_after_attempt(3), wait=wait_none(), reraise=True)
+
+
+async def _collect(**kwargs) -> list[str]:
+    return [
+        d
+        async for d in call_ai_text_stream(
+            messages=[{"role": "user", "content": "test"}],
+            api_base_url="https://api.example.com/v1",
+            api_key="sk-test",
+            **kwargs,
+        )
+    ]
+
+
+async def test_stream_yields_deltas_in_order():
+    """逐段产出增量；首段前导空白被去除；请求体含 stream: true。"""
+    seen: dict = {}
+
+    def _handler(req: httpx.Request) -> httpx.Response:
+        seen["payload"] = json.loads(req.content)
+        return _sse_response(["", "\n体能", "大循环：", "跳圈圈"])
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(_handler))
+    deltas = await _collect(_client=client)
+
+    assert deltas == ["体能", "大循环：", "跳圈圈"]
+    assert seen["payload"]["stream"] is True
+
+
+async def test_stream_json_fallback_for_non_streaming_provider():
+    """服务端忽略 stream 直接返回完整 JSON 时，一次性产出完整内容。"""
+    body = {"choices": [{"message": {"content": "完整内容"}}]}
+    client = httpx.AsyncClient(
+        transport=httpx.MockTransport(lambda req: httpx.Response(200, json=body))
+    )
+    assert await _collect(_client=client) == ["完整内容"]
+
+
+async def test_stream_retries_before_first_token():
+    """首个 token 之前的 5xx 按重试策略重试，成功后正常产出。"""
+    calls = 0
+
+    def _handler(req):
+        nonlocal calls
+        calls += 1
+        if calls < 3:
+            return httpx.Response(503, json={"error": {"message": "busy"}})
+        return _sse_response(["好"])
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(_handler))
+    with mock.patch.object(ai_base, "_make_retry_decorator", _fast_retry):
+        assert await _collect(_client=client) == ["好"]
+    assert calls == 3
+
+
+async def test_stream_http_error_raises_ai_call_error():
+    client = httpx.AsyncClient(
+        transport=httpx.MockTransport(
+            lambda req: httpx.Response(401, json={"error": {"message": "bad key"}})
+        )
+    )
+    with mock.patch.object(ai_base, "_make_retry_decorator", _fast_retry):
+        with pytest.raises(AiCallError, match="bad key"):
+            await _collect(_client=client)
+
+
+async def test_stream_empty_content_raises_parse_error():
+    client = httpx.AsyncClient(
+        transport=httpx.MockTransport(lambda req: _sse_response(["", "  "]))
+    )
+    with mock.patch.object(ai_base, "_make_retry_decorator", _fast_retry):
+        with pytest.raises(AiParseError):
+            await _collect(_client=client)
+
+
+async def test_stream_malformed_chunk_raises_parse_error():
+    client = httpx.AsyncClient(
+        transport=httpx.MockTransport(
+            lambda req: httpx.Response(
+                200,
+                content=b"data: {not json}\n\n",
+                headers={"Content-Type": "text/event-stream"},
+            )
+        )
+    )
+    with mock.patch.object(ai_base, "_make_retry_decorator", _fast_retry):
+        with pytest.raises(AiParseError):
+            await _collect(_client=client)
+
+
+
+async def test_stream_malformed_json_body_raises_parse_error():
+    """非流式服务端返回 application/json 但响应体无法解析时，抛 AiParseError 而非 JSONDecodeError。"""
+    client = httpx.AsyncClient(
+        transport=httpx.MockTransport(
+            lambda req: httpx.Response(
+                200, content=b"{not json", headers={"Content-Type": "application/json"}
+            )
+        )
+    )
+    with mock.patch.object(ai_base, "_make_retry_decorator", _fast_retry):
+        with pytest.raises(AiParseError):
+            await _collect(_client=client)
+
+async def test_generate_activity_stream_builds_messages():
+    """generate_activity_stream 使用内置默认提示词并透传增量。"""
+    seen: dict = {}
+
+    def _handler(req):
+        seen["payload"] = json.loads(req.content)
+        return _sse_response(["谈话", "主题"])
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(_handler))
+    deltas = [
+        d
+        async for d in generate_activity_stream(
+            task_type="morning_talk",
+            context={"grade": "小班", "class_name": "一班"},
+            api_base_url="https://api.example.com/v1",
+            api_key="sk-test",
+            _client=client,
+        )
+    ]
+    assert "".join(deltas) == "谈话主题"
+    messages = seen["payload"]["messages"]
+    assert messages[0]["role"] == "system"
+    assert "晨间谈话" in messages[0]["content"]
+
+
+async def test_generate_activity_stream_unknown_task_type():
+    with pytest.raises(AiParseError):
+        async for _ in generate_activity_stream(
+            task_type="unknown",
+            context={},
+            api_base_url="https://api.example.com/v1",
+            api_key="sk-test",
+        ):
+            pass
@@ -0,0 +1,127 @@
+"""tests/test_ai_hedging.py — 多服务商对冲请求与顺序降级测试。"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.core.exceptions import AiCallError
+from app.integration.ai_client import hedging
+from app.integration.ai_client.hedging import (
+    AiProvider,
+    hedge_delay,
+    hedge_stats,
+    hedged_call,
+    record_latency,
+)
+from app.integration.ai_client.telemetry import get_telemetry
+from app.integration.ai_client.vision_base import call_ai_vision
+
+_A = AiProvider("https://a.example.com/v1", "model-a", "sk-a")
+_B = AiProvider("https://b.example.com/v1", "model-b", "sk-b")
+_C = AiProvider("https://c.example.com/v1", "model-c", "sk-c")
+
+
+@pytest.fixture(autouse=True)
+def _short_hedge_delay(monkeypatch):
+    monkeypatch.setattr(hedging.settings, "AI_HEDGE_ENABLED", True)
+    monkeypatch.setattr(hedging.settings, "AI_HEDGE_DELAY_SECONDS", 0.05)
+    monkeypatch.setattr(hedging.settings, "AI_HEDGE_MIN_DELAY_SECONDS", 0.01)
+    monkeypatch.setattr(hedging.settings, "AI_HEDGE_MIN_SAMPLES", 5)
+
+
+def _scripted(delays: dict[str, float], failures: set[str] = frozenset()):
+    """按服务商标识返回延迟后的结果；记录启动与取消。"""
+    started: list[str] = []
+    cancelled: list[str] = []
+
+    async def _call(provider: AiProvider):
+        started.append(provider.model_name)
+        try:
+            await asyncio.sleep(delays.get(provider.model_name, 0))
+        except asyncio.CancelledError:
+            cancelled.append(provider.model_name)
+            raise
+        if provider.model_name in failures:
+            raise AiCallError(f"{provider.model_name} 失败")
+        return provider.model_name
+
+    return _call, started, cancelled
+
+
+async def test_fast_primary_no_hedge():
+    call, started, _ = _scripted({"model-a": 0.0, "model-b": 0.0})
+    assert await hedged_call([_A, _B], call) == "model-a"
+    assert started == ["model-a"]
+    assert hedge_stats()["hedges"] == 0
+    assert hedge_stats()["wins"] == {_A.label: 1}
+
+
+async def test_slow_primary_hedged_and_loser_cancelled():
+    call, started, cancelled = _scripted({"model-a": 1.0, "model-b": 0.0})
+    assert await hedged_call([_A, _B], call) == "model-b"
+    assert started == ["model-a", "model-b"]
+    assert cancelled == ["model-a"]
+    stats = hedge_stats()
+    assert stats["hedges"] == 1
+    assert stats["wins"] == {_B.label: 1}
+
+
+async def test_primary_failure_falls_back_immediately(monkeypatch):
+    monkeypatch.setattr(hedging.settings, "AI_HEDGE_DELAY_SECONDS", 10.0)
+    call, started, _ = _scripted({}, failures={"model-a"})
+    assert await asyncio.wait_for(hedged_call([_A, _B, _C], call), 1.0) == "model-b"
+    assert started == ["model-a", "model-b"]
+    assert hedge_stats()["fallbacks"] == 1
+
+
+async def test_all_fail_raises_primary_error():
+    call, started, _ = _scripted({}, failures={"model-a", "model-b"})
+    with pytest.raises(AiCallError, match="model-a"):
+        await hedged_call([_A, _B], call)
+    assert started == ["model-a", "model-b"]
+
+
+async def test_hedging_disabled_waits_for_primary(monkeypatch):
+    monkeypatch.setattr(hedging.settings, "AI_HEDGE_ENABLED", False)
+    call, started, _ = _scripted({"model-a": 0.1})
+    assert await hedged_call([_A, _B], call) == "model-a"
+    assert started == ["model-a"]
+
+
+def test_hedge_delay_uses_observed_percentile(monkeypatch):
+    monkeypatch.setattr(hedging.settings, "AI_HEDGE_PERCENTILE", 80.0)
+    assert hedge_delay(_A) == 0.05  # 样本不足：固定延迟
+    for seconds in (0.1, 0.2, 0.3, 0.4, 5.0):
+        record_latency(_A.label, seconds)
+    assert hedge_delay(_A) == 0.4
+
+
+def test_provider_repr_hides_key():
+    assert "sk-a" not in repr(_A)
+
+
+async def test_call_ai_vision_hedges_across_hosts():
+    """主服务商卡住时由备用服务商返回，请求体带各自的模型名与 Key。"""
+    seen: list[tuple[str, str, str]] = []
+
+    async def _handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        seen.append((request.url.host, body["model"], request.headers["Authorization"]))
+        if request.url.host == "a.example.com":
+            await asyncio.sleep(1.0)
+        content = json.dumps({"host": request.url.host})
+        return httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(_handler))
+    messages = [{"role": "user", "content": [{"type": "text", "text": "t"}]}]
+    result = await call_ai_vision(
+        messages, _A.api_base_url, _A.api_key, _A.model_name, fallbacks=[_B], _client=client
+    )
+
+    assert result == {"host": "b.example.com"}
+    assert ("b.example.com", "model-b", "Bearer sk-b") in seen
+    assert hedge_stats()["wins"] == {_B.label: 1}
+    outcomes = {r["api_host"]: r["outcome"] for r in get_telemetry().drain()}
+    assert outcomes == {"a.example.com": "cancelled", "b.example.com": "ok"}
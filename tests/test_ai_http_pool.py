@@ -0,0 +1,99 @@
+"""tests/test_ai_http_pool.py — AI 共享连接池测试。"""
+
+import json
+
+import httpx
+import pytest
+
+from app.integration.ai_client import base as ai_base
+from app.integration.ai_client import http_pool
+from app.integration.ai_client.http_pool import close_all_clients, get_http_client
+
+
+@pytest.fixture(autouse=True)
+async def _reset_pool():
+    await close_all_clients()
+    yield
+    await close_all_clients()
+
+
+async def test_same_base_url_reuses_client():
+    """同一 base_url（忽略尾部斜杠 / host 大小写）返回同一客户端。"""
+    c1 = get_http_client("https://api.example.com/v1")
+    c2 = get_http_client("https://API.example.com/v1/")
+    assert c1 is c2
+
+
+async def test_different_base_url_gets_separate_client():
+    c1 = get_http_client("https://api.example.com/v1")
+    c2 = get_http_client("https://other.example.com/v1")
+    assert c1 is not c2
+
+
+async def test_named_pools_are_separate():
+    ai = get_http_client("https://s3.example.com")
+    storage = get_http_client("https://s3.example.com", pool=http_pool.STORAGE_POOL)
+    assert ai is not storage
+    assert get_http_client("https://s3.example.com", pool=http_pool.STORAGE_POOL) is storage
+    await close_all_clients()
+    assert ai.is_closed and storage.is_closed
+
+
+async def test_close_all_clients_closes_and_recreates():
+    c1 = get_http_client("https://api.example.com/v1")
+    await close_all_clients()
+    assert c1.is_closed
+    c2 = get_http_client("https://api.example.com/v1")
+    assert c2 is not c1
+    assert not c2.is_closed
+
+
+async def test_pool_limits_from_settings(monkeypatch):
+    monkeypatch.setattr(http_pool.settings, "AI_POOL_MAX_CONNECTIONS", 3)
+    monkeypatch.setattr(http_pool.settings, "AI_POOL_MAX_KEEPALIVE", 2)
+    client = get_http_client("https://api.example.com/v1")
+    pool = client._transport._pool
+    assert pool._max_connections == 3
+    assert pool._max_keepalive_connections == 2
+
+
+async def test_http2_without_h2_falls_back(monkeypatch):
+    """开启 AI_HTTP2 但缺少 h2 时降级 HTTP/1.1，不抛异常。"""
+    import builtins
+
+    real_import = builtins.__import__
+
+    def _fake_import(name, *args, **kwargs):
+        if name == "h2":
+            raise ImportError("no h2")
+        return real_import(name, *args, **kwargs)
+
+    monkeypatch.setattr(http_pool.settings, "AI_HTTP2", True)
+    monkeypatch.setattr(builtins, "__import__", _fake_import)
+    assert http_pool._http2_enabled() is False
+    assert get_http_client("https://api.example.com/v1") is not None
+
+
+async def test_call_ai_uses_shared_client(monkeypatch):
+    """未传 _client 时 call_ai 走共享连接池。"""
+    body = {"choices": [{"message": {"content": json.dumps({"ok": 1})}}]}
+    shared = httpx.AsyncClient(
+        transport=httpx.MockTransport(lambda req: httpx.Response(200, json=body))
+    )
+    requested: list[str] = []
+
+    def _fake_get(api_base_url):
+        requested.append(api_base_url)
+        return shared
+
+    monkeypatch.setattr(ai_base, "get_http_client", _fake_get)
+    for i in range(2):
+        result = await ai_base.call_ai(
+            messages=[{"role": "user", "content": f"t{i}"}],
+            api_base_url="https://api.example.com/v1",
+            api_key="sk-test",
+        )
+        assert result == {"ok": 1}
+    assert requested == ["https://api.example.com/v1"] * 2
+    assert not shared.is_closed
+    await shared.aclose()
@@ -0,0 +1,121 @@
+"""tests/test_ai_json_repair.py — AI 结构化输出本地修复与「修复此 JSON」追问测试。"""
+
+import json
+
+import httpx
+import pytest
+
+from app.core.exceptions import AiParseError
+from app.integration.ai_client import base
+from app.integration.ai_client.base import call_ai
+from app.integration.ai_client.json_repair import parse_json_object, repair_stats
+from app.integration.ai_client.vision_base import call_ai_vision
+
+_BASE_URL = "https://api.example.com/v1"
+
+
+def _completion(content: str) -> httpx.Response:
+    return httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+
+
+def _scripted_client(contents: list[str]) -> tuple[httpx.AsyncClient, list[dict]]:
+    """依次返回 contents 中的内容，记录每次请求体。"""
+    seen: list[dict] = []
+
+    def _handler(request: httpx.Request) -> httpx.Response:
+        seen.append(json.loads(request.content))
+        return _completion(contents[min(len(seen), len(contents)) - 1])
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(_handler)), seen
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ('{"a": 1}', {"a": 1}),
+        ('```json\n{"a": 1}\n```', {"a": 1}),
+        ('好的，结果如下：\n{"a": {"b": [1, 2]}}\n以上。', {"a": {"b": [1, 2]}}),
+        ('{"a": [1, 2,], "b": 3,}', {"a": [1, 2], "b": 3}),
+        ('{"a": "x,}", "b": "{不配对",}', {"a": "x,}", "b": "{不配对"}),
+        ('﻿{"a": "引号\\"}"}', {"a": '引号"}'}),
+    ],
+)
+def test_parse_json_object_repairs(text, expected):
+    assert parse_json_object(text) == expected
+
+
+@pytest.mark.parametrize("text", ["不是 JSON", "[1, 2]", '{"a": 1', '{"a": tru}', None])
+def test_parse_json_object_rejects(text):
+    with pytest.raises(ValueError):
+        parse_json_object(text)
+
+
+def test_repair_stats_counts_direct_and_repaired():
+    parse_json_object('{"a": 1}')
+    parse_json_object('```json\n{"a": 1}\n```')
+    stats = repair_stats()
+    assert (stats["direct"], stats["repaired"]) == (1, 1)
+    assert stats["repair_rate"] == 0.5
+
+
+async def test_call_ai_repairs_locally_without_extra_request():
+    client, seen = _scripted_client(['```json\n{"活动目标": "数数",}\n```'])
+    result = await call_ai([{"role": "user", "content": "x"}], _BASE_URL, "sk", _client=client)
+    assert result == {"活动目标": "数数"}
+    assert len(seen) == 1
+
+
+async def test_call_ai_reasks_when_local_repair_fails():
+    client, seen = _scripted_client(['{"活动目标": "数数" "活动准备": "积木"}', '{"活动目标": "数数", "活动准备": "积木"}'])
+    result = await call_ai(
+        [{"role": "user", "content": "x"}], _BASE_URL, "sk", model_name="m", _client=client
+    )
+
+    assert result == {"活动目标": "数数", "活动准备": "积木"}
+    assert len(seen) == 2
+    reask = seen[1]
+    assert reask["model"] == "m"
+    assert reask["messages"][1]["content"] == '{"活动目标": "数数" "活动准备": "积木"}'
+    stats = repair_stats()
+    # 同一份内容只计一次：追问响应自身的解析不计入 direct
+    assert (stats["direct"], stats["reasked"], stats["failed"]) == (0, 1, 0)
+    assert stats["repair_rate"] == 1.0
+
+
+async def test_call_ai_reask_failure_raises_original_error():
+    client, seen = _scripted_client(['{"a": 1 "b": 2}', "仍然不是 JSON"])
+    with pytest.raises(AiParseError) as exc_info:
+        await call_ai([{"role": "user", "content": "x"}], _BASE_URL, "sk", _client=client)
+    assert exc_info.value.raw_content == '{"a": 1 "b": 2}'
+    assert len(seen) == 2
+    assert repair_stats()["failed"] == 1
+
+
+async def test_call_ai_plain_text_not_reasked():
+    client, seen = _scripted_client(["抱歉，我无法回答"])
+    with pytest.raises(AiParseError):
+        await call_ai([{"role": "user", "content": "x"}], _BASE_URL, "sk", _client=client)
+    assert len(seen) == 1
+    assert repair_stats()["failed"] == 1
+
+
+async def test_call_ai_reask_disabled(monkeypatch):
+    monkeypatch.setattr(base.settings, "AI_JSON_REASK_ENABLED", False)
+    client, seen = _scripted_client(['{"a": 1 "b": 2}'])
+    with pytest.raises(AiParseError):
+        await call_ai([{"role": "user", "content": "x"}], _BASE_URL, "sk", _client=client)
+    assert len(seen) == 1
+    assert repair_stats()["failed"] == 1
+
+
+async def test_call_ai_vision_repairs_and_reasks_without_images():
+    client, seen = _scripted_client(['描述：{"desc": "积木" "count": 2}', '{"desc": "积木", "count": 2}'])
+    messages = [{"role": "user", "content": [
+        {"type": "text", "text": "t"},
+        {"type": "image_url", "image_url": {"url": "data:image/jpeg;base64,AAAA"}},
+    ]}]
+    result = await call_ai_vision(messages, _BASE_URL, "sk", "vm", _client=client)
+
+    assert result == {"desc": "积木", "count": 2}
+    assert len(seen) == 2
+    assert "image_url" not in json.dumps(seen[1]["messages"])
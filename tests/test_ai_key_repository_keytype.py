@@ -70,3 +70,41 @@ async def test_save_same_key_type_only_deactivates_same_type(async_session):
     assert get_decrypted_key(text_key) == "sk-text-v2"
     # vision 未受影响
     assert vision_key is not None and vision_key.is_active is True
+
+
+@pytest.mark.asyncio
+async def test_fallback_providers_round_trip_encrypted(async_session):
+    """备用服务商列表整体加密入库，读取时按原顺序解密。"""
+    from app.repository.ai_key_repository import get_fallback_providers, save_ai_key
+
+    fallbacks = [
+        {"api_base_url": "https://b.example.com/v1", "model_name": "qwen-vl", "api_key": "sk-b"},
+        {"api_base_url": "https://c.example.com/v1", "model_name": "glm-4v", "api_key": "sk-c"},
+    ]
+    record = await save_ai_key(
+        async_session, 1, 1, API_URL, "sk-vision", "gpt-4o",
+        key_type="vision", fallback_providers=fallbacks,
+    )
+
+    assert "sk-b" not in record.fallback_providers_encrypted
+    assert get_fallback_providers(record) == fallbacks
+
+
+@pytest.mark.asyncio
+async def test_fallback_providers_default_empty(async_session):
+    from app.repository.ai_key_repository import get_fallback_providers, save_ai_key
+
+    record = await save_ai_key(async_session, 1, 1, API_URL, "sk-vision", "gpt-4o", key_type="vision")
+    assert record.fallback_providers_encrypted is None
+    assert get_fallback_providers(record) == []
+
+
+@pytest.mark.asyncio
+async def test_fallback_providers_missing_field_rejected(async_session):
+    from app.repository.ai_key_repository import save_ai_key
+
+    with pytest.raises(ValueError, match="api_key"):
+        await save_ai_key(
+            async_session, 1, 1, API_URL, "sk-vision", "gpt-4o", key_type="vision",
+            fallback_providers=[{"api_base_url": "https://b.example.com/v1", "model_name": "m"}],
+        )
@@ -0,0 +1,226 @@
+"""tests/test_ai_rate_limiter.py — AI 调用限流（令牌桶 + 并发上限 + 服务端限流头）测试。"""
+
+import asyncio
+import json
+import time
+import unittest.mock as mock
+
+import httpx
+import pytest
+from tenacity import retry, stop_after_attempt, wait_none
+
+from app.core.exceptions import AiCallError
+from app.integration.ai_client import base as ai_base
+from app.integration.ai_client import rate_limiter
+from app.integration.ai_client.rate_limiter import (
+    ProviderLimiter,
+    _parse_duration,
+    get_limiter,
+    throttle_delay,
+)
+
+_BASE = "https://api.example.com/v1"
+_OK = {"choices": [{"message": {"content": json.dumps({"ok": 1})}}]}
+
+
+def _fast_retry():
+    return retry(stop=stop_after_attempt(1), wait=wait_none(), reraise=True)
+
+
+def _resp(status: int, headers: dict | None = None) -> httpx.Response:
+    return httpx.Response(status, headers=headers or {})
+
+
+# ── 响应头解析 ────────────────────────────────────────────────────────────────
+
+
+@pytest.mark.parametrize(
+    "raw, expected",
+    [("2", 2.0), ("0.5", 0.5), ("1s", 1.0), ("20ms", 0.02), ("6m0s", 360.0), ("1m30.5s", 90.5)],
+)
+def test_parse_duration(raw, expected):
+    assert _parse_duration(raw) == pytest.approx(expected)
+
+
+def test_parse_duration_invalid():
+    assert _parse_duration("soon") is None
+    assert _parse_duration("") is None
+
+
+def test_throttle_delay_prefers_retry_after_on_429():
+    resp = _resp(429, {"Retry-After": "3", "x-ratelimit-reset-requests": "10s"})
+    assert throttle_delay(resp) == 3.0
+
+
+def test_throttle_delay_429_uses_reset_then_default():
+    assert throttle_delay(_resp(429, {"x-ratelimit-reset-requests": "2s"})) == 2.0
+    assert throttle_delay(_resp(429)) == rate_limiter._DEFAULT_THROTTLE_SECONDS
+
+
+def test_throttle_delay_remaining_zero_pauses():
+    headers = {"x-ratelimit-remaining-requests": "0", "x-ratelimit-reset-requests": "500ms"}
+    assert throttle_delay(_resp(200, headers)) == pytest.approx(0.5)
+    headers["x-ratelimit-remaining-requests"] = "12"
+    assert throttle_delay(_resp(200, headers)) is None
+
+
+# ── ProviderLimiter ───────────────────────────────────────────────────────────
+
+
+async def test_concurrency_cap_and_fifo_order():
+    limiter = ProviderLimiter(concurrency=2, rate=0, burst=1)
+    peak = 0
+    order: list[int] = []
+
+    async def _job(i: int) -> None:
+        nonlocal peak
+        async with limiter.slot():
+            order.append(i)
+            peak = max(peak, limiter.in_flight)
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*[_job(i) for i in range(8)])
+    assert peak == 2
+    assert order == list(range(8))
+
+
+async def test_token_bucket_paces_requests():
+    limiter = ProviderLimiter(concurrency=10, rate=50, burst=2)
+    start = time.monotonic()
+    for _ in range(6):
+        async with limiter.slot():
+            pass
+    # 突发 2 个后其余 4 个按 50/s 放行，至少约 80ms
+    assert time.monotonic() - start >= 0.07
+
+
+async def test_observe_pauses_all_waiters(monkeypatch):
+    monkeypatch.setattr(rate_limiter.settings, "AI_RATE_LIMIT_MAX_WAIT_SECONDS", 0.1)
+    limiter = ProviderLimiter(concurrency=4, rate=0, burst=1)
+    assert limiter.observe(_resp(429, {"Retry-After": "30"})) == 0.1
+    start = time.monotonic()
+    async with limiter.slot():
+        pass
+    assert time.monotonic() - start >= 0.09
+    assert limiter.throttled == 1
+
+
+async def test_get_limiter_shared_per_provider_and_key():
+    assert get_limiter(_BASE, "sk-a") is get_limiter(_BASE + "/", "sk-a")
+    assert get_limiter(_BASE, "sk-a") is not get_limiter(_BASE, "sk-b")
+
+
+# ── 与 call_ai 集成 ───────────────────────────────────────────────────────────
+
+
+async def test_call_ai_requeues_after_429_instead_of_failing():
+    calls = 0
+
+    def _handler(req):
+        nonlocal calls
+        calls += 1
+        if calls < 3:
+            return httpx.Response(429, headers={"Retry-After": "0.01"})
+        return httpx.Response(200, json=_OK)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(_handler))
+    with mock.patch.object(ai_base, "_make_retry_decorator", _fast_retry):
+        result = await ai_base.call_ai(
+            [{"role": "user", "content": "x"}], _BASE, "sk", _client=client
+        )
+    assert result == {"ok": 1}
+    assert calls == 3
+
+
+async def test_call_ai_requeue_exhausted_raises(monkeypatch):
+    monkeypatch.setattr(rate_limiter.settings, "AI_RATE_LIMIT_MAX_REQUEUE", 1)
+    client = httpx.AsyncClient(
+        transport=httpx.MockTransport(
+            lambda req: httpx.Response(
+                429, headers={"Retry-After": "0"}, json={"error": {"message": "slow down"}}
+            )
+        )
+    )
+    with mock.patch.object(ai_base, "_make_retry_decorator", _fast_retry):
+        with pytest.raises(AiCallError, match="429"):
+            await ai_base.call_ai(
+                [{"role": "user", "content": "x"}], _BASE, "sk", _client=client
+            )
+
+
+async def test_call_ai_final_429_not_retried_again(monkeypatch):
+    """开启限流时 429 只由限流器重新排队；用尽后重试策略不再重试。"""
+    monkeypatch.setattr(rate_limiter.settings, "AI_RATE_LIMIT_MAX_REQUEUE", 1)
+    monkeypatch.setattr(rate_limiter.settings, "AI_RETRY_MAX_ATTEMPTS", 3)
+    calls = 0
+
+    def _handler(req):
+        nonlocal calls
+        calls += 1
+        return httpx.Response(429, headers={"Retry-After": "0"})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(_handler))
+    with pytest.raises(AiCallError) as excinfo:
+        await ai_base.call_ai([{"role": "user", "content": "x"}], _BASE, "sk", _client=client)
+    assert calls == 2
+    assert excinfo.value.retryable is False
+
+
+async def test_requeue_wait_bounded_by_retry_deadline(monkeypatch):
+    """Retry-After 超过剩余总时限时不再排队等待，立即以 429 失败。"""
+    monkeypatch.setattr(rate_limiter.settings, "AI_RETRY_DEADLINE_SECONDS", 0.5)
+    calls = 0
+
+    def _handler(req):
+        nonlocal calls
+        calls += 1
+        return httpx.Response(429, headers={"Retry-After": "30"})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(_handler))
+    started = time.monotonic()
+    with pytest.raises(AiCallError, match="429"):
+        await ai_base.call_ai([{"role": "user", "content": "x"}], _BASE, "sk", _client=client)
+    assert calls == 1
+    assert time.monotonic() - started < 1.0
+
+
+async def test_disabled_limiter_sends_directly(monkeypatch):
+    monkeypatch.setattr(rate_limiter.settings, "AI_RATE_LIMIT_ENABLED", False)
+    calls = 0
+
+    def _handler(req):
+        nonlocal calls
+        calls += 1
+        return httpx.Response(429, headers={"Retry-After": "0"})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(_handler))
+    with mock.patch.object(ai_base, "_make_retry_decorator", _fast_retry):
+        with pytest.raises(AiCallError) as excinfo:
+            await ai_base.call_ai(
+                [{"role": "user", "content": "x"}], _BASE, "sk", _client=client
+            )
+    assert calls == 1
+    # 限流关闭时 429 交由重试策略处理
+    assert excinfo.value.retryable is True
+
+
+async def test_stream_holds_slot_until_closed():
+    body = (
+        'data: {"choices":[{"delta":{"content":"a"}}]}\n\n'
+        'data: {"choices":[{"delta":{"content":"b"}}]}\n\ndata: [DONE]\n\n'
+    )
+    client = httpx.AsyncClient(
+        transport=httpx.MockTransport(
+            lambda req: httpx.Response(
+                200, content=body.encode(), headers={"Content-Type": "text/event-stream"}
+            )
+        )
+    )
+    limiter = get_limiter(_BASE, "sk")
+    seen: list[int] = []
+    async for _ in ai_base.call_ai_text_stream(
+        [{"role": "user", "content": "x"}], _BASE, "sk", _client=client
+    ):
+        seen.append(limiter.in_flight)
+    assert seen == [1, 1]
+    assert limiter.in_flight == 0
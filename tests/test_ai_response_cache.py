@@ -0,0 +1,177 @@
+"""tests/test_ai_response_cache.py — AI 响应缓存（LRU + TTL + 持久层）测试。"""
+
+import json
+import sqlite3
+import time
+
+import httpx
+import pytest
+
+from app.core.exceptions import AiParseError
+from app.integration.ai_client import response_cache
+from app.integration.ai_client.base import call_ai, call_ai_text, call_ai_text_stream
+from app.integration.ai_client.response_cache import (
+    AiResponseCache,
+    cache_enabled_for,
+    get_response_cache,
+    make_cache_key,
+)
+
+_BASE = "https://api.example.com/v1"
+_MESSAGES = [{"role": "system", "content": "sys"}, {"role": "user", "content": "hi"}]
+
+
+def _counting_client(content: str) -> tuple[httpx.AsyncClient, list]:
+    calls: list = []
+
+    def _handler(req: httpx.Request) -> httpx.Response:
+        calls.append(json.loads(req.content))
+        return httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(_handler)), calls
+
+
+# ── make_cache_key ────────────────────────────────────────────────────────────
+
+
+def test_cache_key_varies_with_inputs():
+    base = make_cache_key("json", _BASE, "sk-a", "m", _MESSAGES)
+    assert base == make_cache_key("json", _BASE + "/", "sk-a", "m", _MESSAGES)
+    assert base != make_cache_key("text", _BASE, "sk-a", "m", _MESSAGES)
+    assert base != make_cache_key("json", _BASE, "sk-b", "m", _MESSAGES)
+    assert base != make_cache_key("json", _BASE, "sk-a", "m2", _MESSAGES)
+    changed_prompt = [{"role": "system", "content": "sys v2"}, _MESSAGES[1]]
+    assert base != make_cache_key("json", _BASE, "sk-a", "m", changed_prompt)
+
+
+# ── AiResponseCache ───────────────────────────────────────────────────────────
+
+
+async def test_hit_miss_and_copy_isolation():
+    cache = AiResponseCache()
+    assert await cache.get("k") is None
+    await cache.set("k", {"a": [1]})
+    got = await cache.get("k")
+    got["a"].append(2)
+    assert await cache.get("k") == {"a": [1]}
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["stores"]) == (2, 1, 1)
+
+
+async def test_ttl_expiry(monkeypatch):
+    cache = AiResponseCache(ttl_seconds=10)
+    now = time.time()
+    monkeypatch.setattr(response_cache.time, "time", lambda: now)
+    await cache.set("k", "v")
+    monkeypatch.setattr(response_cache.time, "time", lambda: now + 11)
+    assert await cache.get("k") is None
+    assert cache.stats()["size"] == 0
+
+
+async def test_lru_eviction():
+    cache = AiResponseCache(max_entries=2)
+    await cache.set("a", 1)
+    await cache.set("b", 2)
+    await cache.get("a")  # a 变为最近使用
+    await cache.set("c", 3)
+    assert await cache.get("b") is None
+    assert await cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+
+async def test_persistent_tier_survives_new_instance(tmp_path):
+    path = tmp_path / "cache.db"
+    first = AiResponseCache(persist_path=path)
+    await first.set("k", {"x": "值"})
+    first.close()
+
+    second = AiResponseCache(persist_path=path)
+    assert await second.get("k") == {"x": "值"}
+    assert second.stats()["disk_hits"] == 1
+    assert await second.get("k") == {"x": "值"}
+    assert second.stats()["hits"] == 1
+    second.close()
+
+
+async def test_persistent_tier_encrypted_at_rest(tmp_path):
+    path = tmp_path / "cache.db"
+    cache = AiResponseCache(persist_path=path)
+    await cache.set("k", {"evaluation": "张三能主动分享玩具"})
+    cache.close()
+
+    db = sqlite3.connect(str(path))
+    stored = db.execute("SELECT value FROM ai_response_cache").fetchone()[0]
+    assert "张三" not in stored and "evaluation" not in stored
+    # 无法解密的条目（密钥变更 / 早期明文）视为未命中
+    db.execute("UPDATE ai_response_cache SET value = ?", (json.dumps({"x": 1}),))
+    db.commit()
+    db.close()
+    reopened = AiResponseCache(persist_path=path)
+    assert await reopened.get("k") is None
+    reopened.close()
+
+
+def test_generative_tasks_without_regenerate_excluded_by_default():
+    """没有「重新生成」入口的页面任务默认不缓存；每日计划任务（可 refresh）仍缓存。"""
+    for task in ("split", "adapt", "game_observation", "one_on_one_listening",
+                 "homemade_teaching", "course_review_activity"):
+        assert not cache_enabled_for(task)
+    assert cache_enabled_for("morning_talk")
+
+
+def test_cache_enabled_for(monkeypatch):
+    monkeypatch.setattr(response_cache.settings, "AI_CACHE_EXCLUDE_TASKS", "split, adapt")
+    assert cache_enabled_for("morning_talk")
+    assert not cache_enabled_for("adapt")
+    monkeypatch.setattr(response_cache.settings, "AI_CACHE_ENABLED", False)
+    assert not cache_enabled_for("morning_talk")
+
+
+# ── 与 call_ai / call_ai_text 集成 ───────────────────────────────────────────
+
+
+async def test_call_ai_second_call_served_from_cache():
+    client, calls = _counting_client(json.dumps({"ok": 1}))
+    for _ in range(2):
+        result = await call_ai(_MESSAGES, _BASE, "sk-test", _client=client)
+        assert result == {"ok": 1}
+    assert len(calls) == 1
+    assert get_response_cache().stats()["hits"] == 1
+
+
+async def test_call_ai_refresh_bypasses_and_overwrites():
+    client, calls = _counting_client(json.dumps({"ok": 1}))
+    await call_ai(_MESSAGES, _BASE, "sk-test", _client=client)
+    await call_ai(_MESSAGES, _BASE, "sk-test", refresh=True, _client=client)
+    assert len(calls) == 2
+    await call_ai(_MESSAGES, _BASE, "sk-test", _client=client)
+    assert len(calls) == 2
+
+
+async def test_call_ai_excluded_task_not_cached(monkeypatch):
+    monkeypatch.setattr(response_cache.settings, "AI_CACHE_EXCLUDE_TASKS", "split")
+    client, calls = _counting_client(json.dumps({"ok": 1}))
+    for _ in range(2):
+        await call_ai(_MESSAGES, _BASE, "sk-test", task_type="split", _client=client)
+    assert len(calls) == 2
+
+
+async def test_call_ai_validate_failure_not_cached():
+    client, calls = _counting_client(json.dumps({"ok": 1}))
+
+    def _reject(result: dict) -> None:
+        raise AiParseError("缺少字段")
+
+    with pytest.raises(AiParseError):
+        await call_ai(_MESSAGES, _BASE, "sk-test", validate=_reject, _client=client)
+    await call_ai(_MESSAGES, _BASE, "sk-test", _client=client)
+    assert len(calls) == 2
+
+
+async def test_stream_hit_after_text_call():
+    """流式与非流式文本调用共用缓存键；命中时一次性产出完整文本。"""
+    client, calls = _counting_client("  完整文本 ")
+    assert await call_ai_text(_MESSAGES, _BASE, "sk-test", _client=client) == "完整文本"
+    deltas = [d async for d in call_ai_text_stream(_MESSAGES, _BASE, "sk-test", _client=client)]
+    assert deltas == ["完整文本"]
+    assert len(calls) == 1
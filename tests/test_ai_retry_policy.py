@@ -0,0 +1,173 @@
+"""tests/test_ai_retry_policy.py — AI 调用错误分类 / 抖动退避 / 总时限测试。
+
+不替换 _make_retry_decorator，直接验证生产重试策略；退避上限置 0 以免实际等待。
+"""
+
+import json
+
+import httpx
+import pytest
+
+from app.core.exceptions import AiCallError, AiParseError
+from app.integration.ai_client import retry_policy
+from app.integration.ai_client.base import call_ai, call_ai_text
+from app.integration.ai_client.retry_policy import (
+    RetryTracker,
+    http_status_error,
+    is_retryable_status,
+    transport_error,
+)
+from app.integration.ai_client.vision_base import call_ai_vision
+
+_BASE = "https://api.example.com/v1"
+_MESSAGES = [{"role": "user", "content": "test"}]
+
+
+@pytest.fixture(autouse=True)
+def _no_backoff(monkeypatch):
+    monkeypatch.setattr(retry_policy.settings, "AI_RETRY_BACKOFF_MAX", 0)
+
+
+def _ok(content: str = '{"ok": 1}') -> httpx.Response:
+    return httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+
+
+def _counting(responses: list) -> tuple[httpx.AsyncClient, list]:
+    """依次返回 responses 中的响应（或抛出其中的异常），记录调用次数。"""
+    calls: list = []
+
+    def _handler(req):
+        item = responses[min(len(calls), len(responses) - 1)]
+        calls.append(req)
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(_handler)), calls
+
+
+# ── 分类 ──────────────────────────────────────────────────────────────────────
+
+
+@pytest.mark.parametrize(
+    "status, expected",
+    [(400, False), (401, False), (403, False), (404, False), (408, True), (429, True),
+     (500, True), (502, True), (503, True)],
+)
+def test_is_retryable_status(status, expected):
+    assert is_retryable_status(status) is expected
+    if status != 429:
+        assert http_status_error(status, "x").retryable is expected
+
+
+def test_429_retried_by_policy_only_when_rate_limit_disabled(monkeypatch):
+    """开启限流时 429 由限流器重新排队，最终的 429 不再标记为可重试。"""
+    monkeypatch.setattr(retry_policy.settings, "AI_RATE_LIMIT_ENABLED", True)
+    assert http_status_error(429, "x").retryable is False
+    monkeypatch.setattr(retry_policy.settings, "AI_RATE_LIMIT_ENABLED", False)
+    assert http_status_error(429, "x").retryable is True
+
+
+def test_transport_error_classification():
+    req = httpx.Request("POST", _BASE)
+    assert transport_error(httpx.ReadTimeout("t", request=req)).retryable
+    assert transport_error(httpx.ConnectError("reset", request=req)).retryable
+    assert transport_error(httpx.RemoteProtocolError("eof", request=req)).retryable
+    assert not transport_error(httpx.UnsupportedProtocol("ftp", request=req)).retryable
+
+
+def test_attempt_timeout_bounded_by_deadline(monkeypatch):
+    monkeypatch.setattr(retry_policy.settings, "AI_REQUEST_TIMEOUT_SECONDS", 60.0)
+    monkeypatch.setattr(retry_policy.settings, "AI_RETRY_DEADLINE_SECONDS", 30.0)
+    tracker = RetryTracker()
+    tracker.begin_attempt()
+    assert tracker.attempt_timeout() <= 30.0
+    # 最后一次请求也不越过总时限
+    tracker.begin_attempt()
+    tracker.started -= 25.0
+    assert tracker.attempt_timeout() <= 5.0
+    # 重试时剩余时间不足一次请求：不再发起
+    tracker.started -= 4.0
+    with pytest.raises(AiCallError) as exc_info:
+        tracker.attempt_timeout()
+    assert not exc_info.value.retryable
+    # 首次请求：总时限已过时同样不发起
+    first = RetryTracker()
+    first.begin_attempt()
+    first.started -= 31.0
+    with pytest.raises(AiCallError):
+        first.attempt_timeout()
+
+
+# ── call_ai / call_ai_text / call_ai_vision ──────────────────────────────────
+
+
+async def test_401_fails_fast_without_retry():
+    client, calls = _counting([httpx.Response(401, json={"error": {"message": "bad key"}})])
+    with pytest.raises(AiCallError) as exc_info:
+        await call_ai(_MESSAGES, _BASE, "sk-test", _client=client)
+    assert len(calls) == 1
+    assert exc_info.value.attempts == 1
+    assert "已尝试 1 次" in exc_info.value.message
+
+
+async def test_5xx_retried_then_reports_attempts():
+    client, calls = _counting([httpx.Response(503)])
+    with pytest.raises(AiCallError) as exc_info:
+        await call_ai(_MESSAGES, _BASE, "sk-test", _client=client)
+    assert len(calls) == 3
+    assert exc_info.value.attempts == 3
+    assert exc_info.value.elapsed >= 0
+    assert "已尝试 3 次" in exc_info.value.message
+
+
+async def test_timeout_then_success():
+    req = httpx.Request("POST", _BASE)
+    client, calls = _counting([httpx.ReadTimeout("slow", request=req), _ok()])
+    assert await call_ai(_MESSAGES, _BASE, "sk-test", _client=client) == {"ok": 1}
+    assert len(calls) == 2
+
+
+async def test_connection_reset_retried_for_text():
+    req = httpx.Request("POST", _BASE)
+    client, calls = _counting([httpx.ConnectError("reset", request=req), _ok("文本")])
+    assert await call_ai_text(_MESSAGES, _BASE, "sk-test", _client=client) == "文本"
+    assert len(calls) == 2
+
+
+async def test_parse_error_not_retried():
+    client, calls = _counting([_ok("不是 JSON")])
+    with pytest.raises(AiParseError) as exc_info:
+        await call_ai(_MESSAGES, _BASE, "sk-test", _client=client)
+    assert len(calls) == 1
+    assert exc_info.value.attempts == 1
+
+
+async def test_deadline_stops_retrying(monkeypatch):
+    """下一次退避会越过总时限时停止重试。"""
+    monkeypatch.setattr(retry_policy.settings, "AI_RETRY_BACKOFF_MAX", 5)
+    monkeypatch.setattr(retry_policy.settings, "AI_RETRY_DEADLINE_SECONDS", 0.5)
+    monkeypatch.setattr(retry_policy.settings, "AI_RETRY_MAX_ATTEMPTS", 10)
+    monkeypatch.setattr(
+        retry_policy, "wait_random_exponential", lambda **kw: (lambda state: 1.0)
+    )
+    client, calls = _counting([httpx.Response(500)])
+    with pytest.raises(AiCallError):
+        await call_ai(_MESSAGES, _BASE, "sk-test", _client=client)
+    assert len(calls) == 1
+
+
+async def test_vision_401_fails_fast():
+    client, calls = _counting([httpx.Response(401, json={"error": {"message": "bad key"}})])
+    messages = [{"role": "user", "content": [{"type": "text", "text": "t"}]}]
+    with pytest.raises(AiCallError) as exc_info:
+        await call_ai_vision(messages, _BASE, "sk-test", _client=client)
+    assert len(calls) == 1
+    assert exc_info.value.status_code == 401
+
+
+async def test_vision_502_retried():
+    client, calls = _counting([httpx.Response(502), _ok(json.dumps({"a": 1}))])
+    messages = [{"role": "user", "content": [{"type": "text", "text": "t"}]}]
+    assert await call_ai_vision(messages, _BASE, "sk-test", _client=client) == {"a": 1}
+    assert len(calls) == 2
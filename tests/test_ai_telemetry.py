@@ -0,0 +1,198 @@
+"""tests/test_ai_telemetry.py — AI 调用遥测记录与批量写库测试。"""
+
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+
+from app.core.exceptions import AiCallError
+from app.integration.ai_client import retry_policy, telemetry
+from app.integration.ai_client.base import call_ai, call_ai_text, call_ai_text_stream
+from app.integration.ai_client.telemetry import (
+    ai_call_tenant,
+    get_telemetry,
+    start_telemetry,
+    stop_telemetry,
+)
+from app.repository.ai_call_log_repository import add_ai_call_logs, summarize_call_latency
+from app.service.ai_telemetry_service import merge_cached_counts
+
+_BASE = "https://api.example.com/v1"
+_MESSAGES = [{"role": "user", "content": "test"}]
+
+
+@pytest.fixture(autouse=True)
+def _no_backoff(monkeypatch):
+    monkeypatch.setattr(retry_policy.settings, "AI_RETRY_BACKOFF_MAX", 0)
+
+
+def _client(handler) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def _rows() -> list[dict]:
+    return get_telemetry().drain()
+
+
+async def test_call_ai_records_usage_status_and_bytes():
+    def _handler(req):
+        return httpx.Response(200, json={
+            "choices": [{"message": {"content": '{"ok": 1}'}}],
+            "usage": {"prompt_tokens": 12, "completion_tokens": 3, "total_tokens": 15},
+        })
+
+    await call_ai(_MESSAGES, _BASE, "sk-test", "gpt-x", task_type="split", _client=_client(_handler))
+
+    [row] = _rows()
+    assert row["outcome"] == "ok"
+    assert row["task_type"] == "split"
+    assert row["kind"] == "json"
+    assert row["model_name"] == "gpt-x"
+    assert row["api_host"] == "api.example.com"
+    assert row["status_code"] == 200
+    assert row["attempts"] == 1
+    assert (row["prompt_tokens"], row["completion_tokens"]) == (12, 3)
+    assert row["request_bytes"] > 0 and row["response_bytes"] > 0
+    assert "sk-test" not in json.dumps(row, default=str)
+
+
+async def test_tenant_tagged_from_context():
+    def _handler(req):
+        return httpx.Response(200, json={"choices": [{"message": {"content": "文本"}}]})
+
+    await call_ai_text(_MESSAGES, _BASE, "sk-test", _client=_client(_handler))
+    with ai_call_tenant(7):
+        await call_ai_text(_MESSAGES, _BASE, "sk-other", _client=_client(_handler))
+
+    assert [r["tenant_id"] for r in _rows()] == [None, 7]
+
+
+async def test_failed_call_records_attempts_and_status():
+    with pytest.raises(AiCallError):
+        await call_ai(_MESSAGES, _BASE, "sk-test", _client=_client(lambda req: httpx.Response(503)))
+
+    [row] = _rows()
+    assert row["outcome"] == "AiCallError"
+    assert row["status_code"] == 503
+    assert row["attempts"] == 3
+    assert row["prompt_tokens"] is None
+
+
+async def test_cache_hit_recorded_as_cached():
+    def _handler(req):
+        return httpx.Response(200, json={"choices": [{"message": {"content": "文本"}}]})
+
+    client = _client(_handler)
+    await call_ai_text(_MESSAGES, _BASE, "sk-test", _client=client)
+    await call_ai_text(_MESSAGES, _BASE, "sk-test", _client=client)
+
+    assert [r["outcome"] for r in _rows()] == ["ok", "cached"]
+
+
+async def test_stream_records_usage_from_final_chunk():
+    sse = (
+        'data: {"choices": [{"delta": {"content": "你好"}}]}\n\n'
+        'data: {"choices": [], "usage": {"prompt_tokens": 7, "completion_tokens": 2}}\n\n'
+        "data: [DONE]\n\n"
+    )
+
+    def _handler(req):
+        return httpx.Response(200, text=sse, headers={"content-type": "text/event-stream"})
+
+    payloads = []
+
+    def _capture(req):
+        payloads.append(json.loads(req.content))
+        return _handler(req)
+
+    parts = [d async for d in call_ai_text_stream(_MESSAGES, _BASE, "sk-test", _client=_client(_capture))]
+
+    assert "".join(parts) == "你好"
+    assert payloads[0]["stream_options"] == {"include_usage": True}
+    [row] = _rows()
+    assert row["kind"] == "stream"
+    assert row["outcome"] == "ok"
+    assert (row["prompt_tokens"], row["completion_tokens"]) == (7, 2)
+    assert row["response_bytes"] == len(sse.encode())
+
+
+def test_disabled_records_nothing(monkeypatch):
+    monkeypatch.setattr(telemetry.settings, "AI_TELEMETRY_ENABLED", False)
+    get_telemetry().record({"outcome": "ok"})
+    assert get_telemetry().pending == 0
+
+
+def test_buffer_overflow_drops_oldest(monkeypatch):
+    monkeypatch.setattr(telemetry.settings, "AI_TELEMETRY_MAX_BUFFER", 2)
+    buf = get_telemetry()
+    for i in range(3):
+        buf.record({"i": i})
+    assert [r["i"] for r in buf.drain()] == [1, 2]
+    assert buf.dropped == 1
+
+
+async def test_batch_written_when_full_and_on_stop(monkeypatch):
+    monkeypatch.setattr(telemetry.settings, "AI_TELEMETRY_BATCH_SIZE", 3)
+    monkeypatch.setattr(telemetry.settings, "AI_TELEMETRY_FLUSH_SECONDS", 60)
+    batches: list[list[dict]] = []
+
+    async def _writer(rows):
+        batches.append(rows)
+
+    start_telemetry(_writer)
+    buf = get_telemetry()
+    for i in range(4):
+        buf.record({"i": i})
+    await asyncio.sleep(0.01)
+    assert [len(b) for b in batches] == [4]
+
+    buf.record({"i": 4})
+    await stop_telemetry()
+    assert [len(b) for b in batches] == [4, 1]
+    assert buf.stats()["written"] == 5
+
+
+async def test_writer_failure_drops_batch():
+    async def _writer(rows):
+        raise RuntimeError("db down")
+
+    start_telemetry(_writer)
+    buf = get_telemetry()
+    buf.record({"i": 0})
+    await stop_telemetry()
+    assert buf.stats()["dropped"] == 1
+    assert buf.pending == 0
+
+
+async def test_latency_percentiles_computed_in_sql(async_session):
+    now = datetime.now(timezone.utc)
+    base = {
+        "created_at": now, "tenant_id": 1, "task_type": "split", "kind": "json", "model_name": "m",
+        "api_host": "h", "status_code": 200, "attempts": 1, "request_bytes": 0, "response_bytes": 0,
+    }
+    rows = [{**base, "outcome": "ok", "duration_ms": ms} for ms in range(100, 0, -1)]
+    rows.append({**base, "outcome": "AiCallError", "duration_ms": 5000})
+    rows.append({**base, "outcome": "cached", "duration_ms": 0})
+    rows.append({**base, "task_type": "adapt", "outcome": "ok", "duration_ms": 42})
+    # 其他租户、窗口之外的记录不计入
+    rows.append({**base, "tenant_id": 2, "outcome": "ok", "duration_ms": 9999})
+    rows.append({**base, "tenant_id": None, "outcome": "ok", "duration_ms": 9999})
+    rows.append({**base, "created_at": now - timedelta(days=3), "outcome": "ok", "duration_ms": 9999})
+    await add_ai_call_logs(async_session, rows)
+    await async_session.commit()
+
+    summary = await summarize_call_latency(async_session, 1, now - timedelta(days=1))
+
+    assert summary == [
+        {"task_type": "adapt", "calls": 1, "errors": 0, "p50_ms": 42, "p95_ms": 42, "p99_ms": 42},
+        {"task_type": "split", "calls": 101, "errors": 1, "p50_ms": 51, "p95_ms": 96, "p99_ms": 100},
+    ]
+
+
+def test_merge_cached_counts():
+    latency = [{"task_type": "split", "calls": 2, "errors": 0, "p50_ms": 1, "p95_ms": 2, "p99_ms": 2}]
+    merged = merge_cached_counts(latency, {"split": 3, "adapt": 1})
+    assert [(t["task_type"], t["calls"], t["cached"]) for t in merged] == [("adapt", 0, 1), ("split", 2, 3)]
+    assert merged[0]["p50_ms"] is None
@@ -251,3 +251,77 @@ class TestSignature:
             },
         )
         assert resp.status_code == 401
+
+
+class TestAiCacheStats:
+    async def test_requires_auth(self, api_client):
+        resp = await api_client.get("/api/v1/ai/cache-stats")
+        assert resp.status_code == 401
+
+    async def test_returns_counters(self, api_client):
+        from app.integration.ai_client.response_cache import get_response_cache
+        from app.integration.ai_client.telemetry import ai_call_tenant
+
+        cache = get_response_cache()
+        with ai_call_tenant(TENANT):
+            await cache.set("k", {"a": 1})
+            await cache.get("k")
+            await cache.get("missing")
+        # 其他租户的调用不计入
+        with ai_call_tenant(OTHER_TENANT):
+            await cache.get("k")
+            await cache.get("other-missing")
+        resp = await api_client.get(
+            "/api/v1/ai/cache-stats", headers={"X-Api-Key": API_KEY}
+        )
+        assert resp.status_code == 200
+        body = resp.json()
+        assert body["hits"] == 1
+        assert body["misses"] == 1
+        assert body["stores"] == 1
+        assert body["hit_rate"] == 0.5
+
+
+class TestAiTelemetry:
+    async def test_requires_auth(self, api_client):
+        resp = await api_client.get("/api/v1/ai/telemetry")
+        assert resp.status_code == 401
+
+    async def test_returns_percentiles_and_tokens(self, api_client, async_session):
+        from datetime import datetime, timezone
+
+        from app.repository.ai_call_log_repository import add_ai_call_logs
+
+        now = datetime.now(timezone.utc)
+        base = {
+            "created_at": now, "tenant_id": TENANT, "task_type": "morning_talk", "kind": "text",
+            "model_name": "m", "api_host": "api.example.com", "status_code": 200,
+            "attempts": 1, "request_bytes": 10, "response_bytes": 20,
+        }
+        rows = [
+            {**base, "outcome": "ok", "duration_ms": ms, "prompt_tokens": 10, "completion_tokens": 5}
+            for ms in (100, 200, 300, 400)
+        ]
+        rows.append({**base, "outcome": "cached", "duration_ms": 0,
+                     "prompt_tokens": None, "completion_tokens": None})
+        # 其他租户的调用不出现在统计中
+        rows.append({**base, "tenant_id": OTHER_TENANT, "task_type": "split", "outcome": "ok",
+                     "duration_ms": 900, "prompt_tokens": 99, "completion_tokens": 99})
+        await add_ai_call_logs(async_session, rows)
+        await async_session.commit()
+
+        resp = await api_client.get(
+            "/api/v1/ai/telemetry", params={"days": 1}, headers={"X-Api-Key": API_KEY}
+        )
+        assert resp.status_code == 200
+        body = resp.json()
+        assert body["tasks"] == [{
+            "task_type": "morning_talk", "calls": 4, "errors": 0, "cached": 1,
+            "p50_ms": 200, "p95_ms": 400, "p99_ms": 400,
+        }]
+        assert body["daily_tokens"][0]["day"] == now.date().isoformat()
+        assert body["daily_tokens"][0]["prompt_tokens"] == 40
+        assert body["daily_tokens"][0]["completion_tokens"] == 20
+        assert body["json_repair"] == {
+            "direct": 0, "repaired": 0, "reasked": 0, "failed": 0, "repair_rate": 0.0,
+        }
@@ -1,8 +1,11 @@
 """tests/test_diff_service.py — 差异比对服务测试。"""
 
+import random
+from datetime import date
+
 import pytest
 
-from app.service.diff_service import compute_diff
+from app.service.diff_service import IncrementalDiff, compute_diff, diff_key, plan_diff, save_plan_with_diff
 
 
 # -------------------------------------------------------------------
@@ -96,3 +99,85 @@ def test_multiline_text():
     # 第一、三行未改变
     assert result[0]["changed"] is False
     assert result[2]["changed"] is False
+
+
+# -------------------------------------------------------------------
+# 增量差异 / 持久化差异
+# -------------------------------------------------------------------
+
+_LONG = "".join(f"第{i}步：教师出示第{i}组材料，引导幼儿观察并表达自己的发现。" for i in range(120))
+
+
+def test_incremental_diff_matches_full_diff_while_editing():
+    """模拟教师逐次编辑改写文：每一步的增量结果与全量比对一致。"""
+    rng = random.Random(7)
+    sentences = compute_diff(_LONG, _LONG)
+    adapted = [item["text"] for item in sentences]
+    inc = IncrementalDiff()
+    assert inc.diff(_LONG, "".join(adapted)) == compute_diff(_LONG, "".join(adapted))
+
+    for step in range(40):
+        i = rng.randrange(len(adapted))
+        op = step % 3
+        if op == 0:
+            adapted[i] = adapted[i].replace("教师", "老师", 1) + "（调整）。"
+        elif op == 1:
+            adapted.insert(i, f"新增环节{step}：幼儿分组讨论。")
+        else:
+            del adapted[i]
+        text = "".join(adapted)
+        assert inc.diff(_LONG, text) == compute_diff(_LONG, text)
+
+
+def test_incremental_diff_memoized_and_original_change():
+    inc = IncrementalDiff()
+    first = inc.diff("甲。乙。", "甲。丙。")
+    assert inc.diff("甲。乙。", "甲。丙。") is first
+    assert inc.diff("丙。", "甲。丙。") == compute_diff("丙。", "甲。丙。")
+    assert inc.diff("丙。", "") == []
+
+
+def test_diff_key_depends_on_both_texts():
+    assert diff_key("a", "b") == diff_key("a", "b")
+    assert diff_key("ab", "") != diff_key("a", "b")
+    assert len(diff_key("", "")) == 64
+
+
+async def test_save_stores_diff_and_plan_diff_reads_it(async_session):
+    original = "第一步：出示积木。第二步：数积木。"
+    adapted = "第一步：出示积木。第二步：和小朋友一起数积木。"
+    plan = await save_plan_with_diff(
+        async_session, 1, 1, date(2026, 3, 2), 1, "周一", "中班", "一班",
+        activity_process_original=original, activity_process_adapted=adapted,
+    )
+    assert plan.process_diff_key == diff_key(original, adapted)
+    assert plan_diff(plan) == compute_diff(original, adapted)
+
+    # 原文 / 改写文未变时不重算
+    stored = plan.process_diff_json
+    await save_plan_with_diff(async_session, 1, 1, date(2026, 3, 2), 1, "周一", "中班", "一班", activity_goal="目标")
+    assert plan.process_diff_json is stored
+    await save_plan_with_diff(
+        async_session, 1, 1, date(2026, 3, 2), 1, "周一", "中班", "一班", activity_process_adapted="全新内容。",
+    )
+    assert plan.process_diff_key == diff_key(original, "全新内容。")
+    assert plan_diff(plan) == [{"text": "全新内容。", "changed": True}]
+
+    # 已存差异与文本不一致（如直接改库）时回退为重新计算
+    plan.activity_process_adapted = adapted
+    assert plan_diff(plan) == compute_diff(original, adapted)
+
+
+async def test_save_persists_full_diff_not_incremental_result(async_session):
+    """大段重排时 IncrementalDiff 的对齐可能与全量比对不同，入库的始终是 compute_diff 结果。"""
+    original = "甲。乙。丙。丁。戊。己。"
+    inc = IncrementalDiff()
+    inc.diff(original, "丁。己。乙。戊。甲。丙。")
+    reordered = "丁。甲。乙。戊。己。丙。"
+    assert inc.diff(original, reordered) != compute_diff(original, reordered)
+
+    plan = await save_plan_with_diff(
+        async_session, 1, 1, date(2026, 3, 2), 1, "周一", "中班", "一班",
+        activity_process_original=original, activity_process_adapted=reordered,
+    )
+    assert plan_diff(plan) == compute_diff(original, reordered)
@@ -124,3 +124,128 @@ async def test_generate_activity_content_no_ai_key_raises_config_error():
                 task_type="area_game",
                 context={"grade": "大班", "class_name": "彩虹班"},
             )
+
+
+@pytest.mark.asyncio
+async def test_generate_activity_content_streams_partials():
+    """传入 on_partial 时走流式生成：逐段回调累计文本，返回 strip 后的完整文本。"""
+    mock_key = _make_mock_ai_key()
+    mock_session = AsyncMock()
+    fake_generate = AsyncMock()
+
+    async def _fake_stream(**kwargs):
+        for delta in ("户外", "游戏", "方案\n"):
+            yield delta
+
+    partials: list[str] = []
+
+    with (
+        patch(
+            "app.service.generate_service.get_active_ai_key",
+            new=AsyncMock(return_value=mock_key),
+        ),
+        patch(
+            "app.service.generate_service.get_decrypted_key",
+            return_value="sk-test",
+        ),
+        patch(
+            "app.service.generate_service.get_active_prompt",
+            new=AsyncMock(return_value=None),
+        ),
+        patch("app.service.generate_service.generate_activity", new=fake_generate),
+        patch("app.service.generate_service.generate_activity_stream", new=_fake_stream),
+    ):
+        result = await generate_activity_content(
+            session=mock_session,
+            tenant_id=1,
+            user_id=2,
+            task_type="outdoor_game",
+            context={"grade": "小班", "class_name": "阳光班"},
+            on_partial=partials.append,
+        )
+
+    assert partials == ["户外", "户外游戏", "户外游戏方案\n"]
+    assert result == "户外游戏方案"
+    fake_generate.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_generate_activity_content_coalesces_duplicates():
+    """相同请求进行中时合并为一次 AI 调用；流式增量同时推送给后加入的页面。"""
+    import asyncio
+
+    mock_key = _make_mock_ai_key()
+    gate = asyncio.Event()
+    stream_calls = 0
+
+    async def _fake_stream(**kwargs):
+        nonlocal stream_calls
+        stream_calls += 1
+        yield "晨间"
+        await gate.wait()
+        yield "谈话"
+
+    first_partials: list[str] = []
+    second_partials: list[str] = []
+    ctx = {"grade": "小班", "class_name": "阳光班"}
+
+    with (
+        patch(
+            "app.service.generate_service.get_active_ai_key",
+            new=AsyncMock(return_value=mock_key),
+        ),
+        patch("app.service.generate_service.get_decrypted_key", return_value="sk-test"),
+        patch(
+            "app.service.generate_service.get_active_prompt",
+            new=AsyncMock(return_value=None),
+        ),
+        patch("app.service.generate_service.generate_activity_stream", new=_fake_stream),
+        patch("app.service.generate_service.log_audit") as mock_audit,
+    ):
+        first = asyncio.create_task(generate_activity_content(
+            AsyncMock(), 1, 2, "morning_talk", ctx, on_partial=first_partials.append,
+        ))
+        await asyncio.sleep(0.01)
+        second = asyncio.create_task(generate_activity_content(
+            AsyncMock(), 1, 2, "morning_talk", dict(ctx), on_partial=second_partials.append,
+        ))
+        await asyncio.sleep(0.01)
+        gate.set()
+        results = await asyncio.gather(first, second)
+
+    assert results == ["晨间谈话", "晨间谈话"]
+    assert stream_calls == 1
+    assert first_partials == ["晨间", "晨间谈话"]
+    assert second_partials == ["晨间谈话"]
+    assert [c.kwargs["coalesced"] for c in mock_audit.call_args_list] == [False, True]
+
+
+@pytest.mark.asyncio
+async def test_generate_activity_content_different_users_not_coalesced():
+    import asyncio
+
+    mock_key = _make_mock_ai_key()
+
+    async def _slow_generate(**kwargs):
+        await asyncio.sleep(0.01)
+        return "结果"
+
+    fake_generate = AsyncMock(side_effect=_slow_generate)
+    with (
+        patch(
+            "app.service.generate_service.get_active_ai_key",
+            new=AsyncMock(return_value=mock_key),
+        ),
+        patch("app.service.generate_service.get_decrypted_key", return_value="sk-test"),
+        patch(
+            "app.service.generate_service.get_active_prompt",
+            new=AsyncMock(return_value=None),
+        ),
+        patch("app.service.generate_service.generate_activity", new=fake_generate),
+    ):
+        await asyncio.gather(
+            generate_activity_content(AsyncMock(), 1, 2, "area_game", {"grade": "小班"}),
+            generate_activity_content(AsyncMock(), 1, 3, "area_game", {"grade": "小班"}),
+        )
+
+    assert fake_generate.await_count == 2
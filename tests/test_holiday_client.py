@@ -1,29 +1,36 @@
 """
 Step 2.4 — 节假日客户端测试
 
-使用自定义 httpx.AsyncBaseTransport 模拟 API，测试：
+使用自定义 httpx.AsyncBaseTransport 模拟「年」接口，测试：
 - 正常响应的 bool 返回值（法定节假日 True、工作日 False）
-- API 5xx 时返回 None（降级）
-- 缓存命中时不发出第二次 HTTP 请求
-- near_holiday 对普通周末前一天返回 False
+- API 5xx 时返回 None（降级），失败年份短时间内不重复请求
+- 整年日历：同一年份的不同日期只发出一次 HTTP 请求（含并发查询）
+- near_holiday 对普通周末前一天返回 False，跨年查询下一年日历
 - get_holiday_name 返回具体节日名称（如"国庆节"）
 - get_special_day_tags 在 5月12日包含"全国防灾减灾日"
-- is_adjusted_workday 对 type=3 调班工作日返回 True
+- is_adjusted_workday 对调班工作日返回 True
+- 注入的年日历加载函数（读库）优先于直接请求接口
 """
 
+import asyncio
 from datetime import date
 
 import httpx
-import pytest
 
-import app.integration.holiday_client.client as client_mod
 from app.integration.holiday_client.client import (
+    ADJUSTED_WORKDAY,
+    LEGAL_HOLIDAY,
+    WEEKEND,
+    WORKDAY,
+    build_year_calendar,
     get_holiday_name,
     get_legal_holidays_in_year,
     get_special_day_tags,
+    install_year_calendar,
     is_adjusted_workday,
     is_holiday,
     is_near_holiday,
+    set_year_loader,
 )
 
 
@@ -43,85 +50,77 @@ class MockTransport(httpx.AsyncBaseTransport):
         return self._handler(request)
 
 
-_TYPE_NAMES = {0: "工作日", 1: "周末", 2: "法定节假日", 3: "调班工作日"}
-
-
-def make_response(
-    day_type: int,
-    status_code: int = 200,
-    holiday_name: str | None = None,
-) -> httpx.Response:
-    """
-    构造节假日 API 响应。
-
-    holiday_name：当 day_type=2 时，传入节日名称（如"国庆节"），
-                  若不传则 holiday 字段为 null，名称从 type.name 取。
-    """
-    if status_code != 200:
-        return httpx.Response(status_code, text="Server Error")
-
-    type_name = holiday_name if (holiday_name and day_type == 2) else _TYPE_NAMES.get(day_type, "未知")
-    holiday_obj = (
-        {"holiday": True, "name": holiday_name, "wage": 3}
-        if (day_type == 2 and holiday_name)
-        else None
-    )
-    body = {
-        "code": 0,
-        "type": {"type": day_type, "name": type_name},
-        "holiday": holiday_obj,
+# 2025 / 2026 年的部分安排（holiday=True 法定节假日，False 调班工作日）
+_ENTRIES = {
+    "2025-01-29": (True, "春节"),
+    "2025-05-01": (True, "劳动节"),
+    "2025-09-28": (False, "国庆节前补班"),
+    "2025-10-01": (True, "国庆节"),
+    "2025-10-02": (True, "国庆节"),
+    "2026-01-01": (True, "元旦"),
+    "2026-05-01": (True, "劳动节"),
+    "2026-05-02": (True, "劳动节"),
+    "2026-05-09": (False, "劳动节后补班"),
+}
+
+
+def year_response(request: httpx.Request, entries: dict | None = None) -> httpx.Response:
+    """按请求路径中的年份返回「年」接口响应。"""
+    year = request.url.path.rstrip("/").rsplit("/", 1)[-1]
+    holiday = {
+        iso[5:]: {"holiday": flag, "name": name, "date": iso}
+        for iso, (flag, name) in (entries if entries is not None else _ENTRIES).items()
+        if iso.startswith(year)
     }
-    return httpx.Response(200, json=body)
+    return httpx.Response(200, json={"code": 0, "holiday": holiday})
 
 
-# ──────────────────────────────────────────────
-# Fixture：每个测试前后清空缓存
-# ──────────────────────────────────────────────
+def ok_transport() -> MockTransport:
+    return MockTransport(year_response)
+
 
-@pytest.fixture(autouse=True)
-def clear_cache():
-    """隔离每个测试的节假日缓存状态。"""
-    client_mod._cache.clear()
-    client_mod._year_cache.clear()
-    client_mod._cache_populated_date = None
-    yield
-    client_mod._cache.clear()
-    client_mod._year_cache.clear()
-    client_mod._cache_populated_date = None
+def failing_transport() -> MockTransport:
+    return MockTransport(lambda req: httpx.Response(500, text="Server Error"))
 
 
 # ──────────────────────────────────────────────
-# get_legal_holidays_in_year
+# build_year_calendar / get_legal_holidays_in_year
 # ──────────────────────────────────────────────
 
+class TestYearCalendar:
+    def test_covers_every_day_with_types(self):
+        days = build_year_calendar(2025, {
+            "10-01": {"holiday": True, "name": "国庆节", "date": "2025-10-01"},
+            "09-28": {"holiday": False, "name": "国庆节前补班", "date": "2025-09-28"},
+            "bad": {"holiday": True, "date": "not-a-date"},
+        })
+        assert len(days) == 365
+        assert days[date(2025, 10, 1)] == (LEGAL_HOLIDAY, "国庆节")
+        assert days[date(2025, 9, 28)] == (ADJUSTED_WORKDAY, "国庆节前补班")
+        assert days[date(2025, 9, 1)] == (WORKDAY, None)
+        assert days[date(2025, 9, 6)] == (WEEKEND, None)
+        assert len(build_year_calendar(2024, {})) == 366
+
+
 class TestGetLegalHolidaysInYear:
     async def test_returns_legal_holiday_dates(self):
         """仅 holiday==True 计入；调班工作日（holiday==False）排除；单次请求。"""
-        body = {
-            "code": 0,
-            "holiday": {
-                "05-01": {"holiday": True, "name": "劳动节", "date": "2026-05-01"},
-                "05-02": {"holiday": True, "name": "劳动节", "date": "2026-05-02"},
-                "05-09": {"holiday": False, "name": "劳动节(调班)", "date": "2026-05-09"},
-            },
-        }
-        transport = MockTransport(lambda req: httpx.Response(200, json=body))
+        transport = ok_transport()
         result = await get_legal_holidays_in_year(2026, _transport=transport)
-        assert result == {date(2026, 5, 1), date(2026, 5, 2)}
+        assert result == {date(2026, 1, 1), date(2026, 5, 1), date(2026, 5, 2)}
         assert transport.call_count == 1
 
-    async def test_caches_within_day(self):
-        """同年第二次查询命中缓存，不再发起 HTTP。"""
-        body = {"code": 0, "holiday": {"05-01": {"holiday": True, "date": "2026-05-01"}}}
-        transport = MockTransport(lambda req: httpx.Response(200, json=body))
+    async def test_year_calendar_reused(self):
+        """同年第二次查询及逐日查询都不再发起 HTTP。"""
+        transport = ok_transport()
         await get_legal_holidays_in_year(2026, _transport=transport)
         await get_legal_holidays_in_year(2026, _transport=transport)
+        assert await is_holiday(date(2026, 5, 1), _transport=transport) is True
         assert transport.call_count == 1
 
     async def test_api_failure_returns_none(self):
         """API 5xx → 返回 None（降级）。"""
-        transport = MockTransport(lambda req: httpx.Response(500, text="err"))
-        result = await get_legal_holidays_in_year(2026, _transport=transport)
+        result = await get_legal_holidays_in_year(2026, _transport=failing_transport())
         assert result is None
 
 
@@ -131,51 +130,59 @@ class TestGetLegalHolidaysInYear:
 
 class TestIsHoliday:
     async def test_legal_holiday_returns_true(self):
-        """法定节假日（type=2）返回 True"""
-        transport = MockTransport(lambda req: make_response(2))
-        result = await is_holiday(date(2025, 10, 1), _transport=transport)
-        assert result is True
+        """法定节假日返回 True"""
+        assert await is_holiday(date(2025, 10, 1), _transport=ok_transport()) is True
 
     async def test_workday_returns_false(self):
-        """普通工作日（type=0）返回 False"""
-        transport = MockTransport(lambda req: make_response(0))
-        result = await is_holiday(date(2025, 9, 1), _transport=transport)
-        assert result is False
+        """普通工作日返回 False"""
+        assert await is_holiday(date(2025, 9, 1), _transport=ok_transport()) is False
 
     async def test_weekend_returns_false(self):
-        """普通周末（type=1）返回 False（与法定节假日语义严格区分）"""
-        transport = MockTransport(lambda req: make_response(1))
-        result = await is_holiday(date(2025, 9, 6), _transport=transport)
-        assert result is False
+        """普通周末返回 False（与法定节假日语义严格区分）"""
+        assert await is_holiday(date(2025, 9, 6), _transport=ok_transport()) is False
 
     async def test_adjusted_workday_returns_false(self):
-        """调班工作日（type=3）返回 False"""
-        transport = MockTransport(lambda req: make_response(3))
-        result = await is_holiday(date(2025, 9, 28), _transport=transport)
-        assert result is False
+        """调班工作日返回 False"""
+        assert await is_holiday(date(2025, 9, 28), _transport=ok_transport()) is False
 
     async def test_api_5xx_returns_none(self):
         """API 返回 5xx 时降级，返回 None"""
-        transport = MockTransport(lambda req: make_response(0, status_code=500))
-        result = await is_holiday(date(2025, 9, 1), _transport=transport)
-        assert result is None
+        assert await is_holiday(date(2025, 9, 1), _transport=failing_transport()) is None
+
+    async def test_failure_not_retried_immediately(self):
+        """失败年份在退避期内直接降级，不重复请求"""
+        transport = failing_transport()
+        assert await is_holiday(date(2025, 9, 1), _transport=transport) is None
+        assert await is_holiday(date(2025, 9, 2), _transport=transport) is None
+        assert transport.call_count == 1
 
-    async def test_cache_prevents_second_request(self):
-        """同一日期第二次调用命中缓存，不发出 HTTP 请求"""
-        transport = MockTransport(lambda req: make_response(2))
-        target = date(2025, 10, 1)
+    async def test_same_year_single_request(self):
+        """同一年份的不同日期共用一次 HTTP 请求"""
+        transport = ok_transport()
+        for day in range(1, 8):
+            await is_holiday(date(2025, 10, day), _transport=transport)
+        assert transport.call_count == 1
+
+    async def test_concurrent_same_year_single_request(self):
+        """同一年份的并发查询合并为一次 HTTP 请求，结果共享"""
 
-        first = await is_holiday(target, _transport=transport)
-        second = await is_holiday(target, _transport=transport)
+        class _SlowTransport(MockTransport):
+            async def handle_async_request(self, request):
+                await asyncio.sleep(0.02)
+                return await super().handle_async_request(request)
 
-        assert first == second
-        assert transport.call_count == 1  # 仅发出一次 HTTP 请求
+        transport = _SlowTransport(year_response)
+        results = await asyncio.gather(
+            *[is_holiday(date(2025, 10, d), _transport=transport) for d in range(1, 6)]
+        )
+        assert results == [True, True, False, False, False]
+        assert transport.call_count == 1
 
-    async def test_different_dates_each_fetched(self):
-        """不同日期分别发出独立请求"""
-        transport = MockTransport(lambda req: make_response(0))
+    async def test_different_years_each_fetched(self):
+        """不同年份分别发出独立请求"""
+        transport = ok_transport()
         await is_holiday(date(2025, 9, 1), _transport=transport)
-        await is_holiday(date(2025, 9, 2), _transport=transport)
+        await is_holiday(date(2026, 9, 1), _transport=transport)
         assert transport.call_count == 2
 
 
@@ -186,33 +193,23 @@ class TestIsHoliday:
 class TestIsNearHoliday:
     async def test_day_before_legal_holiday_returns_true(self):
         """法定节假日前一天（9月30日，10月1日为法定节假日）返回 True"""
-        def handler(req: httpx.Request) -> httpx.Response:
-            if "2025-10-01" in str(req.url):
-                return make_response(2)  # 法定节假日
-            return make_response(0)
+        assert await is_near_holiday(date(2025, 9, 30), _transport=ok_transport()) is True
 
-        transport = MockTransport(handler)
-        result = await is_near_holiday(date(2025, 9, 30), _transport=transport)
-        assert result is True
+    async def test_new_years_eve_uses_next_year(self):
+        """12月31日查询次年日历（元旦）"""
+        assert await is_near_holiday(date(2025, 12, 31), _transport=ok_transport()) is True
 
     async def test_friday_before_weekend_returns_false(self):
         """周五（普通周末前一天）返回 False，不视为 near_holiday"""
-        # 周六 type=1（普通周末），不是法定节假日
-        transport = MockTransport(lambda req: make_response(1))
-        result = await is_near_holiday(date(2025, 9, 5), _transport=transport)  # 周五
-        assert result is False
+        assert await is_near_holiday(date(2025, 9, 5), _transport=ok_transport()) is False
 
     async def test_api_failure_returns_none(self):
         """API 失败时返回 None"""
-        transport = MockTransport(lambda req: make_response(0, status_code=500))
-        result = await is_near_holiday(date(2025, 9, 1), _transport=transport)
-        assert result is None
+        assert await is_near_holiday(date(2025, 9, 1), _transport=failing_transport()) is None
 
     async def test_ordinary_workday_returns_false(self):
         """普通工作日的前一天，次日也是工作日，返回 False"""
-        transport = MockTransport(lambda req: make_response(0))
-        result = await is_near_holiday(date(2025, 9, 1), _transport=transport)
-        assert result is False
+        assert await is_near_holiday(date(2025, 9, 1), _transport=ok_transport()) is False
 
 
 # ──────────────────────────────────────────────
@@ -249,72 +246,42 @@ class TestGetSpecialDayTags:
 
 
 # ──────────────────────────────────────────────
-# get_holiday_name（新需求：返回具体节日名称）
+# get_holiday_name（返回具体节日名称）
 # ──────────────────────────────────────────────
 
 class TestGetHolidayName:
-    async def test_returns_name_from_holiday_object(self):
-        """法定节假日且 API 返回 holiday 对象时，取其 name 字段"""
-        transport = MockTransport(
-            lambda req: make_response(2, holiday_name="国庆节")
-        )
-        name = await get_holiday_name(date(2025, 10, 1), _transport=transport)
-        assert name == "国庆节"
+    async def test_returns_holiday_name(self):
+        """法定节假日返回接口给出的节日名称"""
+        assert await get_holiday_name(date(2025, 10, 1), _transport=ok_transport()) == "国庆节"
 
-    async def test_returns_name_from_type_when_holiday_null(self):
-        """法定节假日但 holiday 字段为 null 时，从 type.name 取名称"""
-        # make_response(2) 不传 holiday_name → holiday=null, type.name="法定节假日"
-        transport = MockTransport(lambda req: make_response(2))
-        name = await get_holiday_name(date(2025, 10, 1), _transport=transport)
-        assert name == "法定节假日"
+    async def test_returns_none_when_name_missing(self):
+        """法定节假日但接口未给名称时返回 None"""
+        transport = MockTransport(lambda req: year_response(req, {"2025-10-01": (True, None)}))
+        assert await get_holiday_name(date(2025, 10, 1), _transport=transport) is None
 
     async def test_returns_none_for_workday(self):
         """普通工作日返回 None"""
-        transport = MockTransport(lambda req: make_response(0))
-        name = await get_holiday_name(date(2025, 9, 1), _transport=transport)
-        assert name is None
+        assert await get_holiday_name(date(2025, 9, 1), _transport=ok_transport()) is None
 
     async def test_returns_none_for_weekend(self):
         """普通周末返回 None"""
-        transport = MockTransport(lambda req: make_response(1))
-        name = await get_holiday_name(date(2025, 9, 6), _transport=transport)
-        assert name is None
+        assert await get_holiday_name(date(2025, 9, 6), _transport=ok_transport()) is None
+
+    async def test_returns_none_for_adjusted_workday(self):
+        """调班工作日虽有名称，但不是法定节假日，返回 None"""
+        assert await get_holiday_name(date(2025, 9, 28), _transport=ok_transport()) is None
 
     async def test_returns_none_on_api_failure(self):
         """API 失败时返回 None"""
-        transport = MockTransport(lambda req: make_response(0, status_code=500))
-        name = await get_holiday_name(date(2025, 9, 1), _transport=transport)
-        assert name is None
-
-    async def test_reuses_cache_no_extra_request(self):
-        """先调用 is_holiday，再调用 get_holiday_name，不发出额外 HTTP 请求"""
-        transport = MockTransport(
-            lambda req: make_response(2, holiday_name="春节")
-        )
-        target = date(2025, 1, 29)
-        await is_holiday(target, _transport=transport)    # 填充缓存
-        name = await get_holiday_name(target, _transport=transport)  # 命中缓存
-        assert name == "春节"
-        assert transport.call_count == 1  # 全程只发出一次 HTTP 请求
+        assert await get_holiday_name(date(2025, 9, 1), _transport=failing_transport()) is None
 
     async def test_different_holidays_correct_names(self):
-        """不同节日返回各自正确名称"""
-        holidays = {
-            date(2025, 1, 29): "春节",
-            date(2025, 5, 1): "劳动节",
-            date(2025, 10, 1): "国庆节",
-        }
-
-        def handler(req: httpx.Request) -> httpx.Response:
-            for d, n in holidays.items():
-                if d.isoformat() in str(req.url):
-                    return make_response(2, holiday_name=n)
-            return make_response(0)
-
-        transport = MockTransport(handler)
-        for d, expected_name in holidays.items():
-            name = await get_holiday_name(d, _transport=transport)
-            assert name == expected_name, f"{d} 预期名称 {expected_name}，实际 {name}"
+        """不同节日返回各自正确名称，全程一次请求"""
+        transport = ok_transport()
+        expected = {date(2025, 1, 29): "春节", date(2025, 5, 1): "劳动节", date(2025, 10, 1): "国庆节"}
+        for d, name in expected.items():
+            assert await get_holiday_name(d, _transport=transport) == name
+        assert transport.call_count == 1
 
 
 # ──────────────────────────────────────────────
@@ -323,43 +290,50 @@ class TestGetHolidayName:
 
 class TestIsAdjustedWorkday:
     async def test_adjusted_workday_returns_true(self):
-        """调班工作日（type=3）返回 True，例如 2026-05-09"""
-        transport = MockTransport(lambda req: make_response(3))
-        result = await is_adjusted_workday(date(2026, 5, 9), _transport=transport)
-        assert result is True
+        """调班工作日返回 True，例如 2026-05-09"""
+        assert await is_adjusted_workday(date(2026, 5, 9), _transport=ok_transport()) is True
 
     async def test_ordinary_workday_returns_false(self):
-        """普通工作日（type=0）返回 False"""
-        transport = MockTransport(lambda req: make_response(0))
-        result = await is_adjusted_workday(date(2026, 5, 11), _transport=transport)
-        assert result is False
+        """普通工作日返回 False"""
+        assert await is_adjusted_workday(date(2026, 5, 11), _transport=ok_transport()) is False
 
     async def test_weekend_returns_false(self):
-        """普通周末（type=1）返回 False"""
-        transport = MockTransport(lambda req: make_response(1))
-        result = await is_adjusted_workday(date(2026, 5, 10), _transport=transport)
-        assert result is False
+        """普通周末返回 False"""
+        assert await is_adjusted_workday(date(2026, 5, 10), _transport=ok_transport()) is False
 
     async def test_legal_holiday_returns_false(self):
-        """法定节假日（type=2）返回 False"""
-        transport = MockTransport(lambda req: make_response(2))
-        result = await is_adjusted_workday(date(2025, 10, 1), _transport=transport)
-        assert result is False
+        """法定节假日返回 False"""
+        assert await is_adjusted_workday(date(2025, 10, 1), _transport=ok_transport()) is False
 
     async def test_api_failure_returns_none(self):
         """API 失败时返回 None"""
-        transport = MockTransport(lambda req: make_response(0, status_code=500))
-        result = await is_adjusted_workday(date(2026, 5, 9), _transport=transport)
-        assert result is None
-
-    async def test_shares_cache_with_is_holiday(self):
-        """先调用 is_holiday，再调用 is_adjusted_workday，共享缓存不发额外请求"""
-        transport = MockTransport(lambda req: make_response(3))
-        target = date(2026, 5, 9)
-        await is_holiday(target, _transport=transport)
-        result = await is_adjusted_workday(target, _transport=transport)
-        assert result is True
-        assert transport.call_count == 1  # 全程只发一次 HTTP 请求
+        assert await is_adjusted_workday(date(2026, 5, 9), _transport=failing_transport()) is None
 
 
+# ──────────────────────────────────────────────
+# 进程内日历与加载函数
+# ──────────────────────────────────────────────
 
+class TestCalendarSources:
+    async def test_installed_calendar_answers_without_http(self):
+        """已载入（如启动时从库中读取）的年份不发出任何请求"""
+        install_year_calendar(2025, build_year_calendar(2025, {
+            "10-01": {"holiday": True, "name": "国庆节", "date": "2025-10-01"},
+        }))
+        transport = failing_transport()
+        assert await is_holiday(date(2025, 10, 1), _transport=transport) is True
+        assert await get_holiday_name(date(2025, 10, 1), _transport=transport) == "国庆节"
+        assert transport.call_count == 0
+
+    async def test_loader_used_for_missing_year(self):
+        """注入的加载函数负责缺失年份，结果进入进程内日历"""
+        calls: list[int] = []
+
+        async def _loader(year):
+            calls.append(year)
+            return build_year_calendar(year, {"01-01": {"holiday": True, "name": "元旦", "date": f"{year}-01-01"}})
+
+        set_year_loader(_loader)
+        assert await is_holiday(date(2027, 1, 1)) is True
+        assert await is_adjusted_workday(date(2027, 1, 2)) is False
+        assert calls == [2027]
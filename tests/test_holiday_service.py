@@ -0,0 +1,62 @@
+"""tests/test_holiday_service.py — 节假日日历落库、启动载入与离线应答。"""
+from datetime import date
+
+import httpx
+
+from app.integration.holiday_client.client import (
+    get_holiday_name,
+    is_adjusted_workday,
+    is_holiday,
+    loaded_years,
+    reset_holiday_calendar,
+)
+from app.repository.holiday_repository import load_years
+from app.service.holiday_service import load_stored_calendars, refresh_years, sync_holiday_year
+
+_BODY = {
+    "code": 0,
+    "holiday": {
+        "10-01": {"holiday": True, "name": "国庆节", "date": "2026-10-01"},
+        "10-10": {"holiday": False, "name": "国庆节后补班", "date": "2026-10-10"},
+    },
+}
+
+
+class _Transport(httpx.AsyncBaseTransport):
+    def __init__(self, status: int = 200) -> None:
+        self.status = status
+        self.calls = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        if self.status != 200:
+            return httpx.Response(self.status, text="err")
+        return httpx.Response(200, json=_BODY)
+
+
+async def test_sync_persists_whole_year_and_serves_offline(async_session):
+    assert await sync_holiday_year(async_session, 2026, _transport=_Transport()) is not None
+    stored = (await load_years(async_session, [2026]))[2026]
+    assert len(stored) == 365
+    assert stored[date(2026, 10, 1)] == (2, "国庆节")
+    assert stored[date(2026, 10, 10)] == (3, "国庆节后补班")
+
+    # 进程重启：进程内日历清空，从库中载入后接口不可用也能应答
+    reset_holiday_calendar()
+    assert await load_stored_calendars(async_session) == [2026]
+    offline = _Transport(status=503)
+    assert await is_holiday(date(2026, 10, 1), _transport=offline) is True
+    assert await get_holiday_name(date(2026, 10, 1), _transport=offline) == "国庆节"
+    assert await is_adjusted_workday(date(2026, 10, 10), _transport=offline) is True
+    assert offline.calls == 0
+
+
+async def test_failed_refresh_keeps_stored_calendar(async_session):
+    await sync_holiday_year(async_session, 2026, _transport=_Transport())
+    assert await sync_holiday_year(async_session, 2026, _transport=_Transport(status=500)) is None
+    assert len((await load_years(async_session, [2026]))[2026]) == 365
+    assert loaded_years() == [2026]
+
+
+def test_refresh_years():
+    assert refresh_years(date(2026, 10, 17)) == [2026, 2027]
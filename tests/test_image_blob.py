@@ -0,0 +1,194 @@
+"""tests/test_image_blob.py — 内容寻址图片存储：去重、引用计数、覆盖保存零写入与存量迁移。"""
+
+import os
+import sqlite3
+import subprocess
+import sys
+from datetime import date
+from pathlib import Path
+
+import pytest
+from sqlalchemy import event, select
+
+from app.core.models.game_observation_image import GameObservationImage
+from app.core.models.image_blob import ImageBlob
+from app.integration.image_processing import CompressedImage
+from app.integration.image_storage.blob_backend import BlobImageStorage
+from app.repository import listening_image_repository, observation_image_repository
+from app.repository.image_blob_repository import compute_content_hash, get_inline_contents
+from app.service.image_store_service import load_image_bytes
+from app.service.listening_service import save_record_with_all, update_record_with_all
+
+_PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+
+async def _blobs(session) -> dict[str, int]:
+    rows = (await session.execute(select(ImageBlob))).scalars().all()
+    return {b.sha256: b.ref_count for b in rows}
+
+
+def test_blob_storage_put_is_idempotent():
+    storage = BlobImageStorage()
+    first = storage.put(b"same")
+    assert first == storage.put(b"same")
+    assert first["content_hash"] == compute_content_hash(b"same")
+
+
+async def test_same_content_stored_once_across_subsystems(async_session):
+    for idx in (1, 2):
+        await observation_image_repository.add_image(
+            async_session, tenant_id=1, user_id=1, observation_id=1,
+            image_index=idx, blob_content=b"photo",
+        )
+    await listening_image_repository.add_image(
+        async_session, tenant_id=1, user_id=1, record_id=1,
+        domain="健康", image_index=1, blob_content=b"photo",
+    )
+
+    assert await _blobs(async_session) == {compute_content_hash(b"photo"): 3}
+    images = await observation_image_repository.list_images_by_observation(async_session, 1, 1)
+    inline = await get_inline_contents(async_session, GameObservationImage, (img.id for img in images))
+    assert set(inline.values()) == {None}
+    assert await load_image_bytes(async_session, images) == [b"photo", b"photo"]
+
+
+async def test_delete_releases_and_collects_unreferenced(async_session):
+    await observation_image_repository.add_image(
+        async_session, tenant_id=1, user_id=1, observation_id=1, image_index=1, blob_content=b"a",
+    )
+    await listening_image_repository.add_image(
+        async_session, tenant_id=1, user_id=1, record_id=1, domain="健康",
+        image_index=1, blob_content=b"a",
+    )
+    await listening_image_repository.add_image(
+        async_session, tenant_id=1, user_id=1, record_id=1, domain="健康",
+        image_index=2, blob_content=b"b",
+    )
+
+    await listening_image_repository.delete_images_by_record(async_session, 1, 1)
+    assert await _blobs(async_session) == {compute_content_hash(b"a"): 1}
+
+    await observation_image_repository.delete_images_by_observation(async_session, 1, 1)
+    assert await _blobs(async_session) == {}
+
+
+def _domain(name: str, images: list[bytes]) -> dict:
+    return {
+        "domain": name, "obs_year": 2026, "obs_month": 4,
+        "date_1": date(2026, 4, 1), "date_2": None, "date_3": None,
+        "goals": "目标", "evaluation": "评价", "support_strategy": "策略",
+        "compressed_images": [
+            CompressedImage(data=d, mime_type="image/jpeg", width=1, height=1) for d in images
+        ],
+        "image_descriptions": [],
+        "indicator_results": [],
+    }
+
+
+_RECORD = {"tenant_id": 1, "user_id": 1, "obs_year": 2026, "obs_month": 4, "child_name": "小明"}
+
+
+async def test_resave_writes_no_image_bytes(async_session):
+    rid = await save_record_with_all(
+        async_session, record_data=_RECORD,
+        domains=[_domain("健康", [b"p1", b"p2"]), _domain("语言", [b"p1"])],
+        storage=BlobImageStorage(),
+    )
+    assert await _blobs(async_session) == {
+        compute_content_hash(b"p1"): 2, compute_content_hash(b"p2"): 1,
+    }
+
+    blob_writes: list[str] = []
+    sync_engine = async_session.bind.sync_engine
+
+    def _capture(conn, cursor, statement, params, context, executemany):
+        if statement.lstrip().upper().startswith("INSERT INTO IMAGE_BLOB"):
+            blob_writes.append(statement)
+
+    event.listen(sync_engine, "before_cursor_execute", _capture)
+    try:
+        await update_record_with_all(
+            async_session, record_id=rid, record_data=_RECORD,
+            domains=[_domain("健康", [b"p1", b"p2"]), _domain("语言", [b"p1"])],
+            storage=BlobImageStorage(),
+        )
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", _capture)
+
+    assert blob_writes == []
+    assert await _blobs(async_session) == {
+        compute_content_hash(b"p1"): 2, compute_content_hash(b"p2"): 1,
+    }
+
+    # 替换一张图：新内容写入，不再被引用的旧内容删除
+    await update_record_with_all(
+        async_session, record_id=rid, record_data=_RECORD,
+        domains=[_domain("健康", [b"p1", b"p3"])],
+        storage=BlobImageStorage(),
+    )
+    assert await _blobs(async_session) == {
+        compute_content_hash(b"p1"): 1, compute_content_hash(b"p3"): 1,
+    }
+
+
+# ─── 存量迁移（临时 sqlite + subprocess alembic）─────────────────────────────
+
+
+def _alembic(db_file: Path, *args: str) -> None:
+    env = dict(os.environ)
+    env["DATABASE_URL"] = f"sqlite+aiosqlite:///{db_file}"
+    result = subprocess.run(
+        [sys.executable, "-m", "alembic", *args],
+        cwd=str(_PROJECT_ROOT), env=env, capture_output=True, text=True,
+    )
+    assert result.returncode == 0, f"alembic 失败:\n{result.stderr}"
+
+
+@pytest.mark.parametrize("rows", [3, 450])
+def test_migration_dedupes_existing_blobs(tmp_path, rows):
+    """rows 超过单批大小时分多批迁移；相同字节只保留一份，降级后字节原样恢复。"""
+    db_file = tmp_path / "blob_mig.db"
+    _alembic(db_file, "upgrade", "c9f2d4a6b8e1")
+
+    now = "2026-04-01 00:00:00"
+    conn = sqlite3.connect(str(db_file))
+    for i in range(rows):
+        conn.execute(
+            "INSERT INTO game_observation_image (tenant_id, user_id, observation_id, image_index, "
+            "storage_backend, blob_content, mime_type, created_at, updated_at) "
+            "VALUES (1, 1, ?, 1, 'mysql_blob', ?, 'image/jpeg', ?, ?)",
+            (i, b"dup" if i % 3 else f"u{i}".encode(), now, now),
+        )
+    conn.execute(
+        "INSERT INTO listening_image (tenant_id, user_id, record_id, domain, image_index, "
+        "storage_backend, blob_content, mime_type, created_at, updated_at) "
+        "VALUES (1, 1, 1, '健康', 1, 'mysql_blob', ?, 'image/jpeg', ?, ?)",
+        (b"dup", now, now),
+    )
+    conn.commit()
+    conn.close()
+
+    _alembic(db_file, "upgrade", "head")
+
+    conn = sqlite3.connect(str(db_file))
+    blobs = dict(conn.execute("SELECT sha256, ref_count FROM image_blob").fetchall())
+    unique = len(range(0, rows, 3))
+    dup_refs = rows - unique + 1
+    assert len(blobs) == unique + 1
+    assert blobs[compute_content_hash(b"dup")] == dup_refs
+    assert conn.execute(
+        "SELECT COUNT(*) FROM game_observation_image WHERE blob_content IS NOT NULL "
+        "OR content_hash IS NULL"
+    ).fetchone() == (0,)
+    conn.close()
+
+    _alembic(db_file, "downgrade", "c9f2d4a6b8e1")
+
+    conn = sqlite3.connect(str(db_file))
+    restored = conn.execute(
+        "SELECT observation_id, blob_content FROM game_observation_image ORDER BY observation_id"
+    ).fetchall()
+    conn.close()
+    assert [bytes(b) for _, b in restored] == [
+        b"dup" if i % 3 else f"u{i}".encode() for i in range(rows)
+    ]
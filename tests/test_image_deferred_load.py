@@ -0,0 +1,110 @@
+"""tests/test_image_deferred_load.py — 图片字节延迟加载：元数据查询不传输字节，显式流式读取。"""
+import os
+from datetime import date
+
+import pytest
+from sqlalchemy import event, inspect
+from sqlalchemy.exc import InvalidRequestError
+
+from app.core.models.game_observation_image import GameObservationImage
+from app.repository.image_blob_repository import get_blobs
+from app.repository.observation_image_repository import (
+    add_image,
+    list_image_ids_by_observations,
+    list_images_by_observation,
+)
+from app.repository.observation_repository import list_observations, save_observation
+from app.service.image_store_service import iter_image_bytes, load_image_urls
+
+_IMAGE_BYTES = 32 * 1024
+
+
+class _TransferMeter:
+    """统计查询结果中 bytes / str 值的总长度（aiosqlite 适配器在执行后把整份结果缓存于 _rows）。"""
+
+    def __init__(self, session) -> None:
+        self.total = 0
+        self._engine = session.bind.sync_engine
+        event.listen(self._engine, "after_cursor_execute", self._count)
+
+    def _count(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        for row in getattr(cursor, "_rows", ()):
+            self.total += sum(len(v) for v in row if isinstance(v, (bytes, str)))
+
+    def close(self) -> None:
+        event.remove(self._engine, "after_cursor_execute", self._count)
+
+
+@pytest.fixture
+async def history(async_session):
+    """30 条观察记录，每条 3 张互不相同的图片（第 3 张为迁移前字节内联的存量行）。"""
+    for i in range(30):
+        obs = await save_observation(
+            async_session, tenant_id=1, user_id=1, obs_date=date(2026, 4, 1 + i % 28), game_area=f"区域{i}",
+        )
+        for idx in (1, 2):
+            await add_image(
+                async_session, tenant_id=1, user_id=1, observation_id=obs.id, image_index=idx,
+                blob_content=os.urandom(_IMAGE_BYTES),
+            )
+        async_session.add(GameObservationImage(
+            tenant_id=1, user_id=1, observation_id=obs.id, image_index=3,
+            blob_content=os.urandom(_IMAGE_BYTES), content_hash=None,
+        ))
+    await async_session.commit()
+    async_session.expunge_all()
+    return async_session
+
+
+async def test_history_view_transfers_no_image_bytes(history):
+    meter = _TransferMeter(history)
+    try:
+        records = await list_observations(history, 1, 1, limit=30)
+        image_ids = await list_image_ids_by_observations(history, 1, [r.id for r in records])
+        rows = [img for r in records for img in await list_images_by_observation(history, 1, r.id)]
+        urls = await load_image_urls(history, rows)
+    finally:
+        meter.close()
+
+    assert len(records) == 30 and sum(len(ids) for ids in image_ids.values()) == 90
+    assert [img.id for img in rows[:3]] == image_ids[records[0].id]
+    assert urls == [None] * 90
+    # 90 张 × 32KB ≈ 2.8MB 的字节（含存量内联行与 image_blob 内容行）一个也不经过驱动
+    assert meter.total < 64 * 1024
+
+    # 对照：显式读取字节时计量到全部内容
+    meter = _TransferMeter(history)
+    try:
+        contents = [data async for data in iter_image_bytes(history, rows)]
+    finally:
+        meter.close()
+    assert all(len(data) == _IMAGE_BYTES for data in contents)
+    assert meter.total >= 90 * _IMAGE_BYTES
+
+
+async def test_accidental_blob_access_raises(history):
+    rows = await list_images_by_observation(history, 1, 1)
+    with pytest.raises(InvalidRequestError):
+        _ = rows[0].blob_content
+
+
+async def test_iter_image_bytes_streams_in_order_and_releases(async_session):
+    data = [os.urandom(1024) for _ in range(6)]
+    for idx, content in enumerate(data, start=1):
+        await add_image(
+            async_session, tenant_id=1, user_id=1, observation_id=1, image_index=idx, blob_content=content,
+        )
+    # 迁移前的存量行：字节内联在图片行
+    legacy = GameObservationImage(
+        tenant_id=1, user_id=1, observation_id=1, image_index=7, blob_content=b"legacy", content_hash=None,
+    )
+    async_session.add(legacy)
+    await async_session.commit()
+
+    rows = await list_images_by_observation(async_session, 1, 1)
+    held = list((await get_blobs(async_session, (img.content_hash for img in rows))).values())
+    streamed = [chunk async for chunk in iter_image_bytes(async_session, rows, batch=2)]
+    assert streamed == [*data, b"legacy"]
+
+    # 产出后字节已从会话中释放，不随会话驻留
+    assert len(held) == 6 and all("blob_content" in inspect(b).unloaded for b in held)
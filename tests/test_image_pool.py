@@ -0,0 +1,99 @@
+"""tests/test_image_pool.py — 图片进程池：进程内执行、异常回传、背压、取消与降级。"""
+
+import asyncio
+import io
+import threading
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+from PIL import Image
+
+from app.core.exceptions import AppError
+from app.integration import image_pool
+from app.integration.image_pool import image_pool_stats, run_image_task
+from app.integration.image_processing import compress_image
+
+
+def _jpeg(width: int = 320, height: int = 200) -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", (width, height), (100, 149, 237)).save(buf, format="JPEG")
+    return buf.getvalue()
+
+
+@pytest.fixture
+def process_pool(monkeypatch):
+    monkeypatch.setattr(image_pool.settings, "IMAGE_POOL_ENABLED", True)
+    monkeypatch.setattr(image_pool.settings, "IMAGE_POOL_WORKERS", 1)
+
+
+async def test_compress_in_worker_process(process_pool):
+    result = await run_image_task(compress_image, _jpeg())
+    assert (result.width, result.height) == (320, 200)
+
+    with pytest.raises(AppError):
+        await run_image_task(compress_image, b"not an image")
+
+    stats = image_pool_stats()
+    assert stats["running"] is True
+    assert (stats["submitted"], stats["completed"], stats["fallback"]) == (2, 1, 0)
+
+
+async def test_cancel_removes_queued_task(process_pool):
+    running = asyncio.create_task(run_image_task(time.sleep, 0.5))
+    await asyncio.sleep(0.05)
+    queued = asyncio.create_task(run_image_task(time.sleep, 0.5))
+    await asyncio.sleep(0.05)
+    queued.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await queued
+    await running
+    assert image_pool_stats()["cancelled"] == 1
+
+
+async def test_disabled_pool_runs_in_thread():
+    caller = threading.get_ident()
+    worker = await run_image_task(threading.get_ident)
+    assert worker != caller
+    assert image_pool_stats()["fallback"] == 1
+
+
+async def test_max_pending_applies_backpressure(monkeypatch):
+    monkeypatch.setattr(image_pool.settings, "IMAGE_POOL_MAX_PENDING", 2)
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def _work() -> None:
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.05)
+        with lock:
+            active -= 1
+
+    await asyncio.gather(*(run_image_task(_work) for _ in range(6)))
+    assert peak == 2
+
+
+async def test_broken_pool_falls_back_and_rebuilds(process_pool):
+    class _BrokenExecutor:
+        shut_down = False
+
+        def submit(self, fn, *args):
+            raise BrokenProcessPool("worker died")
+
+        def shutdown(self, wait=True, cancel_futures=False):
+            self.shut_down = True
+
+    broken = _BrokenExecutor()
+    image_pool._executor = broken
+
+    result = await run_image_task(sum, [1, 2, 3])
+
+    assert result == 6
+    assert broken.shut_down
+    assert image_pool._executor is None
+    stats = image_pool_stats()
+    assert (stats["broken"], stats["fallback"]) == (1, 1)
@@ -93,6 +93,52 @@ def test_tiny_image_does_not_crash():
     assert result.file_size >= 0
 
 
+def test_large_jpeg_keeps_aspect_ratio_within_budget():
+    """大图按字节预算一步缩小：结果 ≤ 上限、宽高比不变、尺寸小于原图。"""
+    from PIL import Image
+
+    from app.integration.image_processing import compress_image
+
+    img = Image.effect_noise((2400, 1600), 60).convert("RGB")
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=95)
+
+    result = compress_image(buf.getvalue(), max_bytes=150_000)
+
+    assert result.file_size <= 150_000
+    assert result.width < 2400
+    assert abs(result.width / result.height - 1.5) < 0.01
+    assert Image.open(io.BytesIO(result.data)).size == (result.width, result.height)
+
+
+def test_search_quality_picks_highest_fitting():
+    """质量二分查找返回放得进预算的最高候选质量。"""
+    from PIL import Image
+
+    from app.integration.image_processing import _QUALITIES, _encode, _search_quality
+
+    img = Image.effect_noise((400, 300), 40).convert("RGB")
+    budget = len(_encode(img, 70))
+    probes: dict[int, int] = {}
+
+    quality = _search_quality(img, budget, probes)
+
+    assert quality == 70
+    assert len(probes) < len(_QUALITIES)
+    assert _search_quality(img, 10, {}) is None
+
+
+def test_estimate_size_close_to_actual():
+    """大图体积估算（原分辨率小块拼图）与实际编码体积误差在 ±25% 以内。"""
+    from PIL import Image
+
+    from app.integration.image_processing import _encode, _estimate_size
+
+    img = Image.effect_noise((1600, 1200), 30).convert("RGB")
+    actual = len(_encode(img, 75))
+    assert 0.75 * actual <= _estimate_size(img, 75) <= 1.25 * actual
+
+
 # ─── TC2：异常场景 ─────────────────────────────────────────────────────────────
 
 def test_non_image_bytes_raises():
@@ -0,0 +1,169 @@
+"""filesystem 图片存储后端单测。
+
+覆盖：分片路径与往返一致、幂等不重写、原子写入失败不留残片、mmap 读取、流式分块、
+对象键越界拦截、工厂选择，以及与 image_blob 引用计数配合的保存 / 读取 / 孤儿清理。
+"""
+import os
+from datetime import date
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import undefer
+
+from app.core.models.image_blob import ImageBlob
+from app.integration.image_processing import CompressedImage
+from app.integration.image_storage.fs_backend import FilesystemImageStorage, object_key_for
+from app.repository.image_blob_repository import compute_content_hash
+from app.repository.observation_image_repository import (
+    delete_images_by_observation,
+    list_images_by_observation,
+)
+from app.service.image_store_service import load_image_bytes, sweep_orphan_files
+from app.service.observation_service import save_observation_with_images
+
+
+def test_put_get_roundtrip_sharded(tmp_path):
+    storage = FilesystemImageStorage(tmp_path)
+    data = b"\xff\xd8jpeg" * 10
+
+    stored = storage.put(data)
+    sha = compute_content_hash(data)
+
+    assert stored["storage_backend"] == "filesystem"
+    assert stored["content_hash"] == sha
+    assert stored["blob_content"] is None
+    assert stored["object_key"] == f"{sha[:2]}/{sha[2:4]}/{sha}"
+    assert (tmp_path / stored["object_key"]).read_bytes() == data
+    assert storage.get(stored) == data
+
+
+def test_put_is_idempotent_without_rewrite(tmp_path):
+    storage = FilesystemImageStorage(tmp_path)
+    path = tmp_path / storage.put(b"same")["object_key"]
+    inode = path.stat().st_ino
+
+    assert storage.put(b"same")["object_key"] == object_key_for(compute_content_hash(b"same"))
+    # 未经临时文件改名重写（只刷新修改时间）
+    assert path.stat().st_ino == inode
+    assert not list(path.parent.glob(".tmp-*"))
+
+
+def test_failed_write_leaves_no_partial_file(tmp_path, monkeypatch):
+    storage = FilesystemImageStorage(tmp_path)
+
+    def _boom(fd):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, "fsync", _boom)
+    with pytest.raises(OSError):
+        storage.put(b"partial")
+
+    assert [p for p in tmp_path.rglob("*") if p.is_file()] == []
+
+
+def test_large_file_read_and_stream(tmp_path):
+    storage = FilesystemImageStorage(tmp_path)
+    data = os.urandom(700 * 1024)  # 超过 mmap 阈值
+    stored = storage.put(data)
+
+    assert storage.get(stored) == data
+    chunks = list(storage.iter_chunks(stored, chunk_size=100 * 1024))
+    assert len(chunks) == 7
+    assert b"".join(chunks) == data
+
+
+def test_object_key_outside_root_rejected(tmp_path):
+    storage = FilesystemImageStorage(tmp_path / "images")
+    (tmp_path / "secret").write_bytes(b"x")
+
+    with pytest.raises(ValueError):
+        storage.get({"object_key": "../secret"})
+    with pytest.raises(ValueError):
+        storage.get({"object_key": None})
+
+
+def test_factory_selects_filesystem(tmp_path, monkeypatch):
+    from app.core.config import settings
+    from app.integration.image_storage import get_storage_backend
+
+    monkeypatch.setattr(settings, "IMAGE_STORAGE_BACKEND", "filesystem")
+    monkeypatch.setattr(settings, "IMAGE_STORAGE_DIR", str(tmp_path))
+
+    backend = get_storage_backend()
+    assert isinstance(backend, FilesystemImageStorage)
+    assert backend.root == tmp_path
+
+
+@pytest.fixture
+def fs_root(tmp_path, monkeypatch):
+    """读取侧经工厂按 image_blob.storage_backend 取后端，根目录同样指向临时目录。"""
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "IMAGE_STORAGE_DIR", str(tmp_path))
+    return tmp_path
+
+
+_OBS = {"tenant_id": 1, "user_id": 1, "obs_date": date(2026, 6, 10), "big_env": "户外"}
+
+
+def _images(*payloads: bytes) -> list[CompressedImage]:
+    return [CompressedImage(data=p, mime_type="image/jpeg", width=1, height=1) for p in payloads]
+
+
+async def test_save_load_and_sweep(async_session, fs_root):
+    storage = FilesystemImageStorage()
+    keep_id = await save_observation_with_images(
+        async_session, obs_data=_OBS, compressed_images=_images(b"a", b"b"), storage=storage,
+    )
+    drop_id = await save_observation_with_images(
+        async_session, obs_data=_OBS, compressed_images=_images(b"a", b"c"), storage=storage,
+    )
+
+    blobs = (await async_session.execute(
+        select(ImageBlob).options(undefer(ImageBlob.blob_content))
+    )).scalars().all()
+    assert {b.sha256: b.ref_count for b in blobs} == {
+        compute_content_hash(b"a"): 2, compute_content_hash(b"b"): 1, compute_content_hash(b"c"): 1,
+    }
+    assert all(b.blob_content is None and b.object_key for b in blobs)
+    assert all(b.storage_backend == "filesystem" for b in blobs)
+
+    images = await list_images_by_observation(async_session, 1, keep_id)
+    assert await load_image_bytes(async_session, images) == [b"a", b"b"]
+
+    await delete_images_by_observation(async_session, 1, drop_id)
+    assert await sweep_orphan_files(async_session, storage, min_age_seconds=0) == 1
+    assert not (fs_root / object_key_for(compute_content_hash(b"c"))).exists()
+    assert (fs_root / object_key_for(compute_content_hash(b"a"))).exists()
+
+    # 文件丢失时该图片返回 None，不影响同一记录的其他图片
+    (fs_root / object_key_for(compute_content_hash(b"b"))).unlink()
+    assert await load_image_bytes(async_session, images) == [b"a", None]
+
+
+async def test_sweep_skips_recent_files(async_session, tmp_path):
+    storage = FilesystemImageStorage(tmp_path)
+    storage.put(b"uncommitted")
+
+    assert await sweep_orphan_files(async_session, storage) == 0
+    assert list(storage.iter_stored())
+
+
+async def test_reput_refreshes_mtime_so_sweep_keeps_file(async_session, tmp_path):
+    """引用早已释放的旧文件被重新上传时刷新修改时间，引用提交前不会被清理。"""
+    storage = FilesystemImageStorage(tmp_path)
+    path = storage.local_path(storage.put(b"photo"))
+    stale = path.stat().st_mtime - 7200
+    os.utime(path, (stale, stale))
+
+    storage.put(b"photo")
+    assert path.stat().st_mtime > stale
+    assert await sweep_orphan_files(async_session, storage) == 0
+    assert path.exists()
+
+    # 列举之后才被重新 put 的文件：删除前按修改时间再确认
+    os.utime(path, (stale, stale))
+    listed = dict(storage.iter_stored(min_age_seconds=3600))
+    storage.put(b"photo")
+    assert not storage.remove_stale(listed[compute_content_hash(b"photo")], min_age_seconds=3600)
+    assert path.exists()
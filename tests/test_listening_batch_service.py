@@ -0,0 +1,216 @@
+"""tests/test_listening_batch_service.py — 一对一倾听全班批量生成：后台运行、逐领域落库、续跑与全局名额。"""
+import asyncio
+import io
+import json
+import unittest.mock as mock
+
+import pytest
+from PIL import Image
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.config import settings
+from app.core.database import Base
+from app.core.models.image_blob import ImageBlob
+from app.core.models.listening_batch import ListeningBatchImage, ListeningBatchItem
+from app.core.models.listening_image import ListeningImage
+from app.integration.image_processing import CompressedImage
+from app.integration.image_storage.blob_backend import BlobImageStorage
+from app.repository.ai_key_repository import save_ai_key
+from app.repository.listening_batch_repository import list_items
+from app.repository.listening_repository import list_domains_by_record
+from app.service.listening_batch_service import (
+    BATCH_DOMAINS,
+    BatchChild,
+    cancel_batch_job,
+    children_per_hour,
+    create_batch_job,
+    delete_batch_job,
+    get_batch_progress,
+    resume_batch_job,
+    run_batch_job,
+    start_batch_job,
+)
+from app.service.semester_calendar import build_semester_calendar
+
+_JOB = {
+    "tenant_id": 1, "user_id": 1, "obs_year": 2026, "obs_month": 3,
+    "grade": "小班", "term": "下学期", "class_name": "小一班", "observer": "王老师",
+}
+
+
+def _photo(seed: int) -> CompressedImage:
+    buf = io.BytesIO()
+    Image.new("RGB", (64, 48), ((seed * 37) % 256, (seed * 91) % 256, 160)).save(buf, format="JPEG")
+    return CompressedImage(data=buf.getvalue(), mime_type="image/jpeg", width=64, height=48)
+
+
+def _child(name: str, seed: int = 0) -> BatchChild:
+    return BatchChild(
+        child_name=name,
+        domain_images={d: [_photo(seed + i * 3 + j) for j in range(3)] for i, d in enumerate(BATCH_DOMAINS)},
+        child_age="4岁",
+    )
+
+
+def _ai_result(**_kwargs) -> dict:
+    return {
+        "goals": "目标", "image_descriptions": ["图1", "图2", "图3"], "indicators": [],
+        "evaluation": "评价", "support_strategy": "策略",
+    }
+
+
+@pytest.fixture
+async def sessions(tmp_path, monkeypatch):
+    """文件库（后台任务的多个会话共享同一数据库），并替换服务层的默认会话工厂。"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'batch.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with factory() as session:
+        await save_ai_key(session, 1, 1, "https://api.example.com/v1", "sk-v", "gpt-4o", key_type="vision")
+    monkeypatch.setattr("app.service.listening_batch_service.AsyncSessionLocal", factory)
+    monkeypatch.setattr("app.service.listening_batch_service.get_storage_backend", lambda: BlobImageStorage())
+    monkeypatch.setattr(
+        "app.service.listening_batch_service.get_semester_calendar",
+        mock.AsyncMock(return_value=build_semester_calendar(2026, 2026, None, None, {})),
+    )
+    yield factory
+    await engine.dispose()
+
+
+async def _create(sessions, children) -> int:
+    async with sessions() as session:
+        return await create_batch_job(session, job_data=_JOB, children=children, storage=BlobImageStorage())
+
+
+async def _count(sessions, model) -> int:
+    async with sessions() as session:
+        return (await session.execute(select(func.count()).select_from(model))).scalar_one()
+
+
+async def test_batch_job_saves_one_record_per_child(sessions):
+    job_id = await _create(sessions, [_child("张三"), _child("李四", seed=100)])
+    assert await _count(sessions, ListeningBatchImage) == 30
+    blobs = await _count(sessions, ImageBlob)
+
+    with mock.patch("app.service.listening_service.generate_listening_domain", side_effect=_ai_result) as ai:
+        await run_batch_job(job_id)
+
+    assert ai.await_count == 10
+    async with sessions() as session:
+        items = await list_items(session, job_id)
+        assert [i.status for i in items] == ["done", "done"]
+        domains = await list_domains_by_record(session, 1, items[0].record_id)
+        assert sorted(d.domain for d in domains) == sorted(BATCH_DOMAINS)
+        assert all(d.date_1 and d.date_1.month == 3 and d.date_1.weekday() < 5 for d in domains)
+        [progress] = await get_batch_progress(session, 1, 1)
+    assert await _count(sessions, ListeningImage) == 30
+    # 照片已转入倾听记录：批量照片行删除，内容仍被记录图片引用
+    assert await _count(sessions, ListeningBatchImage) == 0
+    assert await _count(sessions, ImageBlob) == blobs
+    assert progress.status == "finished" and progress.done == 2 and progress.total == 2
+    assert progress.elapsed_seconds > 0 and progress.children_per_hour is not None
+
+
+async def test_failed_domain_is_kept_and_resume_generates_only_remaining(sessions):
+    job_id = await _create(sessions, [_child("张三")])
+    calls: list[str] = []
+
+    async def _flaky(**kwargs):
+        calls.append(kwargs["context"]["domain"])
+        if kwargs["context"]["domain"] == "语言" and calls.count("语言") == 1:
+            raise RuntimeError("上游超时")
+        return _ai_result()
+
+    with mock.patch("app.service.listening_service.generate_listening_domain", side_effect=_flaky):
+        await run_batch_job(job_id)
+        async with sessions() as session:
+            [item] = await list_items(session, job_id)
+            assert item.status == "failed" and "语言" in item.error
+            # 其余四个领域的结果已落库
+            assert sorted(json.loads(item.results_json)) == sorted(set(BATCH_DOMAINS) - {"语言"})
+            [progress] = await get_batch_progress(session, 1, 1)
+            assert progress.status == "finished" and progress.failed == 1
+
+            assert await resume_batch_job(session, job_id, 1, 1)
+        await start_batch_job(job_id)
+
+    assert calls.count("语言") == 2 and len(calls) == 6
+    async with sessions() as session:
+        [item] = await list_items(session, job_id)
+    assert item.status == "done" and item.attempts == 2 and item.error is None
+
+
+async def test_cancel_returns_running_children_to_queue(sessions):
+    job_id = await _create(sessions, [_child("张三")])
+    started = asyncio.Event()
+
+    async def _slow(**_kwargs):
+        started.set()
+        await asyncio.sleep(30)
+
+    with mock.patch("app.service.listening_service.generate_listening_domain", side_effect=_slow):
+        start_batch_job(job_id)
+        await started.wait()
+        async with sessions() as session:
+            assert await cancel_batch_job(session, job_id, 1, 1)
+
+    async with sessions() as session:
+        [item] = await list_items(session, job_id)
+        [progress] = await get_batch_progress(session, 1, 1)
+    assert item.status == "pending"
+    assert progress.status == "cancelled" and not progress.active
+    assert await _count(sessions, ListeningBatchImage) == 15
+
+
+async def test_interrupted_child_is_rerun(sessions):
+    """应用在幼儿处理中途退出：下次运行时该幼儿重新排队。"""
+    job_id = await _create(sessions, [_child("张三")])
+    async with sessions() as session:
+        await session.execute(ListeningBatchItem.__table__.update().values(status="running"))
+        await session.commit()
+
+    with mock.patch("app.service.listening_service.generate_listening_domain", side_effect=_ai_result):
+        await run_batch_job(job_id)
+
+    async with sessions() as session:
+        [item] = await list_items(session, job_id)
+    assert item.status == "done"
+
+
+async def test_jobs_share_global_concurrency_budget(sessions, monkeypatch):
+    monkeypatch.setattr(settings, "LISTENING_BATCH_CONCURRENCY", 3)
+    jobs = [await _create(sessions, [_child(f"{j}-{c}", seed=j * 50 + c) for c in range(2)]) for j in range(2)]
+    in_flight, peak = 0, 0
+
+    async def _tracked(**_kwargs):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return _ai_result()
+
+    with mock.patch("app.service.listening_service.generate_listening_domain", side_effect=_tracked) as ai:
+        await asyncio.gather(*(start_batch_job(job_id) for job_id in jobs))
+
+    assert ai.await_count == 20
+    assert peak == 3
+
+
+async def test_delete_job_releases_photos(sessions):
+    job_id = await _create(sessions, [_child("张三")])
+    assert await _count(sessions, ImageBlob) > 0
+    async with sessions() as session:
+        assert await delete_batch_job(session, job_id, 1, 1)
+        # 其他用户无权操作
+        assert not await delete_batch_job(session, job_id, 1, 2)
+    assert await _count(sessions, ImageBlob) == 0
+    assert await _count(sessions, ListeningBatchItem) == 0
+
+
+def test_children_per_hour():
+    assert children_per_hour(30, 1800) == 60
+    assert children_per_hour(0, 1800) is None
+    assert children_per_hour(3, 0) is None
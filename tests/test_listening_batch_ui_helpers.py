@@ -0,0 +1,39 @@
+"""一对一倾听全班批量生成页面纯函数测试。"""
+from app.service.listening_batch_service import BatchProgress
+from app.ui.pages.listening_batch import (
+    child_name_from_filename,
+    format_batch_summary,
+    group_files_by_child,
+)
+
+
+def test_child_name_from_filename():
+    assert child_name_from_filename("张三_01.jpg") == "张三"
+    assert child_name_from_filename("张三-2.JPG") == "张三"
+    assert child_name_from_filename("张三 (3).png") == "张三"
+    assert child_name_from_filename("张三（12）.jpeg") == "张三"
+    assert child_name_from_filename("李小四05.jpg") == "李小四"
+    assert child_name_from_filename("王五.jpg") == "王五"
+    # 全为数字时保留原名
+    assert child_name_from_filename("IMG_0001.jpg") == "IMG"
+    assert child_name_from_filename("0001.jpg") == "0001"
+
+
+def test_group_files_by_child_keeps_first_seen_order():
+    files = [("李四_1.jpg", 1), ("张三_1.jpg", 2), ("李四_2.jpg", 3), ("张三_2.jpg", 4)]
+    groups = group_files_by_child(files)
+    assert list(groups) == ["李四", "张三"]
+    assert groups["李四"] == [("李四_1.jpg", 1), ("李四_2.jpg", 3)]
+
+
+def test_format_batch_summary():
+    p = BatchProgress(
+        job_id=7, status="running", obs_year=2026, obs_month=3, grade="小班", term="下学期",
+        pending=20, running=2, done=6, failed=1, elapsed_seconds=1800,
+    )
+    text = format_batch_summary(p)
+    assert text.startswith("#7  2026年3月  小班·下学期  运行中")
+    assert "完成 6/29" in text and "失败 1" in text and "12.0 人/小时" in text
+
+    idle = BatchProgress(job_id=8, status="finished", obs_year=2026, obs_month=3, grade=None, term=None)
+    assert format_batch_summary(idle) == "#8  2026年3月  已结束  完成 0/0"
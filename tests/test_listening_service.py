@@ -114,6 +114,138 @@ async def test_default_three_stars(async_session):
     assert stars == {0: 1, 1: 3}  # sort 1 未给 → 默认 3
 
 
+async def test_duplicate_in_flight_requests_coalesced(async_session):
+    """相同领域 + 图片 + 上下文的请求进行中时只调用一次 AI，各自拿到独立副本。"""
+    import asyncio
+
+    from app.repository.ai_key_repository import save_ai_key
+
+    await _seed_catalog(async_session, 2)
+    await save_ai_key(async_session, tenant_id=1, user_id=1,
+                      api_base_url="https://api.example.com/v1",
+                      plain_api_key="sk-v", model_name="gpt-4o", key_type="vision")
+
+    async def _slow_ai(**kwargs):
+        await asyncio.sleep(0.05)
+        return _ai_return(1)
+
+    with (
+        mock.patch("app.service.listening_service.generate_listening_domain",
+                   side_effect=_slow_ai) as mock_ai,
+        mock.patch("app.service.listening_service.compress_image",
+                   return_value=CompressedImage(b"c", "image/jpeg", 10, 10)),
+        mock.patch("app.service.listening_service.log_audit"),
+    ):
+        first = asyncio.create_task(generate_domain_content(
+            session=async_session, tenant_id=1, user_id=1,
+            domain="健康", images=[_FAKE_IMAGE], context=_CTX,
+        ))
+        await asyncio.sleep(0.01)
+        second = asyncio.create_task(generate_domain_content(
+            session=async_session, tenant_id=1, user_id=1,
+            domain="健康", images=[_FAKE_IMAGE], context=dict(_CTX),
+        ))
+        r1, r2 = await asyncio.gather(first, second)
+
+    assert mock_ai.await_count == 1
+    assert r1 == r2
+    assert r1 is not r2
+    assert r1["indicator_results"] is not r2["indicator_results"]
+
+
+async def test_generate_all_domains_runs_concurrently(async_session):
+    """五领域并行：总耗时约等于单次调用，按完成先后产出，图片一次性提交压缩。"""
+    import asyncio
+    import time
+
+    from app.repository.ai_key_repository import save_ai_key
+    from app.service.listening_service import generate_all_domains
+
+    await _seed_catalog(async_session, 2)
+    await save_ai_key(async_session, tenant_id=1, user_id=1,
+                      api_base_url="https://api.example.com/v1",
+                      plain_api_key="sk-v", model_name="gpt-4o", key_type="vision")
+    delays = {"健康": 0.25, "语言": 0.05, "社会": 0.15, "艺术": 0.1, "科学": 0.2}
+
+    async def _slow_ai(**kwargs):
+        await asyncio.sleep(delays[kwargs["context"]["domain"]])
+        return _ai_return(1)
+
+    with (
+        mock.patch("app.service.listening_service.generate_listening_domain",
+                   side_effect=_slow_ai) as mock_ai,
+        mock.patch("app.service.listening_service.compress_image",
+                   return_value=CompressedImage(b"c", "image/jpeg", 10, 10)) as mock_compress,
+        mock.patch("app.service.listening_service.log_audit") as mock_audit,
+    ):
+        started = time.perf_counter()
+        outcomes = [o async for o in generate_all_domains(
+            async_session, 1, 1,
+            domain_images={d: [d.encode() + _FAKE_IMAGE] * 3 for d in delays},
+            context=_CTX,
+        )]
+        elapsed = time.perf_counter() - started
+
+    assert [o.domain for o in outcomes] == sorted(delays, key=delays.get)
+    assert all(o.ok and o.result["goals"] == "目标1；目标2" for o in outcomes)
+    assert mock_ai.await_count == 5 and mock_audit.call_count == 5
+    assert mock_compress.call_count == 15
+    assert elapsed < 0.25 * 2  # 顺序执行约 0.75s
+
+
+async def test_generate_all_domains_keeps_successful_on_partial_failure(async_session):
+    """单领域失败只产出 error，其余领域照常完成；并发上限生效。"""
+    import asyncio
+
+    from app.core.exceptions import AiCallError
+    from app.repository.ai_key_repository import save_ai_key
+    from app.service.listening_service import generate_all_domains
+
+    await _seed_catalog(async_session, 2)
+    await save_ai_key(async_session, tenant_id=1, user_id=1,
+                      api_base_url="https://api.example.com/v1",
+                      plain_api_key="sk-v", model_name="gpt-4o", key_type="vision")
+    running = {"now": 0, "peak": 0}
+
+    async def _ai(**kwargs):
+        running["now"] += 1
+        running["peak"] = max(running["peak"], running["now"])
+        try:
+            await asyncio.sleep(0.02)
+            if kwargs["context"]["domain"] == "语言":
+                raise AiCallError("服务商超时")
+            return _ai_return(1)
+        finally:
+            running["now"] -= 1
+
+    with (
+        mock.patch("app.service.listening_service.generate_listening_domain", side_effect=_ai),
+        mock.patch("app.service.listening_service.compress_image",
+                   return_value=CompressedImage(b"c", "image/jpeg", 10, 10)),
+        mock.patch("app.service.listening_service.log_audit"),
+    ):
+        outcomes = {o.domain: o async for o in generate_all_domains(
+            async_session, 1, 1,
+            domain_images={d: [d.encode() + _FAKE_IMAGE] for d in ("健康", "语言", "社会")},
+            context=_CTX, concurrency=2,
+        )}
+
+    assert set(outcomes) == {"健康", "语言", "社会"}
+    assert outcomes["健康"].ok and outcomes["社会"].ok
+    assert not outcomes["语言"].ok and isinstance(outcomes["语言"].error, AiCallError)
+    assert running["peak"] == 2
+
+
+async def test_generate_all_domains_without_key_raises(async_session):
+    from app.service.listening_service import generate_all_domains
+
+    with pytest.raises(ConfigError):
+        async for _ in generate_all_domains(
+            async_session, 1, 1, domain_images={"健康": [_FAKE_IMAGE]}, context=_CTX,
+        ):
+            pass
+
+
 async def test_prompt_from_db_overrides_default(async_session):
     """DB 有激活 one_on_one_listening 提示词 → 作为 system_prompt 传给 AI。"""
     from app.repository.ai_key_repository import save_ai_key
@@ -144,10 +276,13 @@ async def test_prompt_from_db_overrides_default(async_session):
 
 async def test_save_record_with_all(async_session):
     """save_record_with_all：写主表 + 各领域 + 图片 + 指标结果，计数正确。"""
+    from app.core.models.listening_image import ListeningImage
+    from app.repository.image_blob_repository import get_inline_contents
     from app.repository.listening_image_repository import list_images_by_record
     from app.repository.listening_repository import (
         get_record_by_id, list_domains_by_record, list_indicator_results,
     )
+    from app.service.image_store_service import load_image_bytes
 
     ci = CompressedImage(data=b"\xff\xd8\xffimg", mime_type="image/jpeg", width=10, height=10)
     domains = []
@@ -177,7 +312,9 @@ async def test_save_record_with_all(async_session):
     assert len(await list_indicator_results(async_session, 1, rid)) == 4  # 2 领域 × 2 指标
     health_imgs = await list_images_by_record(async_session, 1, rid, domain="健康")
     assert health_imgs[0].image_description == "d1"
-    assert health_imgs[0].blob_content == b"\xff\xd8\xffimg"
+    # 字节按内容去重存于 image_blob
+    assert await get_inline_contents(async_session, ListeningImage, [health_imgs[0].id]) == {health_imgs[0].id: None}
+    assert await load_image_bytes(async_session, health_imgs[:1]) == [b"\xff\xd8\xffimg"]
 
 
 # ─── P8a — 详情装配 / 导出转换 / 覆盖更新 ─────────────────────────────────────
@@ -325,6 +462,37 @@ async def test_update_record_with_all(async_session):
     assert detail["domains"][0]["obs_month"] == 5
 
 
+async def test_update_record_with_all_failure_releases_old_images(async_session):
+    """重建子表失败时，已删除的旧图片行的 image_blob 引用仍被释放（不泄漏）。"""
+    from sqlalchemy import select
+
+    from app.core.exceptions import StorageError
+    from app.core.models.image_blob import ImageBlob
+    from app.service.listening_service import update_record_with_all
+
+    cat_ids = await _seed_catalog_multi(async_session)
+    rid, record_data = await _save_two_domain_record(async_session, cat_ids)
+    assert (await async_session.execute(select(ImageBlob))).scalars().all()
+
+    class _BrokenStorage(BlobImageStorage):
+        async def aput(self, data, *, mime_type="image/jpeg"):
+            raise StorageError("对象存储不可用")
+
+    new_domains = [{
+        "domain": "健康", "obs_year": 2026, "obs_month": 5,
+        "date_1": date(2026, 5, 4), "date_2": None, "date_3": None,
+        "goals": "g", "evaluation": "e", "support_strategy": "s",
+        "compressed_images": [CompressedImage(data=b"new", mime_type="image/jpeg", width=1, height=1)],
+        "image_descriptions": [], "indicator_results": [],
+    }]
+    with pytest.raises(StorageError):
+        await update_record_with_all(
+            async_session, record_id=rid, record_data=record_data,
+            domains=new_domains, storage=_BrokenStorage(),
+        )
+    assert (await async_session.execute(select(ImageBlob))).scalars().all() == []
+
+
 async def test_update_record_with_all_not_found(async_session):
     """更新不存在/无权限的记录 → AppError。"""
     from app.core.exceptions import AppError
@@ -0,0 +1,204 @@
+"""tests/test_media.py — 缩略图生成与 /media 图片接口（签名地址、强 ETag、304、租户隔离）。"""
+import asyncio
+import io
+from datetime import date
+
+import pytest_asyncio
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from PIL import Image
+from sqlalchemy import select
+from sqlalchemy.orm import undefer
+
+from app.api import create_api_router
+from app.api.deps import get_db
+from app.core.config import settings
+from app.core.models.game_observation_image import GameObservationImage
+from app.core.models.image_thumbnail import ImageThumbnail
+from app.integration.image_processing import THUMBNAIL_SIZES, CompressedImage, make_thumbnails
+from app.integration.image_storage.blob_backend import BlobImageStorage
+from app.repository import listening_image_repository, observation_image_repository
+from app.repository.image_blob_repository import compute_content_hash
+from app.service import media_service
+from app.service.listening_service import save_record_with_all
+from app.service.media_service import ensure_thumbnails, media_url, verify_media_signature
+
+
+def _jpeg(width: int = 1600, height: int = 1200) -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", (width, height), (100, 149, 237)).save(buf, format="JPEG")
+    return buf.getvalue()
+
+
+async def _thumbs(session) -> dict[tuple[str, str], ImageThumbnail]:
+    rows = (await session.execute(
+        select(ImageThumbnail).options(undefer(ImageThumbnail.blob_content))
+    )).scalars().all()
+    return {(t.sha256, t.size): t for t in rows}
+
+
+async def _save_listening(session, data: bytes) -> int:
+    domain = {
+        "domain": "健康", "obs_year": 2026, "obs_month": 4, "date_1": date(2026, 4, 1),
+        "goals": "目标", "evaluation": "评价", "support_strategy": "策略",
+        "compressed_images": [CompressedImage(data=data, mime_type="image/jpeg", width=1600, height=1200)],
+        "image_descriptions": [], "indicator_results": [],
+    }
+    record = {"tenant_id": 1, "user_id": 1, "obs_year": 2026, "obs_month": 4, "child_name": "小明"}
+    rid = await save_record_with_all(
+        session, record_data=record, domains=[domain], storage=BlobImageStorage(),
+    )
+    return (await listening_image_repository.list_images_by_record(session, 1, rid))[0].id
+
+
+@pytest_asyncio.fixture
+async def media_client(async_session, monkeypatch):
+    monkeypatch.setattr(settings, "API_KEYS", "testkey:1")
+    monkeypatch.setattr(settings, "API_SIGNING_SECRET", "")
+
+    fastapi_app = FastAPI()
+    fastapi_app.include_router(create_api_router())
+
+    async def _override_db():
+        yield async_session
+
+    fastapi_app.dependency_overrides[get_db] = _override_db
+    transport = ASGITransport(app=fastapi_app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+def test_make_thumbnails_fits_each_size():
+    thumbs = make_thumbnails(_jpeg())
+    assert set(thumbs) == set(THUMBNAIL_SIZES)
+    for name, edge in THUMBNAIL_SIZES.items():
+        assert max(thumbs[name].width, thumbs[name].height) == edge
+    assert thumbs["sm"].file_size < thumbs["md"].file_size
+
+    small = make_thumbnails(_jpeg(100, 80), ("md",))
+    assert (small["md"].width, small["md"].height) == (100, 80)
+
+
+def test_media_url_signature_and_expiry():
+    url = media_url("listening", 7, 1, "md", now=1_000_000)
+    query = dict(part.split("=") for part in url.split("?", 1)[1].split("&"))
+    exp, sig = int(query["exp"]), query["sig"]
+    assert url == media_url("listening", 7, 1, "md", now=1_000_000 + 3600)  # 同一天内地址不变
+
+    assert verify_media_signature("listening", 7, 1, exp, sig, now=1_000_000)
+    assert not verify_media_signature("listening", 8, 1, exp, sig, now=1_000_000)
+    assert not verify_media_signature("listening", 7, 2, exp, sig, now=1_000_000)
+    assert not verify_media_signature("listening", 7, 1, exp, sig, now=exp + 1)
+
+
+async def test_save_generates_thumbnails_once(async_session):
+    data = _jpeg()
+    sha = compute_content_hash(data)
+    await _save_listening(async_session, data)
+
+    thumbs = await _thumbs(async_session)
+    assert set(thumbs) == {(sha, size) for size in THUMBNAIL_SIZES}
+    assert all(t.blob_content and t.content_hash == compute_content_hash(t.blob_content) for t in thumbs.values())
+
+    # 同一内容再次保存：缩略图已存在，不重复生成
+    assert await ensure_thumbnails(async_session, BlobImageStorage(), [(sha, data)]) == 0
+    await _save_listening(async_session, data)
+    assert len(await _thumbs(async_session)) == len(THUMBNAIL_SIZES)
+
+
+async def test_undecodable_image_skips_thumbnails(async_session):
+    await _save_listening(async_session, b"not-an-image")
+    assert await _thumbs(async_session) == {}
+
+
+async def test_media_endpoint_etag_and_not_modified(async_session, media_client):
+    image_id = await _save_listening(async_session, _jpeg())
+    sha_sm = next(t.content_hash for (_, size), t in (await _thumbs(async_session)).items() if size == "sm")
+
+    resp = await media_client.get(media_url("listening", image_id, 1))
+    assert resp.status_code == 200
+    assert resp.headers["etag"] == f'"{sha_sm}"'
+    assert resp.headers["cache-control"].startswith("private, max-age=")
+    assert resp.headers["content-type"] == "image/jpeg"
+    assert Image.open(io.BytesIO(resp.content)).size == (192, 144)
+
+    again = await media_client.get(
+        media_url("listening", image_id, 1), headers={"If-None-Match": resp.headers["etag"]},
+    )
+    assert again.status_code == 304
+    assert again.content == b""
+
+    orig = await media_client.get(media_url("listening", image_id, 1, "orig"))
+    assert Image.open(io.BytesIO(orig.content)).size == (1600, 1200)
+
+
+async def test_media_endpoint_auth_and_tenant_isolation(async_session, media_client):
+    image_id = await _save_listening(async_session, _jpeg())
+
+    tampered = media_url("listening", image_id, 1).replace("sig=", "sig=0")
+    assert (await media_client.get(tampered)).status_code == 403
+    assert (await media_client.get(f"/media/listening/{image_id}")).status_code == 401
+    assert (await media_client.get(media_url("listening", image_id, 2))).status_code == 404
+    assert (await media_client.get(media_url("unknown", image_id, 1))).status_code == 404
+
+    by_key = await media_client.get(f"/media/listening/{image_id}?size=md", headers={"X-Api-Key": "testkey"})
+    assert by_key.status_code == 200
+
+
+async def test_missing_thumbnails_backfilled_in_background(async_session, media_client):
+    data = _jpeg()
+    image = await observation_image_repository.add_image(
+        async_session, tenant_id=1, user_id=1, observation_id=1, image_index=1, blob_content=data,
+    )
+    await async_session.commit()
+    assert await _thumbs(async_session) == {}
+
+    # 请求中不生成缩略图：先返回原图（不长期缓存），生成排入后台任务
+    resp = await media_client.get(media_url("observation", image.id, 1, "md"))
+    assert resp.status_code == 200
+    assert resp.headers["cache-control"] == "private, no-cache"
+    assert Image.open(io.BytesIO(resp.content)).size == (1600, 1200)
+
+    await asyncio.gather(*list(media_service._backfill_tasks.values()))
+    assert len(await _thumbs(async_session)) == len(THUMBNAIL_SIZES)
+
+    resp = await media_client.get(media_url("observation", image.id, 1, "md"))
+    assert resp.headers["cache-control"].startswith("private, max-age=")
+    assert Image.open(io.BytesIO(resp.content)).size == (640, 480)
+
+
+async def test_legacy_inline_row_served(async_session, media_client):
+    data = _jpeg(400, 300)
+    legacy = GameObservationImage(
+        tenant_id=1, user_id=1, observation_id=1, image_index=1, blob_content=data, content_hash=None,
+    )
+    async_session.add(legacy)
+    await async_session.commit()
+
+    resp = await media_client.get(media_url("observation", legacy.id, 1))
+    assert resp.status_code == 200
+    assert Image.open(io.BytesIO(resp.content)).size == (192, 144)
+    assert await _thumbs(async_session) == {}
+
+
+async def test_legacy_inline_row_mime_detected_from_bytes(async_session, media_client):
+    buf = io.BytesIO()
+    Image.new("RGB", (40, 30), (1, 2, 3)).save(buf, format="PNG")
+    legacy = GameObservationImage(
+        tenant_id=1, user_id=1, observation_id=1, image_index=1, blob_content=buf.getvalue(), content_hash=None,
+    )
+    async_session.add(legacy)
+    await async_session.commit()
+
+    orig = await media_client.get(media_url("observation", legacy.id, 1, "orig"))
+    assert orig.headers["content-type"] == "image/png"
+    assert orig.content == buf.getvalue()
+
+
+async def test_thumbnails_removed_with_last_reference(async_session):
+    await _save_listening(async_session, _jpeg())
+    assert await _thumbs(async_session)
+
+    await listening_image_repository.delete_images_by_record(async_session, 1, 1)
+    await async_session.commit()
+    assert await _thumbs(async_session) == {}
@@ -178,7 +178,8 @@ async def test_game_observation_image_blob_roundtrip(async_session):
     )
     async_session.add(img)
     await async_session.commit()
-    await async_session.refresh(img)
+    # blob_content 为延迟加载列，需显式读取
+    await async_session.refresh(img, ["blob_content"])
 
     assert img.blob_content == sample_bytes
     assert img.image_index == 1
@@ -14,6 +14,7 @@ import pytest
 
 from app.core.exceptions import ConfigError
 from app.repository.observation_image_repository import list_images_by_observation
+from app.service.image_store_service import load_image_bytes
 from app.repository.observation_repository import get_observation_by_id
 from app.service.observation_service import (
     generate_observation_content,
@@ -224,6 +225,5 @@ async def test_save_observation_with_images(async_session):
     # 取回图片（有序）
     images = await list_images_by_observation(async_session, observation_id=obs_id, tenant_id=1)
     assert len(images) == 2
-    assert images[0].blob_content == b"img1_data"
-    assert images[1].blob_content == b"img2_data"
+    assert await load_image_bytes(async_session, images) == [b"img1_data", b"img2_data"]
     assert images[0].image_index < images[1].image_index
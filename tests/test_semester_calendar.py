@@ -0,0 +1,126 @@
+"""tests/test_semester_calendar.py — 学期日历索引：与逐项计算结果一致、按月工作日、缓存与失效。"""
+import random
+from datetime import date, timedelta
+
+from app.integration.holiday_client.client import (
+    build_year_calendar,
+    get_holiday_name,
+    get_special_day_tags,
+    install_year_calendar,
+    is_adjusted_workday,
+    is_holiday,
+    is_near_holiday,
+    set_year_loader,
+)
+from app.service.date_service import (
+    get_week_number,
+    get_weekday_cn,
+    is_within_semester,
+    is_workday,
+    pick_three_workdays,
+)
+from app.service.semester_calendar import (
+    build_semester_calendar,
+    get_semester_calendar,
+    invalidate_semester_calendars,
+)
+
+_SEM_START, _SEM_END = date(2025, 9, 1), date(2026, 1, 16)
+
+
+def _year(year: int) -> dict:
+    entries = {
+        2025: {"10-01": (True, "国庆节"), "10-02": (True, "国庆节"), "09-28": (False, "国庆节前补班")},
+        2026: {"01-01": (True, "元旦"), "01-04": (False, "元旦后补班")},
+    }.get(year, {})
+    return build_year_calendar(year, {
+        md: {"holiday": flag, "name": name, "date": f"{year}-{md}"} for md, (flag, name) in entries.items()
+    })
+
+
+def _install() -> None:
+    for year in (2025, 2026, 2027):
+        install_year_calendar(year, _year(year))
+
+
+async def test_index_matches_per_call_functions():
+    _install()
+    cal = await get_semester_calendar(_SEM_START, _SEM_END)
+    d = date(2025, 1, 1)
+    while d <= date(2026, 12, 31):
+        info = cal.day(d)
+        assert info is not None
+        assert info.weekday_cn == get_weekday_cn(d)
+        assert info.is_workday == is_workday(d)
+        assert info.week_number == get_week_number(_SEM_START, d)
+        assert info.within_semester == is_within_semester(_SEM_START, _SEM_END, d)
+        assert info.is_holiday == await is_holiday(d)
+        assert info.is_adjusted_workday == await is_adjusted_workday(d)
+        assert info.holiday_name == await get_holiday_name(d)
+        assert list(info.special_tags) == get_special_day_tags(d)
+        if d.year == 2025:
+            assert info.is_near_holiday == await is_near_holiday(d)
+        d += timedelta(days=1)
+    assert cal.day(date(2024, 12, 31)) is None
+    assert cal.day(date(2025, 12, 31)).is_near_holiday is True
+
+
+def test_unavailable_year_degrades_to_none():
+    cal = build_semester_calendar(2025, 2025, None, None, {2025: None})
+    info = cal.day(date(2025, 10, 1))
+    assert info.is_holiday is None and info.is_near_holiday is None and info.is_adjusted_workday is None
+    assert info.week_number is None and info.within_semester is None
+    assert info.is_workday is True and info.weekday_cn == "周三"
+    assert not cal.holidays_known(2025) and not cal.complete
+    # 数据不可用时按非节假日选取工作日（降级原则）
+    assert len(cal.workdays_in_month(2025, 10)) == 23
+
+
+def test_pick_three_workdays_uses_index():
+    cal = build_semester_calendar(2025, 2025, None, None, {2025: _year(2025)})
+    workdays = cal.workdays_in_month(2025, 10)
+    assert date(2025, 10, 1) not in workdays and date(2025, 9, 28) not in workdays
+    assert all(d.month == 10 and d.weekday() < 5 for d in workdays)
+    picked = pick_three_workdays(2025, 10, rng=random.Random(1), semester_calendar=cal)
+    assert len(picked) == 3 and set(picked) <= set(workdays) and picked == sorted(picked)
+
+
+async def test_cached_until_holiday_data_or_semester_changes():
+    _install()
+    first = await get_semester_calendar(_SEM_START, _SEM_END)
+    assert await get_semester_calendar(_SEM_START, _SEM_END) is first
+
+    # 节假日数据刷新 → 重建
+    install_year_calendar(2025, build_year_calendar(2025, {}))
+    rebuilt = await get_semester_calendar(_SEM_START, _SEM_END)
+    assert rebuilt is not first and rebuilt.day(date(2025, 10, 1)).is_holiday is False
+
+    # 学期变化 → 新索引；显式失效后重建
+    other = await get_semester_calendar(date(2025, 9, 8), _SEM_END)
+    assert other.day(date(2025, 9, 8)).week_number == 1
+    invalidate_semester_calendars()
+    assert await get_semester_calendar(_SEM_START, _SEM_END) is not rebuilt
+
+
+async def test_incomplete_index_fills_in_when_data_arrives():
+    calls: list[int] = []
+
+    async def _unavailable(year):
+        calls.append(year)
+        return None
+
+    set_year_loader(_unavailable)
+    cal = await get_semester_calendar(covering=[date(2025, 10, 1)])
+    assert cal.day(date(2025, 10, 1)).is_holiday is None
+
+    # 节假日数据未变化时复用不完整的索引，不再重复加载
+    assert await get_semester_calendar(covering=[date(2025, 10, 1)]) is cal
+    assert calls == [2025, 2026]
+
+    # 后台同步完成后（版本号递增）下一次获取即补全
+    install_year_calendar(2025, _year(2025))
+    install_year_calendar(2026, _year(2026))
+    cal = await get_semester_calendar(covering=[date(2025, 10, 1)])
+    assert cal.complete
+    assert cal.day(date(2025, 10, 1)).is_holiday is True
+    assert cal.day(date(2025, 12, 31)).is_near_holiday is True
@@ -0,0 +1,87 @@
+"""tests/test_single_flight.py — 进行中重复请求合并测试。"""
+
+import asyncio
+
+import pytest
+
+from app.core.single_flight import SingleFlight, fingerprint
+
+
+def test_fingerprint_stable_and_distinguishing():
+    assert fingerprint(1, {"b": 2, "a": 1}) == fingerprint(1, {"a": 1, "b": 2})
+    assert fingerprint(1, {"a": 1}) != fingerprint(2, {"a": 1})
+    assert fingerprint([b"img"]) == fingerprint([b"img"])
+    assert fingerprint([b"img"]) != fingerprint([b"img2"])
+
+
+async def test_concurrent_duplicates_share_one_call():
+    flight = SingleFlight("t")
+    calls = 0
+    gate = asyncio.Event()
+
+    async def _work() -> dict:
+        nonlocal calls
+        calls += 1
+        await gate.wait()
+        return {"v": 1}
+
+    waiters = [asyncio.create_task(flight.do("k", _work)) for _ in range(3)]
+    await asyncio.sleep(0)
+    assert flight.in_flight("k")
+    gate.set()
+    results = await asyncio.gather(*waiters)
+
+    assert calls == 1
+    assert results == [{"v": 1}] * 3
+    assert (flight.leaders, flight.coalesced) == (1, 2)
+    assert not flight.in_flight("k")
+
+
+async def test_exception_shared_with_all_waiters():
+    flight = SingleFlight("t")
+    calls = 0
+
+    async def _boom():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream failed")
+
+    results = await asyncio.gather(
+        flight.do("k", _boom), flight.do("k", _boom), return_exceptions=True
+    )
+    assert calls == 1
+    assert all(isinstance(r, ValueError) for r in results)
+
+
+async def test_completed_call_not_reused():
+    """只合并进行中的请求：完成后再次调用会重新执行。"""
+    flight = SingleFlight("t")
+    calls = 0
+
+    async def _work():
+        nonlocal calls
+        calls += 1
+        return calls
+
+    assert await flight.do("k", _work) == 1
+    assert await flight.do("k", _work) == 2
+
+
+async def test_cancelled_waiter_does_not_cancel_others():
+    flight = SingleFlight("t")
+    gate = asyncio.Event()
+
+    async def _work():
+        await gate.wait()
+        return "ok"
+
+    leader = asyncio.create_task(flight.do("k", _work))
+    follower = asyncio.create_task(flight.do("k", _work))
+    await asyncio.sleep(0)
+    leader.cancel()
+    await asyncio.sleep(0)
+    gate.set()
+    assert await follower == "ok"
+    with pytest.raises(asyncio.CancelledError):
+        await leader
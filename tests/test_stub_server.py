@@ -0,0 +1,94 @@
+"""tests/test_stub_server.py — 基准桩服务器：延迟分布、视觉负载校验、端到端调用。"""
+
+import base64
+import random
+
+import pytest
+
+from app.core.exceptions import AiCallError
+from app.integration.ai_client import retry_policy
+from app.integration.ai_client.base import call_ai, call_ai_text_stream
+from app.integration.ai_client.http_pool import close_all_clients
+from app.integration.ai_client.listening_client import generate_listening_domain
+from benchmarks.stub_server import inspect_vision, latency_sampler, run_stub
+
+_JPEG = b"\xff\xd8\xff\xe0" + b"\x00" * 32
+
+
+def _image_message(url: str) -> list[dict]:
+    return [{"role": "user", "content": [
+        {"type": "text", "text": "t"},
+        {"type": "image_url", "image_url": {"url": url}},
+    ]}]
+
+
+@pytest.fixture(autouse=True)
+def _no_backoff(monkeypatch):
+    monkeypatch.setattr(retry_policy.settings, "AI_RETRY_BACKOFF_MAX", 0)
+
+
+@pytest.mark.parametrize(
+    "spec, low, high",
+    [(0.2, 0.2, 0.2), ("fixed:0.1", 0.1, 0.1), ("uniform:0.1,0.3", 0.1, 0.3),
+     ("normal:0.2,0.05", 0.0, 10.0), ("lognormal:0.5,0.3", 0.0, 10.0), ("exp:0.2", 0.0, 10.0)],
+)
+def test_latency_sampler(spec, low, high):
+    sample = latency_sampler(spec)
+    rng = random.Random(1)
+    assert all(low <= sample(rng) <= high for _ in range(50))
+
+
+def test_latency_sampler_rejects_unknown():
+    with pytest.raises(ValueError):
+        latency_sampler("zipf:1")
+
+
+def test_inspect_vision_counts_valid_images():
+    url = "data:image/jpeg;base64," + base64.b64encode(_JPEG).decode()
+    assert inspect_vision(_image_message(url)) == (1, len(_JPEG), None)
+
+
+@pytest.mark.parametrize(
+    "url",
+    ["https://example.com/a.jpg",
+     "data:image/jpeg;base64,@@@",
+     "data:image/png;base64," + base64.b64encode(_JPEG).decode()],
+)
+def test_inspect_vision_rejects_bad_payload(url):
+    count, _, error = inspect_vision(_image_message(url))
+    assert count == 0 and error
+
+
+def test_inspect_vision_size_limit():
+    url = "data:image/jpeg;base64," + base64.b64encode(_JPEG).decode()
+    assert inspect_vision(_image_message(url), max_image_bytes=8)[2]
+
+
+async def test_stub_serves_app_clients_end_to_end():
+    """真实 HTTP 往返：JSON / 流式 / 视觉（图片描述数量随图片数变化）。"""
+    stats: dict = {}
+    async with run_stub(tokens=3, stats=stats) as base_url:
+        assert await call_ai([{"role": "user", "content": "x"}], base_url, "sk") == {"ok": True}
+        parts = [d async for d in call_ai_text_stream([{"role": "user", "content": "y"}], base_url, "sk")]
+        assert "".join(parts) == "字0字1字2"
+        result = await generate_listening_domain(
+            images=[_JPEG, _JPEG], context={"domain": "语言"}, indicators=[],
+            api_base_url=base_url, api_key="sk",
+        )
+        assert len(result["image_descriptions"]) == 2
+        with pytest.raises(AiCallError) as exc_info:
+            await call_ai(_image_message("https://example.com/a.jpg"), base_url, "sk")
+        assert exc_info.value.status_code == 400
+    await close_all_clients()
+
+    assert stats["images"] == 2
+    assert stats["vision_rejected"] == 1
+
+
+async def test_stub_injected_5xx_is_retried():
+    stats: dict = {}
+    async with run_stub(error_rate_5xx=1.0, stats=stats) as base_url:
+        with pytest.raises(AiCallError):
+            await call_ai([{"role": "user", "content": "x"}], base_url, "sk")
+    await close_all_clients()
+    assert stats["injected_5xx"] == 3
@@ -0,0 +1,125 @@
+"""tests/test_template_cache.py — Word 模板解析缓存：只解析一次、副本独立、模板变更后重新解析。"""
+import io
+import os
+import shutil
+from datetime import date
+
+from docx import Document
+
+from app.core.models.daily_plan import DailyPlan
+from app.integration.word_export import exporter
+from app.integration.word_export.listening_exporter import export_batch_by_domain
+from app.integration.word_export.template_cache import (
+    clear_template_cache,
+    open_template,
+    template_derived,
+    template_document,
+    template_parse_count,
+)
+
+
+def _copy_template(tmp_path):
+    path = tmp_path / "teacherplan.docx"
+    shutil.copyfile(exporter.TEMPLATE_PATH, path)
+    return path
+
+
+def test_parsed_once_and_copies_are_independent(tmp_path):
+    clear_template_cache()
+    path = _copy_template(tmp_path)
+    first = open_template(path)
+    first.tables[0].cell(0, 0).text = "已修改"
+    second = open_template(path)
+    assert template_parse_count() == 1
+    assert second.tables[0].cell(0, 0).text != "已修改"
+    # 副本可正常保存并重新打开
+    buf = io.BytesIO()
+    first.save(buf)
+    assert Document(io.BytesIO(buf.getvalue())).tables[0].cell(0, 0).text == "已修改"
+
+
+def test_clone_after_reading_shared_template(tmp_path):
+    """共享模板被读取过（正文代理已缓存）后，克隆出的副本写入的内容仍能保存。"""
+    clear_template_cache()
+    path = _copy_template(tmp_path)
+    assert template_document(path).tables
+    doc = open_template(path)
+    doc.tables[0].cell(1, 0).text = "5 月 12 日"
+    buf = io.BytesIO()
+    doc.save(buf)
+    assert Document(io.BytesIO(buf.getvalue())).tables[0].cell(1, 0).text == "5 月 12 日"
+    assert template_document(path).tables[0].cell(1, 0).text == ""
+
+
+def test_reparsed_only_when_content_changes(tmp_path):
+    clear_template_cache()
+    path = _copy_template(tmp_path)
+    open_template(path)
+
+    # 仅修改时间变化：哈希一致，不重新解析
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    open_template(path)
+    assert template_parse_count() == 1
+
+    # 内容变化：重新解析
+    changed = Document(str(path))
+    changed.tables[0].cell(0, 0).text = "新模板"
+    changed.save(str(path))
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 2 * 10**9))
+    assert open_template(path).tables[0].cell(0, 0).text == "新模板"
+    assert template_parse_count() == 2
+
+
+def test_prepared_variant_cached(tmp_path):
+    clear_template_cache()
+    path = _copy_template(tmp_path)
+    calls = []
+
+    def _strip_tables(doc):
+        calls.append(1)
+        for tbl in list(doc.element.body.iterchildren("{*}tbl")):
+            doc.element.body.remove(tbl)
+
+    assert open_template(path, prepare=_strip_tables).tables == []
+    assert open_template(path, prepare=_strip_tables).tables == []
+    assert open_template(path).tables
+    assert calls == [1] and template_parse_count() == 1
+
+
+def test_derived_cached_until_template_changes(tmp_path):
+    clear_template_cache()
+    path = _copy_template(tmp_path)
+    calls = []
+
+    def _rows(doc):
+        calls.append(1)
+        return len(doc.tables[0].rows)
+
+    first = template_derived(path, "rows", _rows)
+    assert template_derived(path, "rows", _rows) == first and len(calls) == 1
+
+    changed = Document(str(path))
+    changed.tables[0].add_row()
+    changed.save(str(path))
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert template_derived(path, "rows", _rows) == first + 1 and len(calls) == 2
+
+
+def test_batch_exports_parse_each_template_once():
+    clear_template_cache()
+    plans = [
+        (DailyPlan(
+            plan_date=date(2026, 3, d), week_number=1, weekday_cn="周一",
+            grade="中班", class_name="一班", activity_process_adapted="步骤。",
+        ), [{"text": "步骤。", "changed": True}])
+        for d in range(2, 7)
+    ]
+    combined = Document(io.BytesIO(exporter.export_batch_daily_plans(plans)))
+    assert len(combined.tables) == 5
+    record = {"child_name": "张三", "child_age": "4岁"}
+    domains = [{"domain": "健康", "obs_year": 2026, "obs_month": 3, "goals": "目标"}]
+    export_batch_by_domain([(record, domains), ({**record, "child_name": "李四"}, domains)])
+    assert template_parse_count() == 2
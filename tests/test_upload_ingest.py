@@ -0,0 +1,110 @@
+"""tests/test_upload_ingest.py — 上传摄取：文件头校验、大小上限、落盘与后台压缩。"""
+import hashlib
+import io
+
+import pytest
+from PIL import Image
+
+from app.core.exceptions import AppError
+from app.core.single_flight import fingerprint
+from app.integration.upload_ingest import ingest_upload
+
+
+class _FakeUpload:
+    """同 NiceGUI FileUpload 的 size() / iterate() 接口；记录实际读取的块数。"""
+
+    def __init__(self, data: bytes, *, declared: int | None = None, name: str = "photo.jpg") -> None:
+        self.name = name
+        self._data = data
+        self._declared = len(data) if declared is None else declared
+        self.chunks_read = 0
+
+    def size(self) -> int:
+        return self._declared
+
+    async def _gen(self, chunk_size: int):
+        for i in range(0, len(self._data), chunk_size):
+            self.chunks_read += 1
+            yield self._data[i:i + chunk_size]
+
+    def iterate(self, *, chunk_size: int = 1024 * 1024):
+        return self._gen(chunk_size)
+
+
+def _photo(width: int = 800, height: int = 600, fmt: str = "JPEG") -> bytes:
+    buf = io.BytesIO()
+    Image.effect_noise((width, height), 64).convert("RGB").save(buf, format=fmt)
+    return buf.getvalue()
+
+
+@pytest.fixture
+def temp_dir(tmp_path, monkeypatch):
+    import tempfile
+
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    return tmp_path
+
+
+async def test_small_upload_kept_in_memory_and_compressed_in_background():
+    data = _photo()
+    upload = await ingest_upload(_FakeUpload(data))
+
+    assert (upload.header.format, upload.header.width, upload.header.height) == ("JPEG", 800, 600)
+    assert upload.data == data and upload.path is None
+    assert upload.sha256 == hashlib.sha256(data).hexdigest()
+    compressed = await upload.compressed()
+    assert (compressed.width, compressed.height) == (800, 600)
+    assert await upload.compressed() is compressed
+
+
+async def test_large_upload_spills_to_temp_file(temp_dir):
+    data = _photo(1600, 1200, "PNG")
+    upload = await ingest_upload(_FakeUpload(data), spill_bytes=256 * 1024, landscape=True)
+
+    assert upload.data is None
+    assert upload.path.parent == temp_dir and upload.path.read_bytes() == data
+    assert await upload.read() == data
+    compressed = await upload.compressed()
+    assert compressed.mime_type == "image/jpeg" and compressed.width == 1600
+
+    upload.discard()
+    assert not upload.path.exists()
+
+
+async def test_declared_size_over_limit_rejected_before_reading():
+    source = _FakeUpload(b"x" * 100, declared=50 * 1024 * 1024)
+    with pytest.raises(AppError, match="图片过大"):
+        await ingest_upload(source)
+    assert source.chunks_read == 0
+
+
+async def test_actual_size_over_limit_aborts_and_cleans_up(temp_dir):
+    data = _photo(1600, 1200, "PNG")
+    source = _FakeUpload(data, declared=10)
+    with pytest.raises(AppError, match="图片过大"):
+        await ingest_upload(source, max_bytes=len(data) // 2, spill_bytes=128 * 1024)
+    assert list(temp_dir.iterdir()) == []
+
+
+async def test_non_image_rejected_from_header_only():
+    source = _FakeUpload(b"%PDF-1.7\n" + b"0" * (4 * 1024 * 1024))
+    with pytest.raises(AppError, match="无法识别"):
+        await ingest_upload(source)
+    # 只读到文件头上限即拒绝，不会读完 4MB
+    assert source.chunks_read <= 4
+
+
+async def test_oversized_resolution_and_unsupported_format_rejected():
+    with pytest.raises(AppError, match="分辨率过大"):
+        await ingest_upload(_FakeUpload(_photo()), max_pixels=100_000)
+
+    buf = io.BytesIO()
+    Image.new("RGB", (16, 16)).save(buf, format="PPM")
+    with pytest.raises(AppError, match="不支持的图片格式"):
+        await ingest_upload(_FakeUpload(buf.getvalue()))
+
+
+async def test_fingerprint_matches_raw_bytes():
+    data = _photo(64, 48)
+    upload = await ingest_upload(_FakeUpload(data), process=False)
+    assert fingerprint("健康", [upload.fingerprint_key]) == fingerprint("健康", [data])
@@ -0,0 +1,118 @@
+"""tests/test_vision_profile.py — 视觉档案：目标尺寸、模型匹配、AI 副本生成与 data-url 缓存。"""
+import base64
+import io
+
+from PIL import Image
+
+from app.core.config import settings
+from app.integration.ai_client.vision_profile import (
+    DEFAULT_PROFILE,
+    VisionProfile,
+    profile_for_model,
+    render_for_vision,
+    vision_cache_stats,
+    vision_image_parts,
+)
+
+
+def _jpeg(width: int = 4032, height: int = 3024) -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", (width, height), (100, 149, 237)).save(buf, format="JPEG", quality=95)
+    return buf.getvalue()
+
+
+def _decode(part: dict) -> bytes:
+    return base64.b64decode(part["image_url"]["url"].split(",", 1)[1])
+
+
+def test_target_size_per_profile():
+    assert profile_for_model("gpt-4o").target_size(4032, 3024) == (1024, 768)
+    assert profile_for_model("claude-sonnet-4").target_size(4032, 3024) == (1238, 928)
+    # 不放大
+    assert profile_for_model("gpt-4o").target_size(400, 300) == (400, 300)
+    # 640 比一块多 128px（恰为 1/4 块）→ 收缩到 512
+    assert profile_for_model("gpt-4o").target_size(640, 480) == (512, 384)
+    assert DEFAULT_PROFILE.target_size(3024, 4032) == (948, 1264)
+
+
+def test_target_size_snaps_to_tile_boundary():
+    profile = VisionProfile("t", tile_size=512)
+    # 1100 比两块多 76px（≤ 1/4 块）→ 收缩到 1024，少算一列块
+    assert profile.target_size(1100, 400) == (1024, 372)
+    # 超出较多时保留原尺寸
+    assert profile.target_size(1300, 400) == (1300, 400)
+
+
+def test_target_size_snaps_both_sides_without_compounding():
+    profile = VisionProfile("t", tile_size=512)
+    # 两边都略超：取两者中更小的对齐比例（宽 1100→1024），高随之缩到 968，不再二次缩小
+    assert profile.target_size(1100, 1040) == (1024, 968)
+
+
+def test_profile_for_model_matching():
+    assert profile_for_model("gpt-4o-mini").name == "openai"
+    assert profile_for_model("o4-mini").name == "openai"
+    assert profile_for_model("qwen-vl-max").name == "qwen-vl"
+    assert profile_for_model("Qwen2.5-VL-72B-Instruct").name == "qwen-vl"
+    assert profile_for_model("glm-4v-plus").name == "glm-4v"
+    assert profile_for_model("gemini-2.5-flash").name == "gemini"
+    assert profile_for_model("deepseek-chat") is DEFAULT_PROFILE
+    assert profile_for_model("") is DEFAULT_PROFILE
+
+
+def test_render_for_vision_downscales_and_keeps_small_jpeg():
+    data = _jpeg()
+    rendition = render_for_vision(data, profile_for_model("gpt-4o"))
+    assert (rendition.width, rendition.height) == (1024, 768)
+    assert Image.open(io.BytesIO(rendition.data)).size == (1024, 768)
+    assert rendition.file_size < len(data)
+
+    small = _jpeg(400, 300)
+    assert render_for_vision(small, profile_for_model("gpt-4o")).data == small
+
+
+async def test_vision_parts_cached_per_image_and_profile():
+    data = _jpeg()
+    parts = await vision_image_parts([data], "gpt-4o")
+    assert parts[0]["image_url"]["detail"] == "high"
+    assert Image.open(io.BytesIO(_decode(parts[0]))).size == (1024, 768)
+    assert vision_cache_stats()["misses"] == 1
+
+    # 重新生成同一领域：命中缓存，不再缩放编码
+    assert await vision_image_parts([data], "gpt-4o") == parts
+    assert vision_cache_stats()["hits"] == 1
+
+    # 不同档案各自缓存；非 OpenAI 档案不发送 detail
+    other = await vision_image_parts([data], "qwen-vl-max")
+    assert "detail" not in other[0]["image_url"]
+    assert vision_cache_stats()["entries"] == 2
+
+
+async def test_undecodable_bytes_sent_as_is():
+    raw = b"\x89PNG\r\n\x1a\n" + b"\x00" * 64
+    parts = await vision_image_parts([raw], "gpt-4o")
+    assert parts[0]["image_url"]["url"].startswith("data:image/png;base64,")
+    assert _decode(parts[0]) == raw
+
+
+async def test_optimize_disabled_sends_original(monkeypatch):
+    monkeypatch.setattr(settings, "AI_VISION_OPTIMIZE", False)
+    data = _jpeg(800, 600)
+    parts = await vision_image_parts([data], "gpt-4o")
+    assert _decode(parts[0]) == data
+    assert "detail" not in parts[0]["image_url"]
+    assert vision_cache_stats()["entries"] == 0
+
+
+async def test_cache_evicts_beyond_limit(monkeypatch):
+    monkeypatch.setattr(settings, "AI_VISION_CACHE_MB", 1)
+    # 每张约 1/3 MB 的 data-url（随机像素不易压缩）
+    images = []
+    for seed in range(5):
+        buf = io.BytesIO()
+        Image.effect_noise((480, 360), 64 + seed).convert("RGB").save(buf, format="JPEG", quality=95)
+        images.append(buf.getvalue())
+    await vision_image_parts(images, "gpt-4o")
+    stats = vision_cache_stats()
+    assert stats["chars"] <= 1024 * 1024
+    assert stats["entries"] < len(images)